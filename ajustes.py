@@ -4,9 +4,57 @@ import tkinter as tk
 from tkinter import filedialog
 from receta import Conexion
 from conexion import resource_path
+from bus_cambios import bus
 import datetime
 import re
 import pygame
+
+PAGINA_AJUSTES = 50  # Registros por página en las tablas de empleados, clientes y proveedores
+
+# Temporizadores propios (custom_type no choca con los eventos de otros módulos)
+EVENTO_OCULTAR_MENSAJE = pygame.event.custom_type()
+EVENTO_EMPLEADO_GUARDADO = pygame.event.custom_type()
+EVENTO_CLIENTE_GUARDADO = pygame.event.custom_type()
+EVENTO_PROVEEDOR_GUARDADO = pygame.event.custom_type()
+
+# Sección -> (consulta de registros activos, llave primaria para paginar)
+CONSULTAS_SECCION = {
+    "empleados": ("""
+        SELECT
+            Id_Empleado AS id,
+            Nombre_emple AS nombre,
+            Ap_Paterno_emple AS ap_paterno,
+            Ap_Materno_emple AS ap_materno,
+            CURP_emple AS curp,
+            Sexo AS sexo,
+            RFC_emple AS rfc,
+            NSS AS nss,
+            Correo_Electronico AS correo,
+            Telefono_emple AS telefono,
+            Padecimientos AS padecimientos,
+            Calle AS calle,
+            Colonia AS colonia,
+            Cod_Postal AS cp,
+            stoPuesto AS puesto,
+            Fecha_Contratacion AS fecha_contratacion,
+            Estado_emple AS estado
+        FROM Empleado
+        WHERE Estado_emple = 'Activo'""", "Id_Empleado"),
+    "clientes": ("""
+        SELECT Id_Cliente AS id, Nombre_Cliente AS nombre, Ap_Paterno_cliente AS ap_paterno,
+            Ap_Materno_cliente AS ap_materno, Telefono_cli AS telefono, Correo AS correo,
+            RFC AS rfc, Calle AS calle, Colonia AS colonia, Cod_Postal AS cod_postal, Estado
+        FROM Cliente
+        WHERE Estado = 'Activo'""", "Id_Cliente"),
+    "proveedores": ("""
+        SELECT Id_Proveedor AS id, Nombre_prov_proveedor AS nombre, Ap_paterno_prov AS ap_paterno,
+            Ap_materno_prov AS ap_materno, Razon_Social AS razon_social, RFC AS rfc,
+            Correo_prov AS correo, Telefono_prov AS telefono, Direccion AS direccion, Estado
+        FROM Proveedor
+        WHERE Estado = 'Activo'""", "Id_Proveedor"),
+}
+
+
 class InputBox:
     """
     Clase para crear campos de entrada de texto personalizados en Pygame
@@ -129,28 +177,11 @@ class ajustes:
         # Configuración visual
         self.FONDO = (241, 236, 227)
 
-        def fuente_relativa(base_size):
-            """Calcula tamaño de fuente relativo a las dimensiones"""
-            scale = min(self.ancho / 1555, self.alto / 710)
-            return int(base_size * scale)
-
-        self.fuente_titulo = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
         self.color_texto = (0, 0, 0)
 
         # Configuración de navegación
         self.botones_opciones = ["GENERAL", "EMPLEADOS", "CLIENTES", "PROVEEDORES"]
         self.opcion_seleccionada = self.botones_opciones[0]
-        self.fuente_boton = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
-
-        # Crear rectángulos para botones de navegación
-        self.boton_rects = [
-            pygame.Rect(
-                self.x + int(0.013 * self.ancho) + i * int(0.11 * self.ancho),
-                self.y + int(0.11 * self.alto),
-                int(0.10 * self.ancho),
-                int(0.06 * self.alto)
-            ) for i in range(len(self.botones_opciones))
-        ]
         self.color_boton = (220, 220, 220)
         self.color_boton_activo = (180, 180, 255)
 
@@ -169,25 +200,22 @@ class ajustes:
             "logo_path": resource_path("imagenes/log.png")
         }
 
-        # Cargar logo
-        self.logo_img = pygame.image.load(self.info_negocio["logo_path"])
-        self.logo_img = pygame.transform.scale(self.logo_img, (int(0.08*self.ancho), int(0.17*self.alto)))
+        # Cargar logo (se conserva el original para reescalarlo al redimensionar)
+        self.logo_original = pygame.image.load(self.info_negocio["logo_path"])
 
-        # Crear campos de entrada para información general
-        font = pygame.font.SysFont("Open Sans", fuente_relativa(24))
-        self.input_nombre = InputBox(self.x + int(0.25*self.ancho), self.y + int(0.10*self.alto), int(0.26*self.ancho), int(0.06*self.alto), self.info_negocio["nombre"], font)
-        self.input_direccion = InputBox(self.x + int(0.25*self.ancho), self.y + int(0.18*self.alto), int(0.26*self.ancho), int(0.06*self.alto), self.info_negocio["direccion"], font)
-        self.input_telefono = InputBox(self.x + int(0.25*self.ancho), self.y + int(0.26*self.alto), int(0.26*self.ancho), int(0.06*self.alto), self.info_negocio["telefono"], font)
-        self.input_email = InputBox(self.x + int(0.25*self.ancho), self.y + int(0.34*self.alto), int(0.26*self.ancho), int(0.06*self.alto), self.info_negocio["email"], font)
+        # Campos de entrada para información general (se crean en configurar_layout)
+        self.input_nombre = None
+        self.input_direccion = None
+        self.input_telefono = None
+        self.input_email = None
+
+        # Fuentes y posiciones escaladas
+        self.configurar_layout()
 
-        # Botones de sección general
-        self.btn_cambiar_logo = pygame.Rect(self.x + int(0.36*self.ancho), self.y + int(0.44*self.alto), int(0.13*self.ancho), int(0.07*self.alto))
-        self.btn_cancelar = pygame.Rect(self.x + int(0.52*self.ancho), self.y + int(0.60*self.alto), int(0.12*self.ancho), int(0.07*self.alto))
         self.cambiar_logo_hover = False
         self.cancelar_hover = False
 
         # --- Configuración de sección EMPLEADOS ---
-        self.btn_nuevo_empleado = pygame.Rect(self.x + int(0.60*self.ancho), self.y + int(0.08*self.alto), int(0.14*self.ancho), int(0.07*self.alto))
         self.nuevo_empleado_hover = False
         self.mostrando_formulario_empleado = False
         self.formulario_empleado_boxes = []
@@ -196,10 +224,12 @@ class ajustes:
         self.formulario_empleado_btn_cancelar = None
         self.formulario_empleado_mensaje = ""
         self.empleados = []
-        self.cargar_empleados()
+
+        # Cada sección se carga la primera vez que se muestra
+        self.secciones_cargadas = set()
+        self.hay_mas = {}  # sección -> True si quedan páginas por leer
 
         # --- Configuración de sección CLIENTES ---
-        self.btn_nuevo_cliente = pygame.Rect(self.x + int(0.60*self.ancho), self.y + int(0.08*self.alto), int(0.14*self.ancho), int(0.07*self.alto))
         self.nuevo_cliente_hover = False
         self.mostrando_formulario_cliente = False
         self.formulario_cliente_boxes = []
@@ -208,10 +238,8 @@ class ajustes:
         self.formulario_cliente_btn_cancelar = None
         self.formulario_cliente_mensaje = ""
         self.clientes = []
-        self.cargar_clientes()
 
         # --- Configuración de sección PROVEEDORES ---
-        self.btn_nuevo_proveedor = pygame.Rect(self.x + int(0.60*self.ancho), self.y + int(0.08*self.alto), int(0.14*self.ancho), int(0.07*self.alto))
         self.nuevo_proveedor_hover = False
         self.mostrando_formulario_proveedor = False
         self.formulario_proveedor_boxes = []
@@ -220,7 +248,6 @@ class ajustes:
         self.formulario_proveedor_btn_cancelar = None
         self.formulario_proveedor_mensaje = ""
         self.proveedores = []
-        self.cargar_proveedores()
 
         # Variables para edición de tablas
         self.celda_editando = None  # (seccion, fila_idx, col_idx, key)
@@ -232,6 +259,69 @@ class ajustes:
         self.ultimo_clic_tiempo = 0
         self.ultima_celda_clic = None
 
+    def configurar_layout(self):
+        """
+        Calcula fuentes, posiciones y el logo escalado a partir de x, y, ancho y alto.
+        Se usa al crear la interfaz y al redimensionar la ventana; el texto
+        capturado en los campos de información general se conserva.
+        """
+        def fuente_relativa(base_size):
+            """Calcula tamaño de fuente relativo a las dimensiones"""
+            scale = min(self.ancho / 1555, self.alto / 710)
+            return int(base_size * scale)
+
+        self.fuente_titulo = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
+        self.fuente_boton = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
+
+        # Crear rectángulos para botones de navegación
+        self.boton_rects = [
+            pygame.Rect(
+                self.x + int(0.013 * self.ancho) + i * int(0.11 * self.ancho),
+                self.y + int(0.11 * self.alto),
+                int(0.10 * self.ancho),
+                int(0.06 * self.alto)
+            ) for i in range(len(self.botones_opciones))
+        ]
+
+        # Logo escalado
+        self.logo_img = pygame.transform.scale(self.logo_original, (int(0.08*self.ancho), int(0.17*self.alto)))
+
+        # Crear campos de entrada para información general
+        font = pygame.font.SysFont("Open Sans", fuente_relativa(24))
+        campos = [
+            ("input_nombre", "nombre", 0.10),
+            ("input_direccion", "direccion", 0.18),
+            ("input_telefono", "telefono", 0.26),
+            ("input_email", "email", 0.34)
+        ]
+        for atributo, clave, pos_y in campos:
+            anterior = getattr(self, atributo)
+            texto = anterior.text if anterior else self.info_negocio[clave]
+            setattr(self, atributo, InputBox(self.x + int(0.25*self.ancho), self.y + int(pos_y*self.alto), int(0.26*self.ancho), int(0.06*self.alto), texto, font))
+
+        # Botones de sección general
+        self.btn_cambiar_logo = pygame.Rect(self.x + int(0.36*self.ancho), self.y + int(0.44*self.alto), int(0.13*self.ancho), int(0.07*self.alto))
+        self.btn_cancelar = pygame.Rect(self.x + int(0.52*self.ancho), self.y + int(0.60*self.alto), int(0.12*self.ancho), int(0.07*self.alto))
+
+        # Botones de alta en empleados, clientes y proveedores
+        self.btn_nuevo_empleado = pygame.Rect(self.x + int(0.60*self.ancho), self.y + int(0.08*self.alto), int(0.14*self.ancho), int(0.07*self.alto))
+        self.btn_nuevo_cliente = pygame.Rect(self.x + int(0.60*self.ancho), self.y + int(0.08*self.alto), int(0.14*self.ancho), int(0.07*self.alto))
+        self.btn_nuevo_proveedor = pygame.Rect(self.x + int(0.60*self.ancho), self.y + int(0.08*self.alto), int(0.14*self.ancho), int(0.07*self.alto))
+
+    def relayout(self, x, y, ancho, alto):
+        """
+        Reubica la interfaz en una nueva área conservando los datos cargados
+
+        Args:
+            x, y (int): Nueva posición
+            ancho, alto (int): Nuevas dimensiones
+        """
+        self.x = x
+        self.y = y
+        self.ancho = ancho
+        self.alto = alto
+        self.configurar_layout()
+
     def calcular_x_centrada(self, col_widths):
         """
         Calcula la posición X para centrar una tabla
@@ -265,7 +355,10 @@ class ajustes:
             text_rect = texto_boton.get_rect(center=rect.center)
             surface.blit(texto_boton, text_rect)
 
-        # Dibujar sección activa
+        # Dibujar sección activa (las tablas se cargan al mostrarse por primera vez)
+        seccion = self.opcion_seleccionada.lower()
+        if seccion in CONSULTAS_SECCION and seccion not in self.secciones_cargadas:
+            self.cargar_seccion(seccion)
         if self.opcion_seleccionada == "GENERAL":
             self.dibujar_formulario_general(surface)
         elif self.opcion_seleccionada == "EMPLEADOS":
@@ -338,32 +431,63 @@ class ajustes:
 
     def cargar_empleados(self):
         """
-        Carga la lista de empleados activos desde la base de datos
-        """
-        conexion = Conexion()
-        query = """
-            SELECT
-                Id_Empleado AS id,
-                Nombre_emple AS nombre,
-                Ap_Paterno_emple AS ap_paterno,
-                Ap_Materno_emple AS ap_materno,
-                CURP_emple AS curp,
-                Sexo AS sexo,
-                RFC_emple AS rfc,
-                NSS AS nss,
-                Correo_Electronico AS correo,
-                Telefono_emple AS telefono,
-                Padecimientos AS padecimientos,
-                Calle AS calle,
-                Colonia AS colonia,
-                Cod_Postal AS cp,
-                stoPuesto AS puesto,
-                Fecha_Contratacion AS fecha_contratacion,
-                Estado_emple AS estado
-            FROM Empleado
-            WHERE Estado_emple = 'Activo'
-        """
-        self.empleados = conexion.consultar(query)
+        Carga la primera página de empleados activos desde la base de datos
+        """
+        self.cargar_seccion("empleados")
+
+    def cargar_seccion(self, seccion, siguiente=False):
+        """
+        Carga una página de la sección (empleados, clientes o proveedores)
+
+        Las páginas se piden por llave primaria (WHERE id > último) en lugar
+        de OFFSET, así cada página cuesta lo mismo y los registros nuevos
+        quedan al final.
+
+        Args:
+            seccion (str): "empleados", "clientes" o "proveedores"
+            siguiente (bool): Agregar la página que sigue a la última cargada
+        """
+        query, clave = CONSULTAS_SECCION[seccion]
+        filas = getattr(self, seccion) if siguiente else []
+        if siguiente and not self.hay_mas.get(seccion):
+            return
+        ultimo = filas[-1]["id"] if filas else 0
+        try:
+            pagina = Conexion().consultar(
+                f"{query} AND {clave} > %s ORDER BY {clave} LIMIT {PAGINA_AJUSTES}", (ultimo,)
+            )
+        except Exception as e:
+            print(f"Error al cargar {seccion}: {e}")
+            return
+        setattr(self, seccion, filas + pagina)
+        self.hay_mas[seccion] = len(pagina) == PAGINA_AJUSTES
+        self.secciones_cargadas.add(seccion)
+
+    def refrescar_fila(self, seccion, id_registro):
+        """
+        Vuelve a leer un solo registro de la sección y lo reemplaza en su lugar
+
+        Si dejó de estar activo sale de la tabla; si es nuevo se agrega al
+        final cuando ya están cargadas todas las páginas (si no, llegará con
+        la página que le toca).
+
+        Args:
+            seccion (str): "empleados", "clientes" o "proveedores"
+            id_registro (int): Llave primaria del registro
+        """
+        query, clave = CONSULTAS_SECCION[seccion]
+        try:
+            nuevas = Conexion().consultar(f"{query} AND {clave} = %s", (id_registro,))
+        except Exception as e:
+            print(f"Error al refrescar {seccion}: {e}")
+            return
+        filas = getattr(self, seccion)
+        for i, fila in enumerate(filas):
+            if fila["id"] == id_registro:
+                filas[i:i + 1] = nuevas
+                return
+        if nuevas and not self.hay_mas.get(seccion):
+            filas.extend(nuevas)
 
     def dibujar_empleados(self, surface):
         """
@@ -524,17 +648,9 @@ class ajustes:
 
     def cargar_clientes(self):
         """
-        Carga la lista de clientes activos desde la base de datos
+        Carga la primera página de clientes activos desde la base de datos
         """
-        conexion = Conexion()
-        query = """
-            SELECT Id_Cliente AS id, Nombre_Cliente AS nombre, Ap_Paterno_cliente AS ap_paterno,
-                Ap_Materno_cliente AS ap_materno, Telefono_cli AS telefono, Correo AS correo,
-                RFC AS rfc, Calle AS calle, Colonia AS colonia, Cod_Postal AS cod_postal, Estado
-            FROM Cliente
-            WHERE Estado = 'Activo'
-        """
-        self.clientes = conexion.consultar(query)
+        self.cargar_seccion("clientes")
 
     def dibujar_clientes(self, surface):
         """
@@ -837,10 +953,11 @@ class ajustes:
             conexion.cursor.execute(insert, (nombre, ap_paterno, ap_materno, telefono_num, correo, 
                                             rfc.upper(), calle, colonia, cp_num))
             conexion.conn.commit()
+            bus.publicar("cliente", [conexion.cursor.lastrowid])
             self.formulario_cliente_mensaje = f"Cliente '{nombre}' agregado correctamente."
-            self.cargar_clientes()
+            self.refrescar_fila("clientes", conexion.cursor.lastrowid)
             # Cerrar formulario después de 2 segundos
-            pygame.time.set_timer(pygame.USEREVENT + 3, 2000)
+            pygame.time.set_timer(EVENTO_CLIENTE_GUARDADO, 2000)
             
         except Exception as e:
             error_msg = str(e)
@@ -910,17 +1027,9 @@ class ajustes:
 
     def cargar_proveedores(self):
         """
-        Carga la lista de proveedores activos desde la base de datos
-        """
-        conexion = Conexion()
-        query = """
-            SELECT Id_Proveedor AS id, Nombre_prov_proveedor AS nombre, Ap_paterno_prov AS ap_paterno,
-                Ap_materno_prov AS ap_materno, Razon_Social AS razon_social, RFC AS rfc,
-                Correo_prov AS correo, Telefono_prov AS telefono, Direccion AS direccion, Estado
-            FROM Proveedor
-            WHERE Estado = 'Activo'
+        Carga la primera página de proveedores activos desde la base de datos
         """
-        self.proveedores = conexion.consultar(query)
+        self.cargar_seccion("proveedores")
 
     def dibujar_proveedores(self, surface):
         """
@@ -1128,15 +1237,12 @@ class ajustes:
             if seccion == "empleados" and fila_idx < len(self.empleados):
                 id_registro = self.empleados[fila_idx]["id"]
                 self.actualizar_empleado(id_registro, key, nuevo_valor)
-                self.cargar_empleados
             elif seccion == "clientes" and fila_idx < len(self.clientes):
                 id_registro = self.clientes[fila_idx]["id"]
                 self.actualizar_cliente(id_registro, key, nuevo_valor)
-                self.cargar_clientes
             elif seccion == "proveedores" and fila_idx < len(self.proveedores):
                 id_registro = self.proveedores[fila_idx]["id"]
                 self.actualizar_proveedor(id_registro, key, nuevo_valor)
-                self.cargar_proveedores
         else:
             self.mensaje_edicion = "Edición cancelada"
         
@@ -1203,8 +1309,8 @@ class ajustes:
             conexion.conn.commit()
             conexion.cerrar()
             
-            # Recargar datos
-            self.cargar_empleados()
+            # Volver a leer solo la fila editada
+            self.refrescar_fila("empleados", id_empleado)
             self.mensaje_edicion = "Empleado actualizado exitosamente"
         except Exception as e:
             self.mensaje_edicion = f"Error al actualizar: {str(e)}"
@@ -1250,9 +1356,10 @@ class ajustes:
             conexion.cursor.execute(query, (nuevo_valor, id_cliente))
             conexion.conn.commit()
             conexion.cerrar()
+            bus.publicar("cliente", [id_cliente])
             
-            # Recargar datos
-            self.cargar_clientes()
+            # Volver a leer solo la fila editada
+            self.refrescar_fila("clientes", id_cliente)
             self.mensaje_edicion = "Cliente actualizado exitosamente"
         except Exception as e:
             self.mensaje_edicion = f"Error al actualizar: {str(e)}"
@@ -1297,8 +1404,8 @@ class ajustes:
             conexion.conn.commit()
             conexion.cerrar()
             
-            # Recargar datos
-            self.cargar_proveedores()
+            # Volver a leer solo la fila editada
+            self.refrescar_fila("proveedores", id_proveedor)
             self.mensaje_edicion = "Proveedor actualizado exitosamente"
         except Exception as e:
             self.mensaje_edicion = f"Error al actualizar: {str(e)}"
@@ -1319,8 +1426,8 @@ class ajustes:
 
         if file_path and os.path.exists(file_path):
             self.info_negocio["logo_path"] = file_path
-            self.logo_img = pygame.image.load(file_path)
-            self.logo_img = pygame.transform.scale(self.logo_img, (120, 120))
+            self.logo_original = pygame.image.load(file_path)
+            self.logo_img = pygame.transform.scale(self.logo_original, (120, 120))
 
     def cancelar_cambios(self):
         """
@@ -1330,8 +1437,8 @@ class ajustes:
         self.input_direccion.set_value(self.info_negocio["direccion"])
         self.input_telefono.set_value(self.info_negocio["telefono"])
         self.input_email.set_value(self.info_negocio["email"])
-        self.logo_img = pygame.image.load(self.info_negocio["logo_path"])
-        self.logo_img = pygame.transform.scale(self.logo_img, (120, 120))
+        self.logo_original = pygame.image.load(self.info_negocio["logo_path"])
+        self.logo_img = pygame.transform.scale(self.logo_original, (120, 120))
 
     def manejar_clic_tabla_empleados(self, mouse_pos):
         """
@@ -1405,15 +1512,15 @@ class ajustes:
         """
         try:
             # Eventos para cerrar formularios automáticamente
-            if event.type == pygame.USEREVENT + 2:  # Empleado guardado
+            if event.type == EVENTO_EMPLEADO_GUARDADO:
                 self.mostrando_formulario_empleado = False
-                pygame.time.set_timer(pygame.USEREVENT + 2, 0)
-            elif event.type == pygame.USEREVENT + 3:  # Cliente guardado
+                pygame.time.set_timer(EVENTO_EMPLEADO_GUARDADO, 0)
+            elif event.type == EVENTO_CLIENTE_GUARDADO:
                 self.mostrando_formulario_cliente = False
-                pygame.time.set_timer(pygame.USEREVENT + 3, 0)
-            elif event.type == pygame.USEREVENT + 4:  # Proveedor guardado
+                pygame.time.set_timer(EVENTO_CLIENTE_GUARDADO, 0)
+            elif event.type == EVENTO_PROVEEDOR_GUARDADO:
                 self.mostrando_formulario_proveedor = False
-                pygame.time.set_timer(pygame.USEREVENT + 4, 0)
+                pygame.time.set_timer(EVENTO_PROVEEDOR_GUARDADO, 0)
             
             # Manejo de scroll con rueda del mouse
             if event.type == pygame.MOUSEWHEEL:
@@ -1421,14 +1528,20 @@ class ajustes:
                     self.scroll_empleados -= event.y * 2
                     max_scroll = max(0, len(self.empleados) - 10)  # Ajustar según filas visibles
                     self.scroll_empleados = max(0, min(self.scroll_empleados, max_scroll))
+                    if event.y < 0 and self.scroll_empleados >= max_scroll:
+                        self.cargar_seccion("empleados", siguiente=True)
                 elif self.opcion_seleccionada == "CLIENTES":
                     self.scroll_clientes -= event.y * 2
                     max_scroll = max(0, len(self.clientes) - 8)  # Ajustar según filas visibles
                     self.scroll_clientes = max(0, min(self.scroll_clientes, max_scroll))
+                    if event.y < 0 and self.scroll_clientes >= max_scroll:
+                        self.cargar_seccion("clientes", siguiente=True)
                 elif self.opcion_seleccionada == "PROVEEDORES":
                     self.scroll_proveedores -= event.y * 2
                     max_scroll = max(0, len(self.proveedores) - 8)  # Ajustar según filas visibles
                     self.scroll_proveedores = max(0, min(self.scroll_proveedores, max_scroll))
+                    if event.y < 0 and self.scroll_proveedores >= max_scroll:
+                        self.cargar_seccion("proveedores", siguiente=True)
             
             # Eventos de edición de tabla
             if self.celda_editando and self.input_edicion:
@@ -1444,9 +1557,9 @@ class ajustes:
                 return
 
             # Temporizador para ocultar mensajes
-            if event.type == pygame.USEREVENT + 1:
+            if event.type == EVENTO_OCULTAR_MENSAJE:
                 self.mensaje_edicion = ""
-                pygame.time.set_timer(pygame.USEREVENT + 1, 0)
+                pygame.time.set_timer(EVENTO_OCULTAR_MENSAJE, 0)
                 
             # --- Formulario de empleados ---
             if self.mostrando_formulario_empleado:
@@ -1705,9 +1818,9 @@ class ajustes:
                                             rfc.upper(), correo, telefono_num, direccion))
             conexion.conn.commit()
             self.formulario_proveedor_mensaje = f"Proveedor '{nombre}' agregado correctamente."
-            self.cargar_proveedores()
+            self.refrescar_fila("proveedores", conexion.cursor.lastrowid)
             # Cerrar formulario después de 2 segundos
-            pygame.time.set_timer(pygame.USEREVENT + 4, 2000)
+            pygame.time.set_timer(EVENTO_PROVEEDOR_GUARDADO, 2000)
             
         except Exception as e:
             error_msg = str(e)
@@ -1950,10 +2063,10 @@ class ajustes:
             conexion.conn.commit()
             self.formulario_empleado_mensaje = f"Empleado '{nombre} {ap_paterno}' agregado correctamente."
             
-            # Actualizar lista de empleados
-            self.cargar_empleados()
+            # Agregar solo el empleado nuevo a la lista
+            self.refrescar_fila("empleados", conexion.cursor.lastrowid)
             # Cerrar formulario después de 2 segundos
-            pygame.time.set_timer(pygame.USEREVENT + 2, 2000)
+            pygame.time.set_timer(EVENTO_EMPLEADO_GUARDADO, 2000)
             
         except Exception as e:
             # Manejo seguro de errores
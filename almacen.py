@@ -10,6 +10,9 @@ Características principales:
 - Visualización tabular de inventario
 - Búsqueda instantánea
 - Agregar nuevos elementos al inventario
+- Edición de celdas por llave primaria, guardadas en lote con un solo UPDATE
+- Importación masiva de entregas desde CSV/XLSX (importar_inventario.py)
+- Pedidos a proveedor de todo lo que está en punto de reorden (compras.py)
 - Control de stock mínimo
 - Administración de fechas de entrada y caducidad
 - Precios y cálculo de IVA
@@ -17,8 +20,14 @@ Características principales:
 Versión: 1.0
 """
 
+import os
 import pygame
 from receta import Conexion
+from bus_cambios import bus, fusionar_filas, marcadores
+from lotes import registrar_lote, conciliar
+
+# Temporizador que oculta el mensaje de cambios guardados
+EVENTO_OCULTAR_MENSAJE = pygame.event.custom_type()
 
 class InputBox:
     """
@@ -106,6 +115,21 @@ class InputBox:
         """
         return self.text
 
+# Tabla y llave primaria de cada entidad editable
+TABLAS = {
+    "insumo": ("Insumo", "ID_Insumo"),
+    "materiaprima": ("MateriaPrima", "ID_MateriaPrima"),
+}
+
+# Clave de la celda -> columna en la base de datos
+COLUMNAS = {
+    "nombre": "Nombre",
+    "precio": "Precio",
+    "cantidad": "Cantidad",
+    "estado": "Estado"
+}
+
+
 class almacen:
     """
     Clase principal del sistema de gestión de almacén
@@ -123,6 +147,7 @@ class almacen:
         datos_tabla (list): Datos actuales mostrados en la tabla
         busqueda_texto (str): Texto de búsqueda actual
         mostrando_formulario (bool): Estado del formulario de agregar
+        ediciones (dict): Celdas editadas sin guardar, entidad -> {id: {clave: valor}}
     """
     
     def __init__(self, x, y, ancho, alto):
@@ -140,57 +165,44 @@ class almacen:
         self.ancho = ancho
         self.alto = alto
 
-        # Configuración de fuentes escaladas
-        self.fuente_titulo = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
         self.color_texto = (0, 0, 0)
 
         # Configuración de navegación
         self.botones_opciones = ["INSUMOS", "MATERIA PRIMA"]
         self.opcion_seleccionada = self.botones_opciones[0]
-        self.fuente_boton = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
-
-        # Configuración de botones
-        self.boton_width = int(self.ancho * 0.13)
-        self.boton_height = int(self.alto * 0.07)
-        self.boton_margin = int(self.ancho * 0.015)
-        self.boton_rects = [
-            pygame.Rect(
-                self.x + self.ancho - (len(self.botones_opciones)+2-i) * (self.boton_width + self.boton_margin),
-                self.y + int(self.alto * 0.11),
-                self.boton_width, self.boton_height
-            )
-            for i in range(len(self.botones_opciones))
-        ]
         self.color_boton = (220, 220, 220)
         self.color_boton_activo = (180, 180, 255)
-
-        # Botón agregar
-        self.boton_agregar_rect = pygame.Rect(
-            self.x + self.ancho - self.boton_width - self.boton_margin,
-            self.y + int(self.alto * 0.11),
-            self.boton_width, self.boton_height
-        )
         self.color_boton_agregar = (100, 200, 100)
         self.color_boton_agregar_hover = (80, 180, 80)
-        self.fuente_boton_agregar = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
         self.agregar_hover = False
 
         # Configuración de búsqueda
         self.busqueda_activa = False
         self.busqueda_texto = ""
         self.NEGRO = (0, 0, 0)
-        self.fuente_busqueda = pygame.font.SysFont("Open Sans", int(self.alto * 0.045))
 
         # Configuración de tabla
-        self.fuente_tabla = pygame.font.SysFont("Open Sans", int(self.alto * 0.04))
         self.color_tabla_header = (200, 200, 255)
         self.color_tabla_row = (255, 255, 255)
         self.color_tabla_border = (180, 180, 180)
 
+        # Fuentes y posiciones escaladas
+        self.configurar_layout()
+
+        # Ediciones pendientes de guardar (se envían juntas con el botón Guardar)
+        self.ediciones = {"insumo": {}, "materiaprima": {}}
+        self.color_celda_pendiente = (255, 245, 200)
+        self.color_boton_guardar = (0, 120, 220)
+        self.color_boton_guardar_inactivo = (170, 170, 170)
+
         # Carga inicial de datos
         self.datos_tabla = []
         self.cargar_datos_tabla()
 
+        # Refrescar filas editadas desde este u otros módulos
+        bus.suscribir("insumo", self.refrescar_filas)
+        bus.suscribir("materiaprima", self.refrescar_filas)
+
         # Configuración del formulario
         self.mostrando_formulario = False
         self.formulario_boxes = []
@@ -199,21 +211,98 @@ class almacen:
         self.formulario_btn_cancelar = None
         self.formulario_mensaje = ""
 
-    def cargar_datos_tabla(self):
+    def configurar_layout(self):
         """
-        Carga los datos de la tabla según la categoría seleccionada y búsqueda
-        
-        Consulta la base de datos filtrando por:
+        Calcula fuentes y posiciones a partir de x, y, ancho y alto.
+        Se usa al crear la interfaz y al redimensionar la ventana.
+        """
+        # Configuración de fuentes escaladas
+        self.fuente_titulo = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
+        self.fuente_boton = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
+        self.fuente_boton_agregar = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
+        self.fuente_busqueda = pygame.font.SysFont("Open Sans", int(self.alto * 0.045))
+        self.fuente_tabla = pygame.font.SysFont("Open Sans", int(self.alto * 0.04))
+
+        # Configuración de botones
+        self.boton_width = int(self.ancho * 0.13)
+        self.boton_height = int(self.alto * 0.07)
+        self.boton_margin = int(self.ancho * 0.015)
+        self.boton_rects = [
+            pygame.Rect(
+                self.x + self.ancho - (len(self.botones_opciones)+2-i) * (self.boton_width + self.boton_margin),
+                self.y + int(self.alto * 0.11),
+                self.boton_width, self.boton_height
+            )
+            for i in range(len(self.botones_opciones))
+        ]
+
+        # Botón agregar
+        self.boton_agregar_rect = pygame.Rect(
+            self.x + self.ancho - self.boton_width - self.boton_margin,
+            self.y + int(self.alto * 0.11),
+            self.boton_width, self.boton_height
+        )
+
+        # Botón importar archivo (a la altura del título)
+        self.boton_importar_rect = pygame.Rect(
+            self.x + self.ancho - self.boton_width - self.boton_margin,
+            self.y + int(self.alto * 0.03),
+            self.boton_width, self.boton_height
+        )
+
+        # Botón generar pedidos a proveedor (junto a Importar)
+        self.boton_pedidos_rect = pygame.Rect(
+            self.x + self.ancho - 2 * (self.boton_width + self.boton_margin),
+            self.y + int(self.alto * 0.03),
+            self.boton_width, self.boton_height
+        )
+
+        # Botón guardar ediciones (entre las categorías y Agregar)
+        self.boton_guardar_rect = pygame.Rect(
+            self.x + self.ancho - 2 * (self.boton_width + self.boton_margin),
+            self.y + int(self.alto * 0.11),
+            self.boton_width, self.boton_height
+        )
+
+    def relayout(self, x, y, ancho, alto):
+        """
+        Reubica la interfaz en una nueva área conservando los datos cargados
+
+        Args:
+            x, y (int): Nueva posición
+            ancho, alto (int): Nuevas dimensiones
+        """
+        self.x = x
+        self.y = y
+        self.ancho = ancho
+        self.alto = alto
+        self.configurar_layout()
+
+    def entidad_actual(self):
+        """Tabla (en minúsculas) que muestra la categoría seleccionada"""
+        return "insumo" if self.opcion_seleccionada == "INSUMOS" else "materiaprima"
+
+    def consulta_tabla(self, ids=None):
+        """
+        Arma la consulta de la tabla según la categoría seleccionada y búsqueda
+
+        Filtra por:
         - Categoría (INSUMOS o MATERIA PRIMA)
         - Texto de búsqueda
         - Estados válidos (Disponible, Agotado, Descontinuado)
+
+        Args:
+            ids (list, optional): Limitar a estos registros
+
+        Returns:
+            tuple: (query, params)
         """
-        conexion = Conexion()
         texto = self.busqueda_texto.strip().lower()
         
         if self.opcion_seleccionada == "INSUMOS":
             query = """
-                SELECT Nombre AS nombre, 
+                SELECT ID_Insumo AS id,
+                       Nombre AS nombre, 
                        'Insumo' AS categoria, 
                        Precio AS precio, 
                        Cantidad AS cantidad, 
@@ -227,7 +316,8 @@ class almacen:
                 params = (f"%{texto}%",)
         else:  # MATERIA PRIMA
             query = """
-                SELECT Nombre AS nombre, 
+                SELECT ID_MateriaPrima AS id,
+                       Nombre AS nombre, 
                        'Materia Prima' AS categoria, 
                        Precio AS precio, 
                        Cantidad AS cantidad, 
@@ -239,7 +329,53 @@ class almacen:
             if texto:
                 query += " AND LOWER(Nombre) LIKE %s"
                 params = (f"%{texto}%",)
+        if ids is not None:
+            columna_id = "ID_Insumo" if self.opcion_seleccionada == "INSUMOS" else "ID_MateriaPrima"
+            query += f" AND {columna_id} IN ({marcadores(ids)})"
+            params += tuple(ids)
+        return query, params
+
+    def cargar_datos_tabla(self):
+        """Carga la tabla completa de la categoría seleccionada"""
+        conexion = Conexion()
+        query, params = self.consulta_tabla()
         self.datos_tabla = conexion.consultar(query, params)
+        self.aplicar_ediciones(self.datos_tabla)
+
+    def aplicar_ediciones(self, filas):
+        """Muestra sobre las filas leídas los valores editados aún sin guardar"""
+        pendientes = self.ediciones[self.entidad_actual()]
+        if not pendientes:
+            return
+        for fila in filas:
+            cambios = pendientes.get(fila["id"])
+            if cambios:
+                fila.update(cambios)
+
+    def total_ediciones(self):
+        """Número de celdas editadas sin guardar en ambas categorías"""
+        return sum(len(cambios) for pendientes in self.ediciones.values() for cambios in pendientes.values())
+
+    def refrescar_filas(self, cambio):
+        """
+        Vuelve a leer solo las filas modificadas (suscriptor del bus)
+
+        Los avisos de la categoría que no está en pantalla se ignoran: esa
+        tabla se carga completa al cambiar de categoría.
+
+        Args:
+            cambio (Cambio): Aviso del bus con los IDs modificados
+        """
+        if cambio.entidad != self.entidad_actual():
+            return
+        if cambio.ids is None:
+            self.cargar_datos_tabla()
+            return
+        query, params = self.consulta_tabla(sorted(cambio.ids))
+        nuevas = Conexion().consultar(query, params)
+        self.aplicar_ediciones(nuevas)
+        self.datos_tabla = fusionar_filas(self.datos_tabla, nuevas, cambio.ids,
+                                          orden=lambda fila: fila["id"])
 
     def dibujar_punto_venta(self, surface):
         """
@@ -277,6 +413,23 @@ class almacen:
         text_rect_agregar = texto_agregar.get_rect(center=self.boton_agregar_rect.center)
         surface.blit(texto_agregar, text_rect_agregar)
 
+        # Botón importar
+        pygame.draw.rect(surface, self.color_boton_guardar, self.boton_importar_rect, border_radius=8)
+        texto_importar = self.fuente_boton.render("Importar", True, (255, 255, 255))
+        surface.blit(texto_importar, texto_importar.get_rect(center=self.boton_importar_rect.center))
+
+        # Botón pedidos a proveedor
+        pygame.draw.rect(surface, self.color_boton_guardar, self.boton_pedidos_rect, border_radius=8)
+        texto_pedidos = self.fuente_boton.render("Pedidos", True, (255, 255, 255))
+        surface.blit(texto_pedidos, texto_pedidos.get_rect(center=self.boton_pedidos_rect.center))
+
+        # Botón guardar con el número de celdas pendientes
+        pendientes = self.total_ediciones()
+        color_guardar = self.color_boton_guardar if pendientes else self.color_boton_guardar_inactivo
+        pygame.draw.rect(surface, color_guardar, self.boton_guardar_rect, border_radius=8)
+        texto_guardar = self.fuente_boton.render(f"Guardar ({pendientes})" if pendientes else "Guardar", True, (255, 255, 255))
+        surface.blit(texto_guardar, texto_guardar.get_rect(center=self.boton_guardar_rect.center))
+
         # Tabla de inventario
         tabla_x = self.x + int(self.ancho * 0.03)
         tabla_y = self.y + int(self.alto * 0.23)
@@ -319,15 +472,17 @@ class almacen:
             col_x += col_widths[i]
 
         # Dibujar filas de datos
+        pendientes = self.ediciones[self.entidad_actual()]
         fila_y = y + row_height
         for fila_idx, fila in enumerate(datos):
             col_x = x
+            cambios_fila = pendientes.get(fila["id"], {})
             for i, key in enumerate(["nombre", "categoria", "precio", "cantidad", "estado"]):
                 # Crear rectángulo para la celda
                 celda_rect = pygame.Rect(col_x, fila_y, col_widths[i], row_height)
                 
-                # Dibujar celda
-                color_celda = self.color_tabla_row
+                # Dibujar celda (resaltada si tiene un cambio sin guardar)
+                color_celda = self.color_celda_pendiente if key in cambios_fila else self.color_tabla_row
                 
                 # Si esta celda está siendo editada, usar un color diferente
                 if hasattr(self, 'celda_editando') and self.celda_editando == (fila_idx, i):
@@ -363,7 +518,7 @@ class almacen:
         if hasattr(self, 'mensaje_edicion') and self.mensaje_edicion:
             mensaje_y = y + row_height * (len(datos) + 1) + 10
             font_msg = pygame.font.SysFont("Open Sans", int(self.alto * 0.035))
-            color = (0, 120, 0) if "exitosamente" in self.mensaje_edicion else (200, 0, 0)
+            color = (0, 120, 0) if ("exitosamente" in self.mensaje_edicion or "pendiente" in self.mensaje_edicion) else (200, 0, 0)
             msg = font_msg.render(self.mensaje_edicion, True, color)
             surface.blit(msg, (x + (width - msg.get_width()) // 2, mensaje_y))
 
@@ -431,13 +586,13 @@ class almacen:
                             self.mensaje_edicion = "Estado inválido. Use: Disponible, Agotado, Descontinuado"
                             return
                         
-                        # Guardar el cambio en la base de datos
+                        # Registrar el cambio; se envía a la base al presionar Guardar
                         self.actualizar_dato(fila_idx, key, nuevo_valor)
                         
                         # Actualizar el valor en la vista
                         self.datos_tabla[fila_idx][key] = nuevo_valor
                         
-                        self.mensaje_edicion = "Dato actualizado exitosamente"
+                        self.mensaje_edicion = f"Cambio pendiente. Presiona Guardar ({self.total_ediciones()})"
                     except ValueError:
                         self.mensaje_edicion = "Valor inválido para este campo"
                         return
@@ -449,62 +604,173 @@ class almacen:
         
         # Programar que el mensaje desaparezca después de 3 segundos
         if hasattr(self, 'mensaje_edicion') and self.mensaje_edicion:
-            pygame.time.set_timer(pygame.USEREVENT + 1, 3000)  # 3 segundos
+            pygame.time.set_timer(EVENTO_OCULTAR_MENSAJE, 3000)  # 3 segundos
 
     def actualizar_dato(self, fila_idx, key, nuevo_valor):
         """
-        Actualiza un dato en la base de datos
+        Registra el cambio de una celda en el búfer de ediciones
+
+        El cambio se identifica por la llave primaria de la fila y se envía a
+        la base junto con los demás al llamar guardar_ediciones().
         
         Args:
             fila_idx (int): Índice de la fila
             key (str): Clave del dato (nombre, precio, cantidad, estado)
             nuevo_valor: Nuevo valor a guardar
+
+        Returns:
+            bool: True si el cambio quedó registrado
         """
-        # Obtener el elemento que se está modificando
-        if fila_idx >= len(self.datos_tabla):
+        if fila_idx >= len(self.datos_tabla) or key not in COLUMNAS:
             return False
         
-        elemento = self.datos_tabla[fila_idx]
-        nombre = elemento["nombre"]  # Usaremos el nombre para identificar el registro
-        
-        # Conectar a la base de datos
+        id_registro = self.datos_tabla[fila_idx]["id"]
+        pendientes = self.ediciones[self.entidad_actual()]
+        pendientes.setdefault(id_registro, {})[key] = nuevo_valor
+        return True
+
+    def consulta_ediciones(self, entidad, pendientes):
+        """
+        Arma un solo UPDATE para todas las ediciones de una tabla
+
+        Cada columna se asigna con un CASE sobre la llave primaria, así varias
+        filas y columnas se actualizan en una sola sentencia:
+            UPDATE t SET Cantidad = CASE ID WHEN %s THEN %s ... ELSE Cantidad END
+            WHERE ID IN (...)
+
+        Args:
+            entidad (str): insumo o materiaprima
+            pendientes (dict): {id: {clave: valor}}
+
+        Returns:
+            tuple: (query, params)
+        """
+        tabla, columna_id = TABLAS[entidad]
+        asignaciones = []
+        params = []
+        for key, columna in COLUMNAS.items():
+            casos = [(id_registro, cambios[key]) for id_registro, cambios in pendientes.items() if key in cambios]
+            if not casos:
+                continue
+            asignaciones.append(
+                f"{columna} = CASE {columna_id} " + " ".join(["WHEN %s THEN %s"] * len(casos)) + f" ELSE {columna} END"
+            )
+            for id_registro, valor in casos:
+                params.extend((id_registro, valor))
+        ids = sorted(pendientes)
+        query = f"UPDATE {tabla} SET {', '.join(asignaciones)} WHERE {columna_id} IN ({marcadores(ids)})"
+        params.extend(ids)
+        return query, tuple(params)
+
+    def guardar_ediciones(self):
+        """
+        Envía todas las ediciones pendientes en una sola transacción
+
+        Si algo falla (por ejemplo un nombre repetido) no se guarda nada y las
+        ediciones se conservan para corregirlas.
+
+        Returns:
+            bool: True si se guardaron los cambios
+        """
+        por_guardar = {entidad: pendientes for entidad, pendientes in self.ediciones.items() if pendientes}
+        if not por_guardar:
+            self.mensaje_edicion = "No hay cambios por guardar"
+            return False
+
         conexion = Conexion()
         conexion.conectar()
-        
-        # La tabla depende de la categoría seleccionada
-        tabla = "Insumo" if self.opcion_seleccionada == "INSUMOS" else "MateriaPrima"
-        
-        # Mapear key a nombre de columna en la base de datos
-        # El mapeo puede variar según tu esquema de base de datos
-        columnas = {
-            "nombre": "Nombre",
-            "precio": "Precio",
-            "cantidad": "Cantidad",
-            "estado": "Estado"
-        }
-        
-        # Columna a actualizar
-        columna = columnas.get(key, key)
-        
-        # Query de actualización
-        query = f"""
-            UPDATE {tabla}
-            SET {columna} = %s
-            WHERE Nombre = %s
-        """
-        
+        if not conexion.conn:
+            self.mensaje_edicion = "Error: no se pudo conectar a la base de datos"
+            return False
         try:
-            # Ejecutar la actualización
-            conexion.cursor.execute(query, (nuevo_valor, nombre))
+            for entidad, pendientes in por_guardar.items():
+                query, params = self.consulta_ediciones(entidad, pendientes)
+                conexion.cursor.execute(query, params)
+            if "materiaprima" in por_guardar:
+                # Las correcciones de cantidad se reflejan en los lotes (FEFO)
+                conciliar(conexion.cursor, list(por_guardar["materiaprima"]))
             conexion.conn.commit()
-            return True
         except Exception as e:
-            print(f"Error al actualizar dato: {e}")
+            print(f"Error al guardar ediciones: {e}")
+            conexion.conn.rollback()
             self.mensaje_edicion = f"Error: {str(e)}"
             return False
         finally:
             conexion.cerrar()
 
+        total = self.total_ediciones()
+        for entidad, pendientes in por_guardar.items():
+            bus.publicar(entidad, list(pendientes))
+            self.ediciones[entidad] = {}
+        self.mensaje_edicion = f"{total} cambios guardados exitosamente"
+        pygame.time.set_timer(EVENTO_OCULTAR_MENSAJE, 3000)
+        return True
+
+    def importar_archivo(self, ruta=None):
+        """
+        Importa una entrega de proveedor desde CSV o XLSX
+
+        Las filas sin columna tipo se cargan en la categoría seleccionada.
+        Si hay filas rechazadas se guarda junto al archivo un reporte
+        <archivo>_errores.csv.
+
+        Args:
+            ruta (str, optional): Archivo a importar; si falta se abre un diálogo
+        """
+        import importar_inventario
+
+        if ruta is None:
+            import tkinter as tk
+            from tkinter import filedialog
+            root = tk.Tk()
+            root.withdraw()
+            ruta = filedialog.askopenfilename(
+                title="Selecciona la entrega a importar",
+                filetypes=[("CSV", "*.csv"), ("Excel", "*.xlsx"), ("Todos los archivos", "*.*")]
+            )
+            root.destroy()
+        if not ruta:
+            return
+
+        tipo = self.entidad_actual()
+        try:
+            resultado = importar_inventario.importar(ruta, tipo)
+        except Exception as e:
+            print(f"Error al importar {ruta}: {e}")
+            self.mensaje_edicion = f"Error al importar: {str(e)}"
+            return
+
+        errores = resultado["errores"]
+        self.mensaje_edicion = (f"Importación exitosamente terminada: {resultado['insertadas']} nuevos, "
+                                f"{resultado['actualizadas']} actualizados")
+        if errores:
+            ruta_errores = os.path.splitext(ruta)[0] + "_errores.csv"
+            importar_inventario.escribir_errores(errores, ruta_errores)
+            self.mensaje_edicion += f", {len(errores)} filas rechazadas (ver {os.path.basename(ruta_errores)})"
+
+    def generar_pedidos_compra(self):
+        """
+        Genera los pedidos a proveedor de lo que está en punto de reorden
+
+        Los PDF se escriben en segundo plano en la carpeta ordenes_compra.
+        """
+        import compras
+
+        try:
+            resultado = compras.generar_pedidos()
+        except Exception as e:
+            print(f"Error al generar pedidos a proveedor: {e}")
+            self.mensaje_edicion = f"Error al generar pedidos: {str(e)}"
+            return
+
+        if not resultado["pedidos"]:
+            self.mensaje_edicion = "No hay artículos en punto de reorden con proveedor activo"
+        else:
+            self.mensaje_edicion = (f"{len(resultado['pedidos'])} pedidos generados exitosamente ({resultado['renglones']} artículos, "
+                                    f"${resultado['total']:,.2f}); PDF en {compras.CARPETA_PDF}")
+        if resultado["sin_proveedor"]:
+            self.mensaje_edicion += f", {len(resultado['sin_proveedor'])} sin proveedor activo"
+
     def dibujar_campo_busqueda(self, surface, x, y, w, h):
         """
         Dibuja el campo de búsqueda de productos
@@ -556,10 +822,10 @@ class almacen:
                     self.formulario_mensaje = ""
                 return
          # Temporizador para ocultar mensajes
-        if event.type == pygame.USEREVENT + 1:
+        if event.type == EVENTO_OCULTAR_MENSAJE:
             if hasattr(self, 'mensaje_edicion'):
                 self.mensaje_edicion = ""
-            pygame.time.set_timer(pygame.USEREVENT + 1, 0)  # Detener el temporizador
+            pygame.time.set_timer(EVENTO_OCULTAR_MENSAJE, 0)  # Detener el temporizador
 
 
         # Eventos de navegación y búsqueda
@@ -595,6 +861,21 @@ class almacen:
             if self.boton_agregar_rect.collidepoint(mouse_pos):
                 self.mostrar_formulario_agregar()
                 return
+
+            # Botón guardar ediciones
+            if self.boton_guardar_rect.collidepoint(mouse_pos):
+                self.guardar_ediciones()
+                return
+
+            # Botón importar entrega
+            if self.boton_importar_rect.collidepoint(mouse_pos):
+                self.importar_archivo()
+                return
+
+            # Botón pedidos a proveedor
+            if self.boton_pedidos_rect.collidepoint(mouse_pos):
+                self.generar_pedidos_compra()
+                return
             
             # Campo de búsqueda
             busq_x = self.x + int(self.ancho * 0.02)
@@ -611,6 +892,10 @@ class almacen:
             mouse_pos = pygame.mouse.get_pos()
             self.agregar_hover = self.boton_agregar_rect.collidepoint(mouse_pos)
             
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_s and event.mod & pygame.KMOD_CTRL:
+            # Ctrl+S guarda las ediciones pendientes
+            self.guardar_ediciones()
+
         elif event.type == pygame.KEYDOWN and self.busqueda_activa:
             # Manejo de teclas en búsqueda
             if event.key == pygame.K_BACKSPACE:
@@ -817,11 +1102,13 @@ class almacen:
             conexion.cursor.execute(insert, (
                 nombre, precio, stock_minimo, descripcion, cantidad, iva, estado, fecha_entrada, fecha_caducidad
             ))
+            id_nuevo = conexion.cursor.lastrowid
+            registrar_lote(conexion.cursor, id_nuevo, cantidad, fecha_entrada, fecha_caducidad)
 
             conexion.conn.commit()
             conexion.cerrar()
             self.formulario_mensaje = f"Materia Prima '{nombre}' agregado."
-            self.cargar_datos_tabla()
+            bus.publicar("materiaprima", [id_nuevo])
             self.mostrando_formulario = False
             self.formulario_mensaje = ""
 
@@ -853,9 +1140,10 @@ class almacen:
 
             conexion.conectar()
             conexion.cursor.execute(insert, (nombre, precio, stock_minimo, descripcion, cantidad, estado))
+            id_nuevo = conexion.cursor.lastrowid
             conexion.conn.commit()
             conexion.cerrar()
             self.formulario_mensaje = f"Insumo '{nombre}' agregada."
-            self.cargar_datos_tabla()
+            bus.publicar("insumo", [id_nuevo])
             self.mostrando_formulario = False
             self.formulario_mensaje = ""
\ No newline at end of file
@@ -0,0 +1,18 @@
+"""
+Pruebas de rendimiento del sistema POS Bambi
+--------------------------------------------
+Herramientas para medir el sistema con volúmenes de datos realistas sobre
+la base SQLite local (ver conexion_sqlite.py), sin tocar la base MySQL de
+producción.
+
+Módulos:
+- carga_sintetica: siembra ventas, productos, materia prima y pedidos
+- rendimiento: mide las rutas de código reales y genera un reporte JSON
+- renderizado: tiempos de cuadro por pantalla con el video "dummy" de SDL
+- reproducir: reproduce sesiones grabadas por menu.main y reporta picos
+- estadisticas: percentiles y resúmenes compartidos
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.rendimiento --lineas 1000000 --salida reporte.json
+    python -m benchmarks.renderizado --cuadros 300 --salida cuadros.json
+"""
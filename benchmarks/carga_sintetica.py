@@ -0,0 +1,217 @@
+"""
+Generador de carga sintética
+----------------------------
+Siembra la base con volúmenes configurables de ventas, productos, materia
+prima y pedidos de clientes para medir el sistema con datos de un año o
+más. Los datos son deterministas para una misma semilla, de modo que dos
+ejecuciones (o dos versiones del sistema) trabajan sobre la misma base.
+
+Las filas se insertan por lotes con executemany y los IDs de venta y pedido
+se asignan explícitamente para enlazar los detalles sin consultar
+LAST_INSERT_ID.
+"""
+
+import datetime
+import random
+from dinero import calcular_linea, redondear
+
+TAMANO_LOTE = 20000
+
+# Horas de venta y su peso relativo (mañana y tarde son las más fuertes)
+HORAS = list(range(7, 22))
+PESOS_HORA = [3, 6, 8, 7, 5, 4, 5, 4, 3, 4, 6, 7, 5, 3, 2]
+
+ESTADOS_VENTA = ["Completada"] * 97 + ["Cancelada"] * 2 + ["Devuelta"]
+ESTADOS_PEDIDO = ["Pendiente", "En proceso", "Listo", "Entregado", "Cancelado"]
+
+
+def _insertar_por_lotes(conexion, query, filas):
+    """Inserta un iterable de filas en lotes y confirma cada lote"""
+    lote = []
+    total = 0
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= TAMANO_LOTE:
+            conexion.cursor.executemany(query, lote)
+            conexion.conn.commit()
+            total += len(lote)
+            lote = []
+    if lote:
+        conexion.cursor.executemany(query, lote)
+        conexion.conn.commit()
+        total += len(lote)
+    return total
+
+
+def _ids(conexion, tabla, columna):
+    conexion.cursor.execute(f"SELECT {columna} AS id FROM {tabla}")
+    return [fila["id"] for fila in conexion.cursor.fetchall()]
+
+
+def _siguiente_id(conexion, tabla, columna):
+    conexion.cursor.execute(f"SELECT COALESCE(MAX({columna}), 0) AS n FROM {tabla}")
+    return conexion.cursor.fetchone()["n"] + 1
+
+
+def sembrar_productos(conexion, azar, cantidad):
+    """Agrega productos de catálogo con stock suficiente para la prueba"""
+    subtipos = _ids(conexion, "SubtipoProducto", "ID_SubtipoProducto") or [0]
+    recetas = _ids(conexion, "Receta", "ID_Receta") or [0]
+    caducidad = datetime.date.today() + datetime.timedelta(days=365)
+    filas = (
+        (
+            f"Producto sintético {i:05d}",
+            f"Producto generado para pruebas de rendimiento #{i}",
+            redondear(azar.uniform(5, 450)),
+            1000000,
+            caducidad,
+            "0.00" if i % 10 == 0 else "0.16",
+            azar.choice(subtipos),
+            azar.choice(recetas),
+        )
+        for i in range(1, cantidad + 1)
+    )
+    return _insertar_por_lotes(conexion, """
+        INSERT INTO CatProducto (Nombre_prod, Descripcion, Precio, Stock, Caducidad,
+                                 IVA, Estado, FK_ID_SubtipoProducto, FK_ID_Receta)
+        VALUES (%s, %s, %s, %s, %s, %s, 'Disponible', %s, %s)
+    """, filas)
+
+
+def sembrar_materia_prima(conexion, azar, cantidad):
+    """Agrega materias primas con caducidades y stocks variados"""
+    medidas = _ids(conexion, "MedidaCantidad", "ID_MedidaCantidad")
+    tipos = _ids(conexion, "TipoMateriaPrima", "ID_TipoMateriaPrima")
+    hoy = datetime.date.today()
+    filas = (
+        (
+            f"Materia prima sintética {i:05d}",
+            azar.randint(1, 500),
+            redondear(azar.uniform(10, 900)),
+            azar.randint(0, 50),
+            azar.choice(medidas),
+            azar.choice(tipos),
+            hoy + datetime.timedelta(days=azar.randint(-10, 180)),
+            hoy - datetime.timedelta(days=azar.randint(0, 60)),
+        )
+        for i in range(1, cantidad + 1)
+    )
+    return _insertar_por_lotes(conexion, """
+        INSERT INTO MateriaPrima (Nombre, Cantidad, Precio, stock_minimo, FK_ID_MedidaCantidad,
+                                  FK_ID_TipoMateriaPrima, fecha_caducidad, fecha_entrada)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, filas)
+
+
+def sembrar_ventas(conexion, azar, lineas, dias, lineas_por_venta=3):
+    """
+    Agrega ventas y sus detalles repartidos en los últimos `dias` días
+
+    Args:
+        lineas (int): Total de líneas de detalle_venta a generar
+        dias (int): Días hacia atrás desde hoy
+        lineas_por_venta (int): Máximo de líneas por venta (promedio ~ la mitad + 1)
+
+    Returns:
+        tuple: (ventas insertadas, líneas insertadas)
+    """
+    conexion.cursor.execute("SELECT ID_CatProducto, Precio, IVA FROM CatProducto")
+    productos = [(p["ID_CatProducto"], p["Precio"], p["IVA"]) for p in conexion.cursor.fetchall()]
+    empleados = _ids(conexion, "Empleado", "Id_Empleado") or [None]
+    id_venta = _siguiente_id(conexion, "Venta", "ID_Venta")
+    ahora = datetime.datetime.now().replace(microsecond=0)
+
+    query_venta = """
+        INSERT INTO Venta (ID_Venta, Fecha_venta, Total_venta, Estado, FK_ID_Empleado)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    query_detalle = """
+        INSERT INTO Detalle_Venta (Cantidad, PrecioUnitario, Subtotal, FK_ID_Venta, FK_ID_CatProducto)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    ventas = []
+    detalles = []
+    num_ventas = num_lineas = 0
+    restantes = lineas
+    while restantes > 0:
+        cuantas = min(restantes, azar.randint(1, lineas_por_venta))
+        restantes -= cuantas
+        dia = ahora.date() - datetime.timedelta(days=azar.randrange(dias))
+        hora = azar.choices(HORAS, PESOS_HORA)[0]
+        fecha = datetime.datetime.combine(dia, datetime.time(hora, azar.randrange(60), azar.randrange(60)))
+        total = 0
+        for id_producto, precio, iva in azar.sample(productos, min(cuantas, len(productos))):
+            unidades = azar.randint(1, 6)
+            subtotal, _, total_linea = calcular_linea(precio, unidades, iva)
+            total += total_linea
+            detalles.append((unidades, precio, subtotal, id_venta, id_producto))
+        ventas.append((id_venta, min(fecha, ahora), total, azar.choice(ESTADOS_VENTA), azar.choice(empleados)))
+        id_venta += 1
+
+        # Las ventas van antes que sus detalles por la llave foránea
+        if len(detalles) >= TAMANO_LOTE or restantes == 0:
+            num_ventas += _insertar_por_lotes(conexion, query_venta, ventas)
+            num_lineas += _insertar_por_lotes(conexion, query_detalle, detalles)
+            ventas, detalles = [], []
+
+    return num_ventas, num_lineas
+
+
+def sembrar_pedidos(conexion, azar, cantidad, dias):
+    """Agrega pedidos de clientes (con detalle) alrededor de la fecha actual"""
+    clientes = _ids(conexion, "Cliente", "Id_Cliente")
+    conexion.cursor.execute("SELECT ID_CatProducto, Precio FROM CatProducto")
+    productos = [(p["ID_CatProducto"], p["Precio"]) for p in conexion.cursor.fetchall()]
+    id_pedido = _siguiente_id(conexion, "pedidoventa", "ID_PedidoVenta")
+    hoy = datetime.date.today()
+
+    pedidos = []
+    detalles = []
+    for _ in range(cantidad):
+        fecha_pedido = hoy - datetime.timedelta(days=azar.randrange(dias))
+        fecha_entrega = fecha_pedido + datetime.timedelta(days=azar.randint(1, 30))
+        total = 0
+        for id_producto, precio in azar.sample(productos, min(azar.randint(1, 4), len(productos))):
+            unidades = azar.randint(1, 20)
+            total += redondear(precio * unidades)
+            detalles.append((unidades, precio, id_pedido, id_producto))
+        estado = "Entregado" if fecha_entrega < hoy and azar.random() < 0.9 else azar.choice(ESTADOS_PEDIDO)
+        pedidos.append((id_pedido, fecha_pedido, fecha_entrega, total, estado, azar.choice(clientes)))
+        id_pedido += 1
+
+    num_pedidos = _insertar_por_lotes(conexion, """
+        INSERT INTO pedidoventa (ID_PedidoVenta, Fecha_pedido, Fecha_entrega, Total, Estado, FK_ID_Cliente)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, pedidos)
+    _insertar_por_lotes(conexion, """
+        INSERT INTO detallepedidoventa (Cantidad, PrecioUnitario, FK_ID_PedidoVenta, FK_ID_CatProducto)
+        VALUES (%s, %s, %s, %s)
+    """, detalles)
+    return num_pedidos
+
+
+def generar_carga(conexion, lineas=100000, productos=200, materias_primas=500,
+                  pedidos=5000, dias=365, semilla=42):
+    """
+    Siembra la base completa
+
+    Args:
+        conexion (Conexion): Conexión abierta (conexion.conectar() ya llamado)
+        lineas (int): Líneas de detalle_venta
+        productos (int): Productos de catálogo adicionales
+        materias_primas (int): Materias primas adicionales
+        pedidos (int): Pedidos de clientes
+        dias (int): Días de historia
+        semilla (int): Semilla del generador aleatorio
+
+    Returns:
+        dict: Filas insertadas por tabla
+    """
+    azar = random.Random(semilla)
+    volumenes = {
+        "catproducto": sembrar_productos(conexion, azar, productos),
+        "materiaprima": sembrar_materia_prima(conexion, azar, materias_primas),
+    }
+    volumenes["venta"], volumenes["detalle_venta"] = sembrar_ventas(conexion, azar, lineas, dias)
+    volumenes["pedidoventa"] = sembrar_pedidos(conexion, azar, pedidos, dias)
+    return volumenes
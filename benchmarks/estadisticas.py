@@ -0,0 +1,44 @@
+"""
+Resúmenes estadísticos para las pruebas de rendimiento
+"""
+
+import math
+
+
+def percentil(valores, p):
+    """
+    Percentil por el método del rango más cercano
+
+    Args:
+        valores (list): Muestras (no necesitan estar ordenadas)
+        p (float): Percentil entre 0 y 100
+
+    Returns:
+        float: Valor del percentil (0 si no hay muestras)
+    """
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    rango = max(1, math.ceil(p / 100 * len(ordenados)))
+    return ordenados[rango - 1]
+
+
+def resumir(tiempos):
+    """
+    Resume una lista de tiempos en segundos
+
+    Returns:
+        dict: Muestras, mínimo, p50, p95, p99, máximo y media en milisegundos
+    """
+    if not tiempos:
+        return {"muestras": 0}
+    ms = [t * 1000 for t in tiempos]
+    return {
+        "muestras": len(ms),
+        "min_ms": round(min(ms), 3),
+        "p50_ms": round(percentil(ms, 50), 3),
+        "p95_ms": round(percentil(ms, 95), 3),
+        "p99_ms": round(percentil(ms, 99), 3),
+        "max_ms": round(max(ms), 3),
+        "media_ms": round(sum(ms) / len(ms), 3),
+    }
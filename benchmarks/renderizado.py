@@ -0,0 +1,280 @@
+"""
+Arnés de renderizado sin pantalla
+---------------------------------
+Mide el tiempo de dibujo por cuadro de cada pantalla del sistema usando el
+controlador de video "dummy" de SDL, de modo que corre en servidores de
+integración sin monitor.
+
+Cada módulo se construye sobre una base SQLite con datos de prueba (la misma
+carga sintética de benchmarks.rendimiento) y recibe un guion de eventos:
+cambio de pestaña, recorrido del mouse, rueda y, en el punto de venta,
+clics sobre productos y escritura en la búsqueda. Por cuadro se registra:
+
+- dibujo: tiempo del método de dibujo del módulo
+- eventos: tiempo de handle_event para los eventos de ese cuadro
+- memoria: pico y neto de memoria Python asignada (tracemalloc) en una
+  segunda pasada, para no inflar los tiempos; las superficies de SDL se
+  reservan en C y no aparecen aquí
+
+Uso:
+    python -m benchmarks.renderizado
+    python -m benchmarks.renderizado --cuadros 300 --pantallas VENTA REPORTES --salida cuadros.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from benchmarks.estadisticas import percentil, resumir
+from benchmarks.rendimiento import preparar_base, silenciar, version_codigo
+
+BASE_DEFAULT = os.path.join("benchmarks", "bambi_render.sqlite3")
+
+# Pestaña del menú -> (módulo, clase, método de dibujo)
+PANTALLAS = {
+    "VENTA": ("puntoventa", "PuntoVenta", "dibujar_punto_venta"),
+    "ALMACEN": ("almacen", "almacen", "dibujar_punto_venta"),
+    "PEDIDO": ("pedido", "Pedido", "dibujar_pedido"),
+    "RECETA": ("receta", "Receta", "dibujar_receta"),
+    "REPORTES": ("reporte", "reporte", "dibujar_reporte"),
+    "AJUSTES": ("ajustes", "ajustes", "dibujar"),
+}
+
+
+def area_trabajo(ancho, alto):
+    """Misma área de trabajo que ModuleLoader.get_area_trabajo_params"""
+    return {
+        "x": int(0.155 * ancho),
+        "y": int(0.15 * alto),
+        "ancho": ancho - int(0.15 * ancho),
+        "alto": alto - int(0.15 * ancho),
+    }
+
+
+def crear_modulo(pestana, ancho, alto):
+    """Importa y construye el módulo de una pestaña"""
+    nombre_modulo, nombre_clase, metodo = PANTALLAS[pestana]
+    modulo = __import__(nombre_modulo)
+    with silenciar():
+        instancia = getattr(modulo, nombre_clase)(**area_trabajo(ancho, alto))
+    return instancia, getattr(instancia, metodo)
+
+
+# ---------------------------------------------------------------------------
+# Guiones de eventos
+# ---------------------------------------------------------------------------
+
+def clic(pos, boton=1):
+    return [
+        pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=boton),
+        pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=boton),
+    ]
+
+
+def movimiento(pos):
+    return [pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))]
+
+
+def rueda(dy):
+    return [pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=dy, flipped=False)]
+
+
+def tecla(caracter):
+    codigo = pygame.K_BACKSPACE if caracter == "\b" else ord(caracter)
+    return [pygame.event.Event(pygame.KEYDOWN, key=codigo, unicode=caracter.strip("\b"), mod=0, scancode=0)]
+
+
+def recorrido(instancia, cuadros, cuadro):
+    """Eventos de un cuadro genérico: el mouse barre el área y la rueda alterna"""
+    x0, y0 = instancia.x, instancia.y
+    paso = cuadro / max(1, cuadros)
+    pos = (x0 + int(paso * instancia.ancho * 0.95), y0 + int((cuadro * 37 % 100) / 100 * instancia.alto * 0.9))
+    eventos = movimiento(pos)
+    if cuadro % 10 == 5:
+        eventos += rueda(-1 if (cuadro // 10) % 2 == 0 else 1)
+    return eventos
+
+
+def guion_pestanas(instancia, cuadros):
+    """
+    Reparte los cuadros entre las pestañas internas del módulo
+
+    Yields:
+        tuple: (nombre de la pantalla, eventos del cuadro)
+    """
+    opciones = getattr(instancia, "botones_opciones", None) or [None]
+    por_opcion = max(1, cuadros // len(opciones))
+    for i, opcion in enumerate(opciones):
+        for cuadro in range(por_opcion):
+            eventos = []
+            if cuadro == 0 and opcion is not None and i < len(instancia.boton_rects) and instancia.boton_rects[i]:
+                eventos += clic(instancia.boton_rects[i].center)
+            yield opcion, eventos + recorrido(instancia, por_opcion, cuadro)
+
+
+def guion_punto_venta(instancia, cuadros):
+    """
+    Simula una venta grande: clics sobre productos del catálogo (llenan el
+    ticket), búsqueda por texto y desplazamiento del catálogo y del ticket.
+    Al final abre el cobro en efectivo y captura el importe recibido, de modo
+    que el modal se dibuja con cambio calculado.
+    """
+    texto = "pan"
+    importe = "500.50"
+    inicio_pago = None
+    for cuadro in range(cuadros):
+        eventos = recorrido(instancia, cuadros, cuadro)
+        fase = cuadro * 4 // cuadros
+        if fase == 0 and instancia.product_rects:
+            rect, _ = instancia.product_rects[cuadro % len(instancia.product_rects)]
+            if rect:
+                eventos += clic(rect.center)
+        elif fase == 1 and getattr(instancia, "busq_rect", None):
+            indice = cuadro % (len(texto) * 2)
+            if indice == 0:
+                eventos += clic(instancia.busq_rect.center)
+            eventos += tecla(texto[indice] if indice < len(texto) else "\b")
+        elif fase == 3:
+            inicio_pago = cuadro if inicio_pago is None else inicio_pago
+            paso = cuadro - inicio_pago
+            if paso == 0 and instancia.boton_pagar_rect:
+                eventos = clic(instancia.boton_pagar_rect.center)
+            elif paso == 1 and instancia.efectivo_box:
+                eventos = clic(instancia.efectivo_box.rect.center)
+            elif 2 <= paso < 2 + len(importe):
+                eventos = tecla(importe[paso - 2])
+            else:
+                eventos = []
+        yield None, eventos
+
+
+# ---------------------------------------------------------------------------
+# Medición
+# ---------------------------------------------------------------------------
+
+def correr_guion(pestana, instancia, dibujar, superficie, cuadros, con_memoria):
+    """
+    Ejecuta el guion de una pestaña cuadro por cuadro
+
+    Returns:
+        dict: Pantalla -> {"dibujo": [...], "eventos": [...], "pico": [...], "neto": [...]}
+    """
+    guion = guion_punto_venta if pestana == "VENTA" else guion_pestanas
+    muestras = {}
+    with silenciar():
+        dibujar(superficie)  # Primer cuadro: crea los rects que usa el guion
+        for opcion, eventos in guion(instancia, cuadros):
+            nombre = f"{pestana}[{opcion}]" if opcion else pestana
+            datos = muestras.setdefault(nombre, {"dibujo": [], "eventos": [], "pico": [], "neto": []})
+
+            inicio = time.perf_counter()
+            for evento in eventos:
+                instancia.handle_event(evento)
+            datos["eventos"].append(time.perf_counter() - inicio)
+
+            if con_memoria:
+                tracemalloc.reset_peak()
+                antes, _ = tracemalloc.get_traced_memory()
+            inicio = time.perf_counter()
+            dibujar(superficie)
+            datos["dibujo"].append(time.perf_counter() - inicio)
+            if con_memoria:
+                despues, pico = tracemalloc.get_traced_memory()
+                datos["pico"].append(pico - antes)
+                datos["neto"].append(despues - antes)
+    return muestras
+
+
+def resumir_memoria(picos, netos):
+    """Resumen de memoria por cuadro en kilobytes"""
+    kb = lambda valores, p: round(percentil(valores, p) / 1024, 1)
+    return {
+        "pico_kb_p50": kb(picos, 50),
+        "pico_kb_p95": kb(picos, 95),
+        "pico_kb_max": round(max(picos, default=0) / 1024, 1),
+        "neto_kb_total": round(sum(netos) / 1024, 1),
+    }
+
+
+def medir_pantalla(pestana, ancho, alto, cuadros, superficie):
+    """
+    Mide una pestaña: una pasada de tiempos y otra de memoria, cada una con
+    una instancia nueva para que el guion empiece desde el mismo estado.
+    """
+    instancia, dibujar = crear_modulo(pestana, ancho, alto)
+    tiempos = correr_guion(pestana, instancia, dibujar, superficie, cuadros, False)
+
+    instancia, dibujar = crear_modulo(pestana, ancho, alto)
+    tracemalloc.start()
+    try:
+        memoria = correr_guion(pestana, instancia, dibujar, superficie, cuadros, True)
+    finally:
+        tracemalloc.stop()
+
+    resultado = {}
+    for nombre, datos in tiempos.items():
+        resultado[nombre] = {
+            "cuadros": len(datos["dibujo"]),
+            "dibujo": resumir(datos["dibujo"]),
+            "eventos": resumir(datos["eventos"]),
+            "memoria": resumir_memoria(memoria[nombre]["pico"], memoria[nombre]["neto"]),
+        }
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempos de cuadro por pantalla sin monitor")
+    parser.add_argument("--base", default=BASE_DEFAULT, help="Archivo SQLite de pruebas")
+    parser.add_argument("--reusar", action="store_true", help="Usar la base existente sin volver a sembrar")
+    parser.add_argument("--lineas", type=int, default=20000, help="Líneas de venta de la carga de prueba")
+    parser.add_argument("--cuadros", type=int, default=120, help="Cuadros por pestaña")
+    parser.add_argument("--ancho", type=int, default=1920)
+    parser.add_argument("--alto", type=int, default=1080)
+    parser.add_argument("--pantallas", nargs="+", choices=list(PANTALLAS), default=list(PANTALLAS))
+    parser.add_argument("--salida", help="Archivo JSON del reporte (default: salida estándar)")
+    args = parser.parse_args(argv)
+
+    preparar_base(args.base, args.reusar, {"lineas": args.lineas, "productos": 60,
+                                           "materias_primas": 200, "pedidos": 500})
+    pygame.init()
+    superficie = pygame.display.set_mode((args.ancho, args.alto))
+
+    pantallas = {}
+    for pestana in args.pantallas:
+        print(f"Midiendo {pestana}...", file=sys.stderr)
+        pantallas.update(medir_pantalla(pestana, args.ancho, args.alto, args.cuadros, superficie))
+    pygame.quit()
+
+    reporte_json = {
+        "version": version_codigo(),
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "resolucion": [args.ancho, args.alto],
+        "cuadros_por_pestana": args.cuadros,
+        "video": os.environ.get("SDL_VIDEODRIVER", ""),
+        "pantallas": pantallas,
+    }
+    texto = json.dumps(reporte_json, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+    print(f"\n{'pantalla':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'pico KB p95':>14}", file=sys.stderr)
+    for nombre, datos in pantallas.items():
+        dibujo = datos["dibujo"]
+        print(f"{nombre:<28}{dibujo['p50_ms']:>10.2f}{dibujo['p95_ms']:>10.2f}{dibujo['p99_ms']:>10.2f}"
+              f"{datos['memoria']['pico_kb_p95']:>14.1f}", file=sys.stderr)
+    return reporte_json
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Suite de rendimiento de ventas y reportes
+-----------------------------------------
+Crea una base SQLite desde el dump canónico, la siembra con la carga
+sintética y mide las rutas de código reales del sistema:
+
+- PuntoVenta.registrar_venta (venta de 5 productos)
+- reporte.cargar_corte_caja (día más reciente con ventas)
+- reporte.cargar_productos_mas_vendidos
+- reporte.cargar_ventas_por_dia
+- almacen.cargar_datos_tabla (sin filtro y con búsqueda)
+
+El resultado es un JSON con los volúmenes, el entorno y las estadísticas de
+cada caso, pensado para guardarse por versión y compararse con --comparar.
+
+Uso:
+    python -m benchmarks.rendimiento
+    python -m benchmarks.rendimiento --lineas 1000000 --salida v1.json
+    python -m benchmarks.rendimiento --reusar --comparar v1.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+
+BASE_DEFAULT = os.path.join("benchmarks", "bambi_bench.sqlite3")
+
+# El motor y la base se eligen antes de importar los módulos del sistema
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+def preparar_base(ruta, reusar, volumenes):
+    """
+    Crea y siembra la base de pruebas
+
+    Returns:
+        tuple: (filas sembradas por tabla, segundos de siembra)
+    """
+    os.environ["BAMBI_SQLITE"] = ruta
+    from conexion import Conexion
+    from benchmarks.carga_sintetica import generar_carga
+
+    if reusar and os.path.exists(ruta):
+        return {}, 0.0
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+
+    conexion = Conexion()
+    with silenciar():
+        conexion.conectar()
+    if not conexion.conn:
+        raise SystemExit("No se pudo crear la base de pruebas")
+    inicio = time.perf_counter()
+    try:
+        sembradas = generar_carga(conexion, **volumenes)
+    finally:
+        conexion.cerrar()
+    return sembradas, time.perf_counter() - inicio
+
+
+@contextlib.contextmanager
+def silenciar():
+    """Descarta los print del sistema (uno por conexión) durante la medición"""
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        yield
+
+
+def medir(funcion, repeticiones, preparar=None):
+    """
+    Ejecuta una función varias veces y devuelve los tiempos en segundos
+
+    Args:
+        funcion (callable): Código a medir
+        repeticiones (int): Número de ejecuciones (más una de calentamiento)
+        preparar (callable, optional): Se llama antes de cada ejecución, fuera
+            de la medición
+    """
+    tiempos = []
+    for i in range(repeticiones + 1):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        with silenciar():
+            funcion()
+        transcurrido = time.perf_counter() - inicio
+        if i > 0:
+            tiempos.append(transcurrido)
+    return tiempos
+
+
+def casos(ancho, alto):
+    """
+    Construye los módulos del sistema y devuelve los casos a medir
+
+    Returns:
+        list: Tuplas (nombre, función, preparar)
+    """
+    import pygame
+    from conexion import Conexion
+    from puntoventa import PuntoVenta
+    from reporte import reporte
+    from almacen import almacen
+
+    pygame.init()
+    pygame.display.set_mode((ancho, alto))
+    with silenciar():
+        pos = PuntoVenta(0, 0, ancho, alto)
+        rep = reporte(0, 0, ancho, alto)
+        alm = almacen(0, 0, ancho, alto)
+        ultima = Conexion().consultar("SELECT MAX(DATE(Fecha_venta)) AS dia FROM Venta")
+    dia_corte = str(ultima[0]["dia"]) if ultima and ultima[0]["dia"] else None
+    productos = pos.productos[:5]
+
+    def preparar_ticket():
+        pos.ticket.limpiar()
+        for p in productos:
+            pos.ticket.agregar_producto(p["nombre"], 2, p["precio"], p["ID_CatProducto"], p.get("IVA"))
+
+    def buscar_almacen(texto):
+        def preparar():
+            alm.opcion_seleccionada = "MATERIA PRIMA"
+            alm.busqueda_texto = texto
+        return preparar
+
+    return [
+        ("puntoventa.registrar_venta", lambda: pos.registrar_venta("Efectivo"), preparar_ticket),
+        ("reporte.cargar_corte_caja", lambda: rep.cargar_corte_caja(dia_corte), None),
+        ("reporte.cargar_productos_mas_vendidos", rep.cargar_productos_mas_vendidos, None),
+        ("reporte.cargar_ventas_por_dia", rep.cargar_ventas_por_dia, None),
+        ("almacen.cargar_datos_tabla", alm.cargar_datos_tabla, buscar_almacen("")),
+        ("almacen.cargar_datos_tabla[busqueda]", alm.cargar_datos_tabla, buscar_almacen("sint")),
+    ]
+
+
+def version_codigo():
+    """Commit actual del repositorio (vacío si no es un checkout de git)"""
+    try:
+        salida = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, check=True)
+        return salida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def comparar(actual, anterior):
+    """
+    Imprime la variación del p50 de cada caso contra un reporte anterior
+
+    Args:
+        actual (dict): Reporte recién generado
+        anterior (dict): Reporte cargado de --comparar
+    """
+    print(f"\nComparación contra {anterior.get('version') or 'reporte anterior'}:")
+    for nombre, datos in actual["casos"].items():
+        previo = anterior.get("casos", {}).get(nombre)
+        if not previo or not previo.get("p50_ms"):
+            print(f"  {nombre:<42} (sin referencia)")
+            continue
+        cambio = (datos["p50_ms"] - previo["p50_ms"]) / previo["p50_ms"] * 100
+        print(f"  {nombre:<42} {previo['p50_ms']:>10.2f} -> {datos['p50_ms']:>10.2f} ms  ({cambio:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de rendimiento de ventas y reportes")
+    parser.add_argument("--base", default=BASE_DEFAULT, help="Archivo SQLite de pruebas")
+    parser.add_argument("--reusar", action="store_true", help="Usar la base existente sin volver a sembrar")
+    parser.add_argument("--lineas", type=int, default=100000, help="Líneas de detalle_venta")
+    parser.add_argument("--productos", type=int, default=200)
+    parser.add_argument("--materias-primas", type=int, default=500)
+    parser.add_argument("--pedidos", type=int, default=5000)
+    parser.add_argument("--dias", type=int, default=365, help="Días de historia de ventas")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--salida", help="Archivo JSON del reporte (default: salida estándar)")
+    parser.add_argument("--comparar", help="Reporte JSON anterior para comparar")
+    args = parser.parse_args(argv)
+
+    from benchmarks.estadisticas import resumir
+
+    volumenes = {
+        "lineas": args.lineas,
+        "productos": args.productos,
+        "materias_primas": args.materias_primas,
+        "pedidos": args.pedidos,
+        "dias": args.dias,
+        "semilla": args.semilla,
+    }
+    sembradas, segundos_siembra = preparar_base(args.base, args.reusar, volumenes)
+    print(f"Base lista ({segundos_siembra:.1f} s de siembra)", file=sys.stderr)
+
+    resultados = {}
+    for nombre, funcion, preparar in casos(1280, 800):
+        print(f"Midiendo {nombre}...", file=sys.stderr)
+        resultados[nombre] = resumir(medir(funcion, args.repeticiones, preparar))
+
+    reporte_json = {
+        "version": version_codigo(),
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "entorno": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+        },
+        "volumenes": volumenes,
+        "filas_sembradas": sembradas,
+        "siembra_s": round(segundos_siembra, 3),
+        "casos": resultados,
+    }
+    texto = json.dumps(reporte_json, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            comparar(reporte_json, json.load(f))
+    return reporte_json
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Reproducción determinista de sesiones grabadas
+----------------------------------------------
+Lee un registro de eventos de grabador_eventos.py y lo reproduce sobre los
+mismos módulos del sistema, contra una base SQLite de prueba, a la
+velocidad original o acelerada. Cada lote de eventos (los que llegaron en
+la misma vuelta del ciclo principal, según el número de cuadro grabado) se
+procesa y se dibuja como un cuadro, igual que en menu.main.
+
+Reporta los picos de latencia: cuadros cuyo tiempo (eventos + dibujo +
+construcción del módulo la primera vez) supera el umbral, con el evento
+que los disparó.
+
+Uso:
+    python -m benchmarks.reproducir registros/eventos_20250601_101500.bev
+    python -m benchmarks.reproducir sesion.bev --velocidad 4 --umbral 33 --salida picos.json
+    python -m benchmarks.reproducir sesion.bev --velocidad 0     # sin esperas
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from grabador_eventos import leer_registro
+from bus_cambios import bus
+from benchmarks.estadisticas import resumir
+from benchmarks.rendimiento import preparar_base, silenciar, version_codigo
+from benchmarks.renderizado import PANTALLAS, area_trabajo, crear_modulo
+
+BASE_DEFAULT = os.path.join("benchmarks", "bambi_reproducir.sqlite3")
+
+
+class Reproductor:
+    """
+    Reproduce una sesión y mide cada cuadro
+
+    Attributes:
+        instancias (dict): Pestaña -> (instancia, método de dibujo)
+        cuadros (list): Mediciones por cuadro
+    """
+
+    def __init__(self, ancho, alto, velocidad=1.0, umbral_ms=50.0):
+        self.ancho = ancho
+        self.alto = alto
+        self.velocidad = velocidad
+        self.umbral_ms = umbral_ms
+        self.superficie = pygame.display.set_mode((ancho, alto))
+        self.instancias = {}
+        self.cuadros = []
+
+    def obtener_modulo(self, pestana):
+        """Construye el módulo la primera vez; devuelve (instancia, dibujar, segundos de carga)"""
+        if pestana in self.instancias:
+            return self.instancias[pestana] + (0.0,)
+        inicio = time.perf_counter()
+        self.instancias[pestana] = crear_modulo(pestana, self.ancho, self.alto)
+        return self.instancias[pestana] + (time.perf_counter() - inicio,)
+
+    def redimensionar(self, ancho, alto):
+        """Aplica un VIDEORESIZE grabado como lo hace el menú"""
+        self.ancho, self.alto = ancho, alto
+        self.superficie = pygame.display.set_mode((ancho, alto))
+        for instancia, _ in self.instancias.values():
+            if hasattr(instancia, "relayout"):
+                with silenciar():
+                    instancia.relayout(**area_trabajo(ancho, alto))
+
+    def reproducir(self, eventos):
+        """
+        Reproduce la lista de eventos grabados
+
+        Args:
+            eventos (list): Tuplas (segundos, pestaña, evento, cuadro) de leer_registro
+        """
+        activa = ""
+        inicio_sesion = time.perf_counter()
+        lotes = itertools.groupby(enumerate(eventos), key=lambda e: e[1][3])
+        for _, lote in lotes:
+            lote = list(lote)
+            segundos = lote[0][1][0]  # Llegada del primer evento del cuadro
+            retraso = 0.0
+            if self.velocidad > 0:
+                objetivo = inicio_sesion + segundos / self.velocidad
+                espera = objetivo - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+                else:
+                    retraso = -espera
+
+            inicio = time.perf_counter()
+            carga = 0.0
+            manejo = []
+            with silenciar():
+                for indice, (_, pestana, evento, _) in lote:
+                    if evento.type == pygame.VIDEORESIZE:
+                        self.redimensionar(evento.w, evento.h)
+                        continue
+                    activa = pestana
+                    if not pestana or pestana not in PANTALLAS:
+                        continue
+                    instancia, _, segundos_carga = self.obtener_modulo(pestana)
+                    carga += segundos_carga
+                    t = time.perf_counter()
+                    instancia.handle_event(evento)
+                    manejo.append((indice, evento, time.perf_counter() - t))
+
+                t = time.perf_counter()
+                bus.despachar()  # Igual que menu.main antes de dibujar
+                if activa in self.instancias:
+                    self.instancias[activa][1](self.superficie)
+                dibujo = time.perf_counter() - t
+
+            self.cuadros.append({
+                "segundos": segundos,
+                "pestana": activa,
+                "total": time.perf_counter() - inicio,
+                "dibujo": dibujo,
+                "carga": carga,
+                "retraso": retraso,
+                "eventos": manejo,
+            })
+
+    def picos(self, limite=20):
+        """
+        Cuadros que superan el umbral, del más lento al más rápido
+
+        Returns:
+            list: Un dict por pico con el evento más lento del cuadro
+        """
+        lentos = [c for c in self.cuadros if c["total"] * 1000 >= self.umbral_ms]
+        lentos.sort(key=lambda c: c["total"], reverse=True)
+        resultado = []
+        for cuadro in lentos[:limite]:
+            indice, evento, manejo = max(cuadro["eventos"], key=lambda e: e[2], default=(None, None, 0.0))
+            resultado.append({
+                "segundos": round(cuadro["segundos"], 3),
+                "pestana": cuadro["pestana"],
+                "total_ms": round(cuadro["total"] * 1000, 2),
+                "dibujo_ms": round(cuadro["dibujo"] * 1000, 2),
+                "carga_modulo_ms": round(cuadro["carga"] * 1000, 2),
+                "evento_indice": indice,
+                "evento": pygame.event.event_name(evento.type) if evento else "",
+                "evento_datos": {k: v for k, v in evento.dict.items() if k in ("pos", "button", "key", "unicode", "x", "y")} if evento else {},
+                "evento_ms": round(manejo * 1000, 2),
+            })
+        return resultado
+
+    def resumen(self):
+        """Estadísticas de cuadro y de manejo de eventos por pestaña"""
+        por_pestana = {}
+        for cuadro in self.cuadros:
+            datos = por_pestana.setdefault(cuadro["pestana"] or "MENU", {"cuadros": [], "eventos": []})
+            datos["cuadros"].append(cuadro["total"])
+            datos["eventos"].extend(e[2] for e in cuadro["eventos"])
+        return {
+            pestana: {"cuadro": resumir(datos["cuadros"]), "evento": resumir(datos["eventos"])}
+            for pestana, datos in por_pestana.items()
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce una sesión grabada y reporta picos de latencia")
+    parser.add_argument("registro", help="Archivo .bev grabado por menu.main")
+    parser.add_argument("--velocidad", type=float, default=1.0,
+                        help="1 = tiempo original, 4 = cuatro veces más rápido, 0 = sin esperas")
+    parser.add_argument("--umbral", type=float, default=50.0, help="Milisegundos a partir de los que un cuadro es pico")
+    parser.add_argument("--picos", type=int, default=20, help="Número de picos a reportar")
+    parser.add_argument("--base", default=BASE_DEFAULT, help="Archivo SQLite de prueba")
+    parser.add_argument("--reusar", action="store_true", help="Usar la base existente sin volver a sembrar")
+    parser.add_argument("--lineas", type=int, default=20000, help="Líneas de venta de la carga de prueba")
+    parser.add_argument("--salida", help="Archivo JSON del reporte (default: salida estándar)")
+    args = parser.parse_args(argv)
+
+    encabezado, eventos = leer_registro(args.registro)
+    print(f"{len(eventos)} eventos, {eventos[-1][0] if eventos else 0:.1f} s grabados", file=sys.stderr)
+    preparar_base(args.base, args.reusar, {"lineas": args.lineas, "productos": 60,
+                                           "materias_primas": 200, "pedidos": 500})
+
+    pygame.init()
+    reproductor = Reproductor(encabezado["ancho"], encabezado["alto"], args.velocidad, args.umbral)
+    reproductor.reproducir(eventos)
+    pygame.quit()
+
+    reporte_json = {
+        "version": version_codigo(),
+        "registro": os.path.basename(args.registro),
+        "eventos": len(eventos),
+        "cuadros": len(reproductor.cuadros),
+        "velocidad": args.velocidad,
+        "umbral_ms": args.umbral,
+        "retraso_max_ms": round(max((c["retraso"] for c in reproductor.cuadros), default=0) * 1000, 2),
+        "pestanas": reproductor.resumen(),
+        "picos": reproductor.picos(args.picos),
+    }
+    texto = json.dumps(reporte_json, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+    print(f"\n{len(reporte_json['picos'])} picos >= {args.umbral:.0f} ms", file=sys.stderr)
+    for pico in reporte_json["picos"]:
+        print(f"  t={pico['segundos']:>8.3f}s {pico['pestana']:<9} {pico['total_ms']:>8.1f} ms  "
+              f"{pico['evento']} {pico['evento_datos']}", file=sys.stderr)
+    return reporte_json
+
+
+if __name__ == "__main__":
+    main()
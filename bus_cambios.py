@@ -0,0 +1,153 @@
+"""
+Bus de cambios en memoria
+-------------------------
+Publicación/suscripción dentro del proceso para mantener al día los datos
+que cada módulo abierto tiene en pantalla.
+
+Quien escribe en la base publica la entidad (nombre de la tabla) y los IDs
+que cambió; los módulos suscritos a esa entidad vuelven a leer solo esas
+filas en lugar de recargar la tabla completa.
+
+- Los avisos se encolan y se entregan en el hilo principal con despachar(),
+  que el ciclo de menu.main llama en cada cuadro. Así un hilo de fondo puede
+  publicar sin tocar la interfaz.
+- Varios avisos de la misma entidad en un cuadro se fusionan en uno.
+- Las suscripciones guardan referencias débiles: un módulo descartado por
+  el ModuleLoader deja de recibir avisos sin darse de baja.
+
+Uso:
+    from bus_cambios import bus
+    bus.suscribir("pedidoventa", self.refrescar_pedidos)
+    bus.publicar("pedidoventa", [id_pedido])
+"""
+
+import threading
+import weakref
+from collections import deque, namedtuple
+
+# ids es un frozenset con los IDs afectados, o None si cambió toda la entidad
+Cambio = namedtuple("Cambio", ["entidad", "ids"])
+
+
+class BusCambios:
+    """
+    Bus de avisos de cambios por entidad
+
+    Attributes:
+        suscriptores (dict): entidad -> lista de referencias débiles a funciones
+        pendientes (deque): Avisos publicados aún no entregados
+    """
+
+    def __init__(self):
+        self.suscriptores = {}
+        self.pendientes = deque()
+        self.lock = threading.Lock()
+
+    def suscribir(self, entidad, funcion):
+        """
+        Registra una función que recibe los cambios de una entidad
+
+        Args:
+            entidad (str): Nombre de la tabla (en minúsculas)
+            funcion (callable): Recibe un Cambio; normalmente un método del módulo
+        """
+        if hasattr(funcion, "__self__"):
+            referencia = weakref.WeakMethod(funcion)
+        else:
+            referencia = lambda: funcion
+        with self.lock:
+            self.suscriptores.setdefault(entidad, []).append(referencia)
+
+    def publicar(self, entidad, ids=None):
+        """
+        Avisa que cambiaron filas de una entidad
+
+        Args:
+            entidad (str): Nombre de la tabla (en minúsculas)
+            ids (iterable, optional): IDs modificados; None si cambió toda la entidad
+        """
+        if ids is not None:
+            ids = frozenset(ids)
+            if not ids:
+                return
+        with self.lock:
+            self.pendientes.append(Cambio(entidad, ids))
+
+    def despachar(self):
+        """
+        Entrega los avisos pendientes a sus suscriptores
+
+        Returns:
+            int: Número de entidades notificadas
+        """
+        with self.lock:
+            if not self.pendientes:
+                return 0
+            pendientes = list(self.pendientes)
+            self.pendientes.clear()
+
+        # Fusionar por entidad para refrescar con una sola consulta
+        fusion = {}
+        for cambio in pendientes:
+            if cambio.entidad not in fusion:
+                fusion[cambio.entidad] = cambio.ids
+            elif fusion[cambio.entidad] is None or cambio.ids is None:
+                fusion[cambio.entidad] = None
+            else:
+                fusion[cambio.entidad] = fusion[cambio.entidad] | cambio.ids
+
+        for entidad, ids in fusion.items():
+            for funcion in self._funciones(entidad):
+                try:
+                    funcion(Cambio(entidad, ids))
+                except Exception as e:
+                    print(f"Error al refrescar {entidad}: {e}")
+        return len(fusion)
+
+    def _funciones(self, entidad):
+        """Funciones vivas suscritas a una entidad (descarta las de módulos liberados)"""
+        with self.lock:
+            referencias = self.suscriptores.get(entidad, [])
+            vivas = [(ref, ref()) for ref in referencias]
+            vivas = [(ref, funcion) for ref, funcion in vivas if funcion is not None]
+            self.suscriptores[entidad] = [ref for ref, _ in vivas]
+        return [funcion for _, funcion in vivas]
+
+
+# Bus compartido del proceso
+bus = BusCambios()
+
+
+def fusionar_filas(filas, nuevas, ids, clave="id", orden=None, descendente=False):
+    """
+    Sustituye en una lista de filas las que cambiaron
+
+    Args:
+        filas (list): Filas mostradas actualmente
+        nuevas (list): Filas releídas de la base (solo las que siguen visibles)
+        ids (set): IDs que cambiaron; los que no vengan en nuevas se quitan
+        clave (str): Campo con el ID en cada fila
+        orden (callable, optional): Clave de orden; None agrega las nuevas al final
+        descendente (bool): Orden descendente
+
+    Returns:
+        list: Filas actualizadas
+    """
+    por_id = {fila[clave]: fila for fila in nuevas}
+    resultado = []
+    for fila in filas:
+        if fila[clave] in ids:
+            nueva = por_id.pop(fila[clave], None)
+            if nueva is not None:
+                resultado.append(nueva)
+        else:
+            resultado.append(fila)
+    resultado.extend(por_id.values())
+    if orden is not None:
+        resultado.sort(key=orden, reverse=descendente)
+    return resultado
+
+
+def marcadores(ids):
+    """Marcadores %s para una cláusula IN con los IDs dados"""
+    return ", ".join(["%s"] * len(ids))
@@ -0,0 +1,335 @@
+"""
+Calendario de entregas de pedidos
+---------------------------------
+Mantiene en memoria los pedidos de clientes que siguen activos (Pendiente,
+En proceso o Listo) agrupados por día de entrega, con el total de pedidos,
+piezas e importe de cada día ya acumulado.
+
+- La carga es una sola consulta sobre el índice (Estado, Fecha_entrega)
+  de pedidoventa; las búsquedas por cliente y las vistas por día se
+  resuelven en memoria, sin volver a la base en cada tecla.
+- "Qué se entrega mañana / esta semana" y la carga de trabajo por día
+  cuestan O(días mostrados): cada día guarda su resumen y se actualiza al
+  entrar o salir un pedido.
+- Se mantiene al día con el bus de cambios: los pedidos publicados en
+  "pedidoventa" se vuelven a leer y cambian de día (o salen del
+  calendario al entregarse) sin recargar lo demás. Los cambios de estado
+  en bloque (estado_pedidos.py) se aplican directo con aplicar_estado y
+  no se vuelven a leer.
+- El bus solo avisa de los cambios de esta terminal: los pedidos creados
+  o modificados en otras cajas entran al recargar, que se hace al pasar
+  RECARGA_CALENDARIO segundos desde la última carga o al abrir la pestaña
+  de pedidos (cargar).
+
+Uso:
+    calendario = obtener_calendario()
+    calendario.pedidos("Pendiente", "ana")
+    calendario.semana(date.today())
+
+    python calendario_pedidos.py --dias 7
+"""
+
+import argparse
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from conexion import Conexion
+from bus_cambios import bus, marcadores
+
+ESTADOS_ACTIVOS = ("Pendiente", "En proceso", "Listo")
+DIAS_CALENDARIO = 14
+RECARGA_CALENDARIO = 60  # Segundos antes de volver a leer todo el calendario
+
+_calendario = None
+_calendario_lock = threading.Lock()
+
+
+def _fecha(valor):
+    """Normaliza una fecha de la base (date, datetime o texto) a date"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def resumen_vacio():
+    """
+    Resumen de un día sin pedidos
+
+    Returns:
+        dict: pedidos, piezas y total, más el número de pedidos por estado
+    """
+    resumen = {"pedidos": 0, "piezas": 0, "total": Decimal("0")}
+    for estado in ESTADOS_ACTIVOS:
+        resumen[estado] = 0
+    return resumen
+
+
+def consulta(ids=None):
+    """
+    Consulta de pedidos activos con su cliente y piezas
+
+    Args:
+        ids (list, optional): Leer solo estos pedidos, en cualquier estado
+
+    Returns:
+        tuple: (query, params)
+    """
+    if ids is None:
+        filtro = f"p.Estado IN ({marcadores(ESTADOS_ACTIVOS)})"
+        params = ESTADOS_ACTIVOS
+    else:
+        filtro = f"p.ID_PedidoVenta IN ({marcadores(ids)})"
+        params = tuple(ids)
+    query = f"""
+        SELECT
+            p.ID_PedidoVenta AS id,
+            c.Nombre_Cliente AS cliente,
+            p.Fecha_pedido AS fecha,
+            p.Fecha_entrega AS entrega,
+            p.Estado AS estado,
+            p.Total AS total,
+            COALESCE(SUM(d.Cantidad), 0) AS piezas
+        FROM pedidoventa p
+        JOIN Cliente c ON p.FK_ID_Cliente = c.ID_Cliente
+        LEFT JOIN detallepedidoventa d ON d.FK_ID_PedidoVenta = p.ID_PedidoVenta
+        WHERE {filtro}
+        GROUP BY p.ID_PedidoVenta, c.Nombre_Cliente, p.Fecha_pedido, p.Fecha_entrega,
+                 p.Estado, p.Total
+    """
+    return query, params
+
+
+class CalendarioPedidos:
+    """
+    Pedidos activos agrupados por día de entrega
+
+    Attributes:
+        por_dia (dict): date -> {id de pedido: fila}
+        resumen (dict): date -> resumen del día (ver resumen_vacio)
+        entrega (dict): id de pedido -> date en que está agendado
+        aplicados (set): Pedidos ya corregidos en memoria cuyo aviso del bus
+            no hay que volver a leer
+        cargado (bool): Si ya se leyó la base
+        cargado_en (float): time.monotonic() de la última carga completa
+        recargas (int): Número de cargas completas; las vistas que filtran el
+            calendario lo comparan para saber cuándo volver a armarse
+    """
+
+    def __init__(self):
+        self.por_dia = {}
+        self.resumen = {}
+        self.entrega = {}
+        self.aplicados = set()
+        self.cargado = False
+        self.cargado_en = 0.0
+        self.recargas = 0
+
+    def _agregar(self, fila):
+        """Agenda un pedido en su día y suma su resumen"""
+        fila["entrega"] = dia = _fecha(fila["entrega"])
+        fila["piezas"] = int(fila["piezas"] or 0)
+        self.por_dia.setdefault(dia, {})[fila["id"]] = fila
+        self.entrega[fila["id"]] = dia
+        resumen = self.resumen.setdefault(dia, resumen_vacio())
+        resumen["pedidos"] += 1
+        resumen["piezas"] += fila["piezas"]
+        resumen["total"] += Decimal(str(fila["total"] or 0))
+        resumen[fila["estado"]] += 1
+
+    def _quitar(self, id_pedido):
+        """Quita un pedido de su día y resta su resumen"""
+        dia = self.entrega.pop(id_pedido, None)
+        if dia is None:
+            return
+        fila = self.por_dia[dia].pop(id_pedido)
+        resumen = self.resumen[dia]
+        resumen["pedidos"] -= 1
+        resumen["piezas"] -= fila["piezas"]
+        resumen["total"] -= Decimal(str(fila["total"] or 0))
+        resumen[fila["estado"]] -= 1
+        if not self.por_dia[dia]:
+            del self.por_dia[dia]
+            del self.resumen[dia]
+
+    def cargar(self):
+        """Lee todos los pedidos activos (una consulta)"""
+        query, params = consulta()
+        filas = Conexion().consultar(query, params)
+        self.por_dia, self.resumen, self.entrega = {}, {}, {}
+        self.aplicados.clear()
+        for fila in filas:
+            self._agregar(fila)
+        self.cargado = True
+        self.cargado_en = time.monotonic()
+        self.recargas += 1
+
+    def vigente(self):
+        """Carga el calendario la primera vez que se usa o si ya venció"""
+        if not self.cargado or time.monotonic() - self.cargado_en >= RECARGA_CALENDARIO:
+            self.cargar()
+
+    def actualizar(self, ids):
+        """
+        Vuelve a leer solo estos pedidos y los reacomoda
+
+        Args:
+            ids (iterable): IDs de pedidoventa modificados
+        """
+        ids = sorted(ids)
+        if not ids:
+            return
+        query, params = consulta(ids)
+        filas = Conexion().consultar(query, params)
+        for id_pedido in ids:
+            self._quitar(id_pedido)
+        for fila in filas:
+            if fila["estado"] in ESTADOS_ACTIVOS:
+                self._agregar(fila)
+
+    def aplicar_estado(self, ids, estado):
+        """
+        Cambia en memoria el estado de pedidos ya actualizados en la base
+
+        Args:
+            ids (iterable): IDs de pedidoventa
+            estado (str): Estado nuevo; si ya no es activo el pedido sale
+        """
+        if not self.cargado:
+            return
+        for id_pedido in ids:
+            self.aplicados.add(id_pedido)
+            dia = self.entrega.get(id_pedido)
+            if dia is None:
+                continue
+            if estado not in ESTADOS_ACTIVOS:
+                self._quitar(id_pedido)
+                continue
+            fila = self.por_dia[dia][id_pedido]
+            self.resumen[dia][fila["estado"]] -= 1
+            self.resumen[dia][estado] += 1
+            fila["estado"] = estado
+
+    def refrescar_cambio(self, cambio):
+        """Suscriptor del bus: reacomoda los pedidos modificados"""
+        if not self.cargado:
+            return  # Se carga completo la primera vez que se consulta
+        try:
+            if cambio.ids is None:
+                self.cargar()
+            else:
+                pendientes = cambio.ids - self.aplicados
+                self.aplicados -= cambio.ids
+                self.actualizar(pendientes)
+        except Exception as e:
+            print(f"Error al actualizar calendario de pedidos: {e}")
+
+    def pedidos(self, estado=None, texto="", desde=None, hasta=None):
+        """
+        Pedidos activos ordenados por entrega, filtrados en memoria
+
+        Args:
+            estado (str, optional): Solo pedidos en este estado
+            texto (str, optional): Parte del nombre del cliente
+            desde, hasta (date, optional): Rango de entrega (inclusive)
+
+        Returns:
+            list: Filas con id, cliente, fecha, entrega, estado, total y piezas
+        """
+        self.vigente()
+        texto = texto.strip().lower()
+        resultado = []
+        for dia in sorted(self.por_dia):
+            if desde is not None and dia < desde:
+                continue
+            if hasta is not None and dia > hasta:
+                break
+            for id_pedido in sorted(self.por_dia[dia]):
+                fila = self.por_dia[dia][id_pedido]
+                if estado and fila["estado"] != estado:
+                    continue
+                if texto and texto not in (fila["cliente"] or "").lower():
+                    continue
+                resultado.append(fila)
+        return resultado
+
+    def dia(self, fecha):
+        """
+        Pedidos que se entregan un día
+
+        Args:
+            fecha (date): Día de entrega
+
+        Returns:
+            list: Filas del día ordenadas por ID
+        """
+        self.vigente()
+        pedidos = self.por_dia.get(fecha, {})
+        return [pedidos[id_pedido] for id_pedido in sorted(pedidos)]
+
+    def semana(self, desde, dias=DIAS_CALENDARIO):
+        """
+        Carga de trabajo por día (O(días), los resúmenes ya están sumados)
+
+        Args:
+            desde (date): Primer día
+            dias (int): Número de días
+
+        Returns:
+            list: [(date, resumen), ...] un elemento por día, con o sin pedidos
+        """
+        self.vigente()
+        return [(dia, self.resumen.get(dia) or resumen_vacio())
+                for dia in (desde + timedelta(days=i) for i in range(dias))]
+
+    def atrasados(self, hoy):
+        """
+        Resumen de los pedidos activos cuya entrega ya pasó
+
+        Args:
+            hoy (date): Día de referencia
+
+        Returns:
+            dict: Resumen acumulado (ver resumen_vacio)
+        """
+        self.vigente()
+        total = resumen_vacio()
+        for dia, resumen in self.resumen.items():
+            if dia < hoy:
+                for clave, valor in resumen.items():
+                    total[clave] += valor
+        return total
+
+
+def obtener_calendario():
+    """
+    Devuelve el calendario de entregas compartido del proceso
+
+    Returns:
+        CalendarioPedidos: Calendario suscrito a los cambios de pedidoventa
+    """
+    global _calendario
+    with _calendario_lock:
+        if _calendario is None:
+            _calendario = CalendarioPedidos()
+            bus.suscribir("pedidoventa", _calendario.refrescar_cambio)
+        return _calendario
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calendario de entregas de pedidos")
+    parser.add_argument("--dias", type=int, default=7, help="Días a mostrar desde hoy")
+    args = parser.parse_args()
+
+    calendario = obtener_calendario()
+    hoy = date.today()
+    atrasados = calendario.atrasados(hoy)
+    if atrasados["pedidos"]:
+        print(f"Atrasados: {atrasados['pedidos']} pedidos, {atrasados['piezas']} piezas, ${atrasados['total']:,.2f}")
+    for dia, resumen in calendario.semana(hoy, args.dias):
+        print(f"{dia.isoformat()}  {resumen['pedidos']:>3} pedidos  {resumen['piezas']:>5} piezas  "
+              f"${resumen['total']:>10,.2f}  (listos {resumen['Listo']})")
+        for fila in calendario.dia(dia):
+            print(f"    #{fila['id']:<6} {fila['cliente']:<25} {fila['estado']:<10} {fila['piezas']:>4} pzs")
@@ -0,0 +1,335 @@
+"""
+Pedidos de compra a proveedores
+-------------------------------
+Convierte las sugerencias de reorden (reorden.py) en pedidos a proveedor
+de una sola vez:
+
+- Toma cada materia prima e insumo cuya existencia más lo que viene en
+  camino ya está en su punto de reorden y pide hasta su nivel máximo.
+- Cada renglón se asigna al proveedor activo más barato que lo surte
+  (proveedor_materiaprima / proveedor_insumo; a igual precio, el que
+  entrega antes) y se arma un pedido por proveedor.
+- Los pedidos y sus renglones se escriben en una sola transacción: un
+  INSERT por pedido y un executemany por tabla de renglones.
+- Los PDF de los pedidos se generan en un hilo de fondo (GeneradorPDF)
+  para no detener la interfaz; quedan en la carpeta ordenes_compra.
+
+Uso:
+    resultado = generar_pedidos()
+    print(resultado["pedidos"], resultado["sin_proveedor"])
+
+    python compras.py              # genera pedidos y sus PDF
+    python compras.py --revisar    # solo muestra lo que se pediría
+"""
+
+import argparse
+import os
+import queue
+import threading
+from datetime import date, datetime
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from conexion import Conexion
+from bus_cambios import bus
+from dinero import redondear, CERO
+from recetario import TABLAS_PRECIO
+from reorden import TABLAS_PEDIDO, obtener_motor, refrescar
+
+CARPETA_PDF = "ordenes_compra"
+EXIGENCIA = "Pedido generado por punto de reorden"
+
+# Inserción de renglones por tipo de componente
+INSERTAR_RENGLON = {
+    "materiaprima": """
+        INSERT INTO pedido_materiaprima (FK_ID_Pedido, FK_ID_MateriaPrima, Precio, Unidades)
+        VALUES (%s, %s, %s, %s)
+    """,
+    "insumo": """
+        INSERT INTO pedido_insumo (FK_ID_Pedido, FK_ID_Insumo, Precio, Unidades)
+        VALUES (%s, %s, %s, %s)
+    """,
+}
+
+_generador = None
+
+
+def sugerencias(cursor):
+    """
+    Renglones a pedir agrupados por proveedor
+
+    Args:
+        cursor: Cursor abierto (punto_reorden ya calculado)
+
+    Returns:
+        tuple: ({id_proveedor: [renglón]}, [renglones sin proveedor activo]);
+            cada renglón es un dict tipo, id, nombre, unidades, precio, dias
+    """
+    por_proveedor = {}
+    sin_proveedor = []
+    for tipo, (tabla, clave) in TABLAS_PRECIO.items():
+        _, columna, tabla_proveedor = TABLAS_PEDIDO[tipo]
+        cursor.execute(
+            f"""SELECT t.{clave} AS id, t.Nombre AS nombre,
+                       r.Nivel_maximo - t.Cantidad - r.En_camino AS unidades,
+                       pv.FK_ID_Proveedor AS proveedor, pv.Precio_Referencia AS precio,
+                       pv.Tiempo_Entrega AS dias
+                FROM punto_reorden r
+                JOIN {tabla} t ON t.{clave} = r.FK_ID_Componente
+                LEFT JOIN {tabla_proveedor} pv ON pv.{columna} = t.{clave} AND pv.Estado = 'Activo'
+                    AND pv.FK_ID_Proveedor IN (SELECT Id_Proveedor FROM proveedor WHERE Estado = 'Activo')
+                WHERE r.Tipo = %s AND r.Punto_reorden > 0
+                  AND t.Cantidad + r.En_camino <= r.Punto_reorden
+                ORDER BY t.{clave}""",
+            (tipo,)
+        )
+        # Un renglón por componente con su mejor proveedor
+        mejores = {}
+        for fila in cursor.fetchall():
+            if fila["unidades"] <= 0:
+                continue
+            actual = mejores.get(fila["id"])
+            if fila["proveedor"] is None:
+                mejores.setdefault(fila["id"], fila)
+            elif (actual is None or actual["proveedor"] is None
+                  or (fila["precio"], fila["dias"]) < (actual["precio"], actual["dias"])):
+                mejores[fila["id"]] = fila
+        for fila in mejores.values():
+            renglon = {
+                "tipo": tipo,
+                "id": fila["id"],
+                "nombre": fila["nombre"],
+                "unidades": int(fila["unidades"]),
+                "precio": redondear(fila["precio"]) if fila["precio"] is not None else None,
+                "dias": int(fila["dias"]) if fila["dias"] is not None else None,
+            }
+            if fila["proveedor"] is None:
+                sin_proveedor.append(renglon)
+            else:
+                por_proveedor.setdefault(fila["proveedor"], []).append(renglon)
+    return por_proveedor, sin_proveedor
+
+
+def generar_pedidos(conexion=None, fecha=None, generar_pdf=True):
+    """
+    Genera un pedido por proveedor con todo lo que está en punto de reorden
+
+    Args:
+        conexion (Conexion, optional): Conexión a usar
+        fecha (date, optional): Fecha de los pedidos (hoy por defecto)
+        generar_pdf (bool): Encolar los PDF en el generador de fondo
+
+    Returns:
+        dict: pedidos (IDs), renglones, total, sin_proveedor (nombres)
+
+    Raises:
+        ValueError: Si no hay conexión a la base de datos
+    """
+    obtener_motor().vigente()
+    fecha = fecha or date.today()
+    conexion = conexion or Conexion()
+    conexion.conectar()
+    if not conexion.conn:
+        raise ValueError("No se pudo conectar a la base de datos")
+    cursor = conexion.cursor
+    pedidos = []
+    renglones = {tipo: [] for tipo in INSERTAR_RENGLON}
+    total_general = CERO
+    try:
+        por_proveedor, sin_proveedor = sugerencias(cursor)
+        for id_proveedor, lineas in sorted(por_proveedor.items()):
+            total = sum((redondear(l["precio"] * l["unidades"]) for l in lineas), CERO)
+            plazo = max(l["dias"] for l in lineas)
+            cursor.execute(
+                """INSERT INTO pedido (Plazo, Fecha, Exigencia, Estado, Total, FK_ID_Proveedor)
+                   VALUES (%s, %s, %s, 'Pendiente', %s, %s)""",
+                (plazo, fecha, EXIGENCIA, total, id_proveedor)
+            )
+            id_pedido = cursor.lastrowid
+            pedidos.append(id_pedido)
+            total_general += total
+            for l in lineas:
+                renglones[l["tipo"]].append((id_pedido, l["id"], l["precio"], l["unidades"]))
+
+        for tipo, filas in renglones.items():
+            if filas:
+                cursor.executemany(INSERTAR_RENGLON[tipo], filas)
+        conexion.conn.commit()
+    except Exception:
+        conexion.conn.rollback()
+        raise
+    finally:
+        conexion.cerrar()
+
+    # Lo pedido ya cuenta como "en camino" para el punto de reorden
+    ids_por_tipo = {tipo: [fila[1] for fila in filas] for tipo, filas in renglones.items() if filas}
+    if ids_por_tipo:
+        refrescar(ids_por_tipo)
+    for tipo, ids in ids_por_tipo.items():
+        bus.publicar(tipo, ids)
+    if pedidos:
+        bus.publicar("pedido", pedidos)
+        if generar_pdf:
+            obtener_generador().encolar(pedidos)
+
+    return {
+        "pedidos": pedidos,
+        "renglones": sum(len(filas) for filas in renglones.values()),
+        "total": total_general,
+        "sin_proveedor": [l["nombre"] for l in sin_proveedor],
+    }
+
+
+def crear_pdf_pedido(id_pedido, conexion=None, carpeta=CARPETA_PDF):
+    """
+    Escribe el PDF de un pedido a proveedor
+
+    Returns:
+        str: Ruta del PDF, o None si el pedido no existe
+    """
+    conexion = conexion or Conexion()
+    encabezado = conexion.consultar(
+        """SELECT p.ID_Pedido, p.Fecha, p.Plazo, p.Total, p.Exigencia,
+                  pr.Razon_Social, pr.RFC, pr.Correo_prov, pr.Telefono_prov, pr.Direccion
+           FROM pedido p JOIN proveedor pr ON pr.Id_Proveedor = p.FK_ID_Proveedor
+           WHERE p.ID_Pedido = %s""",
+        (id_pedido,)
+    )
+    if not encabezado:
+        return None
+    pedido = encabezado[0]
+    lineas = conexion.consultar(
+        """SELECT mp.Nombre AS nombre, pm.Unidades AS unidades, pm.Precio AS precio
+           FROM pedido_materiaprima pm JOIN materiaprima mp ON mp.ID_MateriaPrima = pm.FK_ID_MateriaPrima
+           WHERE pm.FK_ID_Pedido = %s AND pm.Cancelado = 0
+           UNION ALL
+           SELECT i.Nombre AS nombre, pi.Unidades AS unidades, pi.Precio AS precio
+           FROM pedido_insumo pi JOIN Insumo i ON i.ID_Insumo = pi.FK_ID_Insumo
+           WHERE pi.FK_ID_Pedido = %s AND pi.Cancelado = 0""",
+        (id_pedido, id_pedido)
+    )
+
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = os.path.join(carpeta, f"pedido_{id_pedido}.pdf")
+    doc = SimpleDocTemplate(ruta, pagesize=letter,
+                            topMargin=0.5*inch, bottomMargin=0.5*inch,
+                            leftMargin=0.5*inch, rightMargin=0.5*inch)
+    styles = getSampleStyleSheet()
+    elements = [
+        Paragraph(f"PEDIDO A PROVEEDOR #{pedido['ID_Pedido']}", styles['Heading1']),
+        Paragraph(f"Fecha: {pedido['Fecha']} &nbsp;&nbsp; Plazo de entrega: {pedido['Plazo']} días", styles['Normal']),
+        Spacer(1, 10),
+        Paragraph(f"<b>{pedido['Razon_Social']}</b> (RFC {pedido['RFC']})", styles['Normal']),
+        Paragraph(f"{pedido['Direccion']}", styles['Normal']),
+        Paragraph(f"{pedido['Correo_prov']} &nbsp;&nbsp; Tel. {pedido['Telefono_prov']}", styles['Normal']),
+        Spacer(1, 20),
+    ]
+
+    datos = [["Artículo", "Unidades", "Precio", "Importe"]]
+    for linea in lineas:
+        importe = redondear(linea["precio"] * linea["unidades"])
+        datos.append([linea["nombre"], str(linea["unidades"]), f"${linea['precio']:,.2f}", f"${importe:,.2f}"])
+    datos.append(["", "", "Total", f"${pedido['Total']:,.2f}"])
+
+    tabla = Table(datos, colWidths=[3.6*inch, 1*inch, 1.2*inch, 1.4*inch])
+    tabla.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (3, 0), colors.HexColor('#2E86C1')),
+        ('TEXTCOLOR', (0, 0), (3, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (3, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (3, -2), 1, colors.black),
+        ('ALIGN', (1, 0), (3, -1), 'RIGHT'),
+        ('FONTNAME', (2, -1), (3, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 1), (3, -1), 9),
+    ]))
+    elements.append(tabla)
+    if pedido['Exigencia']:
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph(pedido['Exigencia'], styles['Italic']))
+    doc.build(elements)
+    return ruta
+
+
+class GeneradorPDF:
+    """
+    Hilo de fondo que genera los PDF de los pedidos encolados
+
+    Attributes:
+        cola (queue.Queue): IDs de pedido por generar
+        generados (list): Rutas de los PDF ya escritos
+    """
+
+    def __init__(self, carpeta=CARPETA_PDF):
+        self.carpeta = carpeta
+        self.cola = queue.Queue()
+        self.generados = []
+        self.lock = threading.Lock()
+        self.hilo = None
+
+    def encolar(self, ids_pedido):
+        """Agrega pedidos a la cola y arranca el hilo la primera vez"""
+        for id_pedido in ids_pedido:
+            self.cola.put(id_pedido)
+        if self.hilo is None or not self.hilo.is_alive():
+            self.hilo = threading.Thread(target=self._ciclo, daemon=True)
+            self.hilo.start()
+
+    def _ciclo(self):
+        while True:
+            id_pedido = self.cola.get()
+            try:
+                ruta = crear_pdf_pedido(id_pedido, carpeta=self.carpeta)
+                if ruta:
+                    with self.lock:
+                        self.generados.append(ruta)
+            except Exception as e:
+                print(f"Error al generar el PDF del pedido {id_pedido}: {e}")
+            finally:
+                self.cola.task_done()
+
+    def esperar(self):
+        """Bloquea hasta que la cola queda vacía"""
+        self.cola.join()
+
+
+def obtener_generador():
+    """
+    Devuelve el generador de PDF compartido del proceso
+
+    Returns:
+        GeneradorPDF: Generador con su hilo de fondo
+    """
+    global _generador
+    if _generador is None:
+        _generador = GeneradorPDF()
+    return _generador
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pedidos de compra por punto de reorden")
+    parser.add_argument("--revisar", action="store_true", help="Solo mostrar lo que se pediría")
+    args = parser.parse_args()
+
+    inicio = datetime.now()
+    if args.revisar:
+        obtener_motor().vigente()
+        conexion = Conexion()
+        conexion.conectar()
+        por_proveedor, sin_proveedor = sugerencias(conexion.cursor)
+        conexion.cerrar()
+        for id_proveedor, lineas in sorted(por_proveedor.items()):
+            print(f"Proveedor {id_proveedor}:")
+            for l in lineas:
+                print(f"  {l['nombre']:<30} {l['unidades']:>6} x ${l['precio']}")
+        for l in sin_proveedor:
+            print(f"  Sin proveedor activo: {l['nombre']} ({l['unidades']})")
+    else:
+        resultado = generar_pedidos()
+        obtener_generador().esperar()
+        print(f"{len(resultado['pedidos'])} pedidos, {resultado['renglones']} renglones, "
+              f"total ${resultado['total']:,.2f} ({(datetime.now() - inicio).total_seconds():.2f} s)")
+        for ruta in obtener_generador().generados:
+            print(f"  {ruta}")
+        if resultado["sin_proveedor"]:
+            print(f"Sin proveedor activo: {', '.join(resultado['sin_proveedor'])}")
@@ -9,13 +9,19 @@ Incluye métodos para:
 - Ejecutar consultas SELECT
 - Ejecutar comandos UPDATE/INSERT/DELETE
 - Manejo automático de conexiones
+
+Con "motor": "sqlite" en credentials.json (o la variable de entorno
+BAMBI_SQLITE con la ruta del archivo) usa una base SQLite local creada desde
+el dump de db/, sin servidor MySQL (ver conexion_sqlite.py).
 """
 
 import os
 import sys
 import json
+import sqlite3
 import mysql.connector
 from mysql.connector import Error
+import conexion_sqlite
 
 def resource_path(relative_path):
     try:
@@ -26,6 +32,16 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 JSON_FILE = resource_path("credentials.json")
+SQLITE_DEFAULT = resource_path(os.path.join("db", "bambi_local.sqlite3"))
+
+# Errores de cualquiera de los dos motores
+ERRORES_BD = (Error, sqlite3.Error)
+
+
+def es_sqlite(cursor):
+    """Indica si el cursor es del motor SQLite local (conexion_sqlite.py)"""
+    return getattr(cursor, "motor", "mysql") == "sqlite"
+
 
 class Conexion:
     """
@@ -41,6 +57,8 @@ class Conexion:
         database (str): Nombre de la base de datos (default: panaderiaBambiDB)
         conn: Objeto de conexión MySQL
         cursor: Cursor para ejecutar comandos SQL
+        motor (str): 'mysql' (default) o 'sqlite'
+        archivo_sqlite (str): Archivo de la base cuando el motor es SQLite
     """
     
     def __init__(self, host='localhost', user='root', password='12345', database='panaderiaBambiDB', port='3036'):
@@ -61,12 +79,16 @@ class Conexion:
                 self.password = d['password']
                 self.database = d['database']
                 self.port = d['port']
+                self.motor = d.get('motor', 'mysql')
+                self.archivo_sqlite = d.get('archivo_sqlite', SQLITE_DEFAULT)
         except (FileNotFoundError, KeyError):
             self.host = host
             self.user = user
             self.password = password
             self.database = database
             self.port = port
+            self.motor = 'mysql'
+            self.archivo_sqlite = SQLITE_DEFAULT
 
             d = {
                 'host': host,
@@ -78,6 +100,10 @@ class Conexion:
             with open(JSON_FILE, "w") as f:
                 json.dump(d, f, indent=4)
 
+        if os.environ.get('BAMBI_SQLITE'):
+            self.motor = 'sqlite'
+            self.archivo_sqlite = os.environ['BAMBI_SQLITE']
+
         self.conn = None
         self.cursor = None
 
@@ -94,6 +120,9 @@ class Conexion:
         Prints:
             Mensaje de éxito o error en la conexión
         """
+        if self.motor == 'sqlite':
+            self.conectar_sqlite()
+            return
         try:
             self.conn = mysql.connector.connect(
                 host=self.host,
@@ -110,6 +139,41 @@ class Conexion:
             print(f"Error al conectar a MySQL: {e}")
             self.conn = None
 
+    def conectar_sqlite(self):
+        """
+        Abre la base SQLite local, creándola desde el dump si no existe
+
+        La primera vez se aplican las migraciones (esquema canónico de
+        db/bambidb.sql más índices) con las llaves foráneas desactivadas,
+        igual que mysqldump al cargar.
+        """
+        try:
+            if not os.path.exists(self.archivo_sqlite):
+                self.crear_base_sqlite()
+            self.conn = conexion_sqlite.conectar(self.archivo_sqlite)
+            self.cursor = self.conn.cursor(dictionary=True)
+        except sqlite3.Error as e:
+            print(f"Error al conectar a SQLite: {e}")
+            self.conn = None
+
+    def crear_base_sqlite(self):
+        """Crea el archivo SQLite y aplica las migraciones"""
+        import migraciones  # Importación diferida: migraciones importa este módulo
+
+        print(f"Creando base SQLite en {self.archivo_sqlite}...")
+        self.conn = conexion_sqlite.conectar(self.archivo_sqlite, claves_foraneas=False)
+        self.cursor = self.conn.cursor(dictionary=True)
+        try:
+            aplicadas = migraciones.migrar(self)
+        finally:
+            self.cerrar()
+        if len(aplicadas) < len(migraciones.MIGRACIONES):
+            # No dejar una base a medias que parezca válida la próxima vez
+            for sufijo in ("", "-wal", "-shm"):
+                if os.path.exists(self.archivo_sqlite + sufijo):
+                    os.remove(self.archivo_sqlite + sufijo)
+            raise sqlite3.Error("no se pudo crear la base desde el dump")
+
     def cerrar(self):
         """
         Cierra la conexión con la base de datos
@@ -188,7 +252,7 @@ class Conexion:
             self.cursor.execute(query, params or ())
             self.conn.commit()  # Confirmar los cambios
             return True
-        except Error as e:
+        except ERRORES_BD as e:
             print(f"Error al ejecutar comando: {e}")
             self.conn.rollback()  # Revertir cambios en caso de error
             return False
@@ -0,0 +1,447 @@
+"""
+Motor SQLite para la clase Conexion
+-----------------------------------
+Permite ejecutar el sistema completo sin servidor MySQL: la base se crea en
+un archivo local a partir del dump canónico (db/bambidb.sql) mediante las
+migraciones, y las consultas del código se traducen al vuelo.
+
+La capa imita al conector de MySQL en lo que usa el sistema:
+- cursor(dictionary=True) con execute/executemany/fetchone/fetchall,
+  lastrowid y rowcount
+- commit/rollback/close/is_connected en la conexión
+- marcadores %s, cadenas con escapes de barra invertida y DDL de mysqldump
+- funciones HOUR(), DATEDIFF(), NOW(), CURDATE() y LAST_INSERT_ID()
+- DECIMAL, DATE y DATETIME se devuelven como Decimal, date y datetime
+
+Uso:
+    En credentials.json:  "motor": "sqlite", "archivo_sqlite": "db/bambi_local.sqlite3"
+    o con variable de entorno:  BAMBI_SQLITE=db/bambi_local.sqlite3 python menu.py
+"""
+
+import datetime
+import re
+import sqlite3
+import threading
+from decimal import Decimal
+
+# Último ID insertado por hilo. La clase Conexion abre una conexión por
+# llamada, así que LAST_INSERT_ID() debe sobrevivir al cierre de la conexión
+# que hizo el INSERT.
+_estado_hilo = threading.local()
+
+# Sentencias de mysqldump sin equivalente en SQLite (se ignoran)
+_SENTENCIAS_IGNORADAS = ("/*!", "LOCK TABLES", "UNLOCK TABLES", "SET ")
+
+_TIPOS_TEXTO = re.compile(r"^(var)?char\b|^(tiny|medium|long)?text\b|^enum\b", re.IGNORECASE)
+
+
+# ---------------------------------------------------------------------------
+# Conversión de tipos
+# ---------------------------------------------------------------------------
+
+def _convertir_fecha(valor):
+    texto = valor.decode()
+    try:
+        return datetime.date.fromisoformat(texto[:10])
+    except ValueError:
+        return texto
+
+
+def _convertir_fecha_hora(valor):
+    texto = valor.decode()
+    try:
+        return datetime.datetime.fromisoformat(texto)
+    except ValueError:
+        return _convertir_fecha(valor)
+
+
+def _convertir_decimal(valor):
+    try:
+        return Decimal(valor.decode())
+    except ArithmeticError:
+        return valor.decode()
+
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime.date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda d: d.isoformat(sep=" ", timespec="seconds"))
+sqlite3.register_converter("DECIMAL", _convertir_decimal)
+sqlite3.register_converter("DATE", _convertir_fecha)
+sqlite3.register_converter("DATETIME", _convertir_fecha_hora)
+sqlite3.register_converter("TIMESTAMP", _convertir_fecha_hora)
+
+
+# ---------------------------------------------------------------------------
+# Funciones de MySQL
+# ---------------------------------------------------------------------------
+
+def _a_fecha_hora(valor):
+    if valor is None:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(str(valor))
+    except ValueError:
+        return None
+
+
+def _hour(valor):
+    fecha = _a_fecha_hora(valor)
+    return fecha.hour if fecha else None
+
+
+def _datediff(fin, inicio):
+    fecha_fin, fecha_inicio = _a_fecha_hora(fin), _a_fecha_hora(inicio)
+    if fecha_fin is None or fecha_inicio is None:
+        return None
+    return (fecha_fin.date() - fecha_inicio.date()).days
+
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _curdate():
+    return datetime.date.today().isoformat()
+
+
+def _last_insert_id():
+    return getattr(_estado_hilo, "ultimo_id", 0)
+
+
+def registrar_funciones(conn):
+    """Registra en la conexión las funciones de MySQL usadas por el sistema"""
+    conn.create_function("HOUR", 1, _hour, deterministic=True)
+    conn.create_function("DATEDIFF", 2, _datediff, deterministic=True)
+    conn.create_function("NOW", 0, _now)
+    conn.create_function("CURDATE", 0, _curdate)
+    conn.create_function("LAST_INSERT_ID", 0, _last_insert_id)
+
+
+# ---------------------------------------------------------------------------
+# Traducción de SQL
+# ---------------------------------------------------------------------------
+
+def _leer_cadena(sql, i):
+    """
+    Lee una cadena de MySQL que empieza en sql[i] (comilla simple o doble)
+
+    Returns:
+        tuple: (literal SQLite con comillas simples, índice siguiente)
+    """
+    comilla = sql[i]
+    escapes = {"n": "\n", "r": "\r", "t": "\t", "0": "\0", "Z": "\x1a"}
+    contenido = []
+    i += 1
+    while i < len(sql):
+        c = sql[i]
+        if c == "\\" and i + 1 < len(sql):
+            siguiente = sql[i + 1]
+            contenido.append(escapes.get(siguiente, siguiente))
+            i += 2
+            continue
+        if c == comilla:
+            if i + 1 < len(sql) and sql[i + 1] == comilla:
+                contenido.append(comilla)
+                i += 2
+                continue
+            i += 1
+            break
+        contenido.append(c)
+        i += 1
+    texto = "".join(contenido).replace("'", "''")
+    return f"'{texto}'", i
+
+
+def traducir_consulta(sql, con_parametros=True):
+    """
+    Traduce una sentencia DML de MySQL a SQLite
+
+    Cambia los marcadores %s por ?, normaliza las cadenas (escapes con
+    barra invertida y comillas dobles) y deja intactos los identificadores
+    entre acentos graves, que SQLite acepta.
+
+    Args:
+        sql (str): Sentencia en dialecto MySQL
+        con_parametros (bool): Si la sentencia recibe parámetros (%% -> %)
+
+    Returns:
+        str: Sentencia para SQLite
+    """
+    salida = []
+    i = 0
+    while i < len(sql):
+        c = sql[i]
+        if c in ("'", '"'):
+            literal, i = _leer_cadena(sql, i)
+            salida.append(literal)
+            continue
+        if c == "`":
+            fin = sql.find("`", i + 1)
+            fin = len(sql) - 1 if fin < 0 else fin
+            salida.append(sql[i:fin + 1])
+            i = fin + 1
+            continue
+        if c == "%" and i + 1 < len(sql):
+            if sql[i + 1] == "s":
+                salida.append("?")
+                i += 2
+                continue
+            if sql[i + 1] == "%" and con_parametros:
+                salida.append("%")
+                i += 2
+                continue
+        salida.append(c)
+        i += 1
+    return "".join(salida)
+
+
+def _dividir_nivel_superior(texto):
+    """Divide por comas que no estén dentro de paréntesis ni cadenas"""
+    partes, actual, nivel, i = [], [], 0, 0
+    while i < len(texto):
+        c = texto[i]
+        if c in ("'", '"'):
+            literal, i = _leer_cadena(texto, i)
+            actual.append(literal)
+            continue
+        if c == "(":
+            nivel += 1
+        elif c == ")":
+            nivel -= 1
+        elif c == "," and nivel == 0:
+            partes.append("".join(actual).strip())
+            actual = []
+            i += 1
+            continue
+        actual.append(c)
+        i += 1
+    if "".join(actual).strip():
+        partes.append("".join(actual).strip())
+    return partes
+
+
+def _columnas_indice(definicion):
+    return definicion[definicion.index("("):definicion.rindex(")") + 1]
+
+
+def traducir_columna(definicion):
+    """
+    Traduce la definición de una columna de MySQL a SQLite
+
+    Returns:
+        tuple: (definición traducida, True si la columna es AUTO_INCREMENT)
+    """
+    auto = bool(re.search(r"\bAUTO_INCREMENT\b", definicion, re.IGNORECASE))
+    texto = re.sub(r"\bAUTO_INCREMENT\b", "", definicion, flags=re.IGNORECASE)
+    texto = re.sub(r"\bunsigned\b", "", texto, flags=re.IGNORECASE)
+    texto = re.sub(r"\b(CHARACTER SET|COLLATE)\s+\w+", "", texto, flags=re.IGNORECASE)
+    texto = re.sub(r"\bCOMMENT\s+'(?:[^']|'')*'", "", texto, flags=re.IGNORECASE)
+    texto = re.sub(r"\bON UPDATE CURRENT_TIMESTAMP\b", "", texto, flags=re.IGNORECASE)
+    texto = re.sub(r"\(\s*curdate\(\)\s*\)", "(date('now','localtime'))", texto, flags=re.IGNORECASE)
+    # MySQL guarda la hora local; CURRENT_TIMESTAMP en SQLite es UTC
+    texto = re.sub(r"\bDEFAULT CURRENT_TIMESTAMP\b", "DEFAULT (datetime('now','localtime'))", texto, flags=re.IGNORECASE)
+    texto = re.sub(r"\benum\((?:[^()']|'(?:[^']|'')*')*\)", "varchar(50)", texto, flags=re.IGNORECASE)
+    texto = texto.replace("_utf8mb4'", "'")
+    texto = re.sub(r"\s+", " ", texto).strip()
+
+    # Comparaciones sin distinguir mayúsculas, como la colación de MySQL
+    partes = texto.split(None, 2)
+    if len(partes) >= 2 and _TIPOS_TEXTO.match(partes[1]) and "GENERATED" not in texto.upper():
+        partes.insert(2, "COLLATE NOCASE")
+        texto = " ".join(partes)
+    return texto, auto
+
+
+def traducir_create_table(sql):
+    """
+    Traduce un CREATE TABLE de mysqldump a SQLite
+
+    Las claves simples (KEY/UNIQUE KEY) se convierten en CREATE INDEX
+    aparte, con el nombre de la tabla como prefijo porque en SQLite los
+    nombres de índice son globales.
+
+    Returns:
+        list: Sentencias a ejecutar en orden
+    """
+    inicio = sql.index("(")
+    fin = sql.rindex(")")
+    encabezado = sql[:inicio].strip()
+    tabla = re.search(r"`?(\w+)`?\s*$", encabezado).group(1)
+    si_no_existe = "IF NOT EXISTS" in encabezado.upper()
+
+    columnas, restricciones, indices = [], [], []
+    primaria = None
+    autoincrementales = set()
+    for definicion in _dividir_nivel_superior(sql[inicio + 1:fin]):
+        mayus = definicion.upper()
+        if mayus.startswith("PRIMARY KEY"):
+            primaria = _columnas_indice(definicion)
+        elif mayus.startswith(("UNIQUE KEY", "UNIQUE INDEX", "KEY ", "INDEX ", "FULLTEXT")):
+            if mayus.startswith("FULLTEXT"):
+                continue
+            nombre = re.search(r"(?:KEY|INDEX)\s+`?(\w+)`?", definicion, re.IGNORECASE).group(1)
+            unico = "UNIQUE " if mayus.startswith("UNIQUE") else ""
+            indices.append(
+                f"CREATE {unico}INDEX IF NOT EXISTS `{tabla}_{nombre}` "
+                f"ON `{tabla}` {_columnas_indice(definicion)}"
+            )
+        elif mayus.startswith(("CONSTRAINT", "FOREIGN KEY", "CHECK")):
+            restricciones.append(definicion.replace("_utf8mb4'", "'"))
+        else:
+            columna, auto = traducir_columna(definicion)
+            nombre = columna.split(None, 1)[0].strip("`")
+            if auto:
+                autoincrementales.add(nombre)
+            columnas.append((nombre, columna))
+
+    cuerpo = []
+    columnas_primaria = [c.strip(" `") for c in primaria.strip("()").split(",")] if primaria else []
+    for nombre, columna in columnas:
+        if nombre in autoincrementales and columnas_primaria == [nombre]:
+            # Única forma de autoincremento en SQLite
+            columna = f"`{nombre}` INTEGER PRIMARY KEY AUTOINCREMENT"
+        cuerpo.append(columna)
+    if primaria and not (len(columnas_primaria) == 1 and columnas_primaria[0] in autoincrementales):
+        cuerpo.append(f"PRIMARY KEY {primaria}")
+    cuerpo.extend(restricciones)
+
+    crear = "CREATE TABLE IF NOT EXISTS" if si_no_existe else "CREATE TABLE"
+    definiciones = ",\n  ".join(cuerpo)
+    return [f"{crear} `{tabla}` (\n  {definiciones}\n)"] + indices
+
+
+def traducir_alter_table(sql):
+    """Traduce ALTER TABLE ... ADD/CHANGE COLUMN y DROP INDEX ... ON"""
+    cambio = re.match(
+        r"ALTER TABLE\s+`?(\w+)`?\s+CHANGE COLUMN\s+`?(\w+)`?\s+`?(\w+)`?", sql, re.IGNORECASE
+    )
+    if cambio:
+        tabla, anterior, nueva = cambio.groups()
+        return [f"ALTER TABLE `{tabla}` RENAME COLUMN `{anterior}` TO `{nueva}`"]
+    agregar = re.match(r"(ALTER TABLE\s+`?\w+`?\s+ADD COLUMN\s+)(.*)$", sql, re.IGNORECASE | re.DOTALL)
+    if agregar:
+        columna, _ = traducir_columna(agregar.group(2))
+        return [agregar.group(1) + columna]
+    return [traducir_consulta(sql, False)]
+
+
+def traducir(sql, con_parametros=True):
+    """
+    Traduce una sentencia de MySQL a una o más sentencias de SQLite
+
+    Args:
+        sql (str): Sentencia en dialecto MySQL
+        con_parametros (bool): Si la sentencia recibe parámetros
+
+    Returns:
+        list: Sentencias para SQLite (vacía si no tiene equivalente)
+    """
+    texto = sql.strip().rstrip(";").strip()
+    mayus = texto.upper()
+    if not texto or mayus.startswith(_SENTENCIAS_IGNORADAS):
+        return []
+    if mayus.startswith("CREATE TABLE"):
+        return traducir_create_table(texto)
+    if mayus.startswith("ALTER TABLE"):
+        return traducir_alter_table(texto)
+    indice = re.match(r"DROP INDEX\s+(`?\w+`?)\s+ON\s+`?\w+`?$", texto, re.IGNORECASE)
+    if indice:
+        return [f"DROP INDEX IF EXISTS {indice.group(1)}"]
+    return [traducir_consulta(texto, con_parametros)]
+
+
+# ---------------------------------------------------------------------------
+# Conexión y cursor compatibles con mysql.connector
+# ---------------------------------------------------------------------------
+
+def _fila_dict(cursor, fila):
+    return {col[0]: valor for col, valor in zip(cursor.description, fila)}
+
+
+class CursorSQLite:
+    """Cursor que acepta SQL de MySQL y devuelve filas como diccionarios"""
+
+    motor = "sqlite"
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=None):
+        # Los parámetros se pasan siempre que vengan: si no coinciden con los
+        # marcadores, sqlite3 lo reporta en vez de ignorarlos en silencio
+        sentencias = traducir(query, bool(params))
+        parametros = tuple(params) if params is not None else ()
+        for sentencia in sentencias:
+            self._cursor.execute(sentencia, parametros)
+        if sentencias and sentencias[-1].lstrip().upper().startswith(("INSERT", "REPLACE")):
+            _estado_hilo.ultimo_id = self._cursor.lastrowid
+
+    def executemany(self, query, lista_params):
+        for sentencia in traducir(query, True):
+            self._cursor.executemany(sentencia, [tuple(p) for p in lista_params])
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionSQLite:
+    """Conexión SQLite con la interfaz del conector de MySQL"""
+
+    def __init__(self, ruta, claves_foraneas=True):
+        self._conn = sqlite3.connect(ruta, timeout=10, detect_types=sqlite3.PARSE_DECLTYPES)
+        self._conn.row_factory = _fila_dict
+        registrar_funciones(self._conn)
+        self._conn.execute(f"PRAGMA foreign_keys = {'ON' if claves_foraneas else 'OFF'}")
+        self._abierta = True
+
+    def cursor(self, dictionary=True):
+        return CursorSQLite(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self):
+        return self._abierta
+
+    def close(self):
+        self._conn.close()
+        self._abierta = False
+
+
+def conectar(ruta, claves_foraneas=True):
+    """
+    Abre una conexión SQLite compatible con el código de MySQL
+
+    Args:
+        ruta (str): Archivo de la base de datos
+        claves_foraneas (bool): Activar la revisión de llaves foráneas
+            (se desactiva al cargar el dump, que no viene en orden)
+
+    Returns:
+        ConexionSQLite: Conexión abierta
+    """
+    conn = ConexionSQLite(ruta, claves_foraneas)
+    # WAL deja leer mientras otro hilo escribe (precarga de módulos)
+    conn._conn.execute("PRAGMA journal_mode = WAL")
+    return conn
@@ -0,0 +1,120 @@
+"""
+Motor de dinero e impuestos del sistema POS Bambi
+
+Todos los importes se calculan con Decimal y se redondean a centavos
+(ROUND_HALF_UP) línea por línea, de modo que el ticket en pantalla, el PDF,
+la venta registrada y la factura coinciden al centavo.
+
+El IVA se toma por producto (columna CatProducto.IVA); si no se indica se
+usa la tasa general del 16%.
+
+Uso:
+    subtotal, iva, total = calcular_linea(precio, unidades, tasa_iva)
+    subtotal, iva, total = calcular_totales([(precio, unidades, tasa_iva), ...])
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+
+CENTAVO = Decimal("0.01")
+CERO = Decimal("0")
+IVA_GENERAL = Decimal("0.16")
+
+
+def a_decimal(valor):
+    """
+    Convierte un valor numérico a Decimal sin arrastrar errores de float
+
+    Args:
+        valor: int, float, str, Decimal o None
+
+    Returns:
+        Decimal: Valor convertido (0 si es None o inválido)
+    """
+    if isinstance(valor, Decimal):
+        return valor
+    if valor is None or valor == "":
+        return CERO
+    try:
+        # str() evita convertir la representación binaria completa del float
+        return Decimal(str(valor).strip())
+    except (InvalidOperation, ValueError):
+        return CERO
+
+
+def redondear(valor):
+    """
+    Redondea un importe a centavos
+
+    Args:
+        valor: Importe a redondear
+
+    Returns:
+        Decimal: Importe con dos decimales
+    """
+    return a_decimal(valor).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def tasa_iva(valor=None):
+    """
+    Normaliza una tasa de IVA
+
+    Acepta la tasa como fracción (0.16) o como porcentaje (16).
+
+    Args:
+        valor: Tasa de IVA; None para la tasa general
+
+    Returns:
+        Decimal: Tasa como fracción
+    """
+    if valor is None or valor == "":
+        return IVA_GENERAL
+    tasa = a_decimal(valor)
+    if tasa > 1:
+        tasa = tasa / 100
+    return tasa
+
+
+@lru_cache(maxsize=4096)
+def _calcular_linea(precio, unidades, tasa):
+    """Cálculo cacheado de una línea (los argumentos ya están normalizados)"""
+    subtotal = redondear(precio * unidades)
+    iva = redondear(subtotal * tasa)
+    return subtotal, iva, subtotal + iva
+
+
+def calcular_linea(precio, unidades, tasa=None):
+    """
+    Calcula subtotal, IVA y total de una línea de venta
+
+    Los resultados se cachean por (precio, unidades, tasa), por lo que
+    recalcular la misma línea en cada cuadro no repite la aritmética.
+
+    Args:
+        precio: Precio unitario sin IVA
+        unidades: Cantidad vendida
+        tasa: Tasa de IVA del producto (None para la general)
+
+    Returns:
+        tuple: (subtotal, iva, total) como Decimal
+    """
+    return _calcular_linea(a_decimal(precio), a_decimal(unidades), tasa_iva(tasa))
+
+
+def calcular_totales(lineas):
+    """
+    Calcula los totales de una canasta en una sola pasada
+
+    Args:
+        lineas: Iterable de tuplas (precio, unidades) o (precio, unidades, tasa)
+
+    Returns:
+        tuple: (subtotal, iva, total) como Decimal
+    """
+    subtotal = iva = CERO
+    for linea in lineas:
+        sub_linea, iva_linea, _ = calcular_linea(*linea)
+        subtotal += sub_linea
+        iva += iva_linea
+    return subtotal, iva, subtotal + iva
+
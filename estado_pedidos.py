@@ -0,0 +1,104 @@
+"""
+Cambios de estado de pedidos de clientes
+----------------------------------------
+Avanza varios pedidos a la vez por el flujo Pendiente -> Listo ->
+Entregado y deja constancia de cada cambio en historial_pedido.
+
+1. Lee con un solo SELECT (FOR UPDATE en MySQL) el estado actual de los
+   pedidos; solo avanzan los que están en un estado de origen válido.
+2. Un solo UPDATE ... WHERE ID_PedidoVenta IN (...) cambia todos, y el
+   historial se escribe con executemany, en la misma transacción.
+3. El calendario de entregas se corrige en memoria con el resultado, sin
+   volver a leer los pedidos, y se avisa a los demás módulos por el bus.
+
+Uso:
+    resultado = cambiar_estado([12, 15, 18], "Entregado")
+
+    python estado_pedidos.py Listo 12 15 18
+"""
+
+import argparse
+from datetime import datetime
+from conexion import Conexion, es_sqlite
+from bus_cambios import bus, marcadores
+from calendario_pedidos import obtener_calendario
+
+# Estado nuevo -> estados desde los que se puede llegar a él
+ORIGENES = {
+    "Listo": ("Pendiente", "En proceso"),
+    "Entregado": ("Listo",),
+}
+
+
+def cambiar_estado(ids, estado, conexion=None):
+    """
+    Cambia el estado de varios pedidos en una sola transacción
+
+    Args:
+        ids (iterable): IDs de pedidoventa
+        estado (str): Estado nuevo (una llave de ORIGENES)
+        conexion (Conexion, optional): Conexión a usar
+
+    Returns:
+        dict: {"cambiados": {id: estado anterior}, "omitidos": [ids que no
+            existen o no están en un estado de origen válido]}
+    """
+    if estado not in ORIGENES:
+        raise ValueError(f"Estado no válido: {estado}")
+    ids = sorted(set(ids))
+    if not ids:
+        return {"cambiados": {}, "omitidos": []}
+    origenes = ORIGENES[estado]
+
+    conexion = conexion or Conexion()
+    conexion.conectar()
+    if not conexion.conn:
+        raise ConnectionError("No se pudo conectar a la base de datos")
+    cursor = conexion.cursor
+    try:
+        bloqueo = "" if es_sqlite(cursor) else " FOR UPDATE"
+        cursor.execute(
+            f"SELECT ID_PedidoVenta AS id, Estado AS estado FROM pedidoventa "
+            f"WHERE ID_PedidoVenta IN ({marcadores(ids)}) ORDER BY ID_PedidoVenta{bloqueo}",
+            tuple(ids)
+        )
+        cambiados = {fila["id"]: fila["estado"] for fila in cursor.fetchall()
+                     if fila["estado"] in origenes}
+
+        if cambiados:
+            validos = sorted(cambiados)
+            cursor.execute(
+                f"UPDATE pedidoventa SET Estado = %s "
+                f"WHERE ID_PedidoVenta IN ({marcadores(validos)}) AND Estado IN ({marcadores(origenes)})",
+                (estado, *validos, *origenes)
+            )
+            fecha = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            cursor.executemany("""
+                INSERT INTO historial_pedido (FK_ID_PedidoVenta, Estado_anterior, Estado_nuevo, Fecha)
+                VALUES (%s, %s, %s, %s)
+            """, [(id_pedido, cambiados[id_pedido], estado, fecha) for id_pedido in validos])
+        conexion.conn.commit()
+    except Exception:
+        conexion.conn.rollback()
+        raise
+    finally:
+        conexion.cerrar()
+
+    if cambiados:
+        obtener_calendario().aplicar_estado(cambiados, estado)
+        bus.publicar("pedidoventa", sorted(cambiados))
+    return {"cambiados": cambiados, "omitidos": [i for i in ids if i not in cambiados]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cambia el estado de varios pedidos a la vez")
+    parser.add_argument("estado", choices=sorted(ORIGENES), help="Estado nuevo")
+    parser.add_argument("pedidos", nargs="+", type=int, help="IDs de pedidoventa")
+    args = parser.parse_args()
+
+    resultado = cambiar_estado(args.pedidos, args.estado)
+    for id_pedido, anterior in sorted(resultado["cambiados"].items()):
+        print(f"  #{id_pedido}: {anterior} -> {args.estado}")
+    if resultado["omitidos"]:
+        print(f"Sin cambio (no existen o no pueden pasar a {args.estado}): "
+              f"{', '.join(str(i) for i in resultado['omitidos'])}")
@@ -24,6 +24,7 @@ from reportlab.graphics.shapes import Rect
 from reportlab.graphics.shapes import Drawing
 from reportlab.graphics.barcode.qr import QrCodeWidget
 import pdfplumber
+from dinero import a_decimal, calcular_linea, calcular_totales, tasa_iva
 
 class Factura:
     def __init__(self, x, y, ancho, alto):
@@ -355,7 +356,7 @@ class Factura:
                     # Buscar líneas con formato de productos
                     for i, line in enumerate(lines):
                         # Buscar líneas que tengan formato "cantidad x $precio = $total"
-                        if 'x $' in line and '= $' in line and not ('SUBTOTAL' in line or 'TOTAL' in line or 'IVA' in line):
+                        if 'x $' in line and '= $' in line and not line.upper().startswith(('SUBTOTAL', 'TOTAL', 'IVA')):
                             try:
                                 # Formato esperado: "2 x $15.00 = $30.00"
                                 parts = line.split(' x $')
@@ -368,7 +369,11 @@ class Factura:
                                     precio_part = parts[1]
                                     if ' = $' in precio_part:
                                         precio_unitario_str, precio_total_str = precio_part.split(' = $')
-                                        precio_unitario = float(precio_unitario_str.strip())
+                                        precio_unitario = a_decimal(precio_unitario_str)
+                                        # Tasa de IVA particular: "... = $30.00 T0%"
+                                        iva = None
+                                        if ' T' in precio_total_str:
+                                            iva = tasa_iva(precio_total_str.split(' T')[1].rstrip('%'))
                                         
                                         # Buscar el nombre del producto en líneas anteriores
                                         if i > 0:
@@ -378,6 +383,7 @@ class Factura:
                                                     "nombre": nombre,
                                                     "cantidad": cantidad,
                                                     "precio_unitario": precio_unitario,
+                                                    "iva": iva,
                                                     "clave_sat": "50181900",  # Clave SAT para productos de panadería
                                                     "unidad_medida": "H87"   # Unidad SAT - Pieza
                                                 })
@@ -391,12 +397,10 @@ class Factura:
         return productos
 
     def calcular_totales(self, productos):
-        """Calcula los totales de la factura"""
-        subtotal = sum(item["cantidad"] * item["precio_unitario"] for item in productos)
-        iva_porcentaje = 16
-        iva = subtotal * (iva_porcentaje / 100)
-        total = subtotal + iva
-        return subtotal, iva, total
+        """Calcula los totales de la factura con el mismo motor que el ticket"""
+        return calcular_totales(
+            (item["precio_unitario"], item["cantidad"], item.get("iva")) for item in productos
+        )
 
     def generar_factura_pdf(self, productos):
         """Genera el archivo PDF de la factura con un formato mejorado"""
@@ -582,7 +586,7 @@ class Factura:
         # Tabla de productos
         data = [['Clave SAT', 'Descripción', 'Unidad', 'Cantidad', 'Valor Unitario', 'Importe']]
         for item in productos:
-            importe = item["cantidad"] * item["precio_unitario"]
+            importe = calcular_linea(item["precio_unitario"], item["cantidad"], item.get("iva"))[0]
             data.append([
                 item.get('clave_sat', '50181900'),
                 item['nombre'],
@@ -619,7 +623,7 @@ class Factura:
         subtotal, iva, total = self.calcular_totales(productos)
         totales_data = [
             ["Subtotal:", f"${subtotal:.2f}"],
-            ["IVA (16%):", f"${iva:.2f}"],
+            ["IVA:" if any(p.get("iva") is not None for p in productos) else "IVA (16%):", f"${iva:.2f}"],
             ["Total:", f"${total:.2f}"]
         ]
         tabla_totales = Table(totales_data, colWidths=[5.5*inch, 1.5*inch])
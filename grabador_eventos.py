@@ -0,0 +1,202 @@
+"""
+Grabación de eventos de entrada en un registro binario compacto
+---------------------------------------------------------------
+Guarda el flujo de eventos de pygame del menú principal con su tiempo y la
+pestaña activa, para reproducir después una sesión real (por ejemplo "se
+congeló durante una venta grande") con benchmarks/reproducir.py.
+
+Formato (little endian):
+    Encabezado: b"BEV2", ancho y alto de la ventana (2 x uint16) y hora de
+                inicio (float64, epoch)
+    Registro:   segundos desde el inicio (float64), cuadro (uint32), pestaña
+                (uint8), tipo de evento (uint16), largo de los datos (uint8)
+                y los datos
+
+El cuadro es el número de vuelta del ciclo principal (nuevo_cuadro): los
+eventos con el mismo cuadro llegaron en el mismo pygame.event.get() y se
+reproducen juntos.
+
+Datos por tipo de evento:
+    MOUSEMOTION                  x, y, rel_x, rel_y (int16), botones (uint8)
+    MOUSEBUTTONDOWN/UP           x, y (int16), botón (uint8)
+    MOUSEWHEEL                   x, y (int8)
+    KEYDOWN/KEYUP                tecla (int32), modificadores (uint16), texto UTF-8
+    TEXTINPUT                    texto UTF-8
+    VIDEORESIZE                  ancho, alto (uint16)
+    QUIT                         sin datos
+
+Los demás eventos (ventana, eventos propios del sistema) no se graban.
+
+Uso:
+    BAMBI_GRABAR_EVENTOS=registros/ python login.py   # un archivo por sesión
+"""
+
+import datetime
+import os
+import struct
+import time
+
+import pygame
+
+MAGIA = b"BEV2"
+ENCABEZADO = struct.Struct("<4sHHd")
+REGISTRO = struct.Struct("<dIBHB")
+
+# Código de pestaña en el registro (0 = ninguna, solo el menú)
+PESTANAS = ["", "VENTA", "ALMACEN", "PEDIDO", "RECETA", "REPORTES", "AJUSTES"]
+
+_MOVIMIENTO = struct.Struct("<hhhhB")
+_BOTON = struct.Struct("<hhB")
+_RUEDA = struct.Struct("<bb")
+_TECLA = struct.Struct("<iH")
+_TAMANO = struct.Struct("<HH")
+
+
+def _acotar(valor, minimo=-32768, maximo=32767):
+    return max(minimo, min(maximo, int(valor)))
+
+
+def codificar(evento):
+    """
+    Codifica los datos de un evento
+
+    Returns:
+        bytes: Datos del evento, o None si el tipo no se graba
+    """
+    tipo = evento.type
+    if tipo == pygame.MOUSEMOTION:
+        botones = sum(1 << i for i, b in enumerate(getattr(evento, "buttons", ())[:8]) if b)
+        rel = getattr(evento, "rel", (0, 0))
+        return _MOVIMIENTO.pack(_acotar(evento.pos[0]), _acotar(evento.pos[1]),
+                                _acotar(rel[0]), _acotar(rel[1]), botones)
+    if tipo in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        return _BOTON.pack(_acotar(evento.pos[0]), _acotar(evento.pos[1]), _acotar(evento.button, 0, 255))
+    if tipo == pygame.MOUSEWHEEL:
+        return _RUEDA.pack(_acotar(evento.x, -128, 127), _acotar(evento.y, -128, 127))
+    if tipo in (pygame.KEYDOWN, pygame.KEYUP):
+        texto = getattr(evento, "unicode", "").encode("utf-8")[:32]
+        return _TECLA.pack(evento.key, getattr(evento, "mod", 0) & 0xFFFF) + texto
+    if tipo == pygame.TEXTINPUT:
+        return evento.text.encode("utf-8")[:64]
+    if tipo == pygame.VIDEORESIZE:
+        return _TAMANO.pack(_acotar(evento.w, 0, 65535), _acotar(evento.h, 0, 65535))
+    if tipo == pygame.QUIT:
+        return b""
+    return None
+
+
+def decodificar(tipo, datos):
+    """Reconstruye un evento de pygame a partir de sus datos grabados"""
+    if tipo == pygame.MOUSEMOTION:
+        x, y, rx, ry, botones = _MOVIMIENTO.unpack(datos)
+        return pygame.event.Event(tipo, pos=(x, y), rel=(rx, ry),
+                                  buttons=tuple(bool(botones & (1 << i)) for i in range(3)))
+    if tipo in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        x, y, boton = _BOTON.unpack(datos)
+        return pygame.event.Event(tipo, pos=(x, y), button=boton)
+    if tipo == pygame.MOUSEWHEEL:
+        x, y = _RUEDA.unpack(datos)
+        return pygame.event.Event(tipo, x=x, y=y, flipped=False)
+    if tipo in (pygame.KEYDOWN, pygame.KEYUP):
+        tecla, mod = _TECLA.unpack(datos[:_TECLA.size])
+        return pygame.event.Event(tipo, key=tecla, mod=mod, scancode=0,
+                                  unicode=datos[_TECLA.size:].decode("utf-8", "replace"))
+    if tipo == pygame.TEXTINPUT:
+        return pygame.event.Event(tipo, text=datos.decode("utf-8", "replace"))
+    if tipo == pygame.VIDEORESIZE:
+        w, h = _TAMANO.unpack(datos)
+        return pygame.event.Event(tipo, w=w, h=h, size=(w, h))
+    return pygame.event.Event(tipo)
+
+
+class GrabadorEventos:
+    """
+    Escribe eventos en un registro binario
+
+    El archivo se vacía a disco como máximo cada `intervalo_flush` segundos,
+    así un cierre forzado del sistema conserva casi toda la sesión.
+    """
+
+    def __init__(self, ruta, ancho, alto, intervalo_flush=0.5):
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        self.ruta = ruta
+        self.archivo = open(ruta, "wb")
+        self.inicio = time.perf_counter()
+        self.intervalo_flush = intervalo_flush
+        self.ultimo_flush = self.inicio
+        self.cuadro = 0
+        self.archivo.write(ENCABEZADO.pack(MAGIA, ancho, alto, time.time()))
+
+    @classmethod
+    def desde_destino(cls, destino, ancho, alto):
+        """
+        Crea un grabador a partir de una ruta de archivo o de una carpeta
+
+        Si el destino es una carpeta (o termina en separador) se crea un
+        archivo por sesión con la fecha y hora en el nombre.
+        """
+        if destino.endswith(("/", os.sep)) or os.path.isdir(destino):
+            nombre = datetime.datetime.now().strftime("eventos_%Y%m%d_%H%M%S.bev")
+            destino = os.path.join(destino, nombre)
+        return cls(destino, ancho, alto)
+
+    def nuevo_cuadro(self):
+        """Marca el inicio de una vuelta del ciclo principal (antes de pygame.event.get)"""
+        self.cuadro = (self.cuadro + 1) & 0xFFFFFFFF
+
+    def registrar(self, evento, pestana=None):
+        """
+        Agrega un evento al registro
+
+        Args:
+            evento (pygame.event.Event): Evento recibido
+            pestana (str, optional): Pestaña activa que lo va a procesar
+        """
+        if self.archivo is None:
+            return
+        datos = codificar(evento)
+        if datos is None:
+            return
+        ahora = time.perf_counter()
+        codigo = PESTANAS.index(pestana) if pestana in PESTANAS else 0
+        self.archivo.write(REGISTRO.pack(ahora - self.inicio, self.cuadro, codigo, evento.type, len(datos)) + datos)
+        if ahora - self.ultimo_flush >= self.intervalo_flush:
+            self.archivo.flush()
+            self.ultimo_flush = ahora
+
+    def cerrar(self):
+        """Cierra el registro"""
+        if self.archivo is not None:
+            self.archivo.close()
+            self.archivo = None
+
+
+def leer_registro(ruta):
+    """
+    Lee un registro de eventos
+
+    Returns:
+        tuple: (encabezado, eventos) donde encabezado es un dict con ancho,
+            alto e inicio, y eventos una lista de (segundos, pestaña, evento,
+            cuadro)
+    """
+    with open(ruta, "rb") as f:
+        contenido = f.read()
+    magia, ancho, alto, inicio = ENCABEZADO.unpack_from(contenido, 0)
+    if magia != MAGIA:
+        raise ValueError(f"{ruta} no es un registro de eventos")
+
+    eventos = []
+    pos = ENCABEZADO.size
+    while pos + REGISTRO.size <= len(contenido):
+        segundos, cuadro, codigo, tipo, largo = REGISTRO.unpack_from(contenido, pos)
+        pos += REGISTRO.size
+        if pos + largo > len(contenido):
+            break  # Registro truncado por un cierre forzado
+        datos = contenido[pos:pos + largo]
+        pos += largo
+        pestana = PESTANAS[codigo] if codigo < len(PESTANAS) else ""
+        eventos.append((segundos, pestana, decodificar(tipo, datos), cuadro))
+    return {"ancho": ancho, "alto": alto, "inicio": inicio}, eventos
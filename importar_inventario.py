@@ -0,0 +1,474 @@
+"""
+Importación masiva de inventario
+--------------------------------
+Recibe una entrega de proveedor desde un archivo CSV (o XLSX si openpyxl
+está instalado) y la carga en Insumo / MateriaPrima en lotes.
+
+- Las filas se leen en flujo y se escriben en lotes de TAMANO_LOTE filas
+  válidas, así que en memoria solo está el lote en curso.
+- Cada fila se valida; las inválidas se reportan con su número de fila y
+  no detienen la importación.
+- Las filas repetidas del mismo producto dentro de un lote se suman antes
+  de escribir (entre lotes las suma el upsert).
+  En materia prima cada fila es además un lote con su propia caducidad
+  (lote_materiaprima, ver lotes.py).
+- La escritura es un upsert por lotes con executemany: si el nombre ya
+  existe se suma la cantidad recibida y se actualizan precio y fechas
+  (INSERT ... ON DUPLICATE KEY UPDATE en MySQL, ON CONFLICT en SQLite).
+  Todo el archivo se confirma en una sola transacción.
+
+Columnas reconocidas (sin importar mayúsculas ni acentos):
+    tipo, nombre, precio, cantidad, stock_minimo, descripcion,
+    fecha_entrada, fecha_caducidad (o caducidad)
+La columna tipo es opcional (insumo / materia prima); si falta se usa el
+tipo indicado al importar.
+
+Uso:
+    python importar_inventario.py entrega.csv --tipo "materia prima"
+    python importar_inventario.py entrega.xlsx --errores errores.csv
+    python importar_inventario.py entrega.csv --validar    # sin escribir
+"""
+
+import argparse
+import csv
+import os
+import time
+import unicodedata
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from conexion import Conexion
+from bus_cambios import bus, marcadores
+from lotes import SIN_CADUCIDAD
+
+TAMANO_LOTE = 1000  # Filas por executemany
+
+# Encabezados aceptados -> campo
+ALIAS = {
+    "tipo": "tipo", "categoria": "tipo",
+    "nombre": "nombre", "producto": "nombre",
+    "precio": "precio", "precio_unitario": "precio",
+    "cantidad": "cantidad", "unidades": "cantidad",
+    "stock_minimo": "stock_minimo", "minimo": "stock_minimo",
+    "descripcion": "descripcion",
+    "fecha_entrada": "fecha_entrada", "entrada": "fecha_entrada",
+    "fecha_caducidad": "fecha_caducidad", "caducidad": "fecha_caducidad",
+}
+
+# Valor de la columna tipo -> entidad
+TIPOS = {
+    "insumo": "insumo", "insumos": "insumo",
+    "materia_prima": "materiaprima", "materiaprima": "materiaprima", "mp": "materiaprima",
+}
+
+# Lote recibido por cada fila de materia prima (después del upsert)
+INSERTAR_LOTE = """
+    INSERT INTO lote_materiaprima
+        (FK_ID_MateriaPrima, Cantidad, Cantidad_inicial, fecha_entrada, fecha_caducidad)
+    SELECT ID_MateriaPrima, %s, %s, %s, %s FROM materiaprima WHERE Nombre = %s
+"""
+
+# Upsert por entidad y motor: suma la cantidad recibida a la existente
+UPSERT = {
+    ("insumo", "mysql"): """
+        INSERT INTO Insumo (Nombre, Precio, Stock_Minimo, Descripcion, Cantidad, Estado, FK_ID_TipoInsumo, caducidad)
+        VALUES (%s, %s, %s, %s, %s, 'Disponible', 1, %s)
+        ON DUPLICATE KEY UPDATE
+            Cantidad = Cantidad + VALUES(Cantidad),
+            Precio = VALUES(Precio),
+            Descripcion = COALESCE(NULLIF(VALUES(Descripcion), ''), Descripcion),
+            caducidad = COALESCE(VALUES(caducidad), caducidad),
+            Estado = 'Disponible'
+    """,
+    ("insumo", "sqlite"): """
+        INSERT INTO Insumo (Nombre, Precio, Stock_Minimo, Descripcion, Cantidad, Estado, FK_ID_TipoInsumo, caducidad)
+        VALUES (%s, %s, %s, %s, %s, 'Disponible', 1, %s)
+        ON CONFLICT(Nombre) DO UPDATE SET
+            Cantidad = Cantidad + excluded.Cantidad,
+            Precio = excluded.Precio,
+            Descripcion = COALESCE(NULLIF(excluded.Descripcion, ''), Descripcion),
+            caducidad = COALESCE(excluded.caducidad, caducidad),
+            Estado = 'Disponible'
+    """,
+    ("materiaprima", "mysql"): """
+        INSERT INTO MateriaPrima (Nombre, Precio, stock_minimo, Descripcion, Cantidad, IVA, Estado,
+                                  FK_ID_MedidaCantidad, FK_ID_TipoMateriaPrima, fecha_entrada, fecha_caducidad)
+        VALUES (%s, %s, %s, %s, %s, 0.16, 'Disponible', 1, 1, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            Cantidad = Cantidad + VALUES(Cantidad),
+            Precio = VALUES(Precio),
+            Descripcion = COALESCE(NULLIF(VALUES(Descripcion), ''), Descripcion),
+            fecha_entrada = VALUES(fecha_entrada),
+            fecha_caducidad = COALESCE(VALUES(fecha_caducidad), fecha_caducidad),
+            Estado = 'Disponible'
+    """,
+    ("materiaprima", "sqlite"): """
+        INSERT INTO MateriaPrima (Nombre, Precio, stock_minimo, Descripcion, Cantidad, IVA, Estado,
+                                  FK_ID_MedidaCantidad, FK_ID_TipoMateriaPrima, fecha_entrada, fecha_caducidad)
+        VALUES (%s, %s, %s, %s, %s, 0.16, 'Disponible', 1, 1, %s, %s)
+        ON CONFLICT(Nombre) DO UPDATE SET
+            Cantidad = Cantidad + excluded.Cantidad,
+            Precio = excluded.Precio,
+            Descripcion = COALESCE(NULLIF(excluded.Descripcion, ''), Descripcion),
+            fecha_entrada = excluded.fecha_entrada,
+            fecha_caducidad = COALESCE(excluded.fecha_caducidad, fecha_caducidad),
+            Estado = 'Disponible'
+    """,
+}
+
+TABLAS = {"insumo": "Insumo", "materiaprima": "MateriaPrima"}
+
+
+def normalizar(texto):
+    """Minúsculas, sin acentos y con guiones bajos en lugar de espacios"""
+    texto = unicodedata.normalize("NFKD", str(texto or "").strip().lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return "_".join(texto.replace("-", " ").split())
+
+
+# ---------------------------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------------------------
+
+def leer_csv(ruta):
+    """
+    Lee un CSV en flujo detectando el separador (, o ;)
+
+    Yields:
+        list: Celdas de cada renglón (el primero es el encabezado)
+    """
+    with open(ruta, "r", encoding="utf-8-sig", newline="") as f:
+        muestra = f.read(4096)
+        f.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+        yield from csv.reader(f, dialecto)
+
+
+def leer_xlsx(ruta):
+    """
+    Lee la primera hoja de un XLSX en modo de solo lectura (en flujo)
+
+    Yields:
+        list: Celdas de cada renglón (el primero es el encabezado)
+    """
+    try:
+        import openpyxl
+    except ImportError:
+        raise ValueError("Para importar archivos XLSX instale openpyxl (pip install openpyxl) o guarde el archivo como CSV")
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        for renglon in libro.worksheets[0].iter_rows(values_only=True):
+            yield list(renglon)
+    finally:
+        libro.close()
+
+
+def leer_filas(ruta):
+    """
+    Lee un archivo de inventario y entrega cada fila con sus campos normalizados
+
+    Args:
+        ruta (str): Archivo .csv o .xlsx
+
+    Yields:
+        tuple: (número de fila en el archivo, {campo: valor})
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    renglones = leer_xlsx(ruta) if extension in (".xlsx", ".xlsm") else leer_csv(ruta)
+    encabezado = None
+    for numero, renglon in enumerate(renglones, start=1):
+        if encabezado is None:
+            encabezado = [ALIAS.get(normalizar(celda)) for celda in renglon]
+            if "nombre" not in encabezado:
+                raise ValueError("El archivo no tiene columna 'nombre'")
+            continue
+        if not any(celda not in (None, "") for celda in renglon):
+            continue  # Renglón vacío
+        yield numero, {campo: valor for campo, valor in zip(encabezado, renglon) if campo}
+
+
+# ---------------------------------------------------------------------------
+# Validación
+# ---------------------------------------------------------------------------
+
+def a_fecha(valor, campo):
+    """Convierte una celda a date (acepta AAAA-MM-DD, DD/MM/AAAA o fechas de Excel)"""
+    if valor in (None, ""):
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor).strip()
+    for formato in ("%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            pass
+    raise ValueError(f"{campo} inválida: '{texto}' (use AAAA-MM-DD)")
+
+
+def a_entero(valor, campo, defecto=None):
+    """Convierte una celda a entero (acepta '10' y '10.0')"""
+    if valor in (None, ""):
+        if defecto is None:
+            raise ValueError(f"{campo} es obligatorio")
+        return defecto
+    try:
+        numero = Decimal(str(valor).strip())
+    except InvalidOperation:
+        raise ValueError(f"{campo} no es un número: '{valor}'")
+    if numero != numero.to_integral_value():
+        raise ValueError(f"{campo} debe ser entero: '{valor}'")
+    return int(numero)
+
+
+def validar_fila(campos, tipo_defecto=None, hoy=None):
+    """
+    Valida y convierte una fila del archivo
+
+    Args:
+        campos (dict): Campos de la fila (de leer_filas)
+        tipo_defecto (str): Entidad si la fila no trae columna tipo
+        hoy (date): Fecha de entrada por defecto
+
+    Returns:
+        tuple: (entidad, registro)
+
+    Raises:
+        ValueError: Con el motivo si la fila no es válida
+    """
+    tipo = normalizar(campos.get("tipo")) or tipo_defecto
+    entidad = TIPOS.get(tipo, tipo if tipo in TABLAS else None)
+    if entidad is None:
+        raise ValueError(f"tipo inválido: '{campos.get('tipo') or ''}' (use insumo o materia prima)")
+
+    nombre = str(campos.get("nombre") or "").strip()
+    if not nombre:
+        raise ValueError("nombre es obligatorio")
+    if len(nombre) > 100:
+        raise ValueError("nombre excede 100 caracteres")
+
+    try:
+        precio = Decimal(str(campos.get("precio") or "").strip().replace("$", "").replace(",", ""))
+    except InvalidOperation:
+        raise ValueError(f"precio inválido: '{campos.get('precio') or ''}'")
+    if precio <= 0:
+        raise ValueError("precio debe ser mayor a 0")
+
+    cantidad = a_entero(campos.get("cantidad"), "cantidad")
+    if cantidad < 0 or (entidad == "materiaprima" and cantidad == 0):
+        raise ValueError("cantidad debe ser mayor a 0")
+    stock_minimo = a_entero(campos.get("stock_minimo"), "stock_minimo", defecto=0)
+    if stock_minimo < 0:
+        raise ValueError("stock_minimo no puede ser negativo")
+
+    caducidad = a_fecha(campos.get("fecha_caducidad"), "fecha_caducidad")
+    registro = {
+        "nombre": nombre,
+        "precio": precio.quantize(Decimal("0.01")),
+        "cantidad": cantidad,
+        "stock_minimo": stock_minimo,
+        "descripcion": str(campos.get("descripcion") or "").strip(),
+        "caducidad": caducidad,
+    }
+    if entidad == "materiaprima":
+        entrada = a_fecha(campos.get("fecha_entrada"), "fecha_entrada") or hoy or date.today()
+        if caducidad and caducidad < entrada:
+            raise ValueError("fecha_caducidad es anterior a fecha_entrada")
+        registro["entrada"] = entrada
+        registro["lotes"] = [(cantidad, entrada, caducidad)]
+    return entidad, registro
+
+
+def parametros(entidad, registro):
+    """Tupla de parámetros del upsert en el orden de UPSERT"""
+    comunes = (registro["nombre"], registro["precio"], registro["stock_minimo"],
+               registro["descripcion"], registro["cantidad"])
+    if entidad == "materiaprima":
+        return comunes + (registro["entrada"], registro["caducidad"])
+    return comunes + (registro["caducidad"],)
+
+
+# ---------------------------------------------------------------------------
+# Importación
+# ---------------------------------------------------------------------------
+
+def leer_lotes(ruta, tipo_defecto, resultado):
+    """
+    Lee y valida el archivo en flujo, en lotes de hasta TAMANO_LOTE filas válidas
+
+    Dentro de cada lote las filas repetidas del mismo producto se suman; si
+    el producto vuelve a aparecer en otro lote, el upsert suma su cantidad.
+
+    Args:
+        ruta (str): Archivo a importar
+        tipo_defecto (str): Entidad por defecto (insumo o materiaprima)
+        resultado (dict): Acumula leidas, validas y errores [(fila, mensaje)]
+
+    Yields:
+        dict: {entidad: {nombre en minúsculas: registro}}
+    """
+    tipo_defecto = TIPOS.get(normalizar(tipo_defecto), tipo_defecto) if tipo_defecto else None
+    registros = {entidad: {} for entidad in TABLAS}
+    en_lote = 0
+    hoy = date.today()
+    for numero, campos in leer_filas(ruta):
+        resultado["leidas"] += 1
+        try:
+            entidad, registro = validar_fila(campos, tipo_defecto, hoy)
+        except ValueError as e:
+            resultado["errores"].append((numero, str(e)))
+            continue
+        resultado["validas"] += 1
+        clave = registro["nombre"].lower()
+        previo = registros[entidad].get(clave)
+        if previo:
+            # Mismo producto en varias filas: se suman las cantidades
+            registro["cantidad"] += previo["cantidad"]
+            if "lotes" in previo:
+                registro["lotes"] = previo["lotes"] + registro["lotes"]
+        registros[entidad][clave] = registro
+        en_lote += 1
+        if en_lote >= TAMANO_LOTE:
+            yield registros
+            registros = {entidad: {} for entidad in TABLAS}
+            en_lote = 0
+    if en_lote:
+        yield registros
+
+
+def escribir_lote(cursor, motor, registros, vistos, resultado):
+    """
+    Escribe un lote con un executemany por entidad (upsert y lotes de caducidad)
+
+    Args:
+        cursor: Cursor de la transacción
+        motor (str): 'mysql' o 'sqlite'
+        registros (dict): Lote de leer_lotes
+        vistos (dict): entidad -> nombres ya escritos en lotes anteriores, para
+            no contarlos dos veces en el reporte
+        resultado (dict): Acumula insertadas y actualizadas
+    """
+    for entidad, por_nombre in registros.items():
+        if not por_nombre:
+            continue
+        lote = list(por_nombre.values())
+        # Cuántos ya existían antes de la importación, solo para el reporte
+        nombres = [r["nombre"] for clave, r in por_nombre.items() if clave not in vistos[entidad]]
+        existentes = 0
+        if nombres:
+            cursor.execute(
+                f"SELECT COUNT(*) AS n FROM {TABLAS[entidad]} WHERE Nombre IN ({marcadores(nombres)})",
+                tuple(nombres)
+            )
+            existentes = cursor.fetchone()["n"]
+        cursor.executemany(UPSERT[(entidad, motor)], [parametros(entidad, r) for r in lote])
+        if entidad == "materiaprima":
+            cursor.executemany(INSERTAR_LOTE, [
+                (cantidad, cantidad, entrada, caducidad or SIN_CADUCIDAD, r["nombre"])
+                for r in lote for cantidad, entrada, caducidad in r["lotes"]
+            ])
+        resultado["actualizadas"] += existentes
+        resultado["insertadas"] += len(nombres) - existentes
+        vistos[entidad].update(por_nombre)
+
+
+def importar(ruta, tipo_defecto=None, conexion=None, solo_validar=False):
+    """
+    Importa un archivo de inventario
+
+    Args:
+        ruta (str): Archivo .csv o .xlsx
+        tipo_defecto (str): Entidad para filas sin columna tipo
+        conexion (Conexion, optional): Conexión a usar
+        solo_validar (bool): Solo validar, sin escribir en la base
+
+    Returns:
+        dict: leidas, validas, insertadas, actualizadas, errores [(fila, mensaje)], segundos
+    """
+    inicio = time.perf_counter()
+    resultado = {
+        "leidas": 0,
+        "validas": 0,
+        "insertadas": 0,
+        "actualizadas": 0,
+        "errores": [],
+        "segundos": 0.0,
+    }
+    lotes = leer_lotes(ruta, tipo_defecto, resultado)
+    if solo_validar:
+        for _ in lotes:
+            pass
+        resultado["segundos"] = round(time.perf_counter() - inicio, 3)
+        return resultado
+
+    # Se conecta con el primer lote válido; todo el archivo va en una transacción
+    vistos = {entidad: set() for entidad in TABLAS}
+    abierta = False
+    try:
+        for registros in lotes:
+            if not abierta:
+                conexion = conexion or Conexion()
+                conexion.conectar()
+                if not conexion.conn:
+                    raise ValueError("No se pudo conectar a la base de datos")
+                abierta = True
+            escribir_lote(conexion.cursor, conexion.motor, registros, vistos, resultado)
+        if abierta:
+            conexion.conn.commit()
+    except Exception:
+        if abierta:
+            conexion.conn.rollback()
+        raise
+    finally:
+        if abierta:
+            conexion.cerrar()
+
+    # Cambio masivo: los módulos abiertos recargan la tabla una sola vez
+    for entidad, nombres in vistos.items():
+        if nombres:
+            bus.publicar(entidad)
+    resultado["segundos"] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def escribir_errores(errores, ruta):
+    """
+    Guarda el reporte de filas rechazadas en CSV
+
+    Args:
+        errores (list): Tuplas (fila, mensaje)
+        ruta (str): Archivo de salida
+    """
+    with open(ruta, "w", encoding="utf-8-sig", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["fila", "error"])
+        escritor.writerows(errores)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importación masiva de insumos y materia prima")
+    parser.add_argument("archivo", help="Archivo .csv o .xlsx")
+    parser.add_argument("--tipo", default=None, help="insumo o 'materia prima' para filas sin columna tipo")
+    parser.add_argument("--errores", default=None, help="CSV donde guardar las filas rechazadas")
+    parser.add_argument("--validar", action="store_true", help="Solo validar, sin escribir")
+    args = parser.parse_args()
+
+    try:
+        res = importar(args.archivo, args.tipo, solo_validar=args.validar)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+    print(f"Filas leídas: {res['leidas']}  válidas: {res['validas']}  "
+          f"nuevas: {res['insertadas']}  actualizadas: {res['actualizadas']}  "
+          f"errores: {len(res['errores'])}  ({res['segundos']} s)")
+    for fila, mensaje in res["errores"][:20]:
+        print(f"  Fila {fila}: {mensaje}")
+    if len(res["errores"]) > 20:
+        print(f"  ... y {len(res['errores']) - 20} más")
+    if args.errores and res["errores"]:
+        escribir_errores(res["errores"], args.errores)
+        print(f"Reporte de errores: {args.errores}")
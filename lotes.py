@@ -0,0 +1,146 @@
+"""
+Lotes de materia prima y consumo FEFO
+-------------------------------------
+Cada entrada de materia prima es un lote con su cantidad restante y su
+fecha de caducidad (tabla lote_materiaprima, migración 0005). El total de
+materiaprima.Cantidad es la suma de sus lotes.
+
+El consumo toma primero los lotes que caducan antes (FEFO: first expired,
+first out). En la base se apoya en el índice
+(FK_ID_MateriaPrima, fecha_caducidad, ID_Lote), así que elegir el siguiente
+lote es una búsqueda en el índice y no un recorrido de la tabla; los lotes
+agotados se borran para que la tabla solo tenga existencias vivas.
+
+Los lotes sin caducidad se guardan con SIN_CADUCIDAD (9999-12-31) para que
+queden al final del índice.
+
+Uso (dentro de una transacción):
+    registrar_lote(cursor, id_materia_prima, 25, fecha_caducidad=date(2025, 6, 1))
+    tomados = consumir_lotes(cursor, id_materia_prima, 25)
+    conciliar(cursor, [id_materia_prima])   # tras corregir el total a mano
+"""
+
+from datetime import date, datetime
+from conexion import es_sqlite
+
+SIN_CADUCIDAD = date(9999, 12, 31)
+LOTES_POR_CONSULTA = 20  # Lotes leídos por vuelta al consumir
+
+
+def a_fecha(valor):
+    """Normaliza una caducidad (None -> SIN_CADUCIDAD)"""
+    if valor is None or valor == "":
+        return SIN_CADUCIDAD
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(str(valor), "%Y-%m-%d").date()
+
+
+def registrar_lote(cursor, id_materia_prima, cantidad, fecha_entrada=None, fecha_caducidad=None):
+    """
+    Registra un lote recibido (no modifica materiaprima.Cantidad)
+
+    Args:
+        cursor: Cursor de la transacción
+        id_materia_prima (int): Materia prima del lote
+        cantidad (int): Cantidad recibida
+        fecha_entrada (date): Fecha de recepción (hoy si falta)
+        fecha_caducidad (date): Caducidad (None si no caduca)
+
+    Returns:
+        int: ID del lote
+    """
+    cursor.execute(
+        """INSERT INTO lote_materiaprima
+           (FK_ID_MateriaPrima, Cantidad, Cantidad_inicial, fecha_entrada, fecha_caducidad)
+           VALUES (%s, %s, %s, %s, %s)""",
+        (id_materia_prima, cantidad, cantidad, fecha_entrada or date.today(), a_fecha(fecha_caducidad))
+    )
+    return cursor.lastrowid
+
+
+def consumir_lotes(cursor, id_materia_prima, cantidad):
+    """
+    Descuenta una cantidad de los lotes de una materia prima en orden FEFO
+
+    Solo toca los lotes; el llamador actualiza materiaprima.Cantidad.
+
+    Args:
+        cursor: Cursor de la transacción
+        id_materia_prima (int): Materia prima a consumir
+        cantidad (int): Cantidad a descontar
+
+    Returns:
+        list: Tuplas (id_lote, cantidad tomada, caducidad)
+
+    Raises:
+        ValueError: Si los lotes no alcanzan (el llamador debe hacer rollback)
+    """
+    bloqueo = "" if es_sqlite(cursor) else " FOR UPDATE"
+    tomados = []
+    restante = cantidad
+    while restante > 0:
+        cursor.execute(
+            "SELECT ID_Lote, Cantidad, fecha_caducidad FROM lote_materiaprima "
+            "WHERE FK_ID_MateriaPrima = %s ORDER BY fecha_caducidad, ID_Lote "
+            f"LIMIT {LOTES_POR_CONSULTA}{bloqueo}",
+            (id_materia_prima,)
+        )
+        filas = cursor.fetchall()
+        if not filas:
+            break
+        for fila in filas:
+            tomar = min(restante, fila["Cantidad"])
+            if tomar == fila["Cantidad"]:
+                cursor.execute("DELETE FROM lote_materiaprima WHERE ID_Lote = %s", (fila["ID_Lote"],))
+            else:
+                cursor.execute("UPDATE lote_materiaprima SET Cantidad = Cantidad - %s WHERE ID_Lote = %s",
+                               (tomar, fila["ID_Lote"]))
+            tomados.append((fila["ID_Lote"], tomar, fila["fecha_caducidad"]))
+            restante -= tomar
+            if restante == 0:
+                break
+    if restante > 0:
+        raise ValueError(f"Existencia insuficiente de la materia prima {id_materia_prima}: faltan {restante}")
+    return tomados
+
+
+def conciliar(cursor, ids=None):
+    """
+    Ajusta los lotes para que sumen materiaprima.Cantidad
+
+    Se usa cuando el total se corrige a mano (edición en almacen): si el
+    total subió se crea un lote de ajuste; si bajó se descuenta de los
+    lotes en orden FEFO.
+
+    Args:
+        cursor: Cursor de la transacción
+        ids (list, optional): Materias primas a conciliar; None para todas
+    """
+    filtro = ""
+    params = ()
+    if ids is not None:
+        ids = sorted(ids)
+        if not ids:
+            return
+        filtro = f" AND mp.ID_MateriaPrima IN ({', '.join(['%s'] * len(ids))})"
+        params = tuple(ids)
+
+    cursor.execute(
+        f"""SELECT mp.ID_MateriaPrima AS id, mp.Cantidad AS total, mp.fecha_entrada, mp.fecha_caducidad,
+                   COALESCE(l.en_lotes, 0) AS en_lotes
+            FROM materiaprima mp
+            LEFT JOIN (SELECT FK_ID_MateriaPrima, SUM(Cantidad) AS en_lotes
+                       FROM lote_materiaprima GROUP BY FK_ID_MateriaPrima) l
+              ON l.FK_ID_MateriaPrima = mp.ID_MateriaPrima
+            WHERE mp.Cantidad <> COALESCE(l.en_lotes, 0){filtro}""",
+        params
+    )
+    for fila in cursor.fetchall():
+        diferencia = int(fila["total"]) - int(fila["en_lotes"])
+        if diferencia > 0:
+            registrar_lote(cursor, fila["id"], diferencia, fila["fecha_entrada"], fila["fecha_caducidad"])
+        else:
+            consumir_lotes(cursor, fila["id"], -diferencia)
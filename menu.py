@@ -8,14 +8,24 @@ Características mejoradas:
 - Cache de instancias para reutilización
 - Mejor rendimiento de inicio
 - Menor uso de memoria inicial
+- Precarga en segundo plano de los módulos permitidos al usuario,
+  empezando por la última pestaña que usó
+- Grabación opcional de los eventos de entrada (BAMBI_GRABAR_EVENTOS)
+  para reproducir sesiones con benchmarks/reproducir.py
 
-Versión: 1.1 Optimizada
+Versión: 1.2 Optimizada
 """
 
 import pygame  # Biblioteca para crear la interfaz gráfica
 import sys  # Módulo para operaciones del sistema
+import os  # Rutas del archivo de preferencias
+import json  # Lectura/escritura de preferencias
+import threading  # Precarga de módulos en segundo plano
 import login  # Módulo de login para autenticación
 import datetime  # Módulo para timestamps en capturas de pantalla
+from conexion import resource_path
+from grabador_eventos import GrabadorEventos
+from bus_cambios import bus
 
 # Inicialización de Pygame
 pygame.init()
@@ -88,15 +98,72 @@ imagen_salir = cargar_imagen("imagenes/salir.png", (50, 50))
 imagen_pedido = cargar_imagen("imagenes/pedido.png", (50, 50))
 imagen_receta = cargar_imagen("imagenes/receta.png", (50, 50))
 
+# Archivo donde se recuerda la última pestaña usada por cada usuario
+PREFERENCIAS_FILE = resource_path("preferencias.json")
+
+def leer_ultima_pestana(nombre_usuario):
+    """
+    Obtiene la última pestaña usada por un usuario
+    
+    Args:
+        nombre_usuario (str): Nombre del usuario
+        
+    Returns:
+        str: Nombre de la pestaña (p. ej. "VENTA") o None
+    """
+    try:
+        with open(PREFERENCIAS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get(nombre_usuario)
+    except (OSError, ValueError):
+        return None
+
+def guardar_ultima_pestana(nombre_usuario, pestana):
+    """
+    Guarda la última pestaña usada por un usuario
+    
+    Args:
+        nombre_usuario (str): Nombre del usuario
+        pestana (str): Nombre de la pestaña
+    """
+    try:
+        preferencias = {}
+        if os.path.exists(PREFERENCIAS_FILE):
+            with open(PREFERENCIAS_FILE, "r", encoding="utf-8") as f:
+                preferencias = json.load(f)
+        preferencias[nombre_usuario] = pestana
+        with open(PREFERENCIAS_FILE, "w", encoding="utf-8") as f:
+            json.dump(preferencias, f)
+    except (OSError, ValueError) as e:
+        print(f"No se pudo guardar la preferencia de pestaña: {e}")
+
 class ModuleLoader:
     """
     Clase para manejar la carga perezosa de módulos
     Implementa el patrón Singleton para cache de instancias
+    
+    Las instancias pueden crearse bajo demanda (al hacer clic) o precargarse
+    en segundo plano con precargar(). Cada módulo tiene su propio candado, así
+    un clic sobre un módulo que se está precargando espera a esa misma
+    construcción en lugar de crear una segunda instancia.
     """
     
+    # Pestaña del menú -> método de carga
+    PESTANAS = {
+        "VENTA": "load_punto_venta",
+        "ALMACEN": "load_almacen",
+        "PEDIDO": "load_pedido",
+        "RECETA": "load_receta",
+        "REPORTES": "load_reporte",
+        "AJUSTES": "load_ajustes"
+    }
+    
     def __init__(self):
         self._modules = {}  # Cache de módulos importados
         self._instances = {}  # Cache de instancias creadas
+        self._locks = {}  # Candado por instancia
+        self._locks_guard = threading.Lock()
+        self._precarga_hilo = None
+        self._precarga_cancelada = threading.Event()
     
     def get_area_trabajo_params(self):
         """Calcula parámetros del área de trabajo"""
@@ -107,80 +174,159 @@ class ModuleLoader:
             'alto': SCREEN_HEIGHT - int(0.15 * SCREEN_WIDTH)
         }
     
-    def load_punto_venta(self):
-        """Carga perezosa del módulo PuntoVenta"""
-        if 'PuntoVenta' not in self._instances:
-            if 'puntoventa' not in self._modules:
-                from puntoventa import PuntoVenta
-                self._modules['puntoventa'] = PuntoVenta
+    def _get_lock(self, instance_key):
+        """Devuelve el candado asociado a una instancia"""
+        with self._locks_guard:
+            if instance_key not in self._locks:
+                self._locks[instance_key] = threading.Lock()
+            return self._locks[instance_key]
+    
+    def _load(self, instance_key, module_key, importar):
+        """
+        Crea (una sola vez) la instancia de un módulo
+        
+        Args:
+            instance_key (str): Clave de la instancia en cache
+            module_key (str): Clave de la clase en cache
+            importar (callable): Función que importa y devuelve la clase
             
-            params = self.get_area_trabajo_params()
-            self._instances['PuntoVenta'] = self._modules['puntoventa'](**params)
+        Returns:
+            object: Instancia del módulo
+        """
+        instancia = self._instances.get(instance_key)
+        if instancia is not None:
+            return instancia
+        
+        with self._get_lock(instance_key):
+            if instance_key not in self._instances:
+                if module_key not in self._modules:
+                    self._modules[module_key] = importar()
+                
+                params = self.get_area_trabajo_params()
+                self._instances[instance_key] = instancia = self._modules[module_key](**params)
+                
+                # Si la ventana se redimensionó mientras se construía (p. ej. en la
+                # precarga), relayout() no la alcanzó: ubicarla en el área actual
+                actual = self.get_area_trabajo_params()
+                if actual != params:
+                    if hasattr(instancia, 'relayout'):
+                        instancia.relayout(**actual)
+                    else:
+                        self._instances[instance_key] = self._modules[module_key](**actual)
         
-        return self._instances['PuntoVenta']
+        return self._instances[instance_key]
+    
+    def load_punto_venta(self):
+        """Carga perezosa del módulo PuntoVenta"""
+        def importar():
+            from puntoventa import PuntoVenta
+            return PuntoVenta
+        return self._load('PuntoVenta', 'puntoventa', importar)
     
     def load_almacen(self):
         """Carga perezosa del módulo Almacén"""
-        if 'almacen' not in self._instances:
-            if 'almacen_module' not in self._modules:
-                from almacen import almacen
-                self._modules['almacen_module'] = almacen
-            
-            params = self.get_area_trabajo_params()
-            self._instances['almacen'] = self._modules['almacen_module'](**params)
-        
-        return self._instances['almacen']
+        def importar():
+            from almacen import almacen
+            return almacen
+        return self._load('almacen', 'almacen_module', importar)
     
     def load_pedido(self):
         """Carga perezosa del módulo Pedido"""
-        if 'Pedido' not in self._instances:
-            if 'pedido' not in self._modules:
-                from pedido import Pedido
-                self._modules['pedido'] = Pedido
-            
-            params = self.get_area_trabajo_params()
-            self._instances['Pedido'] = self._modules['pedido'](**params)
-        
-        return self._instances['Pedido']
+        def importar():
+            from pedido import Pedido
+            return Pedido
+        return self._load('Pedido', 'pedido', importar)
     
     def load_receta(self):
         """Carga perezosa del módulo Receta"""
-        if 'Receta' not in self._instances:
-            if 'receta' not in self._modules:
-                from receta import Receta
-                self._modules['receta'] = Receta
-            
-            params = self.get_area_trabajo_params()
-            self._instances['Receta'] = self._modules['receta'](**params)
-        
-        return self._instances['Receta']
+        def importar():
+            from receta import Receta
+            return Receta
+        return self._load('Receta', 'receta', importar)
     
     def load_reporte(self):
         """Carga perezosa del módulo Reporte"""
-        if 'reporte' not in self._instances:
-            if 'reporte_module' not in self._modules:
-                from reporte import reporte
-                self._modules['reporte_module'] = reporte
-            
-            params = self.get_area_trabajo_params()
-            self._instances['reporte'] = self._modules['reporte_module'](**params)
-        
-        return self._instances['reporte']
+        def importar():
+            from reporte import reporte
+            return reporte
+        return self._load('reporte', 'reporte_module', importar)
     
     def load_ajustes(self):
         """Carga perezosa del módulo Ajustes"""
-        if 'ajustes' not in self._instances:
-            if 'ajustes_module' not in self._modules:
-                from ajustes import ajustes
-                self._modules['ajustes_module'] = ajustes
+        def importar():
+            from ajustes import ajustes
+            return ajustes
+        return self._load('ajustes', 'ajustes_module', importar)
+    
+    def orden_precarga(self, permisos_usuario, ultima_pestana=None):
+        """
+        Calcula el orden de precarga: primero la última pestaña usada,
+        después el resto en el orden del menú
+        
+        Args:
+            permisos_usuario (list): Pestañas permitidas al usuario
+            ultima_pestana (str): Última pestaña usada
             
-            params = self.get_area_trabajo_params()
-            self._instances['ajustes'] = self._modules['ajustes_module'](**params)
+        Returns:
+            list: Pestañas a precargar
+        """
+        orden = [p for p in permisos_usuario if p in self.PESTANAS]
+        if ultima_pestana in orden:
+            orden.remove(ultima_pestana)
+            orden.insert(0, ultima_pestana)
+        return orden
+    
+    def precargar(self, permisos_usuario, ultima_pestana=None):
+        """
+        Precarga en segundo plano los módulos permitidos al usuario
+        
+        Args:
+            permisos_usuario (list): Pestañas permitidas al usuario
+            ultima_pestana (str): Última pestaña usada (se carga primero)
+        """
+        orden = self.orden_precarga(permisos_usuario, ultima_pestana)
+        self._precarga_cancelada.clear()
+        
+        def trabajo():
+            for pestana in orden:
+                if self._precarga_cancelada.is_set():
+                    break
+                try:
+                    inicio = datetime.datetime.now()
+                    getattr(self, self.PESTANAS[pestana])()
+                    duracion = (datetime.datetime.now() - inicio).total_seconds()
+                    print(f"Módulo {pestana} precargado en {duracion:.2f}s")
+                except Exception as e:
+                    print(f"Error al precargar {pestana}: {e}")
+        
+        self._precarga_hilo = threading.Thread(target=trabajo, daemon=True)
+        self._precarga_hilo.start()
+    
+    def instancias(self):
+        """Instancias ya creadas (copia, la precarga puede agregar más)"""
+        return list(self._instances.values())
+    
+    def cancelar_precarga(self):
+        """Detiene la precarga pendiente (el módulo en construcción termina)"""
+        self._precarga_cancelada.set()
+    
+    def relayout(self):
+        """
+        Reubica las instancias creadas en el área de trabajo actual
         
-        return self._instances['ajustes']
+        Los módulos con método relayout conservan sus datos; los que no lo
+        tengan se descartan y se volverán a crear bajo demanda.
+        """
+        params = self.get_area_trabajo_params()
+        for nombre, instancia in list(self._instances.items()):
+            if hasattr(instancia, 'relayout'):
+                instancia.relayout(**params)
+            else:
+                del self._instances[nombre]
     
     def clear_cache(self):
         """Limpia el cache de instancias (útil para liberar memoria)"""
+        self.cancelar_precarga()
         self._instances.clear()
     
     def get_memory_usage(self):
@@ -285,16 +431,20 @@ mostrar_ajustes = False
 mostrar_pedidos = False
 mostrar_recetas = False
 
-def main(nombre_usuario, puesto):
+def main(nombre_usuario, puesto, grabar_eventos=None):
     """
     Función principal del menú optimizada
     
     Args:
         nombre_usuario (str): Nombre del usuario logueado
         puesto (str): Rol del usuario (VENDEDOR, ALMACENISTA, GERENTE)
+        grabar_eventos (str, optional): Archivo o carpeta donde grabar los
+            eventos de entrada. Por defecto la variable de entorno
+            BAMBI_GRABAR_EVENTOS; sin ninguna de las dos no se graba.
     """
     global mostrar_punto_venta, mostrar_almacen, mostrar_pedidos
     global mostrar_reportes, mostrar_ajustes, mostrar_recetas
+    global SCREEN_WIDTH, SCREEN_HEIGHT, ventana
 
     # Definir permisos según el rol
     permisos = {
@@ -310,20 +460,34 @@ def main(nombre_usuario, puesto):
     current_module_instance = None  # Para mantener referencia al módulo activo
     
     print(f"Sistema iniciado para {nombre_usuario} ({puesto})")
-    print("Módulos se cargarán bajo demanda...")
+    print("Precargando módulos en segundo plano...")
+    module_loader.precargar(permisos_usuario, leer_ultima_pestana(nombre_usuario))
+    pestana_actual = None
+
+    destino_eventos = grabar_eventos or os.environ.get("BAMBI_GRABAR_EVENTOS")
+    grabador = None
+    if destino_eventos:
+        grabador = GrabadorEventos.desde_destino(destino_eventos, SCREEN_WIDTH, SCREEN_HEIGHT)
+        print(f"Grabando eventos en {grabador.ruta}")
 
     while en_menu:
         try:
+            if grabador:
+                grabador.nuevo_cuadro()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    if pestana_actual:
+                        guardar_ultima_pestana(nombre_usuario, pestana_actual)
+                    if grabador:
+                        grabador.registrar(event)
+                        grabador.cerrar()
                     pygame.quit()
                     sys.exit()
                 elif event.type == pygame.VIDEORESIZE:
-                    global SCREEN_WIDTH, SCREEN_HEIGHT, ventana
                     SCREEN_WIDTH, SCREEN_HEIGHT = event.w, event.h
                     ventana = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
-                    # Limpiar cache al redimensionar para recalcular posiciones
-                    module_loader.clear_cache()
+                    # Recalcular posiciones sin descartar datos ya cargados
+                    module_loader.relayout()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     mouse_x, mouse_y = event.pos
                     # Detectar clicks en los botones y cargar módulos bajo demanda
@@ -335,26 +499,33 @@ def main(nombre_usuario, puesto):
 
                         if int(0.17 * SCREEN_HEIGHT) <= mouse_y <= int(0.23 * SCREEN_HEIGHT) and "VENTA" in permisos_usuario:
                             mostrar_punto_venta = True
+                            pestana_actual = "VENTA"
                             print("Cargando módulo Punto de Venta...")
                             current_module_instance = module_loader.load_punto_venta()
                         elif int(0.27 * SCREEN_HEIGHT) <= mouse_y <= int(0.33 * SCREEN_HEIGHT) and "ALMACEN" in permisos_usuario:
                             mostrar_almacen = True
+                            pestana_actual = "ALMACEN"
                             print("Cargando módulo Almacén...")
                             current_module_instance = module_loader.load_almacen()
                         elif int(0.37 * SCREEN_HEIGHT) <= mouse_y <= int(0.43 * SCREEN_HEIGHT) and "PEDIDO" in permisos_usuario:
                             mostrar_pedidos = True
+                            pestana_actual = "PEDIDO"
                             print("Cargando módulo Pedidos...")
                             current_module_instance = module_loader.load_pedido()
+                            current_module_instance.activar()
                         elif int(0.47 * SCREEN_HEIGHT) <= mouse_y <= int(0.53 * SCREEN_HEIGHT) and "RECETA" in permisos_usuario:
                             mostrar_recetas = True
+                            pestana_actual = "RECETA"
                             print("Cargando módulo Recetas...")
                             current_module_instance = module_loader.load_receta()
                         elif int(0.57 * SCREEN_HEIGHT) <= mouse_y <= int(0.63 * SCREEN_HEIGHT) and "REPORTES" in permisos_usuario:
                             mostrar_reportes = True
+                            pestana_actual = "REPORTES"
                             print("Cargando módulo Reportes...")
                             current_module_instance = module_loader.load_reporte()
                         elif int(0.67 * SCREEN_HEIGHT) <= mouse_y <= int(0.73 * SCREEN_HEIGHT) and "AJUSTES" in permisos_usuario:
                             mostrar_ajustes = True
+                            pestana_actual = "AJUSTES"
                             print("Cargando módulo Ajustes...")
                             current_module_instance = module_loader.load_ajustes()
                         elif int(0.87 * SCREEN_HEIGHT) <= mouse_y <= int(0.93 * SCREEN_HEIGHT):
@@ -378,18 +549,39 @@ def main(nombre_usuario, puesto):
                         print(f"Módulos: {memory_info['module_names']}")
                         print(f"Instancias: {memory_info['instance_names']}")
                 
+                # Grabar el evento junto con la pestaña que lo va a procesar
+                if grabador:
+                    grabador.registrar(event, pestana_actual if current_module_instance else None)
+
                 # Pasar eventos solo al módulo activo
                 if current_module_instance and hasattr(current_module_instance, 'handle_event'):
                     current_module_instance.handle_event(event)
 
+                # Avisos de hilos de fondo (p. ej. el cobro con tarjeta): llegan a su
+                # módulo aunque el usuario se haya cambiado de pestaña
+                for instancia in module_loader.instancias():
+                    if instancia is not current_module_instance and event.type in getattr(instancia, "eventos_fondo", ()):
+                        instancia.handle_event(event)
+
+            # Avisos de cambios de datos: cada módulo refresca solo sus filas afectadas
+            bus.despachar()
             dibujar_interfaz(nombre_usuario)
             pygame.display.flip()
             
         except Exception as e:
             print("Ocurrió un error:", e)
+            if grabador:
+                grabador.cerrar()
             pygame.quit()
             sys.exit()
 
+    # Recordar la última pestaña para priorizar su precarga en el próximo inicio
+    if pestana_actual:
+        guardar_ultima_pestana(nombre_usuario, pestana_actual)
+
+    if grabador:
+        grabador.cerrar()
+
     # Limpiar memoria antes de salir
     module_loader.clear_cache()
     print("Cache de módulos limpiado. Regresando al login...")
@@ -0,0 +1,569 @@
+"""
+Migraciones versionadas del esquema de la base de datos
+-------------------------------------------------------
+Lleva la base de datos (creada desde cualquiera de los dumps de db/) al
+esquema canónico del sistema y le agrega los índices que necesita la carga
+de trabajo del punto de venta.
+
+Cada migración tiene un número, un nombre y una función que recibe el
+cursor. Todas son idempotentes: revisan el catálogo antes de crear tablas,
+columnas o índices, así que volver a ejecutarlas no cambia nada. Las
+versiones aplicadas se registran en la tabla schema_version.
+
+Esquema canónico: db/bambidb.sql (el dump más reciente y el único que
+coincide con las consultas de pedido.py, ajustes.py y reporte.py).
+
+Uso:
+    python migraciones.py            # Aplica las migraciones pendientes
+    python migraciones.py --estado   # Muestra versiones aplicadas y pendientes
+"""
+
+import os
+import re
+import sys
+from conexion import crear_conexion, cerrar_conexion, resource_path, es_sqlite
+
+DUMP_CANONICO = resource_path(os.path.join("db", "bambidb.sql"))
+
+
+# ---------------------------------------------------------------------------
+# Utilidades de inspección del catálogo
+# ---------------------------------------------------------------------------
+
+def existe_tabla(cursor, tabla):
+    """
+    Indica si una tabla existe en la base de datos actual
+
+    Args:
+        cursor: Cursor abierto
+        tabla (str): Nombre de la tabla
+
+    Returns:
+        bool: True si la tabla existe
+    """
+    if es_sqlite(cursor):
+        cursor.execute(
+            "SELECT COUNT(*) AS n FROM sqlite_master "
+            "WHERE type = 'table' AND LOWER(name) = LOWER(%s)",
+            (tabla,)
+        )
+        return cursor.fetchone()["n"] > 0
+    cursor.execute(
+        "SELECT COUNT(*) AS n FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND LOWER(table_name) = LOWER(%s)",
+        (tabla,)
+    )
+    return cursor.fetchone()["n"] > 0
+
+
+def existe_columna(cursor, tabla, columna):
+    """Indica si una columna existe en una tabla"""
+    if es_sqlite(cursor):
+        cursor.execute(f"PRAGMA table_info(`{tabla}`)")
+        return any(fila["name"].lower() == columna.lower() for fila in cursor.fetchall())
+    cursor.execute(
+        "SELECT COUNT(*) AS n FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND LOWER(table_name) = LOWER(%s) "
+        "AND LOWER(column_name) = LOWER(%s)",
+        (tabla, columna)
+    )
+    return cursor.fetchone()["n"] > 0
+
+
+def existe_indice(cursor, tabla, indice):
+    """Indica si un índice existe en una tabla"""
+    if es_sqlite(cursor):
+        cursor.execute(
+            "SELECT COUNT(*) AS n FROM sqlite_master "
+            "WHERE type = 'index' AND LOWER(tbl_name) = LOWER(%s) AND LOWER(name) = LOWER(%s)",
+            (tabla, indice)
+        )
+        return cursor.fetchone()["n"] > 0
+    cursor.execute(
+        "SELECT COUNT(*) AS n FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND LOWER(table_name) = LOWER(%s) "
+        "AND LOWER(index_name) = LOWER(%s)",
+        (tabla, indice)
+    )
+    return cursor.fetchone()["n"] > 0
+
+
+def contar_tablas(cursor):
+    """Cuenta las tablas de la base de datos actual (sin schema_version)"""
+    if es_sqlite(cursor):
+        cursor.execute(
+            "SELECT COUNT(*) AS n FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT IN ('schema_version', 'sqlite_sequence')"
+        )
+        return cursor.fetchone()["n"]
+    cursor.execute(
+        "SELECT COUNT(*) AS n FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name <> 'schema_version'"
+    )
+    return cursor.fetchone()["n"]
+
+
+def agregar_columna(cursor, tabla, columna, definicion):
+    """Agrega una columna si no existe"""
+    if not existe_columna(cursor, tabla, columna):
+        cursor.execute(f"ALTER TABLE `{tabla}` ADD COLUMN `{columna}` {definicion}")
+
+
+def renombrar_columna(cursor, tabla, anterior, nueva, definicion):
+    """Renombra una columna si todavía tiene el nombre anterior"""
+    if existe_columna(cursor, tabla, anterior) and not existe_columna(cursor, tabla, nueva):
+        cursor.execute(f"ALTER TABLE `{tabla}` CHANGE COLUMN `{anterior}` `{nueva}` {definicion}")
+
+
+def crear_indice(cursor, tabla, indice, columnas):
+    """
+    Crea un índice si no existe
+
+    Args:
+        cursor: Cursor abierto
+        tabla (str): Tabla a indexar
+        indice (str): Nombre del índice
+        columnas (list): Columnas en orden
+    """
+    if not existe_indice(cursor, tabla, indice):
+        lista = ", ".join(f"`{c}`" for c in columnas)
+        cursor.execute(f"CREATE INDEX `{indice}` ON `{tabla}` ({lista})")
+
+
+def reemplazar_check(cursor, tabla, restriccion, condicion):
+    """
+    Cambia la condición de una restricción CHECK existente
+
+    MySQL la borra y la vuelve a crear; SQLite no tiene ALTER TABLE para
+    restricciones, así que se reescribe la definición guardada en
+    sqlite_master (la condición nueva debe ser más permisiva, porque las
+    filas existentes no se vuelven a validar).
+
+    Args:
+        cursor: Cursor abierto
+        tabla (str): Tabla de la restricción
+        restriccion (str): Nombre de la restricción
+        condicion (str): Nueva condición, sin paréntesis exteriores
+    """
+    if es_sqlite(cursor):
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = %s", (tabla,))
+        fila = cursor.fetchone()
+        if not fila:
+            return
+        patron = rf"(CONSTRAINT\s+`?{restriccion}`?\s+CHECK\s*)\((?:[^()]|\((?:[^()]|\([^()]*\))*\))*\)"
+        nuevo = re.sub(patron, lambda m: f"{m.group(1)}({condicion})", fila["sql"], count=1)
+        if nuevo == fila["sql"]:
+            return
+        cursor.execute("PRAGMA schema_version")
+        version = cursor.fetchone()["schema_version"]
+        cursor.execute("PRAGMA writable_schema = ON")
+        cursor.execute("UPDATE sqlite_master SET sql = %s WHERE type = 'table' AND name = %s", (nuevo, tabla))
+        cursor.execute(f"PRAGMA schema_version = {version + 1}")
+        cursor.execute("PRAGMA writable_schema = OFF")
+        return
+    cursor.execute(
+        "SELECT COUNT(*) AS n FROM information_schema.table_constraints "
+        "WHERE table_schema = DATABASE() AND LOWER(table_name) = LOWER(%s) "
+        "AND constraint_type = 'CHECK' AND constraint_name = %s",
+        (tabla, restriccion)
+    )
+    if cursor.fetchone()["n"]:
+        cursor.execute(f"ALTER TABLE `{tabla}` DROP CHECK `{restriccion}`")
+    cursor.execute(f"ALTER TABLE `{tabla}` ADD CONSTRAINT `{restriccion}` CHECK ({condicion})")
+
+
+def leer_sentencias(ruta):
+    """
+    Divide un dump de mysqldump en sentencias individuales
+
+    Args:
+        ruta (str): Ruta del archivo .sql
+
+    Returns:
+        list: Sentencias sin el punto y coma final
+    """
+    sentencias = []
+    actual = []
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            limpia = linea.rstrip("\r\n")
+            if not actual and (not limpia.strip() or limpia.startswith("--")):
+                continue
+            actual.append(limpia)
+            if limpia.endswith(";"):
+                sentencia = "\n".join(actual)[:-1].strip()
+                if sentencia:
+                    sentencias.append(sentencia)
+                actual = []
+    return sentencias
+
+
+# ---------------------------------------------------------------------------
+# Migraciones
+# ---------------------------------------------------------------------------
+
+def m0001_esquema_base(cursor):
+    """
+    Crea el esquema canónico en una base de datos vacía.
+
+    Si la base ya tiene tablas (creada desde otro dump) se adopta tal cual y
+    la migración 2 se encarga de reconciliarla.
+    """
+    if contar_tablas(cursor) > 0:
+        print("  Base existente: se adopta como línea base")
+        return
+    for sentencia in leer_sentencias(DUMP_CANONICO):
+        # La base ya está seleccionada por la conexión
+        if sentencia.upper().startswith(("CREATE DATABASE", "USE ")):
+            continue
+        cursor.execute(sentencia)
+
+
+def m0002_reconciliar_dumps(cursor):
+    """
+    Lleva las bases creadas con db/bambi_dump.sql al esquema canónico:
+    tablas de pedidos de clientes, columnas de caducidad/stock mínimo y
+    nombres de columnas de cliente.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS `pedidoventa` (
+          `ID_PedidoVenta` int NOT NULL AUTO_INCREMENT,
+          `Fecha_pedido` date NOT NULL,
+          `Fecha_entrega` date NOT NULL,
+          `Total` decimal(10,2) NOT NULL,
+          `Estado` varchar(20) NOT NULL DEFAULT 'Pendiente',
+          `Observaciones` text,
+          `FK_ID_Cliente` int NOT NULL,
+          PRIMARY KEY (`ID_PedidoVenta`),
+          KEY `fk_cliente` (`FK_ID_Cliente`),
+          CONSTRAINT `fk_cliente` FOREIGN KEY (`FK_ID_Cliente`) REFERENCES `cliente` (`Id_Cliente`) ON DELETE CASCADE ON UPDATE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS `detallepedidoventa` (
+          `ID_DetallePedidoVenta` int NOT NULL AUTO_INCREMENT,
+          `Cantidad` int NOT NULL,
+          `PrecioUnitario` decimal(10,2) NOT NULL,
+          `Subtotal` decimal(10,2) GENERATED ALWAYS AS ((`Cantidad` * `PrecioUnitario`)) STORED,
+          `FK_ID_PedidoVenta` int NOT NULL,
+          `FK_ID_CatProducto` int NOT NULL,
+          PRIMARY KEY (`ID_DetallePedidoVenta`),
+          KEY `fk_pedido` (`FK_ID_PedidoVenta`),
+          KEY `fk_producto` (`FK_ID_CatProducto`),
+          CONSTRAINT `fk_pedido` FOREIGN KEY (`FK_ID_PedidoVenta`) REFERENCES `pedidoventa` (`ID_PedidoVenta`) ON DELETE CASCADE ON UPDATE CASCADE,
+          CONSTRAINT `fk_producto` FOREIGN KEY (`FK_ID_CatProducto`) REFERENCES `catproducto` (`ID_CatProducto`) ON DELETE CASCADE ON UPDATE CASCADE,
+          CONSTRAINT `detallepedidoventa_chk_1` CHECK ((`Cantidad` > 0)),
+          CONSTRAINT `detallepedidoventa_chk_2` CHECK ((`PrecioUnitario` >= 0))
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+    # Columnas usadas por almacen.py
+    agregar_columna(cursor, "materiaprima", "stock_minimo", "int NOT NULL DEFAULT '0'")
+    agregar_columna(cursor, "materiaprima", "fecha_caducidad", "date DEFAULT NULL")
+    agregar_columna(cursor, "materiaprima", "fecha_entrada", "date DEFAULT NULL")
+    agregar_columna(cursor, "insumo", "caducidad", "date DEFAULT NULL")
+
+    # Nombres de columnas de cliente usados por ajustes.py
+    renombrar_columna(cursor, "cliente", "Nombre_Cliente_cliente", "Nombre_Cliente", "varchar(50) NOT NULL")
+    renombrar_columna(cursor, "cliente", "Ap_Paterno_cliente_cli", "Ap_Paterno_cliente", "varchar(50) NOT NULL")
+    renombrar_columna(cursor, "cliente", "Ap_Materno_cleinte_cli", "Ap_Materno_cliente", "varchar(50) NOT NULL")
+
+
+def m0003_indices_rendimiento(cursor):
+    """
+    Índices para las consultas frecuentes:
+    ventas por fecha (reportes y corte de caja), pedidos por estado y fecha
+    de entrega, y catálogo por estado y stock (punto de venta).
+    """
+    crear_indice(cursor, "venta", "idx_venta_fecha", ["Fecha_venta"])
+    crear_indice(cursor, "pedidoventa", "idx_pedidoventa_estado_entrega", ["Estado", "Fecha_entrega"])
+    crear_indice(cursor, "pedidoventa", "idx_pedidoventa_entrega", ["Fecha_entrega"])
+    crear_indice(cursor, "catproducto", "idx_catproducto_estado_stock", ["Estado", "Stock"])
+
+
+def m0004_cambio_stock(cursor):
+    """
+    Registro de cambios de stock que leen las demás cajas (ver stock.py)
+    para actualizar su catálogo sin recargar la tabla de productos.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS `cambio_stock` (
+          `ID_Cambio` bigint NOT NULL AUTO_INCREMENT,
+          `FK_ID_CatProducto` int NOT NULL,
+          `Stock` int NOT NULL,
+          `Fecha` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          PRIMARY KEY (`ID_Cambio`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    crear_indice(cursor, "cambio_stock", "idx_cambio_stock_fecha", ["Fecha"])
+
+
+def m0005_lotes_materiaprima(cursor):
+    """
+    Lotes de materia prima con su caducidad (ver lotes.py). El índice
+    (materia prima, caducidad, lote) sirve al consumo FEFO y el de
+    caducidad a la consulta de lotes por caducar. Cada materia prima con
+    existencia recibe un lote inicial con sus fechas actuales, y la
+    cantidad puede llegar a 0 al consumirse.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS `lote_materiaprima` (
+          `ID_Lote` bigint NOT NULL AUTO_INCREMENT,
+          `FK_ID_MateriaPrima` int NOT NULL,
+          `Cantidad` int NOT NULL,
+          `Cantidad_inicial` int NOT NULL,
+          `fecha_entrada` date NOT NULL,
+          `fecha_caducidad` date NOT NULL DEFAULT '9999-12-31',
+          PRIMARY KEY (`ID_Lote`),
+          CONSTRAINT `fk_lote_materiaprima` FOREIGN KEY (`FK_ID_MateriaPrima`) REFERENCES `materiaprima` (`ID_MateriaPrima`) ON DELETE CASCADE ON UPDATE CASCADE,
+          CONSTRAINT `lote_materiaprima_chk_1` CHECK ((`Cantidad` > 0))
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    crear_indice(cursor, "lote_materiaprima", "idx_lote_fefo",
+                 ["FK_ID_MateriaPrima", "fecha_caducidad", "ID_Lote"])
+    crear_indice(cursor, "lote_materiaprima", "idx_lote_caducidad", ["fecha_caducidad"])
+    reemplazar_check(cursor, "materiaprima", "materiaprima_chk_1", "`Cantidad` >= 0")
+    cursor.execute("""
+        INSERT INTO lote_materiaprima
+            (FK_ID_MateriaPrima, Cantidad, Cantidad_inicial, fecha_entrada, fecha_caducidad)
+        SELECT mp.ID_MateriaPrima, mp.Cantidad, mp.Cantidad,
+               COALESCE(mp.fecha_entrada, CURDATE()), COALESCE(mp.fecha_caducidad, '9999-12-31')
+        FROM materiaprima mp
+        WHERE mp.Cantidad > 0
+          AND NOT EXISTS (SELECT 1 FROM lote_materiaprima l WHERE l.FK_ID_MateriaPrima = mp.ID_MateriaPrima)
+    """)
+
+
+def m0006_receta_ingredientes(cursor):
+    """
+    Lista de materiales de las recetas (ver recetario.py): cada renglón es
+    una materia prima, un insumo o una sub-receta (rellenos, betunes) con
+    la cantidad que usa una tanda. Rendimiento es cuántas piezas salen de
+    una tanda. El índice por componente sirve para saber qué recetas usan
+    un ingrediente.
+    """
+    agregar_columna(cursor, "receta", "Rendimiento", "int NOT NULL DEFAULT '1'")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS `receta_ingrediente` (
+          `ID_RecetaIngrediente` int NOT NULL AUTO_INCREMENT,
+          `FK_ID_Receta` int NOT NULL,
+          `Tipo` varchar(20) NOT NULL,
+          `FK_ID_Componente` int NOT NULL,
+          `Cantidad` decimal(10,3) NOT NULL,
+          PRIMARY KEY (`ID_RecetaIngrediente`),
+          UNIQUE KEY `uq_receta_componente` (`FK_ID_Receta`, `Tipo`, `FK_ID_Componente`),
+          CONSTRAINT `fk_ingrediente_receta` FOREIGN KEY (`FK_ID_Receta`) REFERENCES `receta` (`ID_Receta`) ON DELETE CASCADE ON UPDATE CASCADE,
+          CONSTRAINT `receta_ingrediente_chk_1` CHECK ((`Cantidad` > 0)),
+          CONSTRAINT `receta_ingrediente_chk_2` CHECK ((`Tipo` in ('materiaprima','insumo','receta')))
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    crear_indice(cursor, "receta_ingrediente", "idx_ingrediente_componente", ["Tipo", "FK_ID_Componente"])
+
+
+def m0007_series_demanda(cursor):
+    """
+    Series de demanda para el pronóstico (ver pronostico.py): piezas
+    vendidas por día, hora y producto, la última venta ya acumulada en
+    cada serie y los parámetros ajustados de cada producto. La llave de
+    venta_hora empieza por la fecha para leer ventanas de días por rango.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS `venta_hora` (
+          `Fecha` date NOT NULL,
+          `FK_ID_CatProducto` int NOT NULL,
+          `Hora` tinyint NOT NULL,
+          `Piezas` int NOT NULL DEFAULT '0',
+          PRIMARY KEY (`Fecha`, `FK_ID_CatProducto`, `Hora`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS `serie_demanda` (
+          `Serie` varchar(30) NOT NULL,
+          `Ultimo_ID_Venta` int NOT NULL DEFAULT '0',
+          PRIMARY KEY (`Serie`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS `modelo_demanda` (
+          `FK_ID_CatProducto` int NOT NULL,
+          `Nivel` decimal(10,3) NOT NULL,
+          `Sigma` decimal(10,3) NOT NULL,
+          `Factores_dia` varchar(120) NOT NULL,
+          `Perfil_hora` text NOT NULL,
+          `Dias` int NOT NULL,
+          `Ajustado` date NOT NULL,
+          `Version` int NOT NULL,
+          PRIMARY KEY (`FK_ID_CatProducto`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def m0008_punto_reorden(cursor):
+    """
+    Puntos de reorden calculados de materia prima e insumos (ver
+    reorden.py). El filtro de inventario compara la existencia actual
+    contra Punto_reorden sin recalcular consumos. El índice por fecha de
+    producción sirve a la ventana de consumo.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS `punto_reorden` (
+          `Tipo` varchar(20) NOT NULL,
+          `FK_ID_Componente` int NOT NULL,
+          `Consumo_diario` decimal(12,3) NOT NULL DEFAULT '0.000',
+          `Desviacion` decimal(12,3) NOT NULL DEFAULT '0.000',
+          `Tiempo_entrega` decimal(6,2) NOT NULL,
+          `Punto_reorden` int NOT NULL,
+          `Nivel_maximo` int NOT NULL,
+          `En_camino` int NOT NULL DEFAULT '0',
+          `Origen` varchar(20) NOT NULL,
+          `Actualizado` date NOT NULL,
+          PRIMARY KEY (`Tipo`, `FK_ID_Componente`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    crear_indice(cursor, "produccion", "idx_produccion_fecha", ["Fecha"])
+
+
+def m0009_historial_pedido(cursor):
+    """
+    Bitácora de cambios de estado de pedidos de clientes (ver
+    estado_pedidos.py), escrita en bloque junto con el UPDATE.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS `historial_pedido` (
+          `ID_Historial` bigint NOT NULL AUTO_INCREMENT,
+          `FK_ID_PedidoVenta` int NOT NULL,
+          `Estado_anterior` varchar(20) NOT NULL,
+          `Estado_nuevo` varchar(20) NOT NULL,
+          `Fecha` datetime NOT NULL,
+          PRIMARY KEY (`ID_Historial`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    crear_indice(cursor, "historial_pedido", "idx_historial_pedido", ["FK_ID_PedidoVenta", "Fecha"])
+
+
+def m0010_insumo_sin_existencia(cursor):
+    """
+    La existencia de un insumo puede llegar a 0 cuando una corrida de
+    producción (ver produccion.py) usa todo lo disponible, igual que la
+    materia prima desde la migración 0005.
+    """
+    reemplazar_check(cursor, "insumo", "insumo_chk_3", "`Cantidad` >= 0")
+
+
+# Lista ordenada de migraciones: (versión, nombre, función)
+MIGRACIONES = [
+    (1, "esquema_base", m0001_esquema_base),
+    (2, "reconciliar_dumps", m0002_reconciliar_dumps),
+    (3, "indices_rendimiento", m0003_indices_rendimiento),
+    (4, "cambio_stock", m0004_cambio_stock),
+    (5, "lotes_materiaprima", m0005_lotes_materiaprima),
+    (6, "receta_ingredientes", m0006_receta_ingredientes),
+    (7, "series_demanda", m0007_series_demanda),
+    (8, "punto_reorden", m0008_punto_reorden),
+    (9, "historial_pedido", m0009_historial_pedido),
+    (10, "insumo_sin_existencia", m0010_insumo_sin_existencia),
+]
+
+
+# ---------------------------------------------------------------------------
+# Ejecución
+# ---------------------------------------------------------------------------
+
+def crear_tabla_versiones(cursor):
+    """Crea la tabla schema_version si no existe"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT NOT NULL PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            aplicada TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def versiones_aplicadas(cursor):
+    """Devuelve el conjunto de versiones ya aplicadas"""
+    cursor.execute("SELECT version FROM schema_version")
+    return {fila["version"] for fila in cursor.fetchall()}
+
+
+def migrar(conexion=None, hasta=None):
+    """
+    Aplica en orden las migraciones pendientes
+
+    MySQL confirma implícitamente cada sentencia DDL, por lo que una
+    migración interrumpida puede quedar a medias; al ser idempotentes basta
+    con volver a ejecutar el comando.
+
+    Args:
+        conexion (Conexion, optional): Conexión abierta. Si es None se crea una.
+        hasta (int, optional): Última versión a aplicar
+
+    Returns:
+        list: Versiones aplicadas en esta ejecución
+    """
+    propia = conexion is None
+    if propia:
+        conexion = crear_conexion()
+    if not conexion.conn:
+        print("No se pudo conectar a la base de datos")
+        return []
+
+    aplicadas = []
+    try:
+        cursor = conexion.cursor
+        crear_tabla_versiones(cursor)
+        existentes = versiones_aplicadas(cursor)
+        for version, nombre, funcion in MIGRACIONES:
+            if version in existentes or (hasta is not None and version > hasta):
+                continue
+            print(f"Aplicando migración {version:04d} {nombre}...")
+            funcion(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, nombre) VALUES (%s, %s)",
+                (version, nombre)
+            )
+            conexion.conn.commit()
+            aplicadas.append(version)
+        if not aplicadas:
+            print("El esquema está actualizado")
+    except Exception as e:
+        print(f"Error al aplicar migraciones: {e}")
+        conexion.conn.rollback()
+    finally:
+        if propia:
+            cerrar_conexion(conexion)
+    return aplicadas
+
+
+def estado(conexion=None):
+    """
+    Muestra las migraciones aplicadas y pendientes
+
+    Returns:
+        list: Tuplas (versión, nombre, aplicada)
+    """
+    propia = conexion is None
+    if propia:
+        conexion = crear_conexion()
+    if not conexion.conn:
+        print("No se pudo conectar a la base de datos")
+        return []
+    try:
+        crear_tabla_versiones(conexion.cursor)
+        existentes = versiones_aplicadas(conexion.cursor)
+    finally:
+        if propia:
+            cerrar_conexion(conexion)
+
+    resultado = [(v, n, v in existentes) for v, n, _ in MIGRACIONES]
+    for version, nombre, aplicada in resultado:
+        marca = "aplicada" if aplicada else "pendiente"
+        print(f"{version:04d} {nombre:<25} {marca}")
+    return resultado
+
+
+if __name__ == "__main__":
+    if "--estado" in sys.argv:
+        estado()
+    else:
+        migrar()
@@ -3,16 +3,37 @@ Sistema de Pago con Tarjeta para integración con MercadoPago
 --------------------------------------------------------
 Clase para manejar pagos con tarjeta usando terminal MercadoPago
 
+El cobro se ejecuta en un hilo de trabajo como máquina de estados:
+esperando -> enviado -> consultando -> completado / rechazado / tiempo_agotado
+Cada transición se publica como evento de Pygame (EVENTO_PAGO), de modo que
+el hilo de dibujo nunca se bloquea esperando a la terminal. El menú entrega
+estos eventos al punto de venta aunque su pestaña no esté a la vista.
+
+Un cobro enviado no se vuelve a enviar: tras un tiempo agotado o un error
+de red, "Consultar" sigue el mismo pago (y el envío lleva una llave de
+idempotencia). "Cancelar" está disponible durante la consulta y anula el
+cobro en la terminal (cancelado si sigue pendiente, reembolso si ya se
+aprobó) antes de cerrar: anulando -> anulado.
+
 Autor: Sistema POS Bambi
-Versión: 1.0
+Versión: 1.1
 """
 
 import pygame
 import time
+import threading
 import requests
 import json
+import uuid
 from datetime import datetime
 
+# Evento publicado por el hilo de pago en cada cambio de estado (tipo propio,
+# asignado por pygame, no choca con los temporizadores de los módulos)
+EVENTO_PAGO = pygame.event.custom_type()
+
+# Estados en los que hay una transacción en curso con la terminal
+ESTADOS_EN_CURSO = ("enviado", "consultando", "anulando")
+
 class PagoTarjeta:
     """
     Clase para manejar el pago con tarjeta a través de MercadoPago
@@ -24,8 +45,19 @@ class PagoTarjeta:
         estado (str): Estado actual de la transacción
         resultado (dict): Resultado de la transacción
     """
+
+    # Tiempos de espera HTTP (conexión, lectura) en segundos
+    TIMEOUT_HTTP = (3.05, 10)
+    # Intervalo entre consultas del estado del pago
+    INTERVALO_CONSULTA = 1.0
+    # Tiempo máximo para que el cliente presente la tarjeta
+    TIEMPO_LIMITE = 90
+
+    # Sesión HTTP compartida para reutilizar conexiones entre cobros
+    _sesion = None
+    _sesion_lock = threading.Lock()
     
-    def __init__(self, x, y, ancho, alto, total):
+    def __init__(self, x, y, ancho, alto, total, url_base=None):
         """
         Inicializa la interfaz de pago con tarjeta
         
@@ -33,6 +65,8 @@ class PagoTarjeta:
             x, y (int): Posición de la interfaz
             ancho, alto (int): Dimensiones de la interfaz
             total (float): Monto total a cobrar
+            url_base (str, optional): URL de la API de la terminal. Si es None
+                y no hay credenciales configuradas se usa el modo simulado.
         """
         pygame.font.init()
         
@@ -41,8 +75,17 @@ class PagoTarjeta:
         self.ancho = ancho
         self.alto = alto
         self.total = total
-        self.estado = "esperando"  # esperando, procesando, completado, error
+        self.estado = "esperando"  # esperando, enviado, consultando, completado, rechazado, tiempo_agotado, error, anulando, anulado
         self.resultado = None
+        self.hilo_pago = None
+        self.cancelado = threading.Event()
+        self.turno = 0  # Hilo vigente; los estados de hilos anteriores se ignoran
+
+        # Cobro en la terminal: se conserva hasta que termina (rechazado o anulado)
+        self.id_pago = None
+        self.cobro_enviado = False
+        self.referencia = None
+        self.nuevo_cobro()
         
         # Colores
         self.BLANCO = (255, 255, 255)
@@ -52,21 +95,10 @@ class PagoTarjeta:
         self.ROJO = (220, 0, 0)
         self.GRIS = (200, 200, 200)
         
-        # Fuentes
-        self.fuente_titulo = pygame.font.SysFont("Open Sans", int(alto * 0.05), bold=True)
-        self.fuente_normal = pygame.font.SysFont("Open Sans", int(alto * 0.04))
-        self.fuente_grande = pygame.font.SysFont("Open Sans", int(alto * 0.06), bold=True)
-        
-        # Posiciones
-        self.modal_w = int(ancho * 0.4)
-        self.modal_h = int(alto * 0.6)
-        self.modal_x = x + (ancho - self.modal_w) // 2
-        self.modal_y = y + (alto - self.modal_h) // 2
-        
-        # Botones
+        # Fuentes, posiciones y botones
         self.btn_procesar = None
         self.btn_cancelar = None
-        self.inicializar_botones()
+        self.configurar_layout()
         
         # Timer para animación
         self.timer_animacion = 0
@@ -75,6 +107,46 @@ class PagoTarjeta:
         # Configuración de MercadoPago (ajustar según tu configuración)
         self.MERCADOPAGO_ACCESS_TOKEN = "TU_ACCESS_TOKEN_AQUI"
         self.TERMINAL_ID = "TU_TERMINAL_ID_AQUI"
+        self.url_base = url_base or "https://api.mercadopago.com"
+        self.modo_simulado = url_base is None and self.MERCADOPAGO_ACCESS_TOKEN == "TU_ACCESS_TOKEN_AQUI"
+
+    def configurar_layout(self):
+        """Calcula fuentes, posición del modal y botones según el área actual"""
+        # Fuentes
+        self.fuente_titulo = pygame.font.SysFont("Open Sans", int(self.alto * 0.05), bold=True)
+        self.fuente_normal = pygame.font.SysFont("Open Sans", int(self.alto * 0.04))
+        self.fuente_grande = pygame.font.SysFont("Open Sans", int(self.alto * 0.06), bold=True)
+        
+        # Posiciones
+        self.modal_w = int(self.ancho * 0.4)
+        self.modal_h = int(self.alto * 0.6)
+        self.modal_x = self.x + (self.ancho - self.modal_w) // 2
+        self.modal_y = self.y + (self.alto - self.modal_h) // 2
+        
+        # Botones
+        self.inicializar_botones()
+
+    def relayout(self, x, y, ancho, alto):
+        """
+        Reubica la ventana de pago sin interrumpir la transacción en curso
+        
+        Args:
+            x, y (int): Nueva posición
+            ancho, alto (int): Nuevas dimensiones
+        """
+        self.x = x
+        self.y = y
+        self.ancho = ancho
+        self.alto = alto
+        self.configurar_layout()
+
+    @classmethod
+    def obtener_sesion(cls):
+        """Devuelve la sesión HTTP compartida, creándola la primera vez"""
+        with cls._sesion_lock:
+            if cls._sesion is None:
+                cls._sesion = requests.Session()
+            return cls._sesion
         
     def inicializar_botones(self):
         """Configura los botones de la interfaz"""
@@ -95,52 +167,194 @@ class PagoTarjeta:
             btn_h
         )
     
+    def nuevo_cobro(self):
+        """Olvida el cobro anterior (terminado) y prepara la referencia del siguiente"""
+        self.id_pago = None
+        self.cobro_enviado = False
+        self.referencia = f"bambi-{uuid.uuid4().hex}"
+
+    def iniciar_hilo(self, objetivo, *args):
+        """
+        Detiene el hilo de trabajo anterior y arranca otro con turno nuevo
+
+        Cada hilo recibe su turno y su propio evento de cancelación, de modo
+        que un hilo viejo que sigue consultando no puede cambiar el estado.
+
+        Args:
+            objetivo: Método a ejecutar; recibe (turno, cancelado, *args)
+        """
+        self.cancelado.set()
+        self.cancelado = threading.Event()
+        self.turno += 1
+        self.hilo_pago = threading.Thread(target=objetivo, args=(self.turno, self.cancelado) + args)
+        self.hilo_pago.daemon = True
+        self.hilo_pago.start()
+
     def procesar_pago(self):
-        """Inicia el proceso de pago con la terminal MercadoPago"""
-        self.estado = "procesando"
-        
-        try:
-            # Aquí iría la integración real con MercadoPago
-            # Este es un ejemplo simplificado
-            
-            # Preparar datos del pago
-            payment_data = {
-                "transaction_amount": self.total,
-                "description": f"Venta POS Bambi - {datetime.now().strftime('%Y%m%d%H%M%S')}",
-                "payment_method_id": None,  # Se determina automáticamente
-                "installments": 1,
-                "payer": {
-                    "email": "cliente@example.com"
-                }
+        """
+        Inicia el cobro con la terminal MercadoPago en segundo plano
+
+        Si ya hay un cobro enviado sin resultado (tiempo agotado o error de
+        red), no se manda otro: se vuelve a consultar el mismo pago.
+        """
+        if self.hilo_pago and self.hilo_pago.is_alive():
+            return
+
+        # Preparar datos del pago
+        payment_data = {
+            "transaction_amount": float(self.total),
+            "description": f"Venta POS Bambi - {datetime.now().strftime('%Y%m%d%H%M%S')}",
+            "external_reference": self.referencia,
+            "payment_method_id": None,  # Se determina automáticamente
+            "installments": 1,
+            "payer": {
+                "email": "cliente@example.com"
             }
-            
-            # Simular comunicación con terminal (reemplazar con API real)
-            self.simular_proceso_terminal()
-            
-            # En una implementación real, aquí harías la llamada a la API
-            # response = self.enviar_a_terminal(payment_data)
-            # self.resultado = response
-            
+        }
+
+        self.estado = "consultando" if self.cobro_enviado else "enviado"
+        self.resultado = None
+        self.iniciar_hilo(self.ejecutar_pago, payment_data)
+
+    def ejecutar_pago(self, turno, cancelado, payment_data):
+        """
+        Recorre la máquina de estados del cobro (se ejecuta en el hilo de trabajo)
+
+        Args:
+            turno (int): Turno del hilo
+            cancelado (threading.Event): Se activa para detener la consulta
+            payment_data (dict): Datos del pago
+        """
+        try:
+            if self.modo_simulado:
+                self.simular_proceso_terminal(turno, cancelado)
+                return
+
+            if self.id_pago is None:
+                # Reenviar tras un tiempo agotado devuelve el mismo cobro
+                # (misma llave de idempotencia) en lugar de crear otro
+                self.cobro_enviado = True
+                respuesta = self.enviar_a_terminal(payment_data)
+                if respuesta.get("id") is None:
+                    self.nuevo_cobro()
+                    self.publicar_estado(turno, "error", {"error": respuesta.get("message", "Respuesta inválida de la terminal")})
+                    return
+                self.id_pago = respuesta["id"]
+
+            self.publicar_estado(turno, "consultando")
+            limite = time.monotonic() + self.TIEMPO_LIMITE
+            while not cancelado.is_set():
+                pago = self.consultar_pago(self.id_pago)
+                status = pago.get("status")
+                if status == "approved":
+                    self.publicar_estado(turno, "completado", self.formatear_resultado(pago))
+                    return
+                if status in ("rejected", "cancelled"):
+                    self.nuevo_cobro()
+                    self.publicar_estado(turno, "rechazado", {"error": f"Pago {status}", "status": status})
+                    return
+                if time.monotonic() >= limite:
+                    self.publicar_estado(turno, "tiempo_agotado", {"error": "La terminal no respondió a tiempo"})
+                    return
+                cancelado.wait(self.INTERVALO_CONSULTA)
+        except requests.Timeout:
+            self.publicar_estado(turno, "tiempo_agotado", {"error": "Tiempo de espera agotado con la terminal"})
         except Exception as e:
-            self.estado = "error"
-            self.resultado = {"error": str(e)}
-    
-    def simular_proceso_terminal(self):
+            self.publicar_estado(turno, "error", {"error": str(e)})
+
+    def anular(self):
+        """Detiene la consulta y anula el cobro en la terminal en segundo plano"""
+        anterior = self.hilo_pago
+        self.estado = "anulando"
+        self.resultado = None
+        self.iniciar_hilo(self.anular_cobro, anterior)
+
+    def anular_cobro(self, turno, cancelado, anterior):
+        """
+        Anula el cobro enviado (se ejecuta en el hilo de trabajo)
+
+        Espera a que termine el hilo de consulta anterior; si el pago sigue
+        pendiente se cancela y si ya se aprobó se reembolsa. Si el envío no
+        devolvió ID se busca el pago por su referencia.
+
+        Args:
+            turno (int): Turno del hilo
+            cancelado (threading.Event): Evento del hilo (no se usa para abortar)
+            anterior (threading.Thread): Hilo de consulta que se detuvo
+        """
+        try:
+            if anterior is not None:
+                anterior.join(sum(self.TIMEOUT_HTTP))
+            if self.modo_simulado:
+                cancelado.wait(0.5)
+            else:
+                id_pago = self.id_pago if self.id_pago is not None else self.buscar_pago()
+                if id_pago is not None:
+                    status = self.consultar_pago(id_pago).get("status")
+                    if status == "approved":
+                        self.reembolsar_pago(id_pago)
+                    elif status not in ("rejected", "cancelled", "refunded"):
+                        self.cancelar_en_terminal(id_pago)
+            self.nuevo_cobro()
+            self.publicar_estado(turno, "anulado", {"status": "cancelled"})
+        except Exception as e:
+            self.publicar_estado(turno, "error", {"error": f"No se pudo anular el cobro: {e}"})
+
+    def publicar_estado(self, turno, estado, resultado=None):
+        """
+        Publica un cambio de estado como evento de Pygame
+
+        Args:
+            turno (int): Turno del hilo que publica
+            estado (str): Nuevo estado de la transacción
+            resultado (dict, optional): Datos asociados al estado
+        """
+        evento = pygame.event.Event(EVENTO_PAGO, pago=id(self), turno=turno, estado=estado, resultado=resultado)
+        try:
+            pygame.event.post(evento)
+        except pygame.error:
+            # Sin sistema de eventos (p. ej. fuera de la interfaz): aplicar directo
+            if turno == self.turno:
+                self.aplicar_estado(estado, resultado)
+
+    def aplicar_estado(self, estado, resultado=None):
+        """Aplica un cambio de estado recibido del hilo de pago vigente"""
+        self.estado = estado
+        if resultado is not None:
+            self.resultado = resultado
+
+    def formatear_resultado(self, pago):
+        """Convierte la respuesta de la API al formato usado por la interfaz"""
+        tarjeta = pago.get("card") or {}
+        return {
+            "status": "approved",
+            "transaction_id": str(pago.get("id", "")),
+            "card_brand": pago.get("payment_method_id", ""),
+            "card_last_digits": tarjeta.get("last_four_digits", ""),
+            "payment_type": pago.get("payment_type_id", ""),
+            "total": float(self.total),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def simular_proceso_terminal(self, turno, cancelado):
         """Simula el proceso de pago con la terminal (solo para testing)"""
-        # Simular tiempo de procesamiento
-        pygame.time.wait(2000)
-        
+        self.cobro_enviado = True
+        self.publicar_estado(turno, "consultando")
+        # Simular tiempo de procesamiento sin bloquear el hilo de dibujo
+        if cancelado.wait(2):
+            return
+
         # Simular respuesta exitosa
-        self.estado = "completado"
-        self.resultado = {
+        self.id_pago = "12345678"
+        self.publicar_estado(turno, "completado", {
             "status": "approved",
             "transaction_id": "12345678",
             "card_brand": "visa",
             "card_last_digits": "1234",
             "payment_type": "debit",
-            "total": self.total,
+            "total": float(self.total),
             "timestamp": datetime.now().isoformat()
-        }
+        })
     
     def enviar_a_terminal(self, payment_data):
         """
@@ -152,18 +366,70 @@ class PagoTarjeta:
         Returns:
             dict: Respuesta de la terminal
         """
-        headers = {
-            "Authorization": f"Bearer {self.MERCADOPAGO_ACCESS_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        
-        url = f"https://api.mercadopago.com/v1/pos/{self.TERMINAL_ID}/payment"
+        url = f"{self.url_base}/v1/pos/{self.TERMINAL_ID}/payment"
         
+        encabezados = dict(self.encabezados(), **{"X-Idempotency-Key": self.referencia})
         try:
-            response = requests.post(url, json=payment_data, headers=headers)
+            response = self.obtener_sesion().post(url, json=payment_data, headers=encabezados,
+                                                  timeout=self.TIMEOUT_HTTP)
             return response.json()
+        except requests.Timeout:
+            raise
         except Exception as e:
             raise Exception(f"Error al comunicarse con MercadoPago: {e}")
+
+    def consultar_pago(self, id_pago):
+        """
+        Consulta el estado de un pago enviado a la terminal
+
+        Args:
+            id_pago: Identificador devuelto por la terminal
+
+        Returns:
+            dict: Estado actual del pago
+        """
+        url = f"{self.url_base}/v1/payments/{id_pago}"
+        response = self.obtener_sesion().get(url, headers=self.encabezados(), timeout=self.TIMEOUT_HTTP)
+        return response.json()
+
+    def buscar_pago(self):
+        """
+        Busca el cobro por su referencia (cuando el envío no devolvió ID)
+
+        Returns:
+            ID del pago, o None si la terminal nunca lo registró
+        """
+        url = f"{self.url_base}/v1/payments/search"
+        response = self.obtener_sesion().get(url, params={"external_reference": self.referencia},
+                                             headers=self.encabezados(), timeout=self.TIMEOUT_HTTP)
+        response.raise_for_status()
+        resultados = response.json().get("results") or []
+        return resultados[0].get("id") if resultados else None
+
+    def cancelar_en_terminal(self, id_pago):
+        """Cancela un pago que sigue pendiente"""
+        url = f"{self.url_base}/v1/payments/{id_pago}"
+        response = self.obtener_sesion().put(url, json={"status": "cancelled"}, headers=self.encabezados(),
+                                             timeout=self.TIMEOUT_HTTP)
+        response.raise_for_status()
+
+    def reembolsar_pago(self, id_pago):
+        """Reembolsa completo un pago ya aprobado"""
+        url = f"{self.url_base}/v1/payments/{id_pago}/refunds"
+        encabezados = dict(self.encabezados(), **{"X-Idempotency-Key": f"{self.referencia}-reembolso"})
+        response = self.obtener_sesion().post(url, json={}, headers=encabezados, timeout=self.TIMEOUT_HTTP)
+        response.raise_for_status()
+
+    def encabezados(self):
+        """Encabezados HTTP para la API de MercadoPago"""
+        return {
+            "Authorization": f"Bearer {self.MERCADOPAGO_ACCESS_TOKEN}",
+            "Content-Type": "application/json"
+        }
+
+    def cancelar(self):
+        """Detiene la consulta en curso sin tocar el cobro (ver anular)"""
+        self.cancelado.set()
     
     def dibujar(self, surface):
         """
@@ -195,10 +461,14 @@ class PagoTarjeta:
         # Contenido según estado
         if self.estado == "esperando":
             self.dibujar_estado_esperando(surface)
-        elif self.estado == "procesando":
+        elif self.estado in ESTADOS_EN_CURSO:
             self.dibujar_estado_procesando(surface)
         elif self.estado == "completado":
             self.dibujar_estado_completado(surface)
+        elif self.estado == "rechazado":
+            self.dibujar_estado_error(surface, "Pago Rechazado")
+        elif self.estado == "tiempo_agotado":
+            self.dibujar_estado_error(surface, "Tiempo Agotado")
         elif self.estado == "error":
             self.dibujar_estado_error(surface)
         
@@ -227,7 +497,12 @@ class PagoTarjeta:
         if self.timer_animacion % 30 == 0:
             self.puntos_cargando = "." * ((self.timer_animacion // 30) % 4)
         
-        mensaje = f"Procesando pago{self.puntos_cargando}"
+        if self.estado == "enviado":
+            mensaje = f"Enviando a la terminal{self.puntos_cargando}"
+        elif self.estado == "anulando":
+            mensaje = f"Anulando el cobro{self.puntos_cargando}"
+        else:
+            mensaje = f"Presente la tarjeta{self.puntos_cargando}"
         texto = self.fuente_normal.render(mensaje, True, self.NEGRO)
         texto_x = self.modal_x + (self.modal_w - texto.get_width()) // 2
         surface.blit(texto, (texto_x, self.modal_y + 250))
@@ -270,15 +545,14 @@ class PagoTarjeta:
                 surface.blit(texto, (texto_x, y_offset))
                 y_offset += 35
     
-    def dibujar_estado_error(self, surface):
-        """Dibuja el estado cuando hay un error en el pago"""
+    def dibujar_estado_error(self, surface, mensaje="Error en el Pago"):
+        """Dibuja el estado cuando hay un error, rechazo o tiempo agotado en el pago"""
         # Símbolo de error
         error_img = self.fuente_grande.render("✗", True, self.ROJO)
         error_x = self.modal_x + (self.modal_w - error_img.get_width()) // 2
         surface.blit(error_img, (error_x, self.modal_y + 200))
         
         # Mensaje de error
-        mensaje = "Error en el Pago"
         texto = self.fuente_normal.render(mensaje, True, self.ROJO)
         texto_x = self.modal_x + (self.modal_w - texto.get_width()) // 2
         surface.blit(texto, (texto_x, self.modal_y + 260))
@@ -291,10 +565,11 @@ class PagoTarjeta:
     
     def dibujar_botones(self, surface):
         """Dibuja los botones de la interfaz"""
-        if self.estado != "procesando":
+        if self.estado not in ESTADOS_EN_CURSO:
             # Botón Procesar/Aceptar
-            if self.estado in ["esperando", "error"]:
-                btn_text = "Procesar"
+            if self.estado in ["esperando", "error", "rechazado", "tiempo_agotado"]:
+                # Con un cobro pendiente solo se vuelve a consultar
+                btn_text = "Consultar" if self.cobro_enviado else "Procesar"
                 btn_color = self.VERDE
             else:  # completado
                 btn_text = "Aceptar"
@@ -306,8 +581,8 @@ class PagoTarjeta:
             texto_y = self.btn_procesar.y + (self.btn_procesar.height - texto.get_height()) // 2
             surface.blit(texto, (texto_x, texto_y))
         
-        # Botón Cancelar
-        btn_cancel_color = self.GRIS if self.estado == "procesando" else self.ROJO
+        # Botón Cancelar (disponible también mientras se consulta)
+        btn_cancel_color = self.GRIS if self.estado == "anulando" else self.ROJO
         pygame.draw.rect(surface, btn_cancel_color, self.btn_cancelar, border_radius=8)
         texto = self.fuente_normal.render("Cancelar", True, self.BLANCO)
         texto_x = self.btn_cancelar.x + (self.btn_cancelar.width - texto.get_width()) // 2
@@ -322,11 +597,19 @@ class PagoTarjeta:
             event (pygame.event.Event): Evento de Pygame
             
         Returns:
-            str: 'procesar', 'completado', 'cancelar', o None
+            str: 'procesar', 'completado', 'cancelar' (también cuando termina
+            la anulación del cobro), o None
         """
+        if event.type == EVENTO_PAGO:
+            if getattr(event, "pago", None) == id(self) and getattr(event, "turno", None) == self.turno:
+                self.aplicar_estado(event.estado, event.resultado)
+                if event.estado == "anulado":
+                    return "cancelar"
+            return None
+
         if event.type == pygame.MOUSEBUTTONDOWN:
             if self.btn_procesar.collidepoint(event.pos):
-                if self.estado == "esperando" or self.estado == "error":
+                if self.estado in ["esperando", "error", "rechazado", "tiempo_agotado"]:
                     # Iniciar proceso de pago
                     self.procesar_pago()
                     return "procesar"
@@ -335,7 +618,13 @@ class PagoTarjeta:
                     return "completado"
             
             elif self.btn_cancelar.collidepoint(event.pos):
-                if self.estado != "procesando":
-                    return "cancelar"
+                if self.estado == "anulando":
+                    return None
+                if self.cobro_enviado:
+                    # Pudo haber un cargo: anularlo antes de cerrar la ventana
+                    self.anular()
+                    return None
+                self.cancelar()
+                return "cancelar"
         
         return None
\ No newline at end of file
@@ -2,16 +2,18 @@
 Sistema de Gestión de Pedidos para Panadería
 ------------------------------------------
 Sistema desarrollado en Pygame para administrar pedidos personalizados:
-- Crear nuevos pedidos por adelantado
+- Crear nuevos pedidos por adelantado con varios productos
 - Gestionar pedidos pendientes
-- Procesar entregas de pedidos listos
+- Procesar entregas de pedidos listos, varios a la vez
 - Seguimiento de fechas de entrega
 - Registro automático de fechas
 
 Características principales:
 - Interfaz dual: NUEVO (crear) y RECOGER (entregar)
-- Búsqueda de pedidos por cliente
+- Búsqueda de pedidos por cliente (en memoria, calendario_pedidos.py)
 - Creación de productos sobre la marcha
+- Clientes y productos resueltos desde memoria; el pedido y todos sus
+  renglones se guardan en una sola transacción
 - Validación de datos completa
 - Integración con sistema de clientes y productos
 
@@ -21,6 +23,11 @@ Versión: 1.0
 import pygame
 from receta import Conexion
 from datetime import datetime
+from bus_cambios import bus, marcadores
+from calendario_pedidos import obtener_calendario
+from estado_pedidos import cambiar_estado
+from ticket import Ticket
+from dinero import a_decimal, calcular_linea
 
 class InputBox:
     """
@@ -141,56 +148,43 @@ class Pedido:
         self.ancho = ancho
         self.alto = alto
 
-        # Fuentes escaladas
-        self.fuente_titulo = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
         self.color_texto = (0, 0, 0)
 
         # Configuración de navegación
         self.botones_opciones = ["NUEVO", "RECOGER"]
         self.opcion_seleccionada = self.botones_opciones[0]
-        self.fuente_boton = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
-
-        # Configuración de botones
-        self.boton_width = int(self.ancho * 0.13)
-        self.boton_height = int(self.alto * 0.07)
-        self.boton_margin = int(self.ancho * 0.015)
-        self.boton_rects = [
-            pygame.Rect(
-                self.x + self.ancho - (len(self.botones_opciones)+2-i) * (self.boton_width + self.boton_margin),
-                self.y + int(self.alto * 0.11),
-                self.boton_width, self.boton_height
-            )
-            for i in range(len(self.botones_opciones))
-        ]
         self.color_boton = (220, 220, 220)
         self.color_boton_activo = (180, 180, 255)
-
-        # Botón principal (crear/entregar)
-        self.boton_agregar_rect = pygame.Rect(
-            self.x + self.ancho - self.boton_width - self.boton_margin,
-            self.y + int(self.alto * 0.11),
-            self.boton_width, self.boton_height
-        )
         self.color_boton_agregar = (100, 200, 100)
         self.color_boton_agregar_hover = (80, 180, 80)
-        self.fuente_boton_agregar = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
         self.agregar_hover = False
 
         # Configuración de búsqueda
         self.busqueda_activa = False
         self.busqueda_texto = ""
         self.NEGRO = (0, 0, 0)
-        self.fuente_busqueda = pygame.font.SysFont("Open Sans", int(self.alto * 0.045))
 
         # Configuración de tabla
-        self.fuente_tabla = pygame.font.SysFont("Open Sans", int(self.alto * 0.04))
         self.color_tabla_header = (200, 200, 255)
         self.color_tabla_row = (255, 255, 255)
         self.color_tabla_border = (180, 180, 180)
+
+        # Fuentes y posiciones escaladas
+        self.configurar_layout()
         
         # Datos y formularios
         self.datos_tabla = []
+        self.calendario = obtener_calendario()
+        self.recargas_calendario = 0  # Carga del calendario con que se armó la tabla
         self.cargar_datos_tabla()
+        bus.suscribir("pedidoventa", self.refrescar_pedidos)
+
+        # Catálogos en memoria para resolver correo y producto sin consultar
+        self.clientes = {}   # correo en minúsculas -> ID_Cliente
+        self.catalogo = {}   # nombre en minúsculas -> {"id", "nombre", "precio", "iva"}
+        self.cargar_catalogos()
+        bus.suscribir("cliente", self.refrescar_clientes)
+        bus.suscribir("catproducto", self.refrescar_catalogo)
         
         # Estado del formulario
         self.mostrando_formulario = False
@@ -200,8 +194,9 @@ class Pedido:
         self.formulario_btn_cancelar = None
         self.formulario_mensaje = ""
         
-        # Estado temporal
-        self.productos_pedido = []
+        # Renglones del pedido en captura (mismo modelo que el ticket de la caja)
+        self.productos_pedido = Ticket()
+        self._renglon_rects = []  # (rect, id de producto) de los renglones visibles
         
         # Sistema de alertas
         self.mensaje_alerta = ""
@@ -210,22 +205,78 @@ class Pedido:
         # Evitar errores de referencia
         self.formulario_btn_agregar_producto = None
 
-        # Nuevo botón para editar fecha en vista NUEVO
-        self.boton_editar_fecha_rect = pygame.Rect(
-            self.x + self.ancho - 2 * (self.boton_width + self.boton_margin),
-            self.y + int(self.alto * 0.11),
-            self.boton_width, self.boton_height
-        )
+        # Botón para editar fecha en vista NUEVO (posición en configurar_layout)
         self.color_boton_editar_fecha = (100, 150, 200)
         self.color_boton_editar_fecha_hover = (80, 130, 180)
         self.editar_fecha_hover = False
         self.mostrando_formulario_editar = False  # Estado para formulario de edición
         self.pedido_seleccionado = None  # Almacena ID del pedido seleccionado
+        self.seleccionados = set()  # Pedidos marcados para cambiar de estado en bloque
         self.formulario_editar_box = None  # Campo para edición de fecha
         self.formulario_editar_btn_guardar = None
         self.formulario_editar_btn_cancelar = None
         self.formulario_editar_mensaje = ""
 
+    def configurar_layout(self):
+        """
+        Calcula fuentes y posiciones a partir de x, y, ancho y alto.
+        Se usa al crear la interfaz y al redimensionar la ventana.
+        """
+        # Fuentes escaladas
+        self.fuente_titulo = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
+        self.fuente_boton = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
+        self.fuente_boton_agregar = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
+        self.fuente_busqueda = pygame.font.SysFont("Open Sans", int(self.alto * 0.045))
+        self.fuente_tabla = pygame.font.SysFont("Open Sans", int(self.alto * 0.04))
+
+        # Configuración de botones
+        self.boton_width = int(self.ancho * 0.13)
+        self.boton_height = int(self.alto * 0.07)
+        self.boton_margin = int(self.ancho * 0.015)
+        self.boton_rects = [
+            pygame.Rect(
+                self.x + self.ancho - (len(self.botones_opciones)+2-i) * (self.boton_width + self.boton_margin),
+                self.y + int(self.alto * 0.11),
+                self.boton_width, self.boton_height
+            )
+            for i in range(len(self.botones_opciones))
+        ]
+
+        # Botón principal (crear/entregar)
+        self.boton_agregar_rect = pygame.Rect(
+            self.x + self.ancho - self.boton_width - self.boton_margin,
+            self.y + int(self.alto * 0.11),
+            self.boton_width, self.boton_height
+        )
+
+        # Nuevo botón para editar fecha en vista NUEVO
+        self.boton_editar_fecha_rect = pygame.Rect(
+            self.x + self.ancho - 2 * (self.boton_width + self.boton_margin),
+            self.y + int(self.alto * 0.11),
+            self.boton_width, self.boton_height
+        )
+
+        # Botón para marcar como listos los pedidos seleccionados (vista NUEVO)
+        self.boton_listo_rect = pygame.Rect(
+            self.x + self.ancho - self.boton_width - self.boton_margin,
+            self.y + int(self.alto * 0.03),
+            self.boton_width, self.boton_height
+        )
+
+    def relayout(self, x, y, ancho, alto):
+        """
+        Reubica la interfaz en una nueva área conservando los datos cargados
+
+        Args:
+            x, y (int): Nueva posición
+            ancho, alto (int): Nuevas dimensiones
+        """
+        self.x = x
+        self.y = y
+        self.ancho = ancho
+        self.alto = alto
+        self.configurar_layout()
+
     def mostrar_alerta(self, mensaje, duracion=3000):
         """
         Muestra un mensaje temporal en la interfaz
@@ -239,61 +290,182 @@ class Pedido:
 
     def cargar_datos_tabla(self):
         """
-        Carga los pedidos desde la base de datos según la vista actual
-        
-        Vista NUEVO: Muestra pedidos pendientes
-        Vista RECOGER: Muestra pedidos listos para entregar
+        Arma la tabla de la vista actual desde el calendario de entregas
+
+        Vista NUEVO: Pedidos pendientes
+        Vista RECOGER: Pedidos listos para entregar
+
+        Los pedidos activos ya están en memoria agrupados por día de entrega,
+        así que filtrar por cliente en cada tecla no consulta la base.
         """
-        conexion = Conexion()
-        texto = self.busqueda_texto.strip().lower()
-        
-        if self.opcion_seleccionada == "NUEVO":
-            # Pedidos pendientes
-            query = """
-                SELECT 
-                    p.ID_PedidoVenta AS id,
-                    c.Nombre_Cliente AS cliente, 
-                    p.Fecha_pedido AS fecha,
-                    p.Fecha_entrega AS entrega,
-                    p.Estado AS estado,
-                    p.Total AS total
-                FROM pedidoventa p
-                JOIN Cliente c ON p.FK_ID_Cliente = c.ID_Cliente
-                WHERE p.Estado = 'Pendiente'
-            """
-            params = ()
-            if texto:
-                query += " AND LOWER(c.Nombre_Cliente) LIKE %s"
-                params = (f"%{texto}%",)
-        else:  # RECOGER
-            # Pedidos listos para recoger
-            query = """
-                SELECT 
-                    p.ID_PedidoVenta AS id,
-                    c.Nombre_Cliente AS cliente, 
-                    p.Fecha_pedido AS fecha,
-                    p.Fecha_entrega AS entrega,
-                    p.Estado AS estado,
-                    p.Total AS total
-                FROM pedidoventa p
-                JOIN Cliente c ON p.FK_ID_Cliente = c.ID_Cliente
-                WHERE p.Estado = 'Listo'
-            """
-            params = ()
-            if texto:
-                query += " AND LOWER(c.Nombre) LIKE %s"
-                params = (f"%{texto}%",)
-                
+        estado = "Pendiente" if self.opcion_seleccionada == "NUEVO" else "Listo"
         try:
-            self.datos_tabla = conexion.consultar(query, params)
+            self.datos_tabla = self.calendario.pedidos(estado, self.busqueda_texto)
         except Exception as e:
             print(f"Error al cargar datos: {e}")
             self.datos_tabla = []
+        self.recargas_calendario = self.calendario.recargas
+
+    def activar(self):
+        """
+        Recarga el calendario al abrir la pestaña
+
+        Trae los pedidos creados o modificados en otras terminales mientras
+        la pestaña no estaba a la vista.
+        """
+        try:
+            self.calendario.cargar()
+        except Exception as e:
+            print(f"Error al recargar calendario de pedidos: {e}")
+        self.cargar_datos_tabla()
+
+    def revisar_calendario(self):
+        """Vuelve a armar la tabla si el calendario se recargó (por tiempo o en otra vista)"""
+        try:
+            self.calendario.vigente()
+        except Exception as e:
+            print(f"Error al recargar calendario de pedidos: {e}")
+            return
+        if self.calendario.recargas != self.recargas_calendario:
+            self.cargar_datos_tabla()
+
+    def refrescar_pedidos(self, cambio):
+        """
+        Vuelve a armar la tabla cuando cambian pedidos (suscriptor del bus)
+
+        El calendario se suscribe antes y ya reacomodó solo los pedidos
+        modificados; aquí únicamente se vuelve a filtrar en memoria.
+
+        Args:
+            cambio (Cambio): Aviso del bus con los IDs de pedidoventa
+        """
+        self.cargar_datos_tabla()
+
+    def cargar_catalogos(self, ids_clientes=None, ids_productos=None):
+        """
+        Carga (o recarga) los clientes y productos usados al capturar pedidos
+
+        Sin IDs recarga ambos catálogos completos; con IDs solo vuelve a leer
+        esas filas.
+
+        Args:
+            ids_clientes (list, optional): Clientes a releer
+            ids_productos (list, optional): Productos a releer
+        """
+        conexion = Conexion()
+        completo = ids_clientes is None and ids_productos is None
+        try:
+            if completo or ids_clientes:
+                query = "SELECT ID_Cliente AS id, Correo AS correo FROM Cliente"
+                params = ()
+                if ids_clientes:
+                    query += f" WHERE ID_Cliente IN ({marcadores(ids_clientes)})"
+                    params = tuple(ids_clientes)
+                    self.clientes = {correo: id_cliente for correo, id_cliente in self.clientes.items()
+                                     if id_cliente not in ids_clientes}
+                else:
+                    self.clientes = {}
+                for fila in conexion.consultar(query, params):
+                    if fila["correo"]:
+                        self.clientes[fila["correo"].strip().lower()] = fila["id"]
+            if completo or ids_productos:
+                query = "SELECT ID_CatProducto AS id, Nombre_prod AS nombre, Precio AS precio, IVA AS iva FROM CatProducto"
+                params = ()
+                if ids_productos:
+                    query += f" WHERE ID_CatProducto IN ({marcadores(ids_productos)})"
+                    params = tuple(ids_productos)
+                    self.catalogo = {nombre: prod for nombre, prod in self.catalogo.items()
+                                     if prod["id"] not in ids_productos}
+                else:
+                    self.catalogo = {}
+                for fila in conexion.consultar(query, params):
+                    self.catalogo[fila["nombre"].strip().lower()] = fila
+        except Exception as e:
+            print(f"Error al cargar clientes y productos: {e}")
+
+    def buscar_cliente(self, correo):
+        """
+        Resuelve el ID de un cliente por correo
+
+        Busca primero en el catálogo en memoria; si no está (por ejemplo, un
+        cliente dado de alta en otra terminal) lo consulta en la base y lo
+        agrega al catálogo.
+
+        Args:
+            correo (str): Correo del cliente
+
+        Returns:
+            int: ID_Cliente, o None si no existe
+        """
+        correo = correo.strip()
+        clave = correo.lower()
+        cliente_id = self.clientes.get(clave)
+        if cliente_id is not None:
+            return cliente_id
+        try:
+            # Correo no distingue mayúsculas (collation de la columna)
+            filas = Conexion().consultar(
+                "SELECT ID_Cliente AS id FROM Cliente WHERE Correo = %s LIMIT 1", (correo,)
+            )
+        except Exception as e:
+            print(f"Error al buscar cliente: {e}")
+            return None
+        if not filas:
+            return None
+        self.clientes[clave] = filas[0]["id"]
+        return filas[0]["id"]
+
+    def buscar_producto(self, nombre):
+        """
+        Resuelve un producto del catálogo por nombre
+
+        Igual que buscar_cliente: si no está en memoria (dado de alta en otra
+        terminal) se consulta en la base y se agrega al catálogo.
+
+        Args:
+            nombre (str): Nombre del producto
+
+        Returns:
+            dict: Fila con id, nombre, precio e iva, o None si no existe
+        """
+        nombre = nombre.strip()
+        clave = nombre.lower()
+        producto = self.catalogo.get(clave)
+        if producto is not None:
+            return producto
+        try:
+            filas = Conexion().consultar(
+                "SELECT ID_CatProducto AS id, Nombre_prod AS nombre, Precio AS precio, IVA AS iva "
+                "FROM CatProducto WHERE Nombre_prod = %s LIMIT 1", (nombre,)
+            )
+        except Exception as e:
+            print(f"Error al buscar producto: {e}")
+            return None
+        if not filas:
+            return None
+        self.catalogo[clave] = filas[0]
+        return filas[0]
+
+    def refrescar_clientes(self, cambio):
+        """Mantiene al día el catálogo de clientes (suscriptor del bus)"""
+        if cambio.ids is None:
+            self.cargar_catalogos()
+            return
+        self.cargar_catalogos(ids_clientes=sorted(cambio.ids), ids_productos=[])
+
+    def refrescar_catalogo(self, cambio):
+        """Mantiene al día el catálogo de productos (suscriptor del bus)"""
+        if cambio.ids is None:
+            self.cargar_catalogos()
+            return
+        self.cargar_catalogos(ids_clientes=[], ids_productos=sorted(cambio.ids))
 
     def dibujar_pedido(self, surface):
         """
         Dibuja la interfaz completa, incluyendo el botón de editar fecha.
         """
+        self.revisar_calendario()
+
         # Fondo y título (sin cambios)
         pygame.draw.rect(surface, self.FONDO, (self.x, self.y, self.ancho, self.alto))
         titulo = self.fuente_titulo.render("Gestión de Pedidos", True, self.color_texto)
@@ -329,6 +501,17 @@ class Pedido:
             text_rect_editar = texto_editar.get_rect(center=self.boton_editar_fecha_rect.center)
             surface.blit(texto_editar, text_rect_editar)
 
+            pygame.draw.rect(surface, self.color_boton_agregar, self.boton_listo_rect, border_radius=8)
+            texto_listo = self.fuente_boton.render("Marcar Listo", True, (255, 255, 255))
+            surface.blit(texto_listo, texto_listo.get_rect(center=self.boton_listo_rect.center))
+
+        # Pedidos marcados para el cambio en bloque
+        if self.seleccionados:
+            texto_sel = self.fuente_tabla.render(
+                f"{len(self.seleccionados)} seleccionados (clic en el encabezado: todos / ninguno)",
+                True, (60, 60, 140))
+            surface.blit(texto_sel, (self.x + int(self.ancho * 0.03), self.y + int(self.alto * 0.19)))
+
         # Tabla de pedidos
         tabla_x = self.x + int(self.ancho * 0.03)
         tabla_y = self.y + int(self.alto * 0.23)
@@ -437,7 +620,8 @@ class Pedido:
                         except:
                             pass
                 
-                pygame.draw.rect(surface, self.color_tabla_row, (col_x, fila_y, col_widths[i], row_height))
+                color_fila = (210, 230, 255) if fila.get("id") in self.seleccionados else self.color_tabla_row
+                pygame.draw.rect(surface, color_fila, (col_x, fila_y, col_widths[i], row_height))
                 pygame.draw.rect(surface, self.color_tabla_border, (col_x, fila_y, col_widths[i], row_height), 1)
                 texto = self.fuente_tabla.render(str(valor), True, self.NEGRO)
                 text_rect = texto.get_rect(center=(col_x + col_widths[i] // 2, fila_y + row_height // 2))
@@ -454,10 +638,14 @@ class Pedido:
         2. Fecha de entrega
         3. Nombre del producto
         4. Cantidad
-        5. Precio unitario
+        5. Precio unitario (opcional si el producto ya existe)
         6. Observaciones
+
+        Producto, cantidad y precio se agregan como renglones del pedido con
+        el botón Agregar; el pedido puede llevar cualquier número de ellos.
         """
         self.mostrando_formulario = True
+        self.productos_pedido = Ticket()
         font = pygame.font.SysFont("Open Sans", int(self.alto * 0.035))
         
         # Centrar el formulario
@@ -545,8 +733,13 @@ class Pedido:
             button_height
         )
         
-        # Para evitar errores si alguna parte del código aún intenta acceder a este atributo
-        self.formulario_btn_agregar_producto = None
+        # Botón para agregar el producto capturado como renglón del pedido
+        self.formulario_btn_agregar_producto = pygame.Rect(
+            x + int(self.ancho * 0.39),
+            button_y,
+            button_width,
+            button_height
+        )
         
         self.formulario_mensaje = ""
 
@@ -562,8 +755,8 @@ class Pedido:
         overlay.fill((0, 0, 0, 150))
         surface.blit(overlay, (self.x, self.y))
 
-        # Ventana del formulario - tamaño ajustado
-        form_w = int(self.ancho * 0.5)
+        # Ventana del formulario: campos a la izquierda y renglones a la derecha
+        form_w = int(self.ancho * 0.8)
         form_h = int(self.alto * 0.8)  # Más alto para acomodar todos los campos
         form_x = self.x + (self.ancho - form_w) // 2
         form_y = self.y + (self.alto - form_h) // 2
@@ -587,7 +780,7 @@ class Pedido:
 
         # Labels y cajas de texto
         label_x = form_x + 40
-        input_x = form_x + int(form_w * 0.35)
+        input_x = form_x + int(form_w * 0.2)
         start_y = form_y + 90  # Ajustado para dejar espacio para la fecha de registro
         field_spacing = int(self.alto * 0.07)  # Espacio entre campos
 
@@ -602,6 +795,17 @@ class Pedido:
             self.formulario_boxes[i].rect.x = input_x
             self.formulario_boxes[i].rect.y = current_y
             self.formulario_boxes[i].draw(surface)
+
+        # Botones bajo los campos: Guardar, Cancelar y Agregar
+        button_y = start_y + (len(self.formulario_labels) + 1) * field_spacing
+        for i, boton in enumerate((self.formulario_btn_guardar, self.formulario_btn_cancelar,
+                                   self.formulario_btn_agregar_producto)):
+            boton.x = label_x + i * (boton.width + int(self.ancho * 0.02))
+            boton.y = button_y
+
+        # Renglones del pedido
+        self.dibujar_renglones(surface, form_x + int(form_w * 0.56), start_y,
+                               int(form_w * 0.41), form_h - (start_y - form_y) - 60)
         
         # Dibujar botones
         # Botón guardar
@@ -618,6 +822,11 @@ class Pedido:
         cancelar_x = self.formulario_btn_cancelar.x + (self.formulario_btn_cancelar.width - text_cancelar.get_width()) // 2
         cancelar_y = self.formulario_btn_cancelar.y + (self.formulario_btn_cancelar.height - text_cancelar.get_height()) // 2
         surface.blit(text_cancelar, (cancelar_x, cancelar_y))
+
+        # Botón agregar renglón
+        pygame.draw.rect(surface, (100, 150, 200), self.formulario_btn_agregar_producto, border_radius=8)
+        text_agregar = font_btn.render("Agregar", True, (255, 255, 255))
+        surface.blit(text_agregar, text_agregar.get_rect(center=self.formulario_btn_agregar_producto.center))
         
         # Mensaje de error o éxito
         if self.formulario_mensaje:
@@ -627,6 +836,56 @@ class Pedido:
             msg_x = form_x + (form_w - msg.get_width()) // 2
             surface.blit(msg, (msg_x, form_y + form_h - 40))
 
+    def dibujar_renglones(self, surface, x, y, w, h):
+        """
+        Dibuja los renglones del pedido en captura con su total
+
+        Un clic sobre un renglón lo quita del pedido.
+
+        Args:
+            surface (pygame.Surface): Superficie donde dibujar
+            x, y (int): Esquina superior izquierda del panel
+            w, h (int): Dimensiones del panel
+        """
+        pygame.draw.rect(surface, (248, 248, 255), (x, y, w, h), border_radius=8)
+        pygame.draw.rect(surface, self.color_tabla_border, (x, y, w, h), 1, border_radius=8)
+
+        font = pygame.font.SysFont("Open Sans", int(self.alto * 0.032))
+        font_bold = pygame.font.SysFont("Open Sans", int(self.alto * 0.034), bold=True)
+        fila_h = int(self.alto * 0.045)
+        margen = 10
+
+        titulo = font_bold.render("Productos del pedido", True, (0, 0, 0))
+        surface.blit(titulo, (x + margen, y + margen))
+
+        lineas = self.productos_pedido.productos
+        if not lineas:
+            vacio = font.render("Agregue productos con el botón Agregar", True, (120, 120, 120))
+            surface.blit(vacio, (x + margen, y + margen + fila_h))
+
+        # Filas visibles (las que caben sobre la línea del total)
+        cupo = max(1, (h - 3 * fila_h - 2 * margen) // fila_h)
+        self._renglon_rects = []
+        fila_y = y + margen + fila_h
+        for linea in lineas[:cupo]:
+            rect = pygame.Rect(x + 4, fila_y, w - 8, fila_h)
+            if rect.collidepoint(pygame.mouse.get_pos()):
+                pygame.draw.rect(surface, (255, 225, 225), rect, border_radius=4)
+            subtotal = calcular_linea(linea["precio"], linea["unidades"], linea["iva"])[0]
+            nombre = font.render(f"{linea['unidades']} x {linea['nombre']}", True, (0, 0, 0))
+            importe = font.render(f"${subtotal:,.2f}", True, (0, 0, 0))
+            surface.blit(nombre, (x + margen, fila_y + (fila_h - nombre.get_height()) // 2))
+            surface.blit(importe, (x + w - margen - importe.get_width(),
+                                   fila_y + (fila_h - importe.get_height()) // 2))
+            self._renglon_rects.append((rect, linea["id"]))
+            fila_y += fila_h
+        if len(lineas) > cupo:
+            mas = font.render(f"... y {len(lineas) - cupo} más", True, (120, 120, 120))
+            surface.blit(mas, (x + margen, fila_y))
+
+        total = font_bold.render(f"Total: ${self.productos_pedido.calcular_total():,.2f}", True, (0, 0, 0))
+        surface.blit(total, (x + w - margen - total.get_width(), y + h - margen - total.get_height()))
+
     def dibujar_formulario_editar(self, surface):
         """
         Dibuja el formulario para editar la fecha de entrega.
@@ -692,15 +951,68 @@ class Pedido:
         except ValueError:
             return False, "Error: Formato de fecha inválido (use YYYY-MM-DD)"
 
-    def guardar_pedido(self):
+    def agregar_producto_pedido(self):
         """
-        Guarda un nuevo pedido con validación de fecha.
+        Agrega el producto capturado en el formulario como renglón del pedido
+
+        El producto se busca en el catálogo (en memoria y, si no está, en la
+        base); si no existe se dará de alta al guardar el pedido. Sin precio se usa el del catálogo.
+
+        Returns:
+            bool: True si el renglón se agregó
         """
-        correo_cliente = self.formulario_boxes[0].get_value()
-        fecha_entrega = self.formulario_boxes[1].get_value()
-        nombre_producto = self.formulario_boxes[2].get_value()
+        nombre_producto = self.formulario_boxes[2].get_value().strip()
         cantidad_str = self.formulario_boxes[3].get_value()
         precio_str = self.formulario_boxes[4].get_value()
+
+        if not nombre_producto:
+            self.formulario_mensaje = "Error: Escriba el nombre del producto"
+            return False
+
+        try:
+            cantidad = int(cantidad_str) if cantidad_str else 1
+            precio = float(precio_str) if precio_str else None
+        except ValueError:
+            self.formulario_mensaje = "Error: Cantidad o precio inválidos"
+            return False
+
+        producto = self.buscar_producto(nombre_producto)
+        if precio is None and producto:
+            precio = producto["precio"]
+        if cantidad <= 0:
+            self.formulario_mensaje = "Error: La cantidad debe ser mayor a cero"
+            return False
+        if precio is None or a_decimal(precio) <= 0:
+            self.formulario_mensaje = "Error: El precio debe ser mayor a cero"
+            return False
+
+        if producto:
+            self.productos_pedido.agregar_producto(producto["nombre"], cantidad, precio,
+                                                   producto["id"], producto["iva"])
+        else:
+            # Producto nuevo: se identifica por nombre hasta darlo de alta
+            self.productos_pedido.agregar_producto(nombre_producto, cantidad, precio,
+                                                   ("nuevo", nombre_producto.lower()))
+
+        # Dejar los campos listos para el siguiente renglón
+        self.formulario_boxes[2].text = ""
+        self.formulario_boxes[3].text = "1"
+        self.formulario_boxes[4].text = ""
+        self.formulario_mensaje = f"{len(self.productos_pedido.productos)} productos en el pedido"
+        return True
+
+    def guardar_pedido(self):
+        """
+        Guarda el pedido con todos sus renglones en una sola transacción
+
+        Cliente y productos se resuelven desde los catálogos en memoria (un
+        correo que no esté en memoria se busca en la base). Los
+        productos nuevos, el pedido y sus detalles se insertan con la misma
+        conexión y se confirman juntos; si algo falla no queda nada a medias.
+        Si hay un producto capturado sin agregar, se agrega antes de guardar.
+        """
+        correo_cliente = self.formulario_boxes[0].get_value().strip()
+        fecha_entrega = self.formulario_boxes[1].get_value()
         observaciones = self.formulario_boxes[5].get_value()
 
         # Validar fecha de entrega
@@ -709,77 +1021,92 @@ class Pedido:
             self.formulario_mensaje = mensaje_fecha
             return False
 
-        # Validaciones existentes
-        if not correo_cliente or not nombre_producto:
-            self.formulario_mensaje = "Error: Correo y nombre de producto son obligatorios"
+        if not correo_cliente:
+            self.formulario_mensaje = "Error: El correo del cliente es obligatorio"
+            return False
+        cliente_id = self.buscar_cliente(correo_cliente)
+        if cliente_id is None:
+            self.formulario_mensaje = "Error: No existe un cliente con ese correo"
             return False
 
-        try:
-            cantidad = int(cantidad_str) if cantidad_str else 1
-            precio = float(precio_str) if precio_str else 0
+        if self.formulario_boxes[2].get_value().strip() and not self.agregar_producto_pedido():
+            return False
+        lineas = self.productos_pedido.productos
+        if not lineas:
+            self.formulario_mensaje = "Error: Agregue al menos un producto"
+            return False
 
-            if cantidad <= 0:
-                self.formulario_mensaje = "Error: La cantidad debe ser mayor a cero"
-                return False
-            if precio <= 0:
-                self.formulario_mensaje = "Error: El precio debe ser mayor a cero"
-                return False
+        fecha_registro = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        total = self.productos_pedido.calcular_total()
 
-            # Código existente para guardar cliente, producto y pedido
-            conexion = Conexion()
-            query_cliente = "SELECT Id_Cliente FROM Cliente WHERE Correo = %s"
-            resultado_cliente = conexion.consultar(query_cliente, (correo_cliente,))
-            if not resultado_cliente:
-                self.formulario_mensaje = "Error: No existe un cliente con ese correo"
+        conexion = Conexion()
+        try:
+            conexion.conectar()
+            if not conexion.conn:
+                self.formulario_mensaje = "Error: No se pudo conectar a la base de datos"
                 return False
-            cliente_id = resultado_cliente[0]['Id_Cliente']
 
-            query_producto = "SELECT ID_CatProducto FROM CatProducto WHERE Nombre_prod = %s"
-            resultado_producto = conexion.consultar(query_producto, (nombre_producto,))
-            if resultado_producto:
-                producto_id = resultado_producto[0]['ID_CatProducto']
-            else:
-                query_insertar_producto = """
-                    INSERT INTO CatProducto (Nombre_prod, Precio, Stock, Estado)
-                    VALUES (%s, %s, %s, %s)
-                """
-                conexion.update(query_insertar_producto, (nombre_producto, precio, 10, "Disponible"))
-                id_producto_query = "SELECT LAST_INSERT_ID() AS id_producto"
-                resultado = conexion.consultar(id_producto_query)
-                producto_id = resultado[0]['id_producto']
-
-            subtotal = cantidad * precio
-            fecha_registro = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            # Alta de productos nuevos (cada uno necesita su ID); caducan el día de la entrega.
+            # Si otra terminal ya dio de alta el nombre, se usa ese producto
+            ids_producto = {}
+            nuevos = []
+            for linea in lineas:
+                if isinstance(linea["id"], tuple):
+                    conexion.cursor.execute(
+                        "SELECT ID_CatProducto AS id FROM CatProducto WHERE Nombre_prod = %s LIMIT 1",
+                        (linea["nombre"],)
+                    )
+                    existente = conexion.cursor.fetchone()
+                    if existente:
+                        ids_producto[linea["id"]] = existente["id"]
+                        continue
+                    conexion.cursor.execute("""
+                        INSERT INTO CatProducto (Nombre_prod, Precio, Stock, Caducidad, Estado)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, (linea["nombre"], linea["precio"], 10, fecha_entrega, "Disponible"))
+                    ids_producto[linea["id"]] = conexion.cursor.lastrowid
+                    nuevos.append(conexion.cursor.lastrowid)
+                else:
+                    ids_producto[linea["id"]] = linea["id"]
 
             query_pedido = """
                 INSERT INTO pedidoventa 
                 (Fecha_pedido, Fecha_entrega, Total, Estado, Observaciones, FK_ID_Cliente)
                 VALUES (%s, %s, %s, %s, %s, %s)
             """
-            conexion.update(query_pedido, (
-                fecha_registro, fecha_entrega, subtotal, "Pendiente", 
+            conexion.cursor.execute(query_pedido, (
+                fecha_registro, fecha_entrega, total, "Pendiente",
                 observaciones, cliente_id
             ))
-
-            id_pedido_query = "SELECT LAST_INSERT_ID() AS id_pedido"
-            resultado = conexion.consultar(id_pedido_query)
-            id_pedido = resultado[0]['id_pedido']
+            id_pedido = conexion.cursor.lastrowid
 
             query_detalle = """
                 INSERT INTO detallepedidoventa 
-                (Cantidad, PrecioUnitario, Subtotal, FK_ID_PedidoVenta, FK_ID_CatProducto)
-                VALUES (%s, %s, %s, %s, %s)
+                (Cantidad, PrecioUnitario, FK_ID_PedidoVenta, FK_ID_CatProducto)
+                VALUES (%s, %s, %s, %s)
             """
-            conexion.update(query_detalle, (cantidad, precio, subtotal, id_pedido, producto_id))
+            # Subtotal es columna calculada (Cantidad * PrecioUnitario)
+            conexion.cursor.executemany(query_detalle, [
+                (linea["unidades"], linea["precio"], id_pedido, ids_producto[linea["id"]])
+                for linea in lineas
+            ])
 
-            self.mostrar_alerta(f"Pedido guardado. Registro: {datetime.now().strftime('%d/%m/%Y %H:%M')} - Entrega: {fecha_entrega}")
-            self.mostrando_formulario = False
-            self.cargar_datos_tabla()
-            return True
+            conexion.conn.commit()
         except Exception as e:
             print(f"Error al guardar pedido: {e}")
-            self.formulario_mensaje = f"Error: No se pudo guardar el pedido"
+            if conexion.conn:
+                conexion.conn.rollback()
+            self.formulario_mensaje = "Error: No se pudo guardar el pedido"
             return False
+        finally:
+            conexion.cerrar()
+
+        if nuevos:
+            bus.publicar("catproducto", nuevos)
+        bus.publicar("pedidoventa", [id_pedido])
+        self.mostrar_alerta(f"Pedido #{id_pedido} guardado ({len(lineas)} productos) - Entrega: {fecha_entrega}")
+        self.mostrando_formulario = False
+        return True
         
     def handle_event(self, event):
         """
@@ -808,6 +1135,15 @@ class Pedido:
                 elif self.formulario_btn_cancelar.collidepoint(event.pos):
                     self.mostrando_formulario = False
                     return
+                elif self.formulario_btn_agregar_producto.collidepoint(event.pos):
+                    self.agregar_producto_pedido()
+                    return
+                # Clic sobre un renglón: quitarlo del pedido
+                for rect, id_producto in self._renglon_rects:
+                    if rect.collidepoint(event.pos):
+                        self.productos_pedido.eliminar_linea(id_producto)
+                        self.formulario_mensaje = f"{len(self.productos_pedido.productos)} productos en el pedido"
+                        return
             return
 
         # Eventos generales
@@ -824,6 +1160,7 @@ class Pedido:
                 if rect.collidepoint(mouse_pos):
                     self.opcion_seleccionada = self.botones_opciones[i]
                     self.pedido_seleccionado = None  # Resetear selección
+                    self.seleccionados.clear()
                     self.cargar_datos_tabla()
                     return
 
@@ -832,10 +1169,12 @@ class Pedido:
                 if self.opcion_seleccionada == "NUEVO":
                     self.mostrar_formulario()
                 else:  # RECOGER
-                    if self.pedido_seleccionado:
-                        self.entregar_pedido(self.pedido_seleccionado)
-                    else:
-                        self.mostrar_alerta("No hay pedido seleccionado")
+                    self.cambiar_estado_seleccion("Entregado")
+                return
+
+            # Botón marcar listos
+            if self.opcion_seleccionada == "NUEVO" and self.boton_listo_rect.collidepoint(mouse_pos):
+                self.cambiar_estado_seleccion("Listo")
                 return
 
             # Botón editar fecha
@@ -857,17 +1196,25 @@ class Pedido:
             else:
                 self.busqueda_activa = False
 
-            # Selección en la tabla
+            # Selección en la tabla: cada clic marca o desmarca el pedido;
+            # el encabezado marca todos los visibles o ninguno
             tabla_x = self.x + int(self.ancho * 0.03)
             tabla_y = self.y + int(self.alto * 0.23) + int(self.alto * 0.07)
             tabla_width = int(self.ancho * 0.94)
             row_height = int(self.alto * 0.07)
+            encabezado = pygame.Rect(tabla_x, tabla_y - row_height, tabla_width, row_height)
+            if encabezado.collidepoint(mouse_pos):
+                visibles = {fila["id"] for fila in self.datos_tabla}
+                if visibles <= self.seleccionados:
+                    self.seleccionados -= visibles
+                else:
+                    self.seleccionados |= visibles
+                return
             for i, fila in enumerate(self.datos_tabla):
                 row_rect = pygame.Rect(tabla_x, tabla_y + i * row_height, tabla_width, row_height)
                 if row_rect.collidepoint(mouse_pos):
                     self.pedido_seleccionado = self.datos_tabla[i]["id"]
-                    if self.opcion_seleccionada == "RECOGER":
-                        self.entregar_pedido(self.pedido_seleccionado)
+                    self.seleccionados ^= {self.pedido_seleccionado}
                     break
 
         elif event.type == pygame.KEYDOWN and self.busqueda_activa:
@@ -884,18 +1231,40 @@ class Pedido:
                     self.busqueda_texto += event.unicode
                     self.cargar_datos_tabla()
                     
-    def entregar_pedido(self, id_pedido):
+    def cambiar_estado_seleccion(self, estado):
+        """
+        Cambia de estado todos los pedidos seleccionados con un solo UPDATE
+
+        La tabla se corrige en memoria con el resultado (el calendario ya
+        refleja el cambio), sin volver a consultar los pedidos.
+
+        Args:
+            estado (str): "Listo" o "Entregado"
+
+        Returns:
+            bool: True si cambió al menos un pedido
+        """
+        visibles = [fila["id"] for fila in self.datos_tabla if fila["id"] in self.seleccionados]
+        if not visibles:
+            self.mostrar_alerta("Seleccione uno o más pedidos")
+            return False
         try:
-            conexion = Conexion()
-            query = "UPDATE pedidoventa SET Estado = 'Entregado' WHERE ID_PedidoVenta = %s"
-            conexion.update(query, (id_pedido,))
-            self.mostrar_alerta(f"Pedido #{id_pedido} entregado correctamente")
-            self.cargar_datos_tabla()
-            return True
+            resultado = cambiar_estado(visibles, estado)
         except Exception as e:
-            print(f"Error al entregar pedido: {e}")
-            self.mostrar_alerta(f"Error al entregar pedido #{id_pedido}")
+            print(f"Error al cambiar estado de pedidos: {e}")
+            self.mostrar_alerta(f"Error al marcar pedidos como {estado}")
             return False
+
+        cambiados = resultado["cambiados"]
+        self.seleccionados -= set(cambiados)
+        if self.pedido_seleccionado in cambiados:
+            self.pedido_seleccionado = None
+        self.cargar_datos_tabla()
+        mensaje = f"{len(cambiados)} pedidos marcados como {estado}"
+        if resultado["omitidos"]:
+            mensaje += f" ({len(resultado['omitidos'])} sin cambio)"
+        self.mostrar_alerta(mensaje)
+        return bool(cambiados)
         
     def mostrar_formulario_editar_fecha(self):
         """
@@ -953,7 +1322,7 @@ class Pedido:
             conexion.update(query, (nueva_fecha, self.pedido_seleccionado))
             self.mostrar_alerta(f"Fecha de entrega actualizada para pedido #{self.pedido_seleccionado}")
             self.mostrando_formulario_editar = False
-            self.cargar_datos_tabla()
+            bus.publicar("pedidoventa", [self.pedido_seleccionado])
             return True
         except Exception as e:
             print(f"Error al actualizar fecha: {e}")
@@ -0,0 +1,239 @@
+"""
+Plan de horneado
+----------------
+Sugiere cuántas piezas hornear de cada producto para una fecha y qué
+materia prima e insumos hacen falta, combinando:
+
+- Pedidos de clientes que se entregan ese día y aún no están listos
+  (Pendiente o En proceso, pedidoventa).
+- El pronóstico de mostrador del modelo de demanda (pronostico.py): nivel
+  por factor del día de la semana, más Z desviaciones estándar como margen
+  de seguridad. Es el mismo modelo que usan el reporte y las alertas del
+  punto de venta.
+- El stock actual que sigue vigente en la fecha (CatProducto.Caducidad).
+
+Todo el catálogo se calcula con arreglos de NumPy: las necesidades de
+ingredientes son un producto matricial del plan por la lista de materiales
+explotada (recetario.py), y la hora pico de cada producto sale del perfil
+por hora del mismo modelo de demanda, sin volver a leer las ventas. Las
+consultas son agrupadas, sin una por producto.
+
+A hornear = pedidos + pronóstico - stock vigente, redondeado hacia arriba
+a tandas completas de la receta.
+
+Uso:
+    plan = calcular_plan(date(2025, 5, 24))
+    for fila in plan["productos"]:
+        print(fila["nombre"], fila["hornear"])
+
+    python plan_horneado.py --fecha 2025-05-24
+"""
+
+import argparse
+import time
+from datetime import date, datetime, timedelta
+import numpy as np
+from conexion import Conexion
+from bus_cambios import marcadores
+from recetario import obtener_recetario, TABLAS_PRECIO
+from pronostico import obtener_pronosticador
+
+Z_SEGURIDAD = 0.84       # ~80% de probabilidad de no quedarse sin producto
+DEMANDA_SIN_HISTORIA = 5  # Igual que PuntoVenta.obtener_promedios_ventas
+ESTADOS_POR_HORNEAR = ("Pendiente", "En proceso")  # Pedidos abiertos que aún no están listos
+
+
+def a_fecha(valor):
+    """Convierte date, datetime o 'YYYY-MM-DD' a date"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(str(valor)[:10], "%Y-%m-%d").date()
+
+
+def cargar_datos(fecha, conexion=None):
+    """
+    Lee catálogo y pedidos del día
+
+    Returns:
+        tuple: (catálogo, pedidos) como listas de diccionarios
+    """
+    conexion = conexion or Conexion()
+    catalogo = conexion.consultar(
+        """SELECT ID_CatProducto AS id, Nombre_prod AS nombre, Stock, Caducidad, FK_ID_Receta
+           FROM catproducto WHERE Estado = 'Disponible' ORDER BY ID_CatProducto"""
+    )
+    pedidos = conexion.consultar(
+        f"""SELECT d.FK_ID_CatProducto AS id, SUM(d.Cantidad) AS piezas
+            FROM detallepedidoventa d
+            JOIN pedidoventa p ON p.ID_PedidoVenta = d.FK_ID_PedidoVenta
+            WHERE p.Estado IN ({marcadores(ESTADOS_POR_HORNEAR)}) AND p.Fecha_entrega = %s
+            GROUP BY d.FK_ID_CatProducto""",
+        ESTADOS_POR_HORNEAR + (fecha,)
+    )
+    return catalogo, pedidos
+
+
+def pronosticar(catalogo, fecha, z=Z_SEGURIDAD, pronosticador=None):
+    """
+    Pronóstico de mostrador por producto para una fecha
+
+    Args:
+        catalogo (list): Filas del catálogo en el orden de los arreglos
+        fecha (date): Fecha a pronosticar
+        z (float): Desviaciones estándar de margen
+        pronosticador (Pronosticador, optional): Modelo a usar
+
+    Returns:
+        tuple: (pronóstico [P], con_historia [P] bool, hora pico [P], -1 sin historia)
+    """
+    pronosticador = pronosticador or obtener_pronosticador()
+    pronosticador.vigente()
+    ids = [f["id"] for f in catalogo]
+    pronostico, con_historia = pronosticador.demanda_dia(ids, fecha, z)
+    hora_pico = pronosticador.hora_pico(ids, fecha)
+    return np.where(con_historia, pronostico, DEMANDA_SIN_HISTORIA), con_historia, hora_pico
+
+
+def matriz_materiales(id_recetas, recetario):
+    """
+    Lista de materiales por pieza de cada producto como matriz
+
+    Args:
+        id_recetas (list): Receta de cada producto (None si no tiene)
+        recetario (Recetario): Recetario con las explosiones memorizadas
+
+    Returns:
+        tuple: (matriz [P, K], claves [(tipo, id)] de las K columnas)
+    """
+    explosiones = []
+    claves = {}
+    for id_receta in id_recetas:
+        explosion = {}
+        if id_receta is not None and recetario.tiene_ingredientes(id_receta):
+            try:
+                explosion = recetario.explotar(id_receta)
+            except ValueError:
+                explosion = {}
+        for clave in explosion:
+            claves.setdefault(clave, len(claves))
+        explosiones.append(explosion)
+    matriz = np.zeros((len(id_recetas), len(claves)))
+    for fila, explosion in enumerate(explosiones):
+        for clave, cantidad in explosion.items():
+            matriz[fila, claves[clave]] = float(cantidad)
+    return matriz, list(claves)
+
+
+def existencias(claves, conexion=None):
+    """Cantidad disponible de cada materia prima/insumo de la lista"""
+    conexion = conexion or Conexion()
+    disponibles = {}
+    for tipo, (tabla, clave) in TABLAS_PRECIO.items():
+        ids = sorted(i for t, i in claves if t == tipo)
+        if not ids:
+            continue
+        filas = conexion.consultar(
+            f"SELECT {clave} AS id, Cantidad FROM {tabla} WHERE {clave} IN ({', '.join(['%s'] * len(ids))})",
+            tuple(ids)
+        )
+        for fila in filas:
+            disponibles[(tipo, fila["id"])] = int(fila["Cantidad"])
+    return np.array([disponibles.get(c, 0) for c in claves], dtype=np.float64)
+
+
+def calcular_plan(fecha=None, z=Z_SEGURIDAD, por_tanda=True,
+                  conexion=None, recetario=None, pronosticador=None):
+    """
+    Calcula el plan de horneado y las necesidades de ingredientes
+
+    Args:
+        fecha (date, optional): Día a planear (mañana si es None)
+        z (float): Margen de seguridad en desviaciones estándar
+        por_tanda (bool): Redondear a tandas completas de la receta
+        conexion (Conexion, optional): Conexión a usar
+        recetario (Recetario, optional): Recetario a usar
+        pronosticador (Pronosticador, optional): Modelo de demanda a usar
+
+    Returns:
+        dict: fecha, productos (lista ordenada por piezas a hornear),
+            materiales (necesario/disponible/faltante), segundos
+    """
+    inicio_calculo = time.perf_counter()
+    fecha = a_fecha(fecha) if fecha else date.today() + timedelta(days=1)
+    recetario = recetario or obtener_recetario()
+    catalogo, pedidos = cargar_datos(fecha, conexion)
+    indice = {fila["id"]: i for i, fila in enumerate(catalogo)}
+
+    pronostico, con_historia, hora_pico = pronosticar(catalogo, fecha, z, pronosticador)
+
+    pedidos_dia = np.zeros(len(catalogo))
+    for fila in pedidos:
+        if fila["id"] in indice:
+            pedidos_dia[indice[fila["id"]]] = float(fila["piezas"])
+
+    stock = np.array([float(f["Stock"] or 0) for f in catalogo])
+    vigente = np.array([a_fecha(f["Caducidad"]) >= fecha if f["Caducidad"] else True for f in catalogo], dtype=bool)
+    stock_util = np.where(vigente, stock, 0.0)
+
+    hornear = np.ceil(np.maximum(pedidos_dia + pronostico - stock_util, 0.0))
+
+    id_recetas = [recetario.receta_producto.get(f["id"]) for f in catalogo]
+    id_recetas = [r if r in recetario.rendimiento else None for r in id_recetas]
+    if por_tanda:
+        tanda = np.array([float(recetario.rendimiento[r]) if r is not None else 1.0 for r in id_recetas])
+        hornear = np.ceil(hornear / tanda) * tanda
+
+    matriz, claves = matriz_materiales(id_recetas, recetario)
+    necesario = np.ceil(hornear @ matriz - 1e-9) if claves else np.zeros(0)
+    disponible = existencias(claves, conexion) if claves else np.zeros(0)
+    faltante = np.maximum(necesario - disponible, 0.0)
+
+    orden = np.argsort(-hornear, kind="stable")
+    productos = [{
+        "id": catalogo[i]["id"],
+        "nombre": catalogo[i]["nombre"],
+        "pronostico": round(float(pronostico[i]), 1),
+        "pedidos": int(pedidos_dia[i]),
+        "stock_util": int(stock_util[i]),
+        "hornear": int(hornear[i]),
+        "hora_pico": int(hora_pico[i]) if hora_pico[i] >= 0 else None,
+        "con_receta": id_recetas[i] is not None and recetario.tiene_ingredientes(id_recetas[i]),
+    } for i in orden]
+    materiales = [{
+        "tipo": clave[0],
+        "id": clave[1],
+        "nombre": recetario.ingredientes.get(clave, f"{clave[0]} {clave[1]}"),
+        "necesario": int(necesario[k]),
+        "disponible": int(disponible[k]),
+        "faltante": int(faltante[k]),
+    } for k, clave in enumerate(claves) if necesario[k] > 0]
+    materiales.sort(key=lambda m: (-m["faltante"], m["nombre"]))
+
+    return {
+        "fecha": fecha,
+        "productos": productos,
+        "materiales": materiales,
+        "segundos": round(time.perf_counter() - inicio_calculo, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan de horneado sugerido")
+    parser.add_argument("--fecha", default=None, help="YYYY-MM-DD (mañana por defecto)")
+    parser.add_argument("--z", type=float, default=Z_SEGURIDAD, help="Margen de seguridad")
+    args = parser.parse_args()
+
+    plan = calcular_plan(args.fecha, args.z)
+    print(f"Plan de horneado para {plan['fecha']} ({plan['segundos']} s)")
+    for fila in plan["productos"]:
+        if fila["hornear"]:
+            pico = f"  pico {fila['hora_pico']}:00" if fila["hora_pico"] is not None else ""
+            print(f"  {fila['nombre']:<25} hornear {fila['hornear']:>5}  "
+                  f"(pronóstico {fila['pronostico']}, pedidos {fila['pedidos']}, stock {fila['stock_util']}){pico}")
+    if plan["materiales"]:
+        print("Ingredientes:")
+        for m in plan["materiales"]:
+            falta = f"  FALTAN {m['faltante']}" if m["faltante"] else ""
+            print(f"  {m['nombre']:<25} {m['necesario']:>7} de {m['disponible']}{falta}")
@@ -0,0 +1,206 @@
+"""
+Corridas de producción
+----------------------
+Registra una horneada completa en una sola transacción:
+
+1. Explota las recetas de los productos (recetario.py) y suma lo que
+   consume toda la corrida.
+2. Lee con un solo SELECT (FOR UPDATE en MySQL) la existencia de cada
+   materia prima e insumo; si algo no alcanza se cancela toda la corrida
+   y se devuelven los faltantes.
+3. Descuenta materia prima (en orden FEFO por lotes, ver lotes.py) e
+   insumos con UPDATE condicionales en lote, suma las piezas a
+   CatProducto.Stock y registra cada producto en la tabla produccion.
+
+Las cantidades de la receta pueden ser fraccionarias; lo que se descuenta
+de cada materia prima o insumo se redondea hacia arriba a unidades
+enteras, que es como se lleva la existencia.
+
+Uso:
+    resultado = registrar_produccion([(id_catproducto, piezas), ...], id_empleado)
+    if resultado["faltantes"]:
+        ...  # nada se modificó
+
+    python produccion.py 35:200 36:120 --empleado 1
+"""
+
+import argparse
+from datetime import date
+from decimal import ROUND_CEILING
+from conexion import Conexion, es_sqlite
+from bus_cambios import bus, marcadores
+from lotes import conciliar, consumir_lotes
+from stock import publicar_cambios
+from recetario import obtener_recetario, TABLAS_PRECIO
+
+
+def unidades_enteras(cantidad):
+    """Redondea hacia arriba una cantidad de receta a unidades de inventario"""
+    return int(cantidad.to_integral_value(rounding=ROUND_CEILING))
+
+
+def consumo_corrida(productos, recetario=None):
+    """
+    Calcula lo que consume una corrida, sin tocar la base
+
+    Args:
+        productos: Iterable de tuplas (id_catproducto, piezas)
+        recetario (Recetario, optional): Recetario a usar
+
+    Returns:
+        tuple: ({(tipo, id): unidades enteras}, costo de ingredientes)
+
+    Raises:
+        ValueError: Si un producto no tiene receta con ingredientes
+    """
+    recetario = recetario or obtener_recetario()
+    productos = [(id_producto, int(piezas)) for id_producto, piezas in productos if int(piezas) > 0]
+    if not productos:
+        raise ValueError("La corrida no tiene productos")
+    plan, sin_receta = recetario.plan_productos(productos)
+    sin_ingredientes = list(dict.fromkeys(id_receta for id_receta, _ in plan
+                                          if not recetario.tiene_ingredientes(id_receta)))
+    if sin_receta:
+        raise ValueError(f"Productos sin receta: {', '.join(str(i) for i in sin_receta)}")
+    if sin_ingredientes:
+        nombres = ", ".join(recetario.nombres[i] for i in sin_ingredientes)
+        raise ValueError(f"Recetas sin ingredientes: {nombres}")
+    necesidades, costo = recetario.explotar_plan(plan)
+    consumo = {clave: unidades_enteras(cantidad) for clave, cantidad in necesidades.items()}
+    return {clave: cantidad for clave, cantidad in consumo.items() if cantidad > 0}, costo
+
+
+def revisar_existencias(cursor, consumo):
+    """
+    Bloquea y compara la existencia de cada componente con su consumo
+
+    Args:
+        cursor: Cursor de la transacción
+        consumo (dict): (tipo, id) -> unidades
+
+    Returns:
+        list: Faltantes como tuplas (nombre, necesarias, disponibles)
+    """
+    bloqueo = "" if es_sqlite(cursor) else " FOR UPDATE"
+    faltantes = []
+    for tipo, (tabla, clave) in TABLAS_PRECIO.items():
+        ids = sorted(id_componente for t, id_componente in consumo if t == tipo)
+        if not ids:
+            continue
+        cursor.execute(
+            f"SELECT {clave} AS id, Nombre, Cantidad FROM {tabla} "
+            f"WHERE {clave} IN ({marcadores(ids)}) ORDER BY {clave}{bloqueo}",
+            tuple(ids)
+        )
+        existencias = {fila["id"]: fila for fila in cursor.fetchall()}
+        for id_componente in ids:
+            necesarias = consumo[(tipo, id_componente)]
+            fila = existencias.get(id_componente)
+            disponibles = int(fila["Cantidad"]) if fila else 0
+            if disponibles < necesarias:
+                nombre = fila["Nombre"] if fila else f"{tipo} {id_componente}"
+                faltantes.append((nombre, necesarias, disponibles))
+    return faltantes
+
+
+def registrar_produccion(productos, id_empleado, conexion=None, recetario=None):
+    """
+    Registra una corrida de producción completa
+
+    Args:
+        productos: Iterable de tuplas (id_catproducto, piezas)
+        id_empleado (int): Empleado que registra la corrida
+        conexion (Conexion, optional): Conexión a usar
+        recetario (Recetario, optional): Recetario a usar
+
+    Returns:
+        dict: consumo {(tipo, id): unidades}, costo, faltantes
+            [(nombre, necesarias, disponibles)]; si hay faltantes no se
+            modificó nada
+
+    Raises:
+        ValueError: Si un producto no tiene receta o no hay conexión
+    """
+    piezas = {}
+    for id_producto, cantidad in productos:
+        if int(cantidad) > 0:
+            piezas[int(id_producto)] = piezas.get(int(id_producto), 0) + int(cantidad)
+    consumo, costo = consumo_corrida(piezas.items(), recetario)
+    resultado = {"consumo": consumo, "costo": costo, "faltantes": []}
+
+    conexion = conexion or Conexion()
+    conexion.conectar()
+    if not conexion.conn:
+        raise ValueError("No se pudo conectar a la base de datos")
+    cursor = conexion.cursor
+    ids_mp = sorted(i for tipo, i in consumo if tipo == "materiaprima")
+    ids_insumo = sorted(i for tipo, i in consumo if tipo == "insumo")
+    ids_productos = sorted(piezas)
+    try:
+        resultado["faltantes"] = revisar_existencias(cursor, consumo)
+        if resultado["faltantes"]:
+            conexion.conn.rollback()
+            return resultado
+
+        if ids_mp:
+            conciliar(cursor, ids_mp)
+            for id_mp in ids_mp:
+                consumir_lotes(cursor, id_mp, consumo[("materiaprima", id_mp)])
+            cursor.executemany(
+                "UPDATE materiaprima SET Cantidad = Cantidad - %s WHERE ID_MateriaPrima = %s",
+                [(consumo[("materiaprima", i)], i) for i in ids_mp]
+            )
+        if ids_insumo:
+            cursor.executemany(
+                "UPDATE Insumo SET Cantidad = Cantidad - %s WHERE ID_Insumo = %s",
+                [(consumo[("insumo", i)], i) for i in ids_insumo]
+            )
+        cursor.executemany(
+            "UPDATE CatProducto SET Stock = Stock + %s WHERE ID_CatProducto = %s",
+            [(piezas[i], i) for i in ids_productos]
+        )
+        hoy = date.today()
+        cursor.executemany(
+            "INSERT INTO produccion (Unidades, CantidadInicial, Fecha, FK_ID_CatProducto, FK_ID_Empleado) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [(piezas[i], piezas[i], hoy, i, id_empleado) for i in ids_productos]
+        )
+        publicar_cambios(cursor, ids_productos)
+        conexion.conn.commit()
+    except Exception:
+        conexion.conn.rollback()
+        raise
+    finally:
+        conexion.cerrar()
+
+    bus.publicar("catproducto", ids_productos)
+    if ids_mp:
+        bus.publicar("materiaprima", ids_mp)
+    if ids_insumo:
+        bus.publicar("insumo", ids_insumo)
+    return resultado
+
+
+def texto_faltantes(faltantes):
+    """Resume los faltantes para mostrarlos en pantalla"""
+    return "; ".join(f"{nombre}: faltan {necesarias - disponibles}" for nombre, necesarias, disponibles in faltantes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registra una corrida de producción")
+    parser.add_argument("productos", nargs="+", help="Pares producto:piezas, por ejemplo 35:200")
+    parser.add_argument("--empleado", type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        productos = [tuple(int(x) for x in par.split(":")) for par in args.productos]
+        res = registrar_produccion(productos, args.empleado)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+    if res["faltantes"]:
+        print("Corrida rechazada, no se modificó el inventario:")
+        for nombre, necesarias, disponibles in res["faltantes"]:
+            print(f"  {nombre:<30} necesita {necesarias}, hay {disponibles}")
+        raise SystemExit(1)
+    print(f"Corrida registrada. Costo de ingredientes: ${res['costo']}")
@@ -0,0 +1,472 @@
+"""
+Pronóstico de demanda por producto
+----------------------------------
+Mantiene la serie de piezas vendidas por día, hora y producto (tabla
+venta_hora) y ajusta con NumPy un modelo estacional ligero por producto:
+
+    piezas(día, hora) = nivel * factor[día de la semana] * perfil[día de la semana, hora]
+
+- La serie se actualiza de forma incremental: se recalculan solo los días
+  que tocan las ventas con ID mayor a la última acumulada (serie_demanda)
+  menos VENTANA_VENTAS. Una venta con ID menor puede confirmarse después
+  de una mayor; la ventana la vuelve a ver y, como cada día se reescribe
+  completo, repetir un día no duplica piezas.
+- nivel es un promedio exponencial (ALFA_NIVEL) de la demanda diaria sin
+  estacionalidad; los factores por día de la semana y el perfil por hora
+  se encogen hacia 1 y hacia el perfil general del producto cuando hay
+  pocas semanas de historia. sigma es la desviación de los residuos.
+- Los parámetros se guardan en modelo_demanda y se reajustan una vez al
+  día: al abrir el sistema el mismo día se leen sin recalcular. Todo el
+  catálogo se ajusta a la vez con arreglos producto x día x hora.
+
+Las ventas nuevas (bus de cambios "venta") solo marcan la serie como
+pendiente; el pronóstico del día usa la historia hasta ayer, así que las
+alertas del punto de venta no consultan la base.
+
+El plan de horneado (plan_horneado.py) usa este mismo modelo con
+demanda_dia, así que hay un solo pronóstico en el sistema.
+
+Uso:
+    pronosticador = obtener_pronosticador()
+    manana = pronosticador.pronostico_dia(date.today() + timedelta(days=1))
+    semana = pronosticador.pronostico_semana()
+    restante = pronosticador.demanda_restante(id_producto)
+
+    python pronostico.py --dias 7
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta
+import numpy as np
+from conexion import Conexion
+from bus_cambios import bus
+
+SERIE = "venta_hora"
+VERSION_MODELO = 1
+SEMANAS_AJUSTE = 12
+ALFA_NIVEL = 0.15         # Peso del día más reciente en el nivel
+PREVIO_DIA = 2.0          # Semanas equivalentes que acercan los factores a 1
+PREVIO_HORA = 20.0        # Piezas equivalentes del perfil general en cada día
+Z_ALERTA = 0.84           # Mismo margen que el plan de horneado
+HORAS = 24
+VENTANA_VENTAS = 500      # Ventas ya acumuladas que se vuelven a revisar
+
+# Reemplaza las piezas de la hora: los días se recalculan completos
+UPSERT_SERIE = {
+    "mysql": """
+        INSERT INTO venta_hora (Fecha, FK_ID_CatProducto, Hora, Piezas)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE Piezas = VALUES(Piezas)
+    """,
+    "sqlite": """
+        INSERT INTO venta_hora (Fecha, FK_ID_CatProducto, Hora, Piezas)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT(Fecha, FK_ID_CatProducto, Hora) DO UPDATE SET Piezas = excluded.Piezas
+    """,
+}
+
+_pronosticador = None
+_pronosticador_lock = threading.Lock()
+
+
+def a_fecha(valor):
+    """Convierte date, datetime o 'YYYY-MM-DD' a date"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(str(valor)[:10], "%Y-%m-%d").date()
+
+
+def actualizar_series(conexion=None):
+    """
+    Recalcula en venta_hora los días con ventas nuevas o confirmadas tarde
+
+    Toma los días de las ventas con ID mayor a la marca menos
+    VENTANA_VENTAS y los reescribe completos (borrar e insertar), así que
+    correrla dos veces deja la serie igual.
+
+    Args:
+        conexion (Conexion, optional): Conexión a usar
+
+    Returns:
+        int: Ventas nuevas procesadas
+    """
+    conexion = conexion or Conexion()
+    conexion.conectar()
+    if not conexion.conn:
+        return 0
+    cursor = conexion.cursor
+    try:
+        cursor.execute("SELECT Ultimo_ID_Venta FROM serie_demanda WHERE Serie = %s", (SERIE,))
+        fila = cursor.fetchone()
+        ultimo = int(fila["Ultimo_ID_Venta"]) if fila else 0
+        cursor.execute("SELECT MAX(ID_Venta) AS tope FROM venta")
+        tope = cursor.fetchone()["tope"]
+        if not tope:
+            return 0
+        tope = int(tope)
+
+        # Días que tocan las ventas de la ventana (la llave primaria acota la búsqueda)
+        cursor.execute(
+            "SELECT DISTINCT DATE(Fecha_venta) AS dia FROM venta WHERE ID_Venta > %s",
+            (max(0, ultimo - VENTANA_VENTAS),)
+        )
+        dias = sorted({a_fecha(f["dia"]) for f in cursor.fetchall() if f["dia"]})
+        if dias:
+            rangos = " OR ".join(["(v.Fecha_venta >= %s AND v.Fecha_venta < %s)"] * len(dias))
+            cursor.execute(f"""
+                SELECT DATE(v.Fecha_venta) AS dia, dv.FK_ID_CatProducto AS id,
+                       HOUR(v.Fecha_venta) AS hora, SUM(dv.Cantidad) AS piezas
+                FROM venta v
+                JOIN detalle_venta dv ON dv.FK_ID_Venta = v.ID_Venta
+                WHERE ({rangos}) AND v.Estado = 'Completada'
+                GROUP BY DATE(v.Fecha_venta), dv.FK_ID_CatProducto, HOUR(v.Fecha_venta)
+            """, tuple(valor for dia in dias for valor in (dia, dia + timedelta(days=1))))
+            filas = [(f["dia"], f["id"], int(f["hora"]), int(f["piezas"])) for f in cursor.fetchall()]
+            cursor.execute(
+                f"DELETE FROM venta_hora WHERE Fecha IN ({', '.join(['%s'] * len(dias))})",
+                tuple(dias)
+            )
+            if filas:
+                cursor.executemany(UPSERT_SERIE[conexion.motor], filas)
+
+        cursor.execute("UPDATE serie_demanda SET Ultimo_ID_Venta = %s WHERE Serie = %s", (tope, SERIE))
+        if cursor.rowcount == 0:
+            cursor.execute("INSERT INTO serie_demanda (Serie, Ultimo_ID_Venta) VALUES (%s, %s)", (SERIE, tope))
+        conexion.conn.commit()
+        return max(0, tope - ultimo)
+    except Exception:
+        conexion.conn.rollback()
+        raise
+    finally:
+        conexion.cerrar()
+
+
+def ajustar(filas, hasta, semanas=SEMANAS_AJUSTE):
+    """
+    Ajusta nivel, factores por día de la semana y perfil por hora
+
+    Args:
+        filas (list): Filas Fecha, id, Hora, Piezas de venta_hora
+        hasta (date): Primer día fuera de la ventana (normalmente hoy)
+        semanas (int): Semanas de historia
+
+    Returns:
+        dict: ids [P], nivel [P], sigma [P], factores [P, 7],
+            perfil [P, 7, 24], dias [P]
+    """
+    dias = semanas * 7
+    inicio = hasta - timedelta(days=dias)
+    ids = sorted({f["id"] for f in filas})
+    indice = {id_prod: i for i, id_prod in enumerate(ids)}
+    serie = np.zeros((len(ids), dias, HORAS))
+    if filas:
+        p = np.array([indice[f["id"]] for f in filas], dtype=np.int64)
+        d = (np.array([str(f["Fecha"])[:10] for f in filas], dtype="datetime64[D]")
+             - np.datetime64(inicio, "D")).astype(np.int64)
+        h = np.array([int(f["Hora"]) for f in filas], dtype=np.int64)
+        q = np.array([float(f["Piezas"]) for f in filas])
+        validos = (d >= 0) & (d < dias) & (h >= 0) & (h < HORAS)
+        np.add.at(serie, (p[validos], d[validos], h[validos]), q[validos])
+
+    diaria = serie.sum(axis=2)                                   # [P, D]
+    semana = (inicio.weekday() + np.arange(dias)) % 7             # [D]
+    uno_caliente = np.eye(7)[semana]                              # [D, 7]
+
+    # Solo cuentan los días desde la primera venta de cada producto
+    vendio = diaria > 0
+    primera = np.where(vendio.any(axis=1), vendio.argmax(axis=1), dias)
+    activo = np.arange(dias)[None, :] >= primera[:, None]         # [P, D]
+    dias_activos = activo.sum(axis=1)
+
+    # Factores por día de la semana, encogidos hacia 1 con pocas semanas
+    suma_dia = (diaria * activo) @ uno_caliente                   # [P, 7]
+    cuenta_dia = activo.astype(float) @ uno_caliente              # [P, 7]
+    media = (diaria * activo).sum(axis=1) / np.maximum(dias_activos, 1)
+    crudo = np.divide(suma_dia / np.maximum(cuenta_dia, 1), media[:, None],
+                      out=np.ones_like(suma_dia), where=media[:, None] > 0)
+    factores = (cuenta_dia * crudo + PREVIO_DIA) / (cuenta_dia + PREVIO_DIA)
+    factores /= factores.mean(axis=1, keepdims=True)
+
+    # Nivel: promedio exponencial de la demanda sin estacionalidad
+    factor_dia = factores[:, semana]                              # [P, D]
+    pesos = (1 - ALFA_NIVEL) ** np.arange(dias - 1, -1, -1)[None, :] * activo
+    nivel = (pesos * diaria / factor_dia).sum(axis=1) / np.maximum(pesos.sum(axis=1), 1e-12)
+    residuo = (diaria - nivel[:, None] * factor_dia) * activo
+    sigma = np.sqrt((residuo ** 2).sum(axis=1) / np.maximum(dias_activos, 1))
+
+    # Perfil por hora de cada día de la semana, encogido hacia el del producto
+    por_hora = np.einsum("pdh,dw->pwh", serie, uno_caliente)      # [P, 7, 24]
+    general = por_hora.sum(axis=1)                                # [P, 24]
+    tienda = general.sum(axis=0)
+    tienda = tienda / tienda.sum() if tienda.sum() else np.full(HORAS, 1 / HORAS)
+    base = (general + PREVIO_HORA * tienda) / (general.sum(axis=1, keepdims=True) + PREVIO_HORA)
+    perfil = ((por_hora + PREVIO_HORA * base[:, None, :])
+              / (por_hora.sum(axis=2, keepdims=True) + PREVIO_HORA))
+
+    return {
+        "ids": ids,
+        "nivel": nivel,
+        "sigma": sigma,
+        "factores": factores,
+        "perfil": perfil,
+        "dias": dias_activos,
+    }
+
+
+class Pronosticador:
+    """
+    Modelo de demanda de todo el catálogo con sus parámetros en memoria
+
+    Attributes:
+        indice (dict): id_catproducto -> posición en los arreglos
+        nivel, sigma (np.ndarray): Piezas por día [P]
+        factores (np.ndarray): Factor por día de la semana [P, 7] (lunes = 0)
+        perfil (np.ndarray): Fracción del día por hora [P, 7, 24]
+        ajustado (date): Día en que se ajustaron los parámetros
+        series_pendientes (bool): Hay ventas nuevas sin acumular en la serie
+    """
+
+    def __init__(self, semanas=SEMANAS_AJUSTE):
+        self.semanas = semanas
+        self.indice = {}
+        self.nivel = np.zeros(0)
+        self.sigma = np.zeros(0)
+        self.factores = np.ones((0, 7))
+        self.perfil = np.zeros((0, 7, HORAS))
+        self.ajustado = None
+        self.series_pendientes = True
+
+    def cargar(self, conexion=None):
+        """Lee los parámetros guardados; reajusta si son de otro día o versión"""
+        conexion = conexion or Conexion()
+        filas = conexion.consultar(
+            "SELECT * FROM modelo_demanda WHERE Ajustado = %s AND Version = %s",
+            (date.today(), VERSION_MODELO)
+        )
+        if not filas:
+            self.actualizar(forzar=True)
+            return
+        self._asignar({
+            "ids": [f["FK_ID_CatProducto"] for f in filas],
+            "nivel": np.array([float(f["Nivel"]) for f in filas]),
+            "sigma": np.array([float(f["Sigma"]) for f in filas]),
+            "factores": np.array([json.loads(f["Factores_dia"]) for f in filas]).reshape(-1, 7),
+            "perfil": np.array([json.loads(f["Perfil_hora"]) for f in filas]).reshape(-1, 7, HORAS),
+        }, date.today())
+
+    def _asignar(self, modelo, ajustado):
+        self.indice = {id_prod: i for i, id_prod in enumerate(modelo["ids"])}
+        self.nivel = modelo["nivel"]
+        self.sigma = modelo["sigma"]
+        self.factores = modelo["factores"]
+        self.perfil = modelo["perfil"]
+        self.ajustado = ajustado
+
+    def actualizar(self, forzar=False):
+        """
+        Acumula las ventas nuevas y reajusta si cambió el día
+
+        Args:
+            forzar (bool): Reajustar aunque el modelo sea de hoy
+
+        Returns:
+            bool: True si se reajustó el modelo
+        """
+        hoy = date.today()
+        if self.series_pendientes or self.ajustado != hoy or forzar:
+            actualizar_series()
+            self.series_pendientes = False
+        if self.ajustado == hoy and not forzar:
+            return False
+
+        conexion = Conexion()
+        filas = conexion.consultar(
+            """SELECT Fecha, FK_ID_CatProducto AS id, Hora, Piezas FROM venta_hora
+               WHERE Fecha >= %s AND Fecha < %s""",
+            (hoy - timedelta(weeks=self.semanas), hoy)
+        )
+        modelo = ajustar(filas, hoy, self.semanas)
+        self._asignar(modelo, hoy)
+        self.guardar(modelo, hoy)
+        return True
+
+    def guardar(self, modelo, ajustado):
+        """Reemplaza los parámetros guardados en modelo_demanda"""
+        conexion = Conexion()
+        conexion.conectar()
+        if not conexion.conn:
+            return
+        try:
+            conexion.cursor.execute("DELETE FROM modelo_demanda")
+            conexion.cursor.executemany(
+                """INSERT INTO modelo_demanda
+                   (FK_ID_CatProducto, Nivel, Sigma, Factores_dia, Perfil_hora, Dias, Ajustado, Version)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
+                [(id_prod,
+                  round(float(modelo["nivel"][i]), 3),
+                  round(float(modelo["sigma"][i]), 3),
+                  json.dumps(np.round(modelo["factores"][i], 4).tolist()),
+                  json.dumps(np.round(modelo["perfil"][i], 5).tolist()),
+                  int(modelo["dias"][i]),
+                  ajustado,
+                  VERSION_MODELO) for i, id_prod in enumerate(modelo["ids"])]
+            )
+            conexion.conn.commit()
+        except Exception as e:
+            conexion.conn.rollback()
+            print(f"Error al guardar el modelo de demanda: {e}")
+        finally:
+            conexion.cerrar()
+
+    def vigente(self):
+        """Reajusta solo si el modelo es de un día anterior"""
+        if self.ajustado != date.today():
+            self.actualizar()
+
+    def demanda_dia(self, ids, fecha, z=0.0):
+        """
+        Piezas esperadas de una lista de productos en un día, con margen
+
+        Args:
+            ids (list): IDs de catproducto en el orden de los arreglos
+            fecha: Día a pronosticar
+            z (float): Desviaciones estándar de margen
+
+        Returns:
+            tuple: (piezas [len(ids)], con_historia [len(ids)] bool)
+        """
+        semana = a_fecha(fecha).weekday()
+        posiciones = np.array([self.indice.get(id_prod, -1) for id_prod in ids], dtype=np.int64)
+        con_historia = posiciones >= 0
+        piezas = np.zeros(len(ids))
+        p = posiciones[con_historia]
+        piezas[con_historia] = self.nivel[p] * self.factores[p, semana] + z * self.sigma[p]
+        return piezas, con_historia
+
+    def hora_pico(self, ids, fecha):
+        """
+        Hora de más venta de cada producto en el día de la semana de una fecha
+
+        Args:
+            ids (list): IDs de catproducto en el orden de los arreglos
+            fecha: Día a consultar
+
+        Returns:
+            np.ndarray: Hora [len(ids)]; -1 para productos sin historia
+        """
+        semana = a_fecha(fecha).weekday()
+        posiciones = np.array([self.indice.get(id_prod, -1) for id_prod in ids], dtype=np.int64)
+        horas = np.full(len(ids), -1, dtype=np.int64)
+        con_historia = posiciones >= 0
+        horas[con_historia] = self.perfil[posiciones[con_historia], semana].argmax(axis=1)
+        return horas
+
+    def marcar_ventas(self, cambio):
+        """Suscriptor del bus: hay ventas nuevas para la serie"""
+        self.series_pendientes = True
+
+    def diario(self, desde, dias):
+        """Piezas esperadas por producto y día [P, dias]"""
+        semana = (a_fecha(desde).weekday() + np.arange(dias)) % 7
+        return self.nivel[:, None] * self.factores[:, semana]
+
+    def pronostico_dia(self, fecha=None):
+        """
+        Piezas esperadas de cada producto en un día (mañana por defecto)
+
+        Returns:
+            dict: id_catproducto -> piezas
+        """
+        fecha = a_fecha(fecha) if fecha else date.today() + timedelta(days=1)
+        valores = self.diario(fecha, 1)[:, 0]
+        return {id_prod: float(valores[i]) for id_prod, i in self.indice.items()}
+
+    def pronostico_semana(self, desde=None):
+        """
+        Piezas esperadas de cada producto en los 7 días desde una fecha
+
+        Returns:
+            dict: id_catproducto -> piezas
+        """
+        desde = a_fecha(desde) if desde else date.today() + timedelta(days=1)
+        valores = self.diario(desde, 7).sum(axis=1)
+        return {id_prod: float(valores[i]) for id_prod, i in self.indice.items()}
+
+    def pronostico_horas(self, fecha=None):
+        """
+        Piezas esperadas por hora de cada producto en un día
+
+        Returns:
+            dict: id_catproducto -> arreglo de 24 horas
+        """
+        fecha = a_fecha(fecha) if fecha else date.today() + timedelta(days=1)
+        horas = self.diario(fecha, 1)[:, 0, None] * self.perfil[:, fecha.weekday(), :]
+        return {id_prod: horas[i] for id_prod, i in self.indice.items()}
+
+    def demanda_restante(self, id_producto, momento=None, z=Z_ALERTA):
+        """
+        Piezas que se esperan vender de un producto en lo que resta del día
+
+        Args:
+            id_producto (int): ID del producto
+            momento (datetime, optional): Hora de referencia (ahora por defecto)
+            z (float): Desviaciones estándar de margen
+
+        Returns:
+            float: Piezas, o None si el producto no tiene historia
+        """
+        i = self.indice.get(id_producto)
+        if i is None:
+            return None
+        momento = momento or datetime.now()
+        semana = momento.weekday()
+        perfil = self.perfil[i, semana]
+        # Fracción que queda de la hora actual más las horas siguientes
+        fraccion = perfil[momento.hour] * (1 - momento.minute / 60) + perfil[momento.hour + 1:].sum()
+        esperado = self.nivel[i] * self.factores[i, semana]
+        return float(fraccion * esperado + z * self.sigma[i] * np.sqrt(fraccion))
+
+
+def obtener_pronosticador():
+    """
+    Devuelve el pronosticador compartido del proceso (lo carga la primera vez)
+
+    Returns:
+        Pronosticador: Modelo suscrito a las ventas nuevas
+    """
+    global _pronosticador
+    with _pronosticador_lock:
+        if _pronosticador is None:
+            pronosticador = Pronosticador()
+            pronosticador.cargar()
+            bus.suscribir("venta", pronosticador.marcar_ventas)
+            _pronosticador = pronosticador
+        return _pronosticador
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pronóstico de demanda por producto")
+    parser.add_argument("--desde", default=None, help="YYYY-MM-DD (mañana por defecto)")
+    parser.add_argument("--dias", type=int, default=7)
+    parser.add_argument("--reajustar", action="store_true", help="Reajustar aunque el modelo sea de hoy")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    pronosticador = Pronosticador()
+    if args.reajustar:
+        pronosticador.actualizar(forzar=True)
+    else:
+        pronosticador.cargar()
+    desde = a_fecha(args.desde) if args.desde else date.today() + timedelta(days=1)
+    tabla = pronosticador.diario(desde, args.dias)
+    nombres = {f["id"]: f["nombre"] for f in Conexion().consultar(
+        "SELECT ID_CatProducto AS id, Nombre_prod AS nombre FROM catproducto")}
+    print(f"Pronóstico desde {desde} ({round(time.perf_counter() - inicio, 3)} s)")
+    for id_prod, i in sorted(pronosticador.indice.items(), key=lambda par: -tabla[par[1]].sum()):
+        dias = " ".join(f"{v:6.1f}" for v in tabla[i])
+        print(f"  {nombres.get(id_prod, id_prod)!s:<25} {dias}  total {tabla[i].sum():7.1f}")
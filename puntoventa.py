@@ -17,7 +17,13 @@ import pygame
 import os
 import requests
 from ticket import Ticket
+from dinero import CERO, a_decimal, calcular_linea
 from receta import Conexion
+from stock import descontar_stock, liberar_stock, publicar_cambios, reservar_stock, obtener_feed
+from bus_cambios import bus, fusionar_filas, marcadores
+from produccion import registrar_produccion, texto_faltantes
+from plan_horneado import calcular_plan
+from pronostico import obtener_pronosticador
 import smtplib
 from email.message import EmailMessage
 from datetime import datetime
@@ -35,6 +41,8 @@ COLOR_BOTON_BORDE = (0, 80, 180)
 COLOR_ALERTA = (255, 200, 200)
 COLOR_ALERTA_BORDE = (200, 0, 0)
 
+FILAS_PRODUCCION = 8  # Renglones del formulario de producción
+
 class InputBox:
     """Clase para crear campos de entrada de texto personalizados"""
     
@@ -177,18 +185,17 @@ class PuntoVenta:
         self.GRIS_CLARO = (230, 230, 230)
 
         # Configuración de fuentes escaladas
-        def fuente_relativa(base_size):
-            scale = min(self.ancho / 1585, self.alto / 870)
-            return int(base_size * scale)
+        self.configurar_layout()
 
-        self.fuente_producto = pygame.font.SysFont("Open Sans", fuente_relativa(28))
-        self.fuente_tit = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
-        self.fuente_titulo = pygame.font.SysFont("Times New Roman", fuente_relativa(36), bold=True)
-        self.fuente_ticket = pygame.font.SysFont("Open Sans", fuente_relativa(28))
-        self.fuente_busqueda = pygame.font.SysFont("Open Sans", fuente_relativa(28))
+        # Imágenes originales por ruta, para reescalar sin volver a leer disco
+        self.imagenes_originales = {}
 
         # Inicializar cache de datos
         self.data_cache = DataCache()
+
+        # Cambios de stock de otras cajas (ver stock.py)
+        self.feed_stock = obtener_feed()
+        self.version_stock = self.feed_stock.version
         
         # Inicializar variables del sistema
         self.ticket = Ticket(nombre_panaderia="Panadería Bambi")
@@ -197,17 +204,29 @@ class PuntoVenta:
         self.busqueda_activa = False
         self.boton_pagar_rect = None
         self.boton_agregar_producto_rect = None
+        self.boton_produccion_rect = None
         self.alerta = ""
         self.id_empleado = id_empleado
         self.mostrando_modal_pago = False
         self.efectivo_box = None
         self.efectivo_mensaje = ""
-        self.efectivo_cambio = 0.0
+        self.efectivo_cambio = CERO
+        self.reserva_tarjeta = None  # Líneas con stock apartado para el cobro con tarjeta en curso
+        # Eventos de hilos de fondo que el menú entrega aunque la pestaña no esté activa
+        self.eventos_fondo = set()
         self.mostrando_formulario = False
         self.formulario_boxes = []
         self.formulario_labels = []
         self.formulario_btn_guardar = None
         self.formulario_mensaje = ""
+
+        # Corrida de producción (ver produccion.py)
+        self.mostrando_produccion = False
+        self.produccion_filas = []
+        self.produccion_btn_producir = None
+        self.produccion_btn_cancelar = None
+        self.produccion_btn_sugerir = None
+        self.produccion_mensaje = ""
         
         # Variables para scroll - AJUSTADAS PARA DISEÑO AMPLIADO
         self.scroll_productos = 0
@@ -227,6 +246,39 @@ class PuntoVenta:
         # Cargar datos inicial
         self.cargar_datos_inicial()
 
+        # Refrescar solo los productos que otros módulos modifiquen
+        bus.suscribir("catproducto", self.refrescar_productos)
+
+    def configurar_layout(self):
+        """Calcula las fuentes escaladas según el ancho y alto actuales"""
+        def fuente_relativa(base_size):
+            scale = min(self.ancho / 1585, self.alto / 870)
+            return int(base_size * scale)
+
+        self.fuente_producto = pygame.font.SysFont("Open Sans", fuente_relativa(28))
+        self.fuente_tit = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
+        self.fuente_titulo = pygame.font.SysFont("Times New Roman", fuente_relativa(36), bold=True)
+        self.fuente_ticket = pygame.font.SysFont("Open Sans", fuente_relativa(28))
+        self.fuente_busqueda = pygame.font.SysFont("Open Sans", fuente_relativa(28))
+
+    def relayout(self, x, y, ancho, alto):
+        """
+        Reubica el punto de venta conservando catálogo, cache y ticket abierto
+        
+        Args:
+            x, y (int): Nueva posición
+            ancho, alto (int): Nuevas dimensiones
+        """
+        self.x = x
+        self.y = y
+        self.ancho = ancho
+        self.alto = alto
+        self.configurar_layout()
+        # Reescalar imágenes desde las originales en memoria (sin consultar la BD)
+        self.cargar_imagenes()
+        if getattr(self, "pago_tarjeta_instance", None):
+            self.pago_tarjeta_instance.relayout(x, y, ancho, alto)
+
     def cargar_datos_inicial(self):
         """Carga los datos iniciales de forma optimizada"""
         try:
@@ -247,6 +299,13 @@ class PuntoVenta:
             self.minimo = []
             self.imagenes_productos = []
 
+        # Modelo de demanda para las alertas de stock (se ajusta una vez al día)
+        try:
+            self.pronosticador = obtener_pronosticador()
+        except Exception as e:
+            print(f"Error al cargar el pronóstico de demanda: {e}")
+            self.pronosticador = None
+
     def cargar_imagenes(self):
         """Carga las imágenes de productos de forma optimizada - TAMAÑO AMPLIADO"""
         try:
@@ -256,60 +315,80 @@ class PuntoVenta:
             
             self.imagenes_productos = []
             # TAMAÑO AMPLIADO: Imágenes más grandes para las tarjetas ampliadas
-            tamaño_imagen = (int(145 * self.ancho / 1585), int(145 * self.alto / 870))
+            tamaño_imagen = self.tamano_imagen()
             
             for prod in self.productos:
-                ruta_imagen = prod.get("imagen", "imagenes/log.png")
-                try:
-                    if os.path.exists(ruta_imagen):
-                        imagen = pygame.image.load(ruta_imagen).convert_alpha()
-                        imagen = pygame.transform.smoothscale(imagen, tamaño_imagen)
-                    else:
-                        # Imagen por defecto MÁS GRANDE con mejor diseño
-                        imagen = pygame.Surface(tamaño_imagen)
-                        imagen.fill((245, 245, 245))
-                        
-                        # Marco decorativo
-                        pygame.draw.rect(imagen, (200, 200, 200), imagen.get_rect(), 2)
-                        
-                        # Icono de imagen faltante más grande
-                        centro_x, centro_y = tamaño_imagen[0] // 2, tamaño_imagen[1] // 2
-                        
-                        # Dibujar un icono de imagen simple
-                        icon_size = min(tamaño_imagen) // 3
-                        icon_rect = pygame.Rect(centro_x - icon_size//2, centro_y - icon_size//2 - 10, icon_size, icon_size//2)
-                        pygame.draw.rect(imagen, (180, 180, 180), icon_rect, 3)
-                        
-                        # Círculo para representar una imagen
-                        pygame.draw.circle(imagen, (180, 180, 180), (centro_x - icon_size//4, centro_y - icon_size//4), icon_size//8, 2)
-                        
-                        # Texto "Sin imagen" más legible
-                        font = pygame.font.SysFont("Arial", int(16 * self.ancho / 1585), bold=True)
-                        text = font.render("Sin imagen", True, (120, 120, 120))
-                        text_rect = text.get_rect(center=(centro_x, centro_y + 20))
-                        imagen.blit(text, text_rect)
-                        
-                except Exception as e:
-                    print(f"Error al cargar imagen {ruta_imagen}: {e}")
-                    # Imagen de error más informativa
-                    imagen = pygame.Surface(tamaño_imagen)
-                    imagen.fill((255, 240, 240))
-                    
-                    pygame.draw.rect(imagen, (200, 0, 0), imagen.get_rect(), 2)
-                    
-                    font = pygame.font.SysFont("Arial", int(14 * self.ancho / 1585), bold=True)
-                    error_text = font.render("Error de", True, (200, 0, 0))
-                    error_text2 = font.render("imagen", True, (200, 0, 0))
-                    
-                    centro_x, centro_y = tamaño_imagen[0] // 2, tamaño_imagen[1] // 2
-                    imagen.blit(error_text, (centro_x - error_text.get_width()//2, centro_y - 15))
-                    imagen.blit(error_text2, (centro_x - error_text2.get_width()//2, centro_y + 5))
-                
-                self.imagenes_productos.append(imagen)
+                self.imagenes_productos.append(self.crear_imagen_producto(prod, tamaño_imagen))
         except Exception as e:
             print(f"Error en cargar_imagenes: {e}")
             self.imagenes_productos = []
 
+    def tamano_imagen(self):
+        """Tamaño de las imágenes de producto según el área actual"""
+        return (int(145 * self.ancho / 1585), int(145 * self.alto / 870))
+
+    def crear_imagen_producto(self, prod, tamaño_imagen):
+        """
+        Crea la imagen escalada de un producto (o una imagen sustituta)
+
+        Args:
+            prod (dict): Producto con la ruta de su imagen
+            tamaño_imagen (tuple): Ancho y alto de la imagen
+
+        Returns:
+            pygame.Surface: Imagen lista para dibujar
+        """
+        ruta_imagen = prod.get("imagen", "imagenes/log.png")
+        try:
+            if os.path.exists(ruta_imagen):
+                original = self.imagenes_originales.get(ruta_imagen)
+                if original is None:
+                    original = pygame.image.load(ruta_imagen).convert_alpha()
+                    self.imagenes_originales[ruta_imagen] = original
+                imagen = pygame.transform.smoothscale(original, tamaño_imagen)
+            else:
+                # Imagen por defecto MÁS GRANDE con mejor diseño
+                imagen = pygame.Surface(tamaño_imagen)
+                imagen.fill((245, 245, 245))
+                
+                # Marco decorativo
+                pygame.draw.rect(imagen, (200, 200, 200), imagen.get_rect(), 2)
+                
+                # Icono de imagen faltante más grande
+                centro_x, centro_y = tamaño_imagen[0] // 2, tamaño_imagen[1] // 2
+                
+                # Dibujar un icono de imagen simple
+                icon_size = min(tamaño_imagen) // 3
+                icon_rect = pygame.Rect(centro_x - icon_size//2, centro_y - icon_size//2 - 10, icon_size, icon_size//2)
+                pygame.draw.rect(imagen, (180, 180, 180), icon_rect, 3)
+                
+                # Círculo para representar una imagen
+                pygame.draw.circle(imagen, (180, 180, 180), (centro_x - icon_size//4, centro_y - icon_size//4), icon_size//8, 2)
+                
+                # Texto "Sin imagen" más legible
+                font = pygame.font.SysFont("Arial", int(16 * self.ancho / 1585), bold=True)
+                text = font.render("Sin imagen", True, (120, 120, 120))
+                text_rect = text.get_rect(center=(centro_x, centro_y + 20))
+                imagen.blit(text, text_rect)
+                
+        except Exception as e:
+            print(f"Error al cargar imagen {ruta_imagen}: {e}")
+            # Imagen de error más informativa
+            imagen = pygame.Surface(tamaño_imagen)
+            imagen.fill((255, 240, 240))
+            
+            pygame.draw.rect(imagen, (200, 0, 0), imagen.get_rect(), 2)
+            
+            font = pygame.font.SysFont("Arial", int(14 * self.ancho / 1585), bold=True)
+            error_text = font.render("Error de", True, (200, 0, 0))
+            error_text2 = font.render("imagen", True, (200, 0, 0))
+            
+            centro_x, centro_y = tamaño_imagen[0] // 2, tamaño_imagen[1] // 2
+            imagen.blit(error_text, (centro_x - error_text.get_width()//2, centro_y - 15))
+            imagen.blit(error_text2, (centro_x - error_text2.get_width()//2, centro_y + 5))
+        
+        return imagen
+
     def cargar_imagenes_desde_cache(self):
         """Carga imágenes usando el cache"""
         if hasattr(self, 'imagenes_productos') and self.imagenes_productos:
@@ -324,7 +403,7 @@ class PuntoVenta:
             conexion = Conexion()
             query = """
                 SELECT ID_CatProducto, Nombre_prod AS nombre, Precio AS precio, 
-                       Imagen AS imagen, Stock
+                       Imagen AS imagen, Stock, IVA
                 FROM CatProducto
                 WHERE Estado='Disponible' AND Stock > 0
                 ORDER BY Nombre_prod
@@ -345,6 +424,48 @@ class PuntoVenta:
             print(f"Error en cargar_productos_desde_db: {e}")
             return []
 
+    def refrescar_productos(self, cambio):
+        """
+        Vuelve a leer solo los productos modificados (suscriptor del bus)
+
+        Los que dejaron de estar disponibles o se agotaron salen del catálogo;
+        las imágenes de los productos que no cambiaron se conservan.
+
+        Args:
+            cambio (Cambio): Aviso del bus con los IDs de CatProducto
+        """
+        if cambio.ids is None:
+            self.cargar_datos_inicial()
+            return
+
+        ids = sorted(cambio.ids)
+        query = f"""
+            SELECT ID_CatProducto, Nombre_prod AS nombre, Precio AS precio, 
+                   Imagen AS imagen, Stock, IVA
+            FROM CatProducto
+            WHERE ID_CatProducto IN ({marcadores(ids)}) AND Estado='Disponible' AND Stock > 0
+        """
+        nuevas = Conexion().consultar(query, tuple(ids))
+        for prod in nuevas:
+            if not prod.get("imagen"):
+                prod["imagen"] = "imagenes/log.png"
+
+        # Imagen actual por producto, para no volver a escalar las que no cambiaron
+        imagenes = {
+            prod["ID_CatProducto"]: (prod["imagen"], imagen)
+            for prod, imagen in zip(self.productos, self.imagenes_productos)
+        }
+        self.productos = fusionar_filas(self.productos, nuevas, cambio.ids, clave="ID_CatProducto",
+                                        orden=lambda prod: prod["nombre"].lower())
+        tamaño_imagen = self.tamano_imagen()
+        self.imagenes_productos = []
+        for prod in self.productos:
+            ruta, imagen = imagenes.get(prod["ID_CatProducto"], (None, None))
+            if imagen is None or ruta != prod["imagen"]:
+                imagen = self.crear_imagen_producto(prod, tamaño_imagen)
+            self.imagenes_productos.append(imagen)
+        self.data_cache.productos = self.productos
+
     def obtener_promedios_ventas(self):
         """Obtiene promedios de ventas con manejo de errores mejorado"""
         try:
@@ -448,6 +569,14 @@ class PuntoVenta:
         btn_text = self.fuente_busqueda.render("Agregar producto", True, self.BLANCO)
         surface.blit(btn_text, (btn_x + (btn_w - btn_text.get_width()) // 2, btn_y + (btn_h - btn_text.get_height()) // 2))
 
+        # Botón "Producción" sobre el de agregar producto
+        prod_y = y - h - int(0.01 * self.alto)
+        self.boton_produccion_rect = pygame.Rect(btn_x, prod_y, btn_w, btn_h)
+        pygame.draw.rect(surface, (0, 150, 90), self.boton_produccion_rect, border_radius=8)
+        pygame.draw.rect(surface, (0, 110, 60), self.boton_produccion_rect, 2, border_radius=8)
+        btn_text = self.fuente_busqueda.render("Producción", True, self.BLANCO)
+        surface.blit(btn_text, (btn_x + (btn_w - btn_text.get_width()) // 2, prod_y + (btn_h - btn_text.get_height()) // 2))
+
     def dibujar_producto(self, surface, x, y, producto, imagen):
         """Dibuja una tarjeta de producto individual - TAMAÑO AMPLIADO"""
         ancho = int(0.25 * self.ancho)    # AMPLIADO: Era 0.16, ahora 0.25
@@ -528,8 +657,7 @@ class PuntoVenta:
     def calcular_total_con_iva(self):
         """Calcula el total de la venta incluyendo IVA"""
         try:
-            total = float(self.ticket.calcular_total())
-            return total * 1.16
+            return self.ticket.calcular_total_con_iva()
         except Exception as e:
             print(f"Error al calcular total con IVA: {e}")
             return 0.0
@@ -602,17 +730,21 @@ class PuntoVenta:
                 nombre_texto = producto['nombre']
                 if len(nombre_texto) > 15:
                     nombre_texto = nombre_texto[:12] + "..."
-                nombre_render = self.fuente_ticket.render(nombre_texto, True, COLOR_TEXTO)
+                # Líneas sin stock suficiente (vendido en otra caja) en rojo
+                disponible = self.ticket.conflictos.get(producto['id'])
+                color_linea = COLOR_ALERTA_BORDE if disponible is not None else COLOR_TEXTO
+                nombre_render = self.fuente_ticket.render(nombre_texto, True, color_linea)
                 surface.blit(nombre_render, (col_x, y_offset))
                 col_x += col_widths[0]
 
-                # Unidades
-                unidades_render = self.fuente_ticket.render(str(producto['unidades']), True, COLOR_TEXTO)
+                # Unidades (con el stock disponible si hay conflicto)
+                texto_unidades = str(producto['unidades']) if disponible is None else f"{producto['unidades']}/{disponible}"
+                unidades_render = self.fuente_ticket.render(texto_unidades, True, color_linea)
                 surface.blit(unidades_render, (col_x, y_offset))
                 col_x += col_widths[1]
 
                 # Precio
-                precio_render = self.fuente_ticket.render(f"${producto['precio'] * producto['unidades']:.2f}", True, COLOR_TEXTO)
+                precio_render = self.fuente_ticket.render(f"${calcular_linea(producto['precio'], producto['unidades'], producto['iva'])[0]:.2f}", True, COLOR_TEXTO)
                 surface.blit(precio_render, (col_x, y_offset))
                 col_x += col_widths[2]
 
@@ -746,11 +878,7 @@ class PuntoVenta:
         self.efectivo_box.draw(surface)
 
         # Calcular cambio
-        efectivo_str = self.efectivo_box.get_value()
-        try:
-            efectivo = float(efectivo_str) if efectivo_str else 0.0
-        except Exception:
-            efectivo = 0.0
+        efectivo = a_decimal(self.efectivo_box.get_value())  # CERO si está vacío o no es número
         cambio = efectivo - total_iva
         self.efectivo_cambio = cambio
 
@@ -860,6 +988,7 @@ class PuntoVenta:
         # Verificar si necesitamos actualizar el cache
         if self.data_cache.needs_refresh() and not self.data_cache.is_loading():
             self.data_cache.refresh_data(self)
+        self.aplicar_cambios_stock()
         
         # Fondo de la interfaz
         pygame.draw.rect(surface, self.AZUL_CLARO, (self.x, self.y, self.ancho, self.alto))
@@ -890,6 +1019,8 @@ class PuntoVenta:
         # Dibujar modales si están activos
         if self.mostrando_formulario:
             self.dibujar_formulario_agregar_producto(surface)
+        if self.mostrando_produccion:
+            self.dibujar_formulario_produccion(surface)
         if getattr(self, "mostrando_modal_correo", False):
             self.dibujar_modal_correo(surface)
         if self.mostrando_modal_pago:
@@ -957,14 +1088,28 @@ class PuntoVenta:
     def handle_event(self, event):
         """Maneja todos los eventos del sistema con mejor estructura"""
         try:
+            # Avisos del hilo de pago: van a la ventana de cobro aunque haya otro modal abierto
+            if event.type in self.eventos_fondo:
+                if getattr(self, "pago_tarjeta_instance", None):
+                    return self._handle_pago_tarjeta_events(event)
+                return None
+
             # Eventos del formulario de productos
             if self.mostrando_formulario:
                 return self._handle_formulario_events(event)
+
+            # Eventos de la corrida de producción
+            if self.mostrando_produccion:
+                return self._handle_produccion_events(event)
             
             # Eventos del modal de correo
             if getattr(self, "mostrando_modal_correo", False):
                 return self._handle_correo_events(event)
             
+            # Eventos del pago con tarjeta (incluye avisos del hilo de pago)
+            if getattr(self, "mostrando_pago_tarjeta", False):
+                return self._handle_pago_tarjeta_events(event)
+            
             # Eventos del modal de pago
             if self.mostrando_modal_pago:
                 return self._handle_pago_events(event)
@@ -989,6 +1134,20 @@ class PuntoVenta:
             elif self.formulario_btn_cancelar and self.formulario_btn_cancelar.collidepoint(event.pos):
                 self.mostrando_formulario = False
 
+    def _handle_produccion_events(self, event):
+        """Maneja eventos del formulario de producción"""
+        for caja_nombre, caja_piezas in self.produccion_filas:
+            caja_nombre.handle_event(event)
+            caja_piezas.handle_event(event)
+
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if self.produccion_btn_producir and self.produccion_btn_producir.collidepoint(event.pos):
+                self.guardar_produccion()
+            elif self.produccion_btn_cancelar and self.produccion_btn_cancelar.collidepoint(event.pos):
+                self.mostrando_produccion = False
+            elif self.produccion_btn_sugerir and self.produccion_btn_sugerir.collidepoint(event.pos):
+                self.sugerir_produccion()
+
     def _handle_correo_events(self, event):
         """Maneja eventos del modal de correo"""
         # Manejar eventos de teclado para el campo de correo
@@ -1022,11 +1181,7 @@ class PuntoVenta:
         if event.type == pygame.MOUSEBUTTONDOWN:
             if self.boton_modal_confirmar.collidepoint(event.pos):
                 total_iva = self.calcular_total_con_iva()
-                efectivo_str = self.efectivo_box.get_value()
-                try:
-                    efectivo = float(efectivo_str)
-                except Exception:
-                    efectivo = 0.0
+                efectivo = a_decimal(self.efectivo_box.get_value())
                 
                 if efectivo < total_iva:
                     self.efectivo_mensaje = "Efectivo insuficiente."
@@ -1038,10 +1193,11 @@ class PuntoVenta:
                         self.ticket.guardar_pdf()
                         self.ticket.limpiar()  # CORREGIDO: Agregar paréntesis
                         self.mostrar_alerta(f"Venta registrada. Cambio: ${efectivo - total_iva:.2f}")
-                        self.cargar_datos_inicial()  # Recargar datos
                         self.mostrando_modal_pago = False
                         self.efectivo_box = None
                         self.efectivo_mensaje = ""
+                    elif self.ticket.conflictos:
+                        self.efectivo_mensaje = "Stock insuficiente: revise el ticket."
                     else:
                         self.efectivo_mensaje = "Error al registrar la venta."
             
@@ -1051,9 +1207,56 @@ class PuntoVenta:
                 self.efectivo_mensaje = ""
             
             elif self.boton_pago_tarjeta.collidepoint(event.pos):
+                # Apartar el stock antes de cobrar: un cargo aprobado siempre
+                # tiene sus piezas y nunca hay que cobrar de nuevo
+                lineas = [(p["id"], p["unidades"]) for p in self.ticket.productos]
+                conflictos = reservar_stock(lineas)
+                if conflictos is None:
+                    self.efectivo_mensaje = "Error al apartar el stock."
+                    return
+                if conflictos:
+                    self.reportar_conflictos_stock(conflictos)
+                    self.efectivo_mensaje = "Stock insuficiente: revise el ticket."
+                    return
+                self.reserva_tarjeta = lineas
+                bus.publicar("catproducto", [id_prod for id_prod, _ in lineas])
                 total_iva = self.calcular_total_con_iva()
                 self.procesar_pago_tarjeta(total_iva)
 
+    def _handle_pago_tarjeta_events(self, event):
+        """Maneja eventos de la ventana de pago con tarjeta"""
+        accion = self.pago_tarjeta_instance.handle_event(event)
+        
+        if accion == "completado":
+            # El stock ya se apartó al iniciar el cobro
+            exito = self.registrar_venta("Tarjeta", stock_reservado=True)
+            if not exito:
+                # El cargo ya está aprobado: la ventana sigue en "Aceptar" para
+                # reintentar el registro sin volver a cobrar
+                self.mostrar_alerta("Pago aprobado, pero la venta no se registró. Presione Aceptar para reintentar (no se cobra de nuevo).")
+                return
+            self.reserva_tarjeta = None
+            self.ticket.guardar_pdf()
+            self.ticket.limpiar()
+            self.mostrar_alerta("Venta registrada con tarjeta.")
+            self.mostrando_modal_pago = False
+            self.efectivo_box = None
+            self.efectivo_mensaje = ""
+            self.mostrando_pago_tarjeta = False
+            self.pago_tarjeta_instance = None
+        
+        elif accion == "cancelar":
+            # Sin cargo: devolver el stock apartado para el cobro
+            if self.reserva_tarjeta:
+                lineas = self.reserva_tarjeta
+                if liberar_stock(lineas):
+                    bus.publicar("catproducto", [id_prod for id_prod, _ in lineas])
+                else:
+                    self.mostrar_alerta("No se pudo devolver el stock apartado para el cobro.")
+                self.reserva_tarjeta = None
+            self.mostrando_pago_tarjeta = False
+            self.pago_tarjeta_instance = None
+
     def _handle_main_events(self, event):
         """Maneja eventos principales del POS"""
         # Manejo de scroll con rueda del mouse
@@ -1107,6 +1310,8 @@ class PuntoVenta:
             self.busqueda_activa = True
         elif hasattr(self, "boton_agregar_producto_rect") and self.boton_agregar_producto_rect and self.boton_agregar_producto_rect.collidepoint(mouse_x, mouse_y):
             self.mostrar_formulario_agregar_producto()
+        elif self.boton_produccion_rect and self.boton_produccion_rect.collidepoint(mouse_x, mouse_y):
+            self.mostrar_formulario_produccion()
         elif hasattr(self, "boton_enviar_rect") and self.boton_enviar_rect and self.boton_enviar_rect.collidepoint(mouse_x, mouse_y):
             self.mostrando_modal_correo = True
             self.correo_box = None
@@ -1136,7 +1341,7 @@ class PuntoVenta:
                     if rect.collidepoint(mouse_x, mouse_y):
                         if 0 <= idx < len(self.ticket.productos):
                             producto_eliminado = self.ticket.productos[idx]
-                            self.ticket.eliminar_producto(idx)
+                            self.ticket.eliminar_linea(producto_eliminado['id'])
                             self.mostrar_alerta(f"Producto '{producto_eliminado['nombre']}' eliminado del ticket")
                             max_scroll = max(0, len(self.ticket.productos) - self.productos_ticket_visibles)
                             self.scroll_ticket = min(self.scroll_ticket, max_scroll)
@@ -1149,18 +1354,18 @@ class PuntoVenta:
                 if idx < len(self.productos):
                     prod = self.productos[idx]
                     # Verificar si el producto ya está en el ticket
-                    if self.ticket.buscar_producto_por_nombre(prod["nombre"]):
-                        cantidad_actual = self.ticket.obtener_cantidad_producto(prod["nombre"])
+                    cantidad_actual = self.ticket.obtener_cantidad(prod["ID_CatProducto"])
+                    if cantidad_actual:
                         cantidad_nueva = cantidad_actual + 1
                         
                         if self.verificar_stock(prod["ID_CatProducto"], cantidad_nueva):
-                            self.ticket.agregar_producto(prod["nombre"], 1, prod["precio"], prod["ID_CatProducto"])
+                            self.ticket.agregar_producto(prod["nombre"], 1, prod["precio"], prod["ID_CatProducto"], prod.get("IVA"))
                             self.mostrar_alerta(f"Incrementada cantidad de {prod['nombre']} en el ticket")
                         else:
                             self.mostrar_alerta(f"No hay suficiente stock para agregar más '{prod['nombre']}'")
                     else:
                         if self.verificar_stock(prod["ID_CatProducto"], 1):
-                            self.ticket.agregar_producto(prod["nombre"], 1, prod["precio"], prod["ID_CatProducto"])
+                            self.ticket.agregar_producto(prod["nombre"], 1, prod["precio"], prod["ID_CatProducto"], prod.get("IVA"))
                             self.mostrar_alerta(f"Producto agregado al ticket: {prod['nombre']}")
                         else:
                             self.mostrar_alerta(f"No hay suficiente stock de '{prod['nombre']}'")
@@ -1177,9 +1382,9 @@ class PuntoVenta:
                         if 0 <= idx < len(self.ticket.productos):
                             producto = self.ticket.productos[idx]
                             if producto['unidades'] > 1:
-                                producto['unidades'] -= 1
+                                self.ticket.cambiar_unidades(producto['id'], producto['unidades'] - 1)
                             else:
-                                self.ticket.eliminar_producto(idx)
+                                self.ticket.eliminar_linea(producto['id'])
                                 self.mostrar_alerta(f"Producto '{producto['nombre']}' eliminado del ticket")
                                 max_scroll = max(0, len(self.ticket.productos) - self.productos_ticket_visibles)
                                 self.scroll_ticket = min(self.scroll_ticket, max_scroll)
@@ -1191,7 +1396,7 @@ class PuntoVenta:
                             minimo_producto = self._get_minimo_producto(producto['id'])
                             
                             if self.verificar_stock(producto['id'], producto['unidades'] + 1):
-                                producto['unidades'] += 1
+                                self.ticket.cambiar_unidades(producto['id'], producto['unidades'] + 1)
                                 stock_actual = self.obtener_stock_actual(producto['id'])
                                 if stock_actual - producto['unidades'] <= minimo_producto:
                                     self.mostrar_alerta(f"Se recomienda hornear más de '{producto['nombre']}': mínimo alcanzado")
@@ -1199,7 +1404,20 @@ class PuntoVenta:
                                 self.mostrar_alerta(f"Stock insuficiente de '{producto['nombre']}'")
 
     def _get_minimo_producto(self, producto_id):
-        """Obtiene el mínimo de stock para un producto"""
+        """
+        Obtiene el mínimo de stock para un producto
+
+        Es la demanda pronosticada para lo que resta del día; si el producto
+        no tiene historia de ventas se usa su promedio por venta.
+        """
+        try:
+            if getattr(self, "pronosticador", None):
+                self.pronosticador.vigente()
+                restante = self.pronosticador.demanda_restante(producto_id)
+                if restante is not None:
+                    return restante
+        except Exception as e:
+            print(f"Error al consultar el pronóstico de demanda: {e}")
         try:
             # CORREGIDO: Verificar que self.minimo es una lista y no un método
             if isinstance(self.minimo, list):
@@ -1332,12 +1550,14 @@ class PuntoVenta:
             if resultado:
                 # Actualizar stock del producto existente
                 id_prod = resultado[0]["ID_CatProducto"]
-                nuevo_stock = resultado[0]["Stock"] + stock
-                update = "UPDATE CatProducto SET Stock = %s WHERE ID_CatProducto = %s"
+                # Incremento relativo: no pisa ventas de otras cajas entre la lectura y la escritura
+                update = "UPDATE CatProducto SET Stock = Stock + %s WHERE ID_CatProducto = %s"
                 conexion.conectar()
-                conexion.cursor.execute(update, (nuevo_stock, id_prod))
+                conexion.cursor.execute(update, (stock, id_prod))
+                publicar_cambios(conexion.cursor, [id_prod])
                 conexion.conn.commit()
                 conexion.cerrar()
+                bus.publicar("catproducto", [id_prod])
                 self.mostrar_alerta(f"Stock actualizado para '{nombre}'.")
             else:
                 # Crear nuevo producto
@@ -1348,13 +1568,13 @@ class PuntoVenta:
                 """
                 conexion.conectar()
                 conexion.cursor.execute(insert, (nombre, descripcion, precio, stock, imagen, caducidad, sabor, iva, estado))
+                id_prod = conexion.cursor.lastrowid
+                publicar_cambios(conexion.cursor, [id_prod])
                 conexion.conn.commit()
                 conexion.cerrar()
+                bus.publicar("catproducto", [id_prod])
                 self.mostrar_alerta(f"Producto '{nombre}' agregado.")
             
-            # Recargar datos
-            self.cargar_datos_inicial()
-            
             # Cerrar formulario
             self.mostrando_formulario = False
             self.formulario_mensaje = ""
@@ -1363,6 +1583,184 @@ class PuntoVenta:
             print(f"Error al guardar producto: {e}")
             self.formulario_mensaje = f"Error al guardar: {str(e)}"
 
+    def mostrar_formulario_produccion(self):
+        """Configura el formulario de la corrida de producción (producto y piezas por renglón)"""
+        self.mostrando_produccion = True
+        font = pygame.font.SysFont("Open Sans", int(0.024 * self.alto))
+        x, y = self.x + int(0.21 * self.ancho), self.y + int(0.22 * self.alto)
+        alto_fila = int(0.06 * self.alto)
+
+        self.produccion_filas = []
+        for i in range(FILAS_PRODUCCION):
+            fila_y = y + i * alto_fila
+            caja_nombre = InputBox(x, fila_y, int(0.25 * self.ancho), int(0.045 * self.alto), font=font)
+            caja_piezas = InputBox(x + int(0.27 * self.ancho), fila_y, int(0.1 * self.ancho),
+                                   int(0.045 * self.alto), font=font, numeric=True)
+            self.produccion_filas.append((caja_nombre, caja_piezas))
+
+        botones_y = y + 10 + FILAS_PRODUCCION * alto_fila
+        self.produccion_btn_producir = pygame.Rect(x, botones_y, int(0.13 * self.ancho), alto_fila)
+        self.produccion_btn_cancelar = pygame.Rect(x + int(0.15 * self.ancho), botones_y,
+                                                   int(0.13 * self.ancho), alto_fila)
+        self.produccion_btn_sugerir = pygame.Rect(x + int(0.30 * self.ancho), botones_y,
+                                                  int(0.1 * self.ancho), alto_fila)
+        self.produccion_mensaje = ""
+
+    def dibujar_formulario_produccion(self, surface):
+        """Dibuja el formulario de la corrida de producción"""
+        modal_rect = pygame.Rect(self.x + int(0.18 * self.ancho), self.y + int(0.10 * self.alto),
+                                int(0.45 * self.ancho), int(0.75 * self.alto))
+        pygame.draw.rect(surface, (245, 245, 245), modal_rect, border_radius=18)
+        pygame.draw.rect(surface, COLOR_BOTON, modal_rect, 3, border_radius=18)
+
+        font = pygame.font.SysFont("Open Sans", int(0.032 * self.alto), bold=True)
+        titulo = font.render("Corrida de Producción", True, COLOR_TEXTO)
+        surface.blit(titulo, (modal_rect.x + 30, modal_rect.y + 20))
+
+        font_enc = pygame.font.SysFont("Open Sans", int(0.024 * self.alto), bold=True)
+        primera_nombre, primera_piezas = self.produccion_filas[0]
+        surface.blit(font_enc.render("Producto", True, COLOR_TEXTO),
+                     (primera_nombre.rect.x, primera_nombre.rect.y - int(0.035 * self.alto)))
+        surface.blit(font_enc.render("Piezas", True, COLOR_TEXTO),
+                     (primera_piezas.rect.x, primera_piezas.rect.y - int(0.035 * self.alto)))
+        for caja_nombre, caja_piezas in self.produccion_filas:
+            caja_nombre.draw(surface)
+            caja_piezas.draw(surface)
+
+        font_btn = pygame.font.SysFont("Open Sans", int(0.026 * self.alto), bold=True)
+        for rect, color, borde, texto in (
+            (self.produccion_btn_producir, (0, 180, 0), (0, 120, 0), "Producir"),
+            (self.produccion_btn_cancelar, (220, 0, 0), (180, 0, 0), "Cancelar"),
+            (self.produccion_btn_sugerir, COLOR_BOTON, COLOR_BOTON_BORDE, "Sugerir"),
+        ):
+            pygame.draw.rect(surface, color, rect, border_radius=8)
+            pygame.draw.rect(surface, borde, rect, 2, border_radius=8)
+            render = font_btn.render(texto, True, self.BLANCO)
+            surface.blit(render, (rect.x + (rect.w - render.get_width()) // 2,
+                                  rect.y + (rect.h - render.get_height()) // 2))
+
+        if self.produccion_mensaje:
+            font_msg = pygame.font.SysFont("Open Sans", int(0.022 * self.alto))
+            msg = font_msg.render(self.produccion_mensaje[:110], True, (200, 0, 0))
+            surface.blit(msg, (modal_rect.x + 30, modal_rect.y + modal_rect.height - 50))
+
+    def sugerir_produccion(self):
+        """Llena el formulario con el plan de horneado del día (ver plan_horneado.py)"""
+        try:
+            plan = calcular_plan(datetime.now().date())
+        except Exception as e:
+            print(f"Error al calcular plan de horneado: {e}")
+            self.produccion_mensaje = "No se pudo calcular el plan de horneado."
+            return
+        sugeridos = [fila for fila in plan["productos"] if fila["con_receta"] and fila["hornear"] > 0]
+        for (caja_nombre, caja_piezas), fila in zip(self.produccion_filas, sugeridos + [None] * FILAS_PRODUCCION):
+            caja_nombre.text = fila["nombre"] if fila else ""
+            caja_piezas.text = str(fila["hornear"]) if fila else ""
+            caja_nombre.txt_surface = caja_nombre.font.render(caja_nombre.text, True, COLOR_TEXTO)
+            caja_piezas.txt_surface = caja_piezas.font.render(caja_piezas.text, True, COLOR_TEXTO)
+        faltantes = [m["nombre"] for m in plan["materiales"] if m["faltante"]]
+        if not sugeridos:
+            self.produccion_mensaje = "El plan no sugiere hornear productos con receta."
+        elif faltantes:
+            self.produccion_mensaje = f"Ingredientes insuficientes para el plan: {', '.join(faltantes)}"
+        else:
+            self.produccion_mensaje = ""
+
+    def guardar_produccion(self):
+        """Registra la corrida: descuenta ingredientes y suma las piezas al stock"""
+        renglones = []
+        for caja_nombre, caja_piezas in self.produccion_filas:
+            nombre = caja_nombre.get_value().strip()
+            piezas = caja_piezas.get_value().strip()
+            if not nombre and not piezas:
+                continue
+            try:
+                piezas = int(float(piezas))
+            except ValueError:
+                piezas = 0
+            if not nombre or piezas <= 0:
+                self.produccion_mensaje = "Cada renglón necesita producto y piezas mayores a 0."
+                return
+            renglones.append((nombre, piezas))
+        if not renglones:
+            self.produccion_mensaje = "Capture al menos un producto."
+            return
+
+        nombres = sorted({nombre for nombre, _ in renglones})
+        encontrados = Conexion().consultar(
+            f"SELECT ID_CatProducto, Nombre_prod FROM CatProducto WHERE Nombre_prod IN ({marcadores(nombres)})",
+            tuple(nombres)
+        )
+        ids = {fila["Nombre_prod"].lower(): fila["ID_CatProducto"] for fila in encontrados}
+        desconocidos = [nombre for nombre in nombres if nombre.lower() not in ids]
+        if desconocidos:
+            self.produccion_mensaje = f"Producto no encontrado: {', '.join(desconocidos)}"
+            return
+
+        try:
+            resultado = registrar_produccion(
+                [(ids[nombre.lower()], piezas) for nombre, piezas in renglones], self.id_empleado
+            )
+        except Exception as e:
+            print(f"Error al registrar producción: {e}")
+            self.produccion_mensaje = f"Error: {str(e)}"
+            return
+        if resultado["faltantes"]:
+            self.produccion_mensaje = f"Sin existencia suficiente. {texto_faltantes(resultado['faltantes'])}"
+            return
+
+        total = sum(piezas for _, piezas in renglones)
+        self.mostrando_produccion = False
+        self.mostrar_alerta(f"Producción registrada: {total} piezas (ingredientes ${resultado['costo']})")
+
+    def aplicar_cambios_stock(self):
+        """
+        Aplica al catálogo en memoria los cambios de stock de otras cajas
+
+        Solo toca los productos que cambiaron; si aparece stock de un
+        producto que no está en el catálogo (estaba agotado) se pide al bus
+        que se lea esa fila.
+        Las líneas del ticket que ya no alcanzan se marcan en rojo.
+        """
+        version, cambios = self.feed_stock.cambios_desde(self.version_stock)
+        if not cambios:
+            return
+        self.version_stock = version
+
+        por_id = {prod["ID_CatProducto"]: prod for prod in self.productos}
+        nuevos = []
+        for id_producto, stock in cambios.items():
+            prod = por_id.get(id_producto)
+            if prod is not None:
+                prod["Stock"] = stock
+            elif stock > 0:
+                nuevos.append(id_producto)
+
+        marcadas = self.ticket.marcar_conflictos(cambios)
+        if marcadas:
+            self.mostrar_alerta(self.texto_conflictos(marcadas))
+        if nuevos:
+            bus.publicar("catproducto", nuevos)
+
+    def texto_conflictos(self, marcadas):
+        """Mensaje de alerta para líneas sin stock suficiente"""
+        detalle = ", ".join(f"{nombre} (quedan {disponible})" for nombre, _, disponible in marcadas)
+        return f"Stock insuficiente: {detalle}"
+
+    def reportar_conflictos_stock(self, conflictos):
+        """
+        Marca en el ticket las líneas sin stock y actualiza el catálogo
+
+        Args:
+            conflictos (dict): {id_producto: stock disponible}
+        """
+        por_id = {prod["ID_CatProducto"]: prod for prod in self.productos}
+        for id_producto, disponible in conflictos.items():
+            if id_producto in por_id:
+                por_id[id_producto]["Stock"] = disponible
+        marcadas = self.ticket.marcar_conflictos(conflictos)
+        self.mostrar_alerta(self.texto_conflictos(marcadas))
+
     def verificar_stock(self, id_catproducto, cantidad):
         """Verifica si hay stock suficiente de un producto"""
         try:
@@ -1376,8 +1774,15 @@ class PuntoVenta:
             print(f"Error en verificar_stock: {e}")
             return False
 
-    def registrar_venta(self, tipo_pago="Efectivo"):
-        """Registra una venta completa en la base de datos"""
+    def registrar_venta(self, tipo_pago="Efectivo", stock_reservado=False):
+        """
+        Registra una venta completa en la base de datos
+
+        Args:
+            tipo_pago (str): "Efectivo" o "Tarjeta"
+            stock_reservado (bool): El stock ya se descontó con reservar_stock
+                (cobro con tarjeta) y no debe descontarse otra vez
+        """
         try:
             conexion = Conexion()
             conexion.conectar()
@@ -1396,8 +1801,16 @@ class PuntoVenta:
             """
             
             try:
+                # Descontar primero, condicionado a que el stock alcance; si
+                # otra caja ya vendió las piezas no se registra nada
+                lineas = [(producto["id"], producto["unidades"]) for producto in self.ticket.productos]
+                conflictos = {} if stock_reservado else descontar_stock(conexion.cursor, lineas)
+                if conflictos:
+                    conexion.conn.rollback()
+                    self.reportar_conflictos_stock(conflictos)
+                    return False
+
                 conexion.cursor.execute(insert_venta_query, (fecha_venta, total_venta))
-                conexion.conn.commit()
                 
                 # Obtener ID de la venta recién creada
                 id_venta = conexion.cursor.lastrowid
@@ -1409,22 +1822,19 @@ class PuntoVenta:
                     INSERT INTO Detalle_Venta (Cantidad, PrecioUnitario, Subtotal, FK_ID_Venta, FK_ID_CatProducto)
                     VALUES (%s, %s, %s, %s, %s)
                     """
-                    subtotal = float(producto["unidades"]) * float(producto["precio"])
+                    subtotal = calcular_linea(producto["precio"], producto["unidades"], producto["iva"])[0]
                     
                     conexion.cursor.execute(insert_detalle_venta_query, 
                         (producto["unidades"], producto["precio"], subtotal, id_venta, producto["id"]))
-                    
-                    # Actualizar stock del producto
-                    update_catproducto_query = """
-                    UPDATE CatProducto
-                    SET Stock = Stock - %s
-                    WHERE ID_CatProducto = %s
-                    """
-                    conexion.cursor.execute(update_catproducto_query, 
-                        (producto["unidades"], producto["id"]))
+
+                # Avisar a las demás cajas del stock resultante
+                if not stock_reservado:
+                    publicar_cambios(conexion.cursor, [id_prod for id_prod, _ in lineas])
                 
-                # Confirmar todos los cambios
+                # Confirmar todos los cambios (venta, detalles y stock juntos)
                 conexion.conn.commit()
+                bus.publicar("catproducto", [id_prod for id_prod, _ in lineas])
+                bus.publicar("venta", [id_venta])
                 
                 # Actualizar el ticket con el tipo de pago
                 self.ticket.tipo_pago = tipo_pago
@@ -1488,14 +1898,18 @@ class PuntoVenta:
     def procesar_pago_tarjeta(self, total):
         """Procesa el pago con tarjeta usando la terminal MercadoPago"""
         try:
-            from pagotarjeta import PagoTarjeta
+            from pagotarjeta import PagoTarjeta, EVENTO_PAGO
             
             # Crear y mostrar la ventana de pago con tarjeta
             pago_tarjeta = PagoTarjeta(self.x, self.y, self.ancho, self.alto, total)
+            self.eventos_fondo.add(EVENTO_PAGO)
             
-            # Esperar a que el usuario complete el pago
+            # El cobro corre en segundo plano; el resultado llega por eventos
             self.mostrando_pago_tarjeta = True
             self.pago_tarjeta_instance = pago_tarjeta
             
         except Exception as e:
+            if self.reserva_tarjeta and liberar_stock(self.reserva_tarjeta):
+                bus.publicar("catproducto", [id_prod for id_prod, _ in self.reserva_tarjeta])
+            self.reserva_tarjeta = None
             self.mostrar_alerta(f"Error al procesar pago con tarjeta: {e}")
\ No newline at end of file
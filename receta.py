@@ -1,6 +1,9 @@
 import pygame
 from conexion import Conexion
 from datetime import datetime
+from bus_cambios import bus
+from dinero import redondear
+from recetario import obtener_recetario
 
 class InputBox:
     """
@@ -119,56 +122,37 @@ class Receta:
         self.ancho = ancho
         self.alto = alto
 
-        # Fuentes escaladas
-        self.fuente_titulo = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
         self.color_texto = (0, 0, 0)
 
         # Configuración de navegación
         self.botones_opciones = ["CREAR", "EDITAR", "VER"]
         self.opcion_seleccionada = self.botones_opciones[0]
-        self.fuente_boton = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
-
-        # Configuración de botones
-        self.boton_width = int(self.ancho * 0.13)
-        self.boton_height = int(self.alto * 0.07)
-        self.boton_margin = int(self.ancho * 0.015)
-        self.boton_rects = [
-            pygame.Rect(
-                self.x + self.ancho - (len(self.botones_opciones)+2-i) * (self.boton_width + self.boton_margin),
-                self.y + int(self.alto * 0.11),
-                self.boton_width, self.boton_height
-            )
-            for i in range(len(self.botones_opciones))
-        ]
         self.color_boton = (220, 220, 220)
         self.color_boton_activo = (180, 180, 255)
-
-        # Botón principal (crear/guardar/ver)
-        self.boton_agregar_rect = pygame.Rect(
-            self.x + self.ancho - self.boton_width - self.boton_margin,
-            self.y + int(self.alto * 0.11),
-            self.boton_width, self.boton_height
-        )
         self.color_boton_agregar = (100, 200, 100)
         self.color_boton_agregar_hover = (80, 180, 80)
-        self.fuente_boton_agregar = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
         self.agregar_hover = False
 
         # Configuración de búsqueda
         self.busqueda_activa = False
         self.busqueda_texto = ""
         self.NEGRO = (0, 0, 0)
-        self.fuente_busqueda = pygame.font.SysFont("Open Sans", int(self.alto * 0.045))
 
         # Configuración de tabla
-        self.fuente_tabla = pygame.font.SysFont("Open Sans", int(self.alto * 0.04))
         self.color_tabla_header = (200, 200, 255)
         self.color_tabla_row = (255, 255, 255)
         self.color_tabla_border = (180, 180, 180)
 
+        # Fuentes y posiciones escaladas
+        self.configurar_layout()
+
         # Datos y formularios
         self.datos_tabla = []
+        self.version_costos = None  # Versión de costos del recetario con que se armó la tabla
         self.cargar_datos_tabla()
+        # Después del recetario (suscrito al cargar), para leer costos ya recalculados
+        for entidad in ("receta", "materiaprima", "insumo"):
+            bus.suscribir(entidad, self.refrescar_recetas)
 
         # Estado del formulario principal
         self.mostrando_formulario = False
@@ -185,6 +169,52 @@ class Receta:
         # Receta actual en edición/visualización
         self.receta_seleccionada = None
 
+    def configurar_layout(self):
+        """
+        Calcula fuentes y posiciones a partir de x, y, ancho y alto.
+        Se usa al crear la interfaz y al redimensionar la ventana.
+        """
+        # Fuentes escaladas
+        self.fuente_titulo = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
+        self.fuente_boton = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
+        self.fuente_boton_agregar = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
+        self.fuente_busqueda = pygame.font.SysFont("Open Sans", int(self.alto * 0.045))
+        self.fuente_tabla = pygame.font.SysFont("Open Sans", int(self.alto * 0.04))
+
+        # Configuración de botones
+        self.boton_width = int(self.ancho * 0.13)
+        self.boton_height = int(self.alto * 0.07)
+        self.boton_margin = int(self.ancho * 0.015)
+        self.boton_rects = [
+            pygame.Rect(
+                self.x + self.ancho - (len(self.botones_opciones)+2-i) * (self.boton_width + self.boton_margin),
+                self.y + int(self.alto * 0.11),
+                self.boton_width, self.boton_height
+            )
+            for i in range(len(self.botones_opciones))
+        ]
+
+        # Botón principal (crear/guardar/ver)
+        self.boton_agregar_rect = pygame.Rect(
+            self.x + self.ancho - self.boton_width - self.boton_margin,
+            self.y + int(self.alto * 0.11),
+            self.boton_width, self.boton_height
+        )
+
+    def relayout(self, x, y, ancho, alto):
+        """
+        Reubica la interfaz en una nueva área conservando los datos cargados
+
+        Args:
+            x, y (int): Nueva posición
+            ancho, alto (int): Nuevas dimensiones
+        """
+        self.x = x
+        self.y = y
+        self.ancho = ancho
+        self.alto = alto
+        self.configurar_layout()
+
     def mostrar_alerta(self, mensaje, duracion=3000):
         """
         Muestra un mensaje temporal en la interfaz
@@ -204,6 +234,7 @@ class Receta:
         - Nombre de la receta
         - Tiempo de preparación
         - Descripción
+        - Costo de ingredientes por pieza (recetario.py)
         """
         conexion = Conexion()
         texto = self.busqueda_texto.strip().lower()
@@ -230,6 +261,27 @@ class Receta:
             print(f"Error al cargar datos: {e}")
             self.datos_tabla = []
 
+        try:
+            recetario = obtener_recetario()
+            for fila in self.datos_tabla:
+                if recetario.tiene_ingredientes(fila["id"]):
+                    fila["costo"] = f"${redondear(recetario.costo_unitario(fila['id']))}"
+            self.version_costos = recetario.version_costos
+        except Exception as e:
+            print(f"Error al calcular costos: {e}")
+
+    def refrescar_recetas(self, cambio):
+        """
+        Recarga la tabla cuando cambian recetas o precios (suscriptor del bus)
+
+        Los avisos de materia prima e insumos llegan también por cambios de
+        cantidad; solo se recarga si el recetario (suscrito antes) borró los
+        costos porque algún precio cambió.
+        """
+        if cambio.entidad != "receta" and obtener_recetario().version_costos == self.version_costos:
+            return
+        self.cargar_datos_tabla()
+
     def dibujar_receta(self, surface):
         """
         Dibuja la interfaz completa de gestión de recetas
@@ -338,10 +390,10 @@ class Receta:
             datos (list): Lista de recetas a mostrar
         """
         # Definir columnas
-        columnas = ["ID", "Nombre", "Tiempo Prep.", "Descripción"]
+        columnas = ["ID", "Nombre", "Tiempo Prep.", "Costo/pz", "Descripción"]
         col_widths = [
             int(width*0.05), int(width*0.2), int(width*0.15),
-            int(width*0.6)
+            int(width*0.12), int(width*0.48)
         ]
 
         # Dibujar encabezados
@@ -358,7 +410,7 @@ class Receta:
         fila_y = y + row_height
         for fila in datos:
             col_x = x
-            keys = ["id", "nombre", "tiempo", "descripcion"]
+            keys = ["id", "nombre", "tiempo", "costo", "descripcion"]
             for i, key in enumerate(keys):
                 valor = fila.get(key, "")
 
@@ -594,6 +646,7 @@ class Receta:
                     nombre, tiempo, descripcion, instrucciones,
                     self.receta_seleccionada
                 ))
+                bus.publicar("receta", [self.receta_seleccionada])
                 self.mostrar_alerta(f"Receta '{nombre}' actualizada")
             else:  # Crear nueva
                 query = """
@@ -609,6 +662,7 @@ class Receta:
                 query_id = "SELECT LAST_INSERT_ID() AS id"
                 resultado = conexion.consultar(query_id)
                 self.receta_seleccionada = resultado[0]['id']
+                bus.publicar("receta", [self.receta_seleccionada])
                 self.mostrar_alerta(f"Receta '{nombre}' creada")
 
             # Recargar datos
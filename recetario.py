@@ -0,0 +1,401 @@
+"""
+Lista de materiales de las recetas y costeo de producción
+---------------------------------------------------------
+Una receta (tabla receta) produce Rendimiento piezas por tanda y consume
+los renglones de receta_ingrediente: materia prima, insumos o sub-recetas
+(un relleno, un betún) en la cantidad que usa una tanda. Las cantidades de
+sub-recetas se expresan en piezas/porciones de la sub-receta.
+
+Recetario carga el árbol completo en tres consultas y lo resuelve en
+memoria:
+
+- explotar(receta) baja el árbol hasta materia prima e insumos y devuelve
+  lo que consume UNA pieza. El resultado se memoriza por receta, así que
+  cada sub-receta se resuelve una sola vez aunque aparezca en muchas
+  recetas o en niveles profundos.
+- costo_unitario(receta) multiplica esa explosión por los precios
+  vigentes (también memorizado).
+- explotar_plan(plan) escala las explosiones memorizadas por las piezas
+  pedidas: costear 500 piezas cuesta lo mismo que costear una.
+
+El recetario compartido (obtener_recetario) se invalida con el bus de
+cambios: un cambio de precios solo borra los costos (y solo si algún precio
+cambió de verdad: la producción y las compras publican materia prima e
+insumos por las cantidades); un cambio de recetas
+vuelve a cargar el árbol; un cambio en el catálogo (cada venta publica uno)
+solo vuelve a leer a qué receta apuntan esos productos y conserva las
+explosiones y costos memorizados.
+
+Uso:
+    recetario = obtener_recetario()
+    necesidades, costo = recetario.explotar_plan([(id_receta, 500)])
+
+    python recetario.py 1:500 4:120     # explota y costea un plan
+    python recetario.py --guardar 1 --rendimiento 40 materiaprima:3:2.5 insumo:7:40 receta:5:40
+                                        # captura la lista de materiales de la receta 1
+"""
+
+import argparse
+import threading
+from decimal import Decimal
+from conexion import Conexion
+from bus_cambios import bus
+from dinero import a_decimal, redondear, CERO
+
+TIPOS_COMPONENTE = ("materiaprima", "insumo", "receta")
+TABLAS_PRECIO = {
+    "materiaprima": ("materiaprima", "ID_MateriaPrima"),
+    "insumo": ("Insumo", "ID_Insumo"),
+}
+
+_recetario = None
+_recetario_lock = threading.Lock()
+
+
+class Recetario:
+    """
+    Árbol de recetas con explosión y costeo memorizados
+
+    Attributes:
+        rendimiento (dict): id_receta -> piezas por tanda
+        nombres (dict): id_receta -> nombre
+        componentes (dict): id_receta -> [(tipo, id, cantidad por tanda)]
+        precios (dict): (tipo, id) -> precio unitario
+        ingredientes (dict): (tipo, id) -> nombre
+        receta_producto (dict): id_catproducto -> id_receta
+        version_costos (int): Aumenta cada vez que se borran los costos; las
+            vistas que muestran costos la comparan para saber si recalcular
+    """
+
+    def __init__(self, cursor=None):
+        self.rendimiento = {}
+        self.nombres = {}
+        self.componentes = {}
+        self.precios = {}
+        self.ingredientes = {}
+        self.receta_producto = {}
+        self._explosion = {}
+        self._costos = {}
+        self.version_costos = 0
+        self.cargar(cursor)
+
+    def cargar(self, cursor=None):
+        """
+        Carga recetas, renglones y precios
+
+        Args:
+            cursor: Cursor a usar (por ejemplo dentro de una transacción);
+                si es None se abre una conexión propia
+        """
+        conexion = None
+        if cursor is None:
+            conexion = Conexion()
+            conexion.conectar()
+            if not conexion.conn:
+                raise ValueError("No se pudo conectar a la base de datos")
+            cursor = conexion.cursor
+        try:
+            cursor.execute("SELECT ID_Receta, Nombre_receta, Rendimiento FROM receta")
+            filas = cursor.fetchall()
+            self.nombres = {f["ID_Receta"]: f["Nombre_receta"] for f in filas}
+            self.rendimiento = {f["ID_Receta"]: Decimal(max(int(f["Rendimiento"] or 1), 1)) for f in filas}
+
+            cursor.execute("SELECT FK_ID_Receta, Tipo, FK_ID_Componente, Cantidad FROM receta_ingrediente")
+            self.componentes = {}
+            for f in cursor.fetchall():
+                self.componentes.setdefault(f["FK_ID_Receta"], []).append(
+                    (f["Tipo"], f["FK_ID_Componente"], a_decimal(f["Cantidad"]))
+                )
+
+            cursor.execute("SELECT ID_CatProducto, FK_ID_Receta FROM catproducto WHERE FK_ID_Receta > 0")
+            self.receta_producto = {f["ID_CatProducto"]: f["FK_ID_Receta"] for f in cursor.fetchall()}
+
+            self._cargar_precios(cursor)
+        finally:
+            if conexion:
+                conexion.cerrar()
+        self._explosion = {}
+        self._costos = {}
+        self.version_costos += 1
+
+    def _cargar_precios(self, cursor, tipo=None, ids=None):
+        """
+        Lee nombre y precio de materia prima e insumos (o solo de unos ids)
+
+        Returns:
+            bool: True si algún precio es nuevo o distinto al que había
+        """
+        cambio = False
+        for entidad, (tabla, clave) in TABLAS_PRECIO.items():
+            if tipo is not None and entidad != tipo:
+                continue
+            query = f"SELECT {clave} AS id, Nombre, Precio FROM {tabla}"
+            params = ()
+            if ids is not None:
+                query += f" WHERE {clave} IN ({', '.join(['%s'] * len(ids))})"
+                params = tuple(ids)
+            cursor.execute(query, params)
+            for f in cursor.fetchall():
+                precio = a_decimal(f["Precio"])
+                if self.precios.get((entidad, f["id"])) != precio:
+                    self.precios[(entidad, f["id"])] = precio
+                    cambio = True
+                self.ingredientes[(entidad, f["id"])] = f["Nombre"]
+        return cambio
+
+    def explotar(self, id_receta, _en_curso=None):
+        """
+        Materia prima e insumos que consume una pieza de la receta
+
+        Args:
+            id_receta (int): Receta a explotar
+
+        Returns:
+            dict: (tipo, id) -> cantidad por pieza (Decimal); no modificar
+
+        Raises:
+            ValueError: Si la receta no existe o contiene un ciclo
+        """
+        memo = self._explosion.get(id_receta)
+        if memo is not None:
+            return memo
+        if id_receta not in self.rendimiento:
+            raise ValueError(f"La receta {id_receta} no existe")
+        en_curso = _en_curso if _en_curso is not None else set()
+        if id_receta in en_curso:
+            raise ValueError(f"La receta '{self.nombres[id_receta]}' se contiene a sí misma")
+        en_curso.add(id_receta)
+
+        rendimiento = self.rendimiento[id_receta]
+        explosion = {}
+        for tipo, id_componente, cantidad in self.componentes.get(id_receta, []):
+            por_pieza = cantidad / rendimiento
+            if tipo == "receta":
+                for clave, sub_cantidad in self.explotar(id_componente, en_curso).items():
+                    explosion[clave] = explosion.get(clave, CERO) + sub_cantidad * por_pieza
+            else:
+                clave = (tipo, id_componente)
+                explosion[clave] = explosion.get(clave, CERO) + por_pieza
+
+        en_curso.discard(id_receta)
+        self._explosion[id_receta] = explosion
+        return explosion
+
+    def costo_unitario(self, id_receta):
+        """
+        Costo de ingredientes de una pieza (sin redondear)
+
+        Returns:
+            Decimal: Costo por pieza
+        """
+        costo = self._costos.get(id_receta)
+        if costo is None:
+            costo = sum((cantidad * self.precios.get(clave, CERO)
+                         for clave, cantidad in self.explotar(id_receta).items()), CERO)
+            self._costos[id_receta] = costo
+        return costo
+
+    def explotar_plan(self, plan):
+        """
+        Necesidades y costo de un plan de producción
+
+        Args:
+            plan: Iterable de tuplas (id_receta, piezas)
+
+        Returns:
+            tuple: ({(tipo, id): cantidad total}, costo total redondeado)
+        """
+        necesidades = {}
+        costo = CERO
+        for id_receta, piezas in plan:
+            piezas = a_decimal(piezas)
+            for clave, cantidad in self.explotar(id_receta).items():
+                necesidades[clave] = necesidades.get(clave, CERO) + cantidad * piezas
+            costo += self.costo_unitario(id_receta) * piezas
+        return necesidades, redondear(costo)
+
+    def plan_productos(self, productos):
+        """
+        Convierte piezas por producto del catálogo en un plan por receta
+
+        Args:
+            productos: Iterable de tuplas (id_catproducto, piezas)
+
+        Returns:
+            tuple: (plan [(id_receta, piezas)], productos sin receta)
+        """
+        plan = []
+        sin_receta = []
+        for id_producto, piezas in productos:
+            id_receta = self.receta_producto.get(id_producto)
+            if id_receta in self.rendimiento:
+                plan.append((id_receta, piezas))
+            else:
+                sin_receta.append(id_producto)
+        return plan, sin_receta
+
+    def tiene_ingredientes(self, id_receta):
+        """Indica si la receta tiene lista de materiales"""
+        return bool(self.componentes.get(id_receta))
+
+    def invalidar_precios(self, cambio):
+        """Suscriptor del bus: vuelve a leer precios y, si alguno cambió, borra los costos"""
+        ids = sorted(cambio.ids) if cambio.ids is not None else None
+        if ids is not None and not ids:
+            return
+        conexion = Conexion()
+        conexion.conectar()
+        if not conexion.conn:
+            return
+        try:
+            cambiaron = self._cargar_precios(conexion.cursor, cambio.entidad, ids)
+        finally:
+            conexion.cerrar()
+        if cambiaron:
+            self._costos = {}
+            self.version_costos += 1
+
+    def invalidar_recetas(self, cambio):
+        """Suscriptor del bus: vuelve a cargar el árbol de recetas"""
+        self.cargar()
+
+    def refrescar_productos(self, cambio):
+        """
+        Suscriptor del bus: vuelve a leer la receta de los productos cambiados
+
+        Las ventas y la producción publican "catproducto" por el stock; aquí
+        solo importa FK_ID_Receta, así que no se toca el árbol ni los memos.
+        """
+        ids = sorted(cambio.ids) if cambio.ids is not None else None
+        if ids is not None and not ids:
+            return
+        query = "SELECT ID_CatProducto, FK_ID_Receta FROM catproducto"
+        params = ()
+        if ids is not None:
+            query += f" WHERE ID_CatProducto IN ({', '.join(['%s'] * len(ids))})"
+            params = tuple(ids)
+        filas = Conexion().consultar(query, params)
+        if ids is None:
+            self.receta_producto = {}
+        for id_producto in ids or ():
+            self.receta_producto.pop(id_producto, None)
+        for f in filas:
+            if f["FK_ID_Receta"] and f["FK_ID_Receta"] > 0:
+                self.receta_producto[f["ID_CatProducto"]] = f["FK_ID_Receta"]
+
+
+def obtener_recetario():
+    """
+    Devuelve el recetario compartido del proceso (lo carga la primera vez)
+
+    Returns:
+        Recetario: Recetario suscrito al bus de cambios
+    """
+    global _recetario
+    with _recetario_lock:
+        if _recetario is None:
+            _recetario = Recetario()
+            bus.suscribir("materiaprima", _recetario.invalidar_precios)
+            bus.suscribir("insumo", _recetario.invalidar_precios)
+            bus.suscribir("receta", _recetario.invalidar_recetas)
+            bus.suscribir("catproducto", _recetario.refrescar_productos)
+        return _recetario
+
+
+def guardar_ingredientes(id_receta, ingredientes, rendimiento=None, conexion=None):
+    """
+    Reemplaza la lista de materiales de una receta
+
+    Args:
+        id_receta (int): Receta a modificar
+        ingredientes: Iterable de tuplas (tipo, id_componente, cantidad por tanda);
+            los componentes repetidos se suman
+        rendimiento (int, optional): Piezas por tanda
+        conexion (Conexion, optional): Conexión a usar
+
+    Raises:
+        ValueError: Si un renglón es inválido o la receta queda en un ciclo
+            (no se guarda nada)
+    """
+    por_componente = {}
+    for tipo, id_componente, cantidad in ingredientes:
+        cantidad = a_decimal(cantidad)
+        if tipo not in TIPOS_COMPONENTE:
+            raise ValueError(f"Tipo de componente inválido: {tipo}")
+        if cantidad <= 0:
+            raise ValueError("La cantidad debe ser mayor a 0")
+        # Un componente repetido se guarda como un solo renglón
+        clave = (tipo, int(id_componente))
+        por_componente[clave] = por_componente.get(clave, CERO) + cantidad
+    renglones = [(id_receta, tipo, id_componente, cantidad)
+                 for (tipo, id_componente), cantidad in por_componente.items()]
+    if rendimiento is not None and int(rendimiento) <= 0:
+        raise ValueError("El rendimiento debe ser mayor a 0")
+
+    conexion = conexion or Conexion()
+    conexion.conectar()
+    if not conexion.conn:
+        raise ValueError("No se pudo conectar a la base de datos")
+    try:
+        cursor = conexion.cursor
+        if rendimiento is not None:
+            cursor.execute("UPDATE receta SET Rendimiento = %s WHERE ID_Receta = %s", (int(rendimiento), id_receta))
+        cursor.execute("DELETE FROM receta_ingrediente WHERE FK_ID_Receta = %s", (id_receta,))
+        if renglones:
+            cursor.executemany(
+                "INSERT INTO receta_ingrediente (FK_ID_Receta, Tipo, FK_ID_Componente, Cantidad) "
+                "VALUES (%s, %s, %s, %s)",
+                renglones
+            )
+        # Valida con el árbol ya modificado (ciclos y sub-recetas inexistentes)
+        Recetario(cursor).explotar(id_receta)
+        conexion.conn.commit()
+    except Exception:
+        conexion.conn.rollback()
+        raise
+    finally:
+        conexion.cerrar()
+    bus.publicar("receta", [id_receta])
+
+
+def leer_renglon(texto):
+    """
+    Convierte un renglón tipo:id:cantidad de la línea de comandos
+
+    Returns:
+        tuple: (tipo, id_componente, cantidad)
+    """
+    partes = texto.split(":")
+    if len(partes) != 3 or not partes[1].isdigit():
+        raise ValueError(f"Renglón inválido '{texto}', se espera tipo:id:cantidad")
+    return partes[0].lower(), int(partes[1]), a_decimal(partes[2])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explosión y costeo de un plan de producción")
+    parser.add_argument("plan", nargs="+",
+                        help="Pares receta:piezas (por ejemplo 1:500); con --guardar, renglones "
+                             f"tipo:id:cantidad por tanda con tipo en {', '.join(TIPOS_COMPONENTE)}")
+    parser.add_argument("--guardar", type=int, metavar="RECETA",
+                        help="Reemplaza la lista de materiales de la receta con los renglones dados")
+    parser.add_argument("--rendimiento", type=int, help="Piezas por tanda (con --guardar)")
+    args = parser.parse_args()
+
+    try:
+        if args.guardar is not None:
+            guardar_ingredientes(args.guardar, [leer_renglon(r) for r in args.plan], args.rendimiento)
+            args.plan = [f"{args.guardar}:1"]
+            print(f"Lista de materiales de la receta {args.guardar} guardada")
+        plan = [tuple(int(x) for x in par.split(":")) for par in args.plan]
+        recetario = Recetario()
+        necesidades, costo = recetario.explotar_plan(plan)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+    for id_receta, piezas in plan:
+        print(f"{recetario.nombres[id_receta]}: {piezas} pz  "
+              f"(${redondear(recetario.costo_unitario(id_receta))} por pieza)")
+    for (tipo, id_componente), cantidad in sorted(necesidades.items()):
+        nombre = recetario.ingredientes.get((tipo, id_componente), f"{tipo} {id_componente}")
+        print(f"  {nombre:<30} {cantidad.normalize():f}")
+    print(f"Costo total de ingredientes: ${costo}")
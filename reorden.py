@@ -0,0 +1,322 @@
+"""
+Puntos de reorden de materia prima e insumos
+--------------------------------------------
+Calcula cuándo y cuánto pedir de cada materia prima e insumo y lo guarda
+en la tabla punto_reorden, de modo que el filtro de inventario solo
+compara la existencia actual contra un número ya calculado.
+
+- Consumo diario: piezas producidas en los últimos VENTANA_DIAS días
+  (tabla produccion) por la lista de materiales de cada producto
+  (recetario.py), como un producto matricial día x producto x componente.
+  Los componentes sin producción registrada toman el consumo que implica
+  el pronóstico de demanda de la próxima semana (pronostico.py).
+- Tiempo de entrega: plazo promedio de los pedidos a proveedor que
+  incluyeron el componente; si no hay pedidos, el menor Tiempo_Entrega de
+  sus proveedores activos (proveedor_materiaprima / proveedor_insumo).
+- Punto de reorden = consumo * entrega + Z * desviación * raíz(entrega),
+  nunca menor al stock mínimo capturado en almacén. Nivel máximo = punto
+  de reorden + DIAS_REVISION días de consumo; lo que hay que pedir es el
+  nivel máximo menos la existencia y lo que ya viene en camino.
+
+La tabla se recalcula completa una vez al día o cuando hay producción
+nueva, y por componente cuando el bus de cambios avisa de cambios en
+materia prima o insumos (stock mínimo o existencias capturadas en almacén).
+
+Uso:
+    obtener_motor().vigente()
+
+    python reorden.py             # recalcula y lista lo que hay que pedir
+"""
+
+import argparse
+import math
+import threading
+import time
+from datetime import date, timedelta
+import numpy as np
+from conexion import Conexion
+from bus_cambios import bus, marcadores
+from recetario import obtener_recetario, TABLAS_PRECIO
+from plan_horneado import matriz_materiales
+from pronostico import obtener_pronosticador
+
+VENTANA_DIAS = 28
+DIAS_REVISION = 14        # Días de consumo que cubre cada pedido
+DIAS_ENTREGA_DEFECTO = 7
+Z_SERVICIO = 1.65         # ~95% de probabilidad de no agotarse durante la entrega
+
+# Tabla de renglones de pedido a proveedor por tipo de componente
+TABLAS_PEDIDO = {
+    "materiaprima": ("pedido_materiaprima", "FK_ID_MateriaPrima", "proveedor_materiaprima"),
+    "insumo": ("pedido_insumo", "FK_ID_Insumo", "proveedor_insumo"),
+}
+COLUMNA_MINIMO = {"materiaprima": "stock_minimo", "insumo": "Stock_Minimo"}
+
+_motor = None
+_motor_lock = threading.Lock()
+
+
+def consumo_diario(cursor, hoy, recetario):
+    """
+    Consumo por día de cada componente según la producción reciente
+
+    Returns:
+        tuple: (claves [(tipo, id)], consumo [K], desviación [K])
+    """
+    inicio = hoy - timedelta(days=VENTANA_DIAS)
+    cursor.execute(
+        """SELECT FK_ID_CatProducto AS id, Fecha, SUM(CantidadInicial) AS piezas
+           FROM produccion WHERE Fecha >= %s AND Fecha < %s
+           GROUP BY FK_ID_CatProducto, Fecha""",
+        (inicio, hoy)
+    )
+    filas = cursor.fetchall()
+    productos = sorted({f["id"] for f in filas})
+    indice = {id_prod: i for i, id_prod in enumerate(productos)}
+    por_dia = np.zeros((VENTANA_DIAS, len(productos)))
+    if filas:
+        d = (np.array([str(f["Fecha"])[:10] for f in filas], dtype="datetime64[D]")
+             - np.datetime64(inicio, "D")).astype(np.int64)
+        p = np.array([indice[f["id"]] for f in filas], dtype=np.int64)
+        q = np.array([float(f["piezas"]) for f in filas])
+        validos = (d >= 0) & (d < VENTANA_DIAS)
+        np.add.at(por_dia, (d[validos], p[validos]), q[validos])
+
+    matriz, claves = matriz_materiales([recetario.receta_producto.get(i) for i in productos], recetario)
+    uso = por_dia @ matriz                                   # [D, K]
+    return claves, uso.mean(axis=0), uso.std(axis=0)
+
+
+def consumo_pronosticado(recetario):
+    """
+    Consumo por día que implica el pronóstico de la próxima semana
+
+    Returns:
+        dict: (tipo, id) -> consumo diario
+    """
+    semana = obtener_pronosticador().pronostico_semana()
+    productos = list(semana)
+    matriz, claves = matriz_materiales([recetario.receta_producto.get(i) for i in productos], recetario)
+    if not claves:
+        return {}
+    uso = np.array([semana[i] for i in productos]) @ matriz / 7
+    return {clave: float(uso[k]) for k, clave in enumerate(claves)}
+
+
+def tiempos_entrega(cursor, tipo, ids):
+    """
+    Días de entrega por componente según pedidos previos y proveedores
+
+    Returns:
+        dict: id -> días
+    """
+    tabla, columna, tabla_proveedor = TABLAS_PEDIDO[tipo]
+    cursor.execute(
+        f"""SELECT pm.{columna} AS id, AVG(p.Plazo) AS dias
+            FROM {tabla} pm JOIN pedido p ON p.ID_Pedido = pm.FK_ID_Pedido
+            WHERE pm.Cancelado = 0 AND p.Estado <> 'Cancelado' AND pm.{columna} IN ({marcadores(ids)})
+            GROUP BY pm.{columna}""",
+        tuple(ids)
+    )
+    dias = {f["id"]: float(f["dias"]) for f in cursor.fetchall()}
+    columna_proveedor = "FK_ID_MateriaPrima" if tipo == "materiaprima" else "FK_ID_Insumo"
+    cursor.execute(
+        f"""SELECT {columna_proveedor} AS id, MIN(Tiempo_Entrega) AS dias
+            FROM {tabla_proveedor}
+            WHERE Estado = 'Activo' AND {columna_proveedor} IN ({marcadores(ids)})
+            GROUP BY {columna_proveedor}""",
+        tuple(ids)
+    )
+    for fila in cursor.fetchall():
+        dias.setdefault(fila["id"], float(fila["dias"]))
+    return dias
+
+
+def en_camino(cursor, tipo, ids):
+    """Unidades pedidas a proveedor que aún no se reciben (id -> unidades)"""
+    tabla, columna, _ = TABLAS_PEDIDO[tipo]
+    cursor.execute(
+        f"""SELECT pm.{columna} AS id, SUM(pm.Unidades) AS unidades
+            FROM {tabla} pm JOIN pedido p ON p.ID_Pedido = pm.FK_ID_Pedido
+            WHERE pm.Cancelado = 0 AND p.Estado IN ('Pendiente', 'En proceso')
+              AND pm.{columna} IN ({marcadores(ids)})
+            GROUP BY pm.{columna}""",
+        tuple(ids)
+    )
+    return {f["id"]: int(f["unidades"]) for f in cursor.fetchall()}
+
+
+def calcular(cursor, ids_por_tipo=None, hoy=None, recetario=None):
+    """
+    Calcula los puntos de reorden
+
+    Args:
+        cursor: Cursor abierto
+        ids_por_tipo (dict, optional): tipo -> ids a calcular (todos si es None)
+        hoy (date, optional): Fecha de cálculo
+        recetario (Recetario, optional): Recetario a usar
+
+    Returns:
+        list: Tuplas listas para insertar en punto_reorden
+    """
+    hoy = hoy or date.today()
+    recetario = recetario or obtener_recetario()
+    claves, consumo, desviacion = consumo_diario(cursor, hoy, recetario)
+    posicion = {clave: k for k, clave in enumerate(claves)}
+    pronosticado = None
+
+    filas = []
+    for tipo, (tabla, clave_tabla) in TABLAS_PRECIO.items():
+        ids = None if ids_por_tipo is None else sorted(ids_por_tipo.get(tipo, ()))
+        if ids == []:
+            continue
+        filtro = f" WHERE {clave_tabla} IN ({marcadores(ids)})" if ids else ""
+        cursor.execute(f"SELECT {clave_tabla} AS id, {COLUMNA_MINIMO[tipo]} AS minimo FROM {tabla}{filtro}",
+                       tuple(ids or ()))
+        minimos = {f["id"]: int(f["minimo"] or 0) for f in cursor.fetchall()}
+        if not minimos:
+            continue
+        entregas = tiempos_entrega(cursor, tipo, list(minimos))
+        pedidos = en_camino(cursor, tipo, list(minimos))
+
+        for id_componente, minimo in minimos.items():
+            k = posicion.get((tipo, id_componente))
+            tasa = float(consumo[k]) if k is not None else 0.0
+            sigma = float(desviacion[k]) if k is not None else 0.0
+            origen = "produccion"
+            if tasa == 0:
+                if pronosticado is None:
+                    try:
+                        pronosticado = consumo_pronosticado(recetario)
+                    except Exception as e:
+                        print(f"Error al leer el pronóstico de demanda: {e}")
+                        pronosticado = {}
+                tasa = pronosticado.get((tipo, id_componente), 0.0)
+                origen = "pronostico" if tasa else "minimo"
+
+            entrega = entregas.get(id_componente, DIAS_ENTREGA_DEFECTO)
+            punto = math.ceil(tasa * entrega + Z_SERVICIO * sigma * math.sqrt(entrega) - 1e-9)
+            if punto < minimo:
+                punto, origen = minimo, "minimo"
+            maximo = punto + math.ceil(tasa * DIAS_REVISION - 1e-9)
+            filas.append((tipo, id_componente, round(tasa, 3), round(sigma, 3), round(entrega, 2),
+                          punto, maximo, pedidos.get(id_componente, 0), origen, hoy))
+    return filas
+
+
+def refrescar(ids_por_tipo=None, conexion=None, recetario=None):
+    """
+    Recalcula y guarda los puntos de reorden
+
+    Args:
+        ids_por_tipo (dict, optional): tipo -> ids a recalcular (todos si es None)
+
+    Returns:
+        int: Renglones guardados
+    """
+    conexion = conexion or Conexion()
+    conexion.conectar()
+    if not conexion.conn:
+        return 0
+    cursor = conexion.cursor
+    try:
+        filas = calcular(cursor, ids_por_tipo, recetario=recetario)
+        if ids_por_tipo is None:
+            cursor.execute("DELETE FROM punto_reorden")
+        else:
+            for tipo, ids in ids_por_tipo.items():
+                if ids:
+                    cursor.execute(
+                        f"DELETE FROM punto_reorden WHERE Tipo = %s AND FK_ID_Componente IN ({marcadores(ids)})",
+                        (tipo,) + tuple(ids)
+                    )
+        cursor.executemany(
+            """INSERT INTO punto_reorden
+               (Tipo, FK_ID_Componente, Consumo_diario, Desviacion, Tiempo_entrega,
+                Punto_reorden, Nivel_maximo, En_camino, Origen, Actualizado)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+            filas
+        )
+        conexion.conn.commit()
+        return len(filas)
+    except Exception:
+        conexion.conn.rollback()
+        raise
+    finally:
+        conexion.cerrar()
+
+
+class MotorReorden:
+    """
+    Mantiene punto_reorden al día dentro del proceso
+
+    Attributes:
+        actualizado (date): Día del último recálculo completo
+        ultima_produccion (int): Mayor ID_Produccion considerado
+    """
+
+    def __init__(self):
+        self.actualizado = None
+        self.ultima_produccion = None
+
+    def vigente(self):
+        """Recalcula todo si cambió el día o se registró producción nueva"""
+        filas = Conexion().consultar("SELECT MAX(ID_Produccion) AS ultima FROM produccion")
+        ultima = filas[0]["ultima"] if filas else None
+        if self.actualizado == date.today() and ultima == self.ultima_produccion:
+            return False
+        refrescar()
+        self.actualizado = date.today()
+        self.ultima_produccion = ultima
+        return True
+
+    def refrescar_cambio(self, cambio):
+        """Suscriptor del bus: recalcula los componentes modificados"""
+        if self.actualizado is None:
+            return  # Aún no se ha calculado; vigente() lo hará completo
+        try:
+            if cambio.ids is None:
+                self.actualizado = None
+                self.vigente()
+            else:
+                refrescar({cambio.entidad: cambio.ids})
+        except Exception as e:
+            print(f"Error al recalcular puntos de reorden: {e}")
+
+
+def obtener_motor():
+    """
+    Devuelve el motor de reorden compartido del proceso
+
+    Returns:
+        MotorReorden: Motor suscrito a los cambios de materia prima e insumos
+    """
+    global _motor
+    with _motor_lock:
+        if _motor is None:
+            _motor = MotorReorden()
+            bus.suscribir("materiaprima", _motor.refrescar_cambio)
+            bus.suscribir("insumo", _motor.refrescar_cambio)
+        return _motor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Puntos de reorden de materia prima e insumos")
+    parser.parse_args()
+
+    inicio = time.perf_counter()
+    total = refrescar()
+    print(f"{total} puntos de reorden calculados ({round(time.perf_counter() - inicio, 3)} s)")
+    conexion = Conexion()
+    for tipo, (tabla, clave) in TABLAS_PRECIO.items():
+        filas = conexion.consultar(
+            f"""SELECT t.Nombre, t.Cantidad, r.Punto_reorden, r.Nivel_maximo, r.En_camino, r.Origen
+                FROM punto_reorden r JOIN {tabla} t ON t.{clave} = r.FK_ID_Componente
+                WHERE r.Tipo = %s AND t.Cantidad <= r.Punto_reorden
+                ORDER BY t.Nombre""",
+            (tipo,)
+        )
+        for fila in filas:
+            pedir = max(fila["Nivel_maximo"] - fila["Cantidad"] - fila["En_camino"], 0)
+            print(f"  [{tipo}] {fila['Nombre']:<30} existencia {fila['Cantidad']:>6}  "
+                  f"reorden {fila['Punto_reorden']:>6}  pedir {pedir:>6}  ({fila['Origen']})")
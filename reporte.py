@@ -1,5 +1,9 @@
 import pygame
 from conexion import Conexion
+from bus_cambios import bus, fusionar_filas, marcadores
+from pronostico import obtener_pronosticador
+from reorden import obtener_motor
+from calendario_pedidos import obtener_calendario, DIAS_CALENDARIO
 import math
 import os
 import datetime
@@ -12,6 +16,8 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
+PAGINA_PEDIDOS = 100  # Pedidos por página; las siguientes se leen al llegar al final
+
 class reporte:
     def __init__(self, x, y, ancho, alto):
         """
@@ -27,42 +33,13 @@ class reporte:
         self.FONDO = (241, 236, 227)
         self.color_texto = (0, 0, 0)
 
-        # Función para escalar fuentes y elementos de manera proporcional
-        def fuente_relativa(base_size):
-            scale = min(self.ancho / 1555, self.alto / 710)
-            return int(base_size * scale)
-
-        # Inicialización de fuentes
-        self.fuente_titulo = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
-        self.fuente_boton = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
-        self.fuente_boton_agregar = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
-        self.fuente_boton_pdf = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
-        self.fuente_pie_pagina = pygame.font.SysFont("Open Sans", fuente_relativa(28), bold=True)
-
         # Opciones disponibles en el informe
-        self.botones_opciones = ["VENTAS", "PRODUCTOS", "HORARIOS", "CORTE CAJA", "INVENTARIO", "PEDIDOS"]
+        self.botones_opciones = ["VENTAS", "PRODUCTOS", "HORARIOS", "CORTE CAJA", "INVENTARIO", "PEDIDOS", "PRONÓSTICO"]
         self.opcion_seleccionada = self.botones_opciones[0]
 
-        # Configuración de botones y rectángulos
-        self.boton_width = int(self.ancho * 0.09)
-        self.boton_rects = [
-            pygame.Rect(
-                self.x + int(0.013 * self.ancho) + i * (self.boton_width + int(0.01 * self.ancho)),
-                self.y + int(0.11 * self.alto),
-                self.boton_width,
-                int(0.06 * self.alto)
-            ) for i in range(len(self.botones_opciones))
-        ]
         self.color_boton = (220, 220, 220)
         self.color_boton_activo = (180, 180, 255)
 
-        # Botón PDF
-        self.boton_pdf_rect = pygame.Rect(
-            self.x + int(0.013 * self.ancho) + len(self.botones_opciones) * (self.boton_width + int(0.01 * self.ancho)) + int(0.12 * self.ancho),
-            self.y + int(0.11 * self.alto),
-            int(0.12 * self.ancho),
-            int(0.06 * self.alto)
-        )
         self.color_boton_pdf = (100, 100, 200)
         self.color_boton_pdf_hover = (80, 80, 180)
         self.pdf_hover = False
@@ -81,34 +58,13 @@ class reporte:
         self.metodos_pago = []
         self.fecha_seleccionada = self.fecha_corte
         
-        # Selector de fecha
-        self.selector_fecha_rect = pygame.Rect(
-            self.x + int(0.35 * self.ancho),
-            self.y + int(0.11 * self.alto),
-            int(0.15 * self.ancho),
-            int(0.06 * self.alto)
-        )
         self.selector_fecha_activo = False
 
-        # Botones para cambiar fecha
-        self.boton_fecha_anterior = pygame.Rect(
-            self.x + int(0.32 * self.ancho),
-            self.y + int(0.11 * self.alto),
-            int(0.03 * self.ancho),
-            int(0.06 * self.alto)
-        )
-
-        self.boton_fecha_siguiente = pygame.Rect(
-            self.x + int(0.51 * self.ancho),
-            self.y + int(0.11 * self.alto),
-            int(0.03 * self.ancho),
-            int(0.06 * self.alto)
-        )
-
         # Configuración de inventario
         self.inventario_datos = []
         self.inventario_filtro = "TODOS"
-        self.filtros_inventario = ["TODOS", "BAJO", "AGOTADO"]
+        self.filtros_inventario = ["TODOS", "BAJO", "AGOTADO", "POR CADUCAR"]
+        self.dias_por_caducar = 7
         self.botones_filtro_inventario = []
         
         self.inventario_scroll_y = 0
@@ -121,7 +77,14 @@ class reporte:
         # Configuración de pedidos
         self.pedidos_datos = []
         self.pedidos_filtro = "TODOS"
-        self.filtros_pedidos = ["TODOS", "PENDIENTES", "COMPLETADOS"]
+        self.filtros_pedidos = ["TODOS", "PENDIENTES", "COMPLETADOS", "CALENDARIO"]
+        self.pedidos_hay_mas = False
+        # (Fecha_entrega, ID) de la última fila leída de la base: los avisos del
+        # bus reordenan y agregan filas en pedidos_datos, así que la página
+        # siguiente no puede partir de la última fila mostrada
+        self.pedidos_cursor = None
+        self.calendario_dias = []
+        self.calendario_atrasados = None
         self.botones_filtro_pedidos = []
         
         self.pedidos_scroll_y = 0
@@ -131,13 +94,96 @@ class reporte:
         self.pedidos_row_height = 40
         self.pedidos_scroll_area = None
 
+        # Configuración de pronóstico de demanda (ver pronostico.py)
+        self.pronostico_datos = []
+        self.pronostico_horas = [0] * 24
+        self.pronostico_filtro = "MAÑANA"
+        self.filtros_pronostico = ["MAÑANA", "SEMANA"]
+        self.botones_filtro_pronostico = []
+        self.pronostico_visible_rows = 10
+
         # Configuración de scroll
         self.scroll_bar_width = 15
         self.scroll_handle_height = 50
         self.dragging_scroll = False
         self.drag_offset = 0
 
+        # Fuentes y posiciones escaladas
+        self.configurar_layout()
+
+        # Puntos de reorden; se suscribe antes que el inventario para que
+        # las filas refrescadas lean los puntos ya recalculados
+        self.motor_reorden = obtener_motor()
+        # Igual con el calendario de entregas antes de la tabla de pedidos
+        self.calendario = obtener_calendario()
+
+        # Refrescar filas cuando otros módulos modifiquen inventario o pedidos
+        bus.suscribir("materiaprima", self.refrescar_inventario)
+        bus.suscribir("pedidoventa", self.refrescar_pedidos)
+
+    def configurar_layout(self):
+        """
+        Calcula fuentes y posiciones a partir de x, y, ancho y alto.
+        Se usa al crear la interfaz y al redimensionar la ventana.
+        """
+        # Función para escalar fuentes y elementos de manera proporcional
+        def fuente_relativa(base_size):
+            scale = min(self.ancho / 1555, self.alto / 710)
+            return int(base_size * scale)
+
+        # Inicialización de fuentes
+        self.fuente_titulo = pygame.font.SysFont("Times New Roman", int(self.alto * 0.08), bold=True)
+        self.fuente_boton = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
+        self.fuente_boton_agregar = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
+        self.fuente_boton_pdf = pygame.font.SysFont("Open Sans", int(self.alto * 0.045), bold=True)
+        self.fuente_pie_pagina = pygame.font.SysFont("Open Sans", fuente_relativa(28), bold=True)
+
+        # Configuración de botones y rectángulos
+        self.boton_width = int(self.ancho * 0.09)
+        self.boton_rects = [
+            pygame.Rect(
+                self.x + int(0.013 * self.ancho) + i * (self.boton_width + int(0.01 * self.ancho)),
+                self.y + int(0.11 * self.alto),
+                self.boton_width,
+                int(0.06 * self.alto)
+            ) for i in range(len(self.botones_opciones))
+        ]
+
+        # Botón PDF
+        self.boton_pdf_rect = pygame.Rect(
+            self.x + int(0.013 * self.ancho) + len(self.botones_opciones) * (self.boton_width + int(0.01 * self.ancho)) + int(0.12 * self.ancho),
+            self.y + int(0.11 * self.alto),
+            int(0.12 * self.ancho),
+            int(0.06 * self.alto)
+        )
+
+        # Selector de fecha
+        self.selector_fecha_rect = pygame.Rect(
+            self.x + int(0.35 * self.ancho),
+            self.y + int(0.11 * self.alto),
+            int(0.15 * self.ancho),
+            int(0.06 * self.alto)
+        )
+
+        # Botones para cambiar fecha
+        self.boton_fecha_anterior = pygame.Rect(
+            self.x + int(0.32 * self.ancho),
+            self.y + int(0.11 * self.alto),
+            int(0.03 * self.ancho),
+            int(0.06 * self.alto)
+        )
+
+        self.boton_fecha_siguiente = pygame.Rect(
+            self.x + int(0.51 * self.ancho),
+            self.y + int(0.11 * self.alto),
+            int(0.03 * self.ancho),
+            int(0.06 * self.alto)
+        )
+
         # Crear botones de filtro
+        self.botones_filtro_inventario = []
+        self.botones_filtro_pedidos = []
+        self.botones_filtro_pronostico = []
         for i, filtro in enumerate(self.filtros_inventario):
             self.botones_filtro_inventario.append(
                 pygame.Rect(
@@ -158,6 +204,31 @@ class reporte:
                 )
             )
 
+        for i, filtro in enumerate(self.filtros_pronostico):
+            self.botones_filtro_pronostico.append(
+                pygame.Rect(
+                    self.x + int(0.2 * self.ancho) + i * int(0.11 * self.ancho),
+                    self.y + int(0.18 * self.alto),
+                    int(0.1 * self.ancho),
+                    int(0.04 * self.alto)
+                )
+            )
+
+    def relayout(self, x, y, ancho, alto):
+        """
+        Reubica la interfaz en una nueva área conservando los datos cargados
+
+        Args:
+            x, y (int): Nueva posición
+            ancho, alto (int): Nuevas dimensiones
+        """
+        self.x = x
+        self.y = y
+        self.ancho = ancho
+        self.alto = alto
+        self.configurar_layout()
+
+
     # [Métodos de carga de datos permanecen igual...]
     def cargar_ventas_por_dia(self):
         """Carga los datos de ventas por día desde la base de datos."""
@@ -563,6 +634,9 @@ class reporte:
         elif self.opcion_seleccionada == "PEDIDOS":
             self.dibujar_filtros_pedidos(surface)
             self.dibujar_pedidos_con_scroll(surface)
+        elif self.opcion_seleccionada == "PRONÓSTICO":
+            self.dibujar_filtros_pronostico(surface)
+            self.dibujar_pronostico(surface)
 
     def descargar_pdf(self):
         """Descarga el informe actual como un archivo PDF mejorado."""
@@ -592,6 +666,10 @@ class reporte:
                 if not self.pedidos_datos:
                     self.cargar_pedidos()
                 self.crear_pdf_pedidos()
+            elif self.opcion_seleccionada == "PRONÓSTICO":
+                if not self.pronostico_datos:
+                    self.cargar_pronostico()
+                self.crear_pdf_pronostico()
                 
         except Exception as e:
             print(f"Error al generar PDF: {e}")
@@ -1272,7 +1350,7 @@ class reporte:
 
         # Resumen estadístico
         items_agotados = sum(1 for item in self.inventario_datos if item['Cantidad'] == 0)
-        items_bajos = sum(1 for item in self.inventario_datos if 0 < item['Cantidad'] <= 10)
+        items_bajos = sum(1 for item in self.inventario_datos if 0 < item['Cantidad'] <= item['Reorden'])
         items_normales = len(self.inventario_datos) - items_agotados - items_bajos
 
         elements.append(Paragraph("Resumen del Inventario", subtitulo_style))
@@ -1281,7 +1359,7 @@ class reporte:
             ["Estado", "Cantidad", "Porcentaje"],
             ["Total de Items", str(len(self.inventario_datos)), "100%"],
             ["Stock Normal", str(items_normales), f"{(items_normales/len(self.inventario_datos)*100):.1f}%" if len(self.inventario_datos) > 0 else "0%"],
-            ["Stock Bajo (≤10)", str(items_bajos), f"{(items_bajos/len(self.inventario_datos)*100):.1f}%" if len(self.inventario_datos) > 0 else "0%"],
+            ["Stock Bajo (≤ reorden)", str(items_bajos), f"{(items_bajos/len(self.inventario_datos)*100):.1f}%" if len(self.inventario_datos) > 0 else "0%"],
             ["Agotados", str(items_agotados), f"{(items_agotados/len(self.inventario_datos)*100):.1f}%" if len(self.inventario_datos) > 0 else "0%"]
         ]
 
@@ -1313,7 +1391,7 @@ class reporte:
             # Determinar estado del stock
             if item['Cantidad'] == 0:
                 estado = "AGOTADO"
-            elif item['Cantidad'] <= 10:
+            elif item['Cantidad'] <= item['Reorden']:
                 estado = "BAJO"
             else:
                 estado = "NORMAL"
@@ -1349,7 +1427,7 @@ class reporte:
                 tabla_inventario.setStyle(TableStyle([
                     ('BACKGROUND', (0, i), (5, i), colors.HexColor('#F1948A'))
                 ]))
-            elif item['Cantidad'] <= 10:  # Bajo - Amarillo
+            elif item['Cantidad'] <= item['Reorden']:  # Bajo - Amarillo
                 tabla_inventario.setStyle(TableStyle([
                     ('BACKGROUND', (0, i), (5, i), colors.HexColor('#F9E79F'))
                 ]))
@@ -1384,6 +1462,71 @@ class reporte:
         doc.build(elements)
         print(f"PDF de inventario generado: {nombre_pdf}")
 
+    def crear_pdf_pronostico(self):
+        """Crea un PDF con el pronóstico de demanda por producto."""
+        if not self.pronostico_datos:
+            return
+
+        fecha_actual = datetime.datetime.now().strftime('%d-%m-%Y_%H-%M')
+        nombre_pdf = f"reportes/pronostico_{fecha_actual}.pdf"
+
+        doc = SimpleDocTemplate(nombre_pdf, pagesize=letter,
+                              topMargin=0.5*inch, bottomMargin=0.5*inch,
+                              leftMargin=0.5*inch, rightMargin=0.5*inch)
+        elements = []
+        styles = getSampleStyleSheet()
+
+        titulo_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#2471A3')
+        )
+
+        manana = datetime.date.today() + datetime.timedelta(days=1)
+        elements.append(Paragraph("PRONÓSTICO DE DEMANDA", titulo_style))
+        elements.append(Paragraph(f"Fecha de generación: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+        elements.append(Paragraph(
+            f"Piezas esperadas para mañana ({manana.strftime('%d/%m/%Y')}) y para los 7 días desde mañana, "
+            "según la historia de ventas por día de la semana y hora.", styles['Normal']))
+        elements.append(Spacer(1, 20))
+
+        datos = [["ID", "Producto", "Mañana", "7 días", "Stock", "Hora pico"]]
+        for item in self.pronostico_datos:
+            datos.append([
+                str(item['id']),
+                item['Nombre'][:30] + "..." if len(item['Nombre']) > 30 else item['Nombre'],
+                f"{item['Manana']:.1f}",
+                f"{item['Semana']:.1f}",
+                str(item['Stock']),
+                item['Hora_pico'],
+            ])
+
+        tabla = Table(datos, colWidths=[0.5*inch, 2.6*inch, 0.9*inch, 0.9*inch, 0.8*inch, 0.9*inch])
+        tabla.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (5, 0), colors.HexColor('#2E86C1')),
+            ('TEXTCOLOR', (0, 0), (5, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (5, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (5, 0), 9),
+            ('BACKGROUND', (0, 1), (5, -1), colors.HexColor('#F4F6F7')),
+            ('GRID', (0, 0), (5, -1), 1, colors.black),
+            ('ALIGN', (2, 0), (5, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (5, -1), 'MIDDLE'),
+            ('FONTSIZE', (0, 1), (5, -1), 8),
+        ]))
+        # Stock que no alcanza para mañana
+        for i, item in enumerate(self.pronostico_datos, 1):
+            if item['Stock'] < item['Manana']:
+                tabla.setStyle(TableStyle([
+                    ('BACKGROUND', (0, i), (5, i), colors.HexColor('#F9E79F'))
+                ]))
+        elements.append(tabla)
+
+        doc.build(elements)
+        print(f"PDF de pronóstico generado: {nombre_pdf}")
+
     def crear_pdf_pedidos(self):
         """Crea un PDF completo para el reporte de pedidos."""
         if not self.pedidos_datos:
@@ -1635,34 +1778,74 @@ class reporte:
         # Estados para el gráfico
         self.metodos_pago = [(e['Estado'], float(e['total'])) for e in resultado_estados] if resultado_estados else []
 
-    def cargar_inventario(self):
-        """Carga los datos del inventario desde la base de datos."""
-        conexion = Conexion()
+    def consulta_inventario(self, ids=None):
+        """
+        Arma la consulta de inventario con el filtro actual
 
-        # Filtro según la opción seleccionada
-        filtro_sql = ""
+        Args:
+            ids (list, optional): Limitar a estas materias primas
+
+        Returns:
+            tuple: (query, params)
+        """
+        # Filtro según la opción seleccionada. "Bajo" es por debajo del punto
+        # de reorden calculado (reorden.py) o del stock mínimo si aún no hay
+        condiciones = []
+        params = ()
+        columnas_lote = ""
+        join_lote = ""
+        orden = "mp.Cantidad ASC"
         if self.inventario_filtro == "BAJO":
-            filtro_sql = " WHERE Cantidad <= 10 AND Cantidad > 0"
+            condiciones.append("mp.Cantidad <= COALESCE(r.Punto_reorden, mp.stock_minimo) AND mp.Cantidad > 0")
         elif self.inventario_filtro == "AGOTADO":
-            filtro_sql = " WHERE Cantidad = 0"
+            condiciones.append("mp.Cantidad = 0")
+        elif self.inventario_filtro == "POR CADUCAR":
+            # Solo recorre los lotes dentro del rango (índice por caducidad)
+            limite = datetime.date.today() + datetime.timedelta(days=self.dias_por_caducar)
+            columnas_lote = ", l.Por_caducar, l.Caducidad"
+            join_lote = """
+            JOIN (SELECT FK_ID_MateriaPrima, SUM(Cantidad) AS Por_caducar, MIN(fecha_caducidad) AS Caducidad
+                  FROM lote_materiaprima WHERE fecha_caducidad <= %s
+                  GROUP BY FK_ID_MateriaPrima) l ON l.FK_ID_MateriaPrima = mp.ID_MateriaPrima"""
+            params = (limite,)
+            orden = "l.Caducidad ASC, mp.Nombre ASC"
+        if ids is not None:
+            condiciones.append(f"mp.ID_MateriaPrima IN ({marcadores(ids)})")
+            params += tuple(ids)
+        filtro_sql = " WHERE " + " AND ".join(condiciones) if condiciones else ""
 
-        # Consultar materia prima
         query_mp = f"""
             SELECT
                 mp.ID_MateriaPrima AS id,
                 mp.Nombre,
                 mp.Cantidad,
                 mc.Nombre AS Unidad,
-                tmp.Nombre AS Tipo
+                tmp.Nombre AS Tipo,
+                COALESCE(r.Punto_reorden, mp.stock_minimo) AS Reorden,
+                CASE WHEN r.Nivel_maximo - mp.Cantidad - r.En_camino > 0
+                     THEN r.Nivel_maximo - mp.Cantidad - r.En_camino ELSE 0 END AS Pedir{columnas_lote}
             FROM materiaprima mp
             JOIN medidacantidad mc ON mp.FK_ID_MedidaCantidad = mc.ID_MedidaCantidad
             JOIN tipomateriaprima tmp ON mp.FK_ID_TipoMateriaPrima = tmp.ID_TipoMateriaPrima
+            LEFT JOIN punto_reorden r ON r.Tipo = 'materiaprima' AND r.FK_ID_Componente = mp.ID_MateriaPrima{join_lote}
             {filtro_sql}
-            ORDER BY mp.Cantidad ASC
+            ORDER BY {orden}
         """
+        return query_mp, params
+
+    def cargar_inventario(self):
+        """Carga los datos del inventario desde la base de datos."""
+        try:
+            self.motor_reorden.vigente()
+        except Exception as e:
+            print(f"Error al actualizar puntos de reorden: {e}")
+        conexion = Conexion()
+
+        # Consultar materia prima
+        query_mp, params = self.consulta_inventario()
 
         try:
-            resultado_mp = conexion.consultar(query_mp)
+            resultado_mp = conexion.consultar(query_mp, params)
             self.inventario_datos = resultado_mp
             
             # Calcular scroll máximo
@@ -1681,18 +1864,36 @@ class reporte:
             self.inventario_scroll_max = 0
             self.inventario_scroll_y = 0
 
-    def cargar_pedidos(self):
-        """Carga los datos de los pedidos desde la base de datos."""
-        conexion = Conexion()
+    def consulta_pedidos(self, ids=None, despues=None):
+        """
+        Arma la consulta de pedidos con el filtro actual
+
+        Las páginas se piden por llave (Fecha_entrega, ID) en lugar de OFFSET,
+        así cada página cuesta lo mismo sin importar cuántas haya antes.
 
+        Args:
+            ids (list, optional): Limitar a estos pedidos (sin tope de filas)
+            despues (tuple, optional): (Fecha_entrega, ID) del último pedido de
+                la página anterior
+
+        Returns:
+            tuple: (query, params)
+        """
         # Filtro según la opción seleccionada
-        filtro_sql = ""
+        condiciones = []
+        params = ()
         if self.pedidos_filtro == "PENDIENTES":
-            filtro_sql = " WHERE p.Estado IN ('Pendiente', 'En proceso')"
+            condiciones.append("p.Estado IN ('Pendiente', 'En proceso')")
         elif self.pedidos_filtro == "COMPLETADOS":
-            filtro_sql = " WHERE p.Estado IN ('Entregado', 'Listo')"
+            condiciones.append("p.Estado IN ('Entregado', 'Listo')")
+        if ids is not None:
+            condiciones.append(f"p.ID_PedidoVenta IN ({marcadores(ids)})")
+            params = tuple(ids)
+        if despues is not None:
+            condiciones.append("(p.Fecha_entrega < %s OR (p.Fecha_entrega = %s AND p.ID_PedidoVenta < %s))")
+            params += (despues[0], despues[0], despues[1])
+        filtro_sql = " WHERE " + " AND ".join(condiciones) if condiciones else ""
 
-        # Consultar pedidos
         query = f"""
             SELECT
                 p.ID_PedidoVenta as id,
@@ -1705,12 +1906,47 @@ class reporte:
             FROM pedidoventa p
             JOIN Cliente c ON p.FK_ID_Cliente = c.ID_Cliente
             {filtro_sql}
-            ORDER BY p.Fecha_entrega DESC
-            LIMIT 100
+            ORDER BY p.Fecha_entrega DESC, p.ID_PedidoVenta DESC
+        """
+        if ids is None:
+            query += f" LIMIT {PAGINA_PEDIDOS}"
+        return query, params
+
+    def cargar_pedidos(self, siguiente=False):
         """
+        Carga los datos de los pedidos desde la base de datos.
+
+        Args:
+            siguiente (bool): Agregar la página que sigue a la última cargada
+                en lugar de empezar desde la primera
+        """
+        if self.pedidos_filtro == "CALENDARIO":
+            self.cargar_calendario()
+            return
+
+        despues = None
+        if siguiente:
+            if not self.pedidos_hay_mas or self.pedidos_cursor is None:
+                return
+            despues = self.pedidos_cursor
+
+        conexion = Conexion()
+
+        # Consultar pedidos
+        query, params = self.consulta_pedidos(despues=despues)
 
         try:
-            self.pedidos_datos = conexion.consultar(query)
+            filas = conexion.consultar(query, params)
+            self.pedidos_hay_mas = len(filas) == PAGINA_PEDIDOS
+            if filas:
+                self.pedidos_cursor = (filas[-1]['Fecha_entrega'], filas[-1]['id'])
+            if siguiente:
+                vistos = {fila['id'] for fila in self.pedidos_datos}
+                self.pedidos_datos = self.pedidos_datos + [fila for fila in filas if fila['id'] not in vistos]
+            else:
+                self.pedidos_datos = filas
+                # Resetear scroll al cambiar filtro
+                self.pedidos_scroll_y = 0
             
             # Calcular scroll máximo
             total_rows = len(self.pedidos_datos)
@@ -1718,16 +1954,129 @@ class reporte:
                 self.pedidos_scroll_max = (total_rows - self.pedidos_visible_rows) * self.pedidos_row_height
             else:
                 self.pedidos_scroll_max = 0
-                
-            # Resetear scroll al cambiar filtro
-            self.pedidos_scroll_y = 0
             
         except Exception as e:
             print(f"Error al cargar pedidos: {e}")
             self.pedidos_datos = []
+            self.pedidos_hay_mas = False
+            self.pedidos_cursor = None
             self.pedidos_scroll_max = 0
             self.pedidos_scroll_y = 0
 
+    def cargar_calendario(self):
+        """
+        Carga la vista de calendario: entregas de los próximos días
+
+        Sale del calendario en memoria (calendario_pedidos.py), sin consultar
+        la base; la tabla de pedidos y el PDF usan los pedidos activos que se
+        entregan hasta el último día mostrado, incluidos los atrasados.
+        """
+        try:
+            hoy = datetime.date.today()
+            self.calendario_dias = self.calendario.semana(hoy, DIAS_CALENDARIO)
+            self.calendario_atrasados = self.calendario.atrasados(hoy)
+            hasta = hoy + datetime.timedelta(days=DIAS_CALENDARIO - 1)
+            self.pedidos_datos = [
+                {
+                    'id': fila['id'],
+                    'cliente': fila['cliente'],
+                    'Fecha_pedido': fila['fecha'],
+                    'Fecha_entrega': fila['entrega'],
+                    'Estado': fila['estado'],
+                    'Total': fila['total'],
+                    'dias_proceso': (fila['entrega'] - fila['fecha']).days,
+                }
+                for fila in self.calendario.pedidos(hasta=hasta)
+            ]
+        except Exception as e:
+            print(f"Error al cargar calendario de pedidos: {e}")
+            self.calendario_dias = []
+            self.calendario_atrasados = None
+            self.pedidos_datos = []
+        self.pedidos_hay_mas = False
+        self.pedidos_cursor = None
+        self.pedidos_scroll_y = 0
+        self.pedidos_scroll_max = 0
+
+    def cargar_pronostico(self):
+        """Carga el pronóstico de demanda de mañana y de los próximos 7 días."""
+        try:
+            pronosticador = obtener_pronosticador()
+            pronosticador.actualizar()
+            manana = datetime.date.today() + datetime.timedelta(days=1)
+            por_dia = pronosticador.pronostico_dia(manana)
+            por_semana = pronosticador.pronostico_semana(manana)
+            por_hora = pronosticador.pronostico_horas(manana)
+
+            conexion = Conexion()
+            productos = conexion.consultar("""
+                SELECT ID_CatProducto AS id, Nombre_prod AS Nombre, Stock
+                FROM CatProducto
+                WHERE Estado = 'Disponible'
+            """)
+            self.pronostico_datos = []
+            self.pronostico_horas = [0] * 24
+            for producto in productos:
+                if producto['id'] not in por_dia:
+                    continue
+                horas = por_hora[producto['id']]
+                self.pronostico_datos.append({
+                    'id': producto['id'],
+                    'Nombre': producto['Nombre'],
+                    'Stock': int(producto['Stock'] or 0),
+                    'Manana': round(por_dia[producto['id']], 1),
+                    'Semana': round(por_semana[producto['id']], 1),
+                    'Hora_pico': f"{int(horas.argmax())}:00",
+                })
+                for hora in range(24):
+                    self.pronostico_horas[hora] += float(horas[hora])
+            self.ordenar_pronostico()
+        except Exception as e:
+            print(f"Error al cargar pronóstico: {e}")
+            self.pronostico_datos = []
+            self.pronostico_horas = [0] * 24
+
+    def ordenar_pronostico(self):
+        """Ordena el pronóstico por la demanda del horizonte seleccionado."""
+        clave = 'Manana' if self.pronostico_filtro == "MAÑANA" else 'Semana'
+        self.pronostico_datos.sort(key=lambda fila: -fila[clave])
+
+    def refrescar_inventario(self, cambio):
+        """Actualiza solo las materias primas modificadas (suscriptor del bus)"""
+        if not self.inventario_datos:
+            return  # Se carga completo al abrir la sección
+        if cambio.ids is None:
+            self.cargar_inventario()
+            return
+        ids = sorted(cambio.ids)
+        query, params = self.consulta_inventario(ids)
+        nuevas = Conexion().consultar(query, params)
+        if self.inventario_filtro == "POR CADUCAR":
+            orden = lambda fila: (fila["Caducidad"], fila["Nombre"])
+        else:
+            orden = lambda fila: fila["Cantidad"]
+        self.inventario_datos = fusionar_filas(self.inventario_datos, nuevas, cambio.ids, orden=orden)
+        total_rows = len(self.inventario_datos)
+        self.inventario_scroll_max = max(0, (total_rows - self.inventario_visible_rows) * self.inventario_row_height)
+        self.inventario_scroll_y = min(self.inventario_scroll_y, self.inventario_scroll_max)
+
+    def refrescar_pedidos(self, cambio):
+        """Actualiza solo los pedidos modificados (suscriptor del bus)"""
+        if not self.pedidos_datos:
+            return  # Se carga completo al abrir la sección
+        if cambio.ids is None or self.pedidos_filtro == "CALENDARIO":
+            self.cargar_pedidos()
+            return
+        ids = sorted(cambio.ids)
+        query, params = self.consulta_pedidos(ids)
+        nuevas = Conexion().consultar(query, params)
+        self.pedidos_datos = fusionar_filas(self.pedidos_datos, nuevas, cambio.ids,
+                                            orden=lambda fila: (str(fila["Fecha_entrega"]), fila["id"]),
+                                            descendente=True)
+        total_rows = len(self.pedidos_datos)
+        self.pedidos_scroll_max = max(0, (total_rows - self.pedidos_visible_rows) * self.pedidos_row_height)
+        self.pedidos_scroll_y = min(self.pedidos_scroll_y, self.pedidos_scroll_max)
+
     def dibujar_selector_fecha(self, surface):
         """Dibuja el selector de fecha en la superficie proporcionada."""
         # Calcular posición dinámica
@@ -1828,6 +2177,96 @@ class reporte:
             text_rect = texto.get_rect(center=rect.center)
             surface.blit(texto, text_rect)
 
+    def dibujar_filtros_pronostico(self, surface):
+        """Dibuja los botones de horizonte del pronóstico."""
+        for i, rect in enumerate(self.botones_filtro_pronostico):
+            color = (180, 180, 255) if self.pronostico_filtro == self.filtros_pronostico[i] else (220, 220, 220)
+            pygame.draw.rect(surface, color, rect, border_radius=8)
+            texto = self.fuente_boton.render(self.filtros_pronostico[i], True, (0, 0, 0))
+            text_rect = texto.get_rect(center=rect.center)
+            surface.blit(texto, text_rect)
+
+    def dibujar_pronostico(self, surface):
+        """Dibuja los productos con mayor demanda esperada y la curva por hora de mañana."""
+        graf_x, graf_y, graf_w, graf_h = self._get_grafica_area()
+        graf_y += 40
+        graf_h -= 40
+
+        pygame.draw.rect(surface, (255, 255, 255), (graf_x, graf_y, graf_w, graf_h), border_radius=12)
+        pygame.draw.rect(surface, (200, 200, 200), (graf_x, graf_y, graf_w, graf_h), 2, border_radius=12)
+
+        if not self.pronostico_datos:
+            font = pygame.font.SysFont("Open Sans", int(0.045 * self.alto))
+            msg = font.render("No hay historia de ventas para pronosticar.", True, (180, 0, 0))
+            surface.blit(msg, (graf_x + graf_w//4, graf_y + graf_h // 2))
+            return
+
+        font_titulo = pygame.font.SysFont("Open Sans", int(0.035 * self.alto), bold=True)
+        font_normal = pygame.font.SysFont("Open Sans", int(0.03 * self.alto))
+        fila_h = int((graf_h - 60) / (self.pronostico_visible_rows + 1))
+
+        # Tabla de productos (izquierda)
+        tabla_x = graf_x + 15
+        tabla_y = graf_y + 15
+        tabla_w = int(graf_w * 0.58)
+        col_widths = [int(0.40 * tabla_w), int(0.15 * tabla_w), int(0.15 * tabla_w), int(0.15 * tabla_w), int(0.15 * tabla_w)]
+        col_headers = ["Producto", "Mañana", "7 días", "Stock", "Pico"]
+        cols = ["Nombre", "Manana", "Semana", "Stock", "Hora_pico"]
+
+        x_pos = tabla_x
+        for i, header in enumerate(col_headers):
+            pygame.draw.rect(surface, (220, 220, 255), (x_pos, tabla_y, col_widths[i], fila_h))
+            pygame.draw.rect(surface, (100, 100, 200), (x_pos, tabla_y, col_widths[i], fila_h), 1)
+            texto = font_titulo.render(header, True, (0, 0, 0))
+            surface.blit(texto, texto.get_rect(center=(x_pos + col_widths[i]//2, tabla_y + fila_h//2)))
+            x_pos += col_widths[i]
+
+        for i, item in enumerate(self.pronostico_datos[:self.pronostico_visible_rows]):
+            row_y = tabla_y + (i + 1) * fila_h
+            if i % 2 == 0:
+                pygame.draw.rect(surface, (240, 240, 255), (tabla_x, row_y, tabla_w, fila_h))
+            x_pos = tabla_x
+            for j, col in enumerate(cols):
+                valor = str(item.get(col, ""))
+                if col == "Nombre" and len(valor) > 22:
+                    valor = valor[:22] + "..."
+                color = (0, 0, 0)
+                # Stock que no alcanza para mañana en naranja
+                if col == "Stock" and item['Stock'] < item['Manana']:
+                    color = (255, 150, 0)
+                texto = font_normal.render(valor, True, color)
+                surface.blit(texto, texto.get_rect(midleft=(x_pos + 8, row_y + fila_h // 2)))
+                x_pos += col_widths[j]
+
+        # Piezas esperadas por hora de toda la tienda (derecha)
+        curva_x = tabla_x + tabla_w + 30
+        curva_w = graf_x + graf_w - curva_x - 20
+        curva_y = tabla_y + fila_h
+        curva_h = graf_h - fila_h - 70
+        titulo = font_titulo.render("Piezas por hora (mañana)", True, (50, 70, 120))
+        surface.blit(titulo, titulo.get_rect(center=(curva_x + curva_w // 2, tabla_y + fila_h // 2)))
+        maximo = max(self.pronostico_horas) or 1
+        barra_w = curva_w / 24
+        fuente_eje = pygame.font.SysFont("Open Sans", int(0.022 * self.alto))
+        for hora, valor in enumerate(self.pronostico_horas):
+            alto_barra = int(curva_h * valor / maximo)
+            rect = pygame.Rect(int(curva_x + hora * barra_w) + 1, curva_y + curva_h - alto_barra,
+                               max(int(barra_w) - 2, 1), alto_barra)
+            pygame.draw.rect(surface, (100, 180, 255), rect)
+            if hora % 3 == 0:
+                lbl = fuente_eje.render(f"{hora}", True, (80, 80, 80))
+                surface.blit(lbl, lbl.get_rect(center=(int(curva_x + (hora + 0.5) * barra_w), curva_y + curva_h + 12)))
+
+        total_manana = sum(item['Manana'] for item in self.pronostico_datos)
+        total_semana = sum(item['Semana'] for item in self.pronostico_datos)
+        cortos = sum(1 for item in self.pronostico_datos if item['Stock'] < item['Manana'])
+        resumen_font = pygame.font.SysFont("Open Sans", int(0.03 * self.alto))
+        resumen_texto = resumen_font.render(
+            f"Mañana: {total_manana:.0f} pzs | Próximos 7 días: {total_semana:.0f} pzs | Stock insuficiente para mañana: {cortos}",
+            True, (50, 50, 120)
+        )
+        surface.blit(resumen_texto, resumen_texto.get_rect(center=(graf_x + graf_w // 2, graf_y + graf_h - 20)))
+
     def dibujar_inventario_con_scroll(self, surface):
         """Dibuja el reporte de inventario con scroll en la superficie proporcionada."""
         # Si no hay datos, cargarlos
@@ -1875,6 +2314,13 @@ class reporte:
 
         col_widths = [int(0.1 * tabla_w), int(0.35 * tabla_w), int(0.15 * tabla_w), int(0.15 * tabla_w), int(0.25 * tabla_w)]
         col_headers = ["ID", "Nombre", "Cantidad", "Unidad", "Tipo"]
+        cols = ["id", "Nombre", "Cantidad", "Unidad", "Tipo"]
+        if self.inventario_filtro == "POR CADUCAR":
+            col_headers = ["ID", "Nombre", "Cantidad", "Por caducar", "Caducidad"]
+            cols = ["id", "Nombre", "Cantidad", "Por_caducar", "Caducidad"]
+        elif self.inventario_filtro == "BAJO":
+            col_headers = ["ID", "Nombre", "Cantidad", "Reorden", "Pedir"]
+            cols = ["id", "Nombre", "Cantidad", "Reorden", "Pedir"]
 
         # Dibujar encabezados
         header_y = 0
@@ -1898,12 +2344,11 @@ class reporte:
             stock_color = (0, 0, 0)
             if item['Cantidad'] == 0:
                 stock_color = (255, 0, 0)  # Rojo para agotado
-            elif item['Cantidad'] <= 10:
+            elif item['Cantidad'] <= item['Reorden']:
                 stock_color = (255, 150, 0)  # Naranja para bajo
 
             # Dibujar datos
             x_pos = 0
-            cols = ["id", "Nombre", "Cantidad", "Unidad", "Tipo"]
             for j, col in enumerate(cols):
                 valor = str(item.get(col, ""))
                 color = stock_color if col == "Cantidad" else (0, 0, 0)
@@ -1925,7 +2370,7 @@ class reporte:
 
         # Estadísticas de inventario
         items_agotados = sum(1 for item in self.inventario_datos if item['Cantidad'] == 0)
-        items_bajos = sum(1 for item in self.inventario_datos if 0 < item['Cantidad'] <= 10)
+        items_bajos = sum(1 for item in self.inventario_datos if 0 < item['Cantidad'] <= item['Reorden'])
 
         resumen_font = pygame.font.SysFont("Open Sans", int(0.03 * self.alto))
         resumen_texto = resumen_font.render(
@@ -1942,6 +2387,10 @@ class reporte:
 
     def dibujar_pedidos_con_scroll(self, surface):
         """Dibuja el reporte de pedidos con scroll en la superficie proporcionada."""
+        if self.pedidos_filtro == "CALENDARIO":
+            self.dibujar_calendario_pedidos(surface)
+            return
+
         # Si no hay datos, cargarlos
         if not self.pedidos_datos:
             self.cargar_pedidos()
@@ -2069,8 +2518,9 @@ class reporte:
         pedidos_entregados = sum(1 for p in self.pedidos_datos if p['Estado'] == 'Entregado')
 
         resumen_font = pygame.font.SysFont("Open Sans", int(0.03 * self.alto))
+        mas = "+" if self.pedidos_hay_mas else ""
         resumen_texto = resumen_font.render(
-            f"Total: {len(self.pedidos_datos)} | Pendientes: {pedidos_pendientes} | Listos: {pedidos_listos} | Entregados: {pedidos_entregados}",
+            f"Total: {len(self.pedidos_datos)}{mas} | Pendientes: {pedidos_pendientes} | Listos: {pedidos_listos} | Entregados: {pedidos_entregados}",
             True, (50, 50, 120)
         )
         rect = resumen_texto.get_rect(center=(graf_x + graf_w // 2, graf_y + graf_h + 10))
@@ -2081,6 +2531,70 @@ class reporte:
         pie_rect = pie_pedidos.get_rect(center=(graf_x + graf_w // 2, graf_y + graf_h + 30))
         surface.blit(pie_pedidos, pie_rect)
 
+    def dibujar_calendario_pedidos(self, surface):
+        """Dibuja la carga de entregas por día de los próximos días."""
+        if not self.calendario_dias:
+            self.cargar_calendario()
+
+        graf_x, graf_y, graf_w, graf_h = self._get_grafica_area()
+        graf_y += 40
+        graf_h -= 40
+
+        pygame.draw.rect(surface, (255, 255, 255), (graf_x, graf_y, graf_w, graf_h), border_radius=12)
+        pygame.draw.rect(surface, (200, 200, 200), (graf_x, graf_y, graf_w, graf_h), 2, border_radius=12)
+
+        titulo = self.fuente_titulo.render(f"Entregas - próximos {DIAS_CALENDARIO} días", True, (0, 0, 0))
+        surface.blit(titulo, titulo.get_rect(center=(graf_x + graf_w // 2, graf_y + 30)))
+
+        font_titulo = pygame.font.SysFont("Open Sans", int(0.032 * self.alto), bold=True)
+        font_normal = pygame.font.SysFont("Open Sans", int(0.028 * self.alto))
+        dias_semana = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
+        hoy = datetime.date.today()
+
+        filas = []
+        if self.calendario_atrasados and self.calendario_atrasados['pedidos']:
+            filas.append(("Atrasados", "", self.calendario_atrasados))
+        for dia, resumen in self.calendario_dias:
+            nombre = "Hoy" if dia == hoy else "Mañana" if dia == hoy + datetime.timedelta(days=1) else dias_semana[dia.weekday()]
+            filas.append((nombre, dia.strftime("%d/%m"), resumen))
+
+        tabla_x = graf_x + 20
+        tabla_y = graf_y + 60
+        tabla_w = graf_w - 40
+        fila_h = max(18, min(40, (graf_h - 80) // (len(filas) + 1)))
+        encabezados = ["Día", "Fecha", "Pedidos", "Piezas", "Total", "Pendientes", "En proceso", "Listos"]
+        anchos = [0.11, 0.09, 0.09, 0.27, 0.14, 0.1, 0.1, 0.1]
+        col_x = [tabla_x]
+        for ancho in anchos[:-1]:
+            col_x.append(col_x[-1] + int(ancho * tabla_w))
+
+        for i, encabezado in enumerate(encabezados):
+            w = int(anchos[i] * tabla_w)
+            pygame.draw.rect(surface, (220, 220, 255), (col_x[i], tabla_y, w, fila_h))
+            pygame.draw.rect(surface, (100, 100, 200), (col_x[i], tabla_y, w, fila_h), 1)
+            texto = font_titulo.render(encabezado, True, (0, 0, 0))
+            surface.blit(texto, texto.get_rect(center=(col_x[i] + w // 2, tabla_y + fila_h // 2)))
+
+        max_piezas = max([resumen['piezas'] for _, _, resumen in filas] + [1])
+        ancho_barra = int(anchos[3] * tabla_w) - 70
+        for n, (nombre, fecha, resumen) in enumerate(filas):
+            y = tabla_y + (n + 1) * fila_h
+            if nombre == "Atrasados":
+                pygame.draw.rect(surface, (255, 225, 225), (tabla_x, y, tabla_w, fila_h))
+            elif n % 2 == 0:
+                pygame.draw.rect(surface, (240, 240, 255), (tabla_x, y, tabla_w, fila_h))
+            color = (180, 0, 0) if nombre == "Atrasados" else (0, 0, 0)
+            valores = [nombre, fecha, str(resumen['pedidos']), str(resumen['piezas']),
+                       f"${float(resumen['total']):,.2f}", str(resumen['Pendiente']),
+                       str(resumen['En proceso']), str(resumen['Listo'])]
+            for i, valor in enumerate(valores):
+                texto = font_normal.render(valor, True, color)
+                surface.blit(texto, texto.get_rect(midleft=(col_x[i] + 10, y + fila_h // 2)))
+            # Barra de carga de trabajo (piezas) junto al número
+            if resumen['piezas']:
+                largo = max(2, int(ancho_barra * resumen['piezas'] / max_piezas))
+                pygame.draw.rect(surface, (120, 170, 230), (col_x[3] + 60, y + fila_h // 4, largo, fila_h // 2), border_radius=4)
+
     def dibujar_corte_caja(self, surface):
         """Dibuja el informe de corte de caja en la superficie proporcionada."""
         # Si no hay datos, cargarlos
@@ -2288,6 +2802,8 @@ class reporte:
                         self.cargar_inventario()
                     elif self.opcion_seleccionada == "PEDIDOS":
                         self.cargar_pedidos()
+                    elif self.opcion_seleccionada == "PRONÓSTICO":
+                        self.cargar_pronostico()
                     return
 
             # Verificar clic en botón PDF
@@ -2336,6 +2852,21 @@ class reporte:
                         self.cargar_pedidos()
                         return
 
+            elif self.opcion_seleccionada == "PRONÓSTICO":
+                for i, rect in enumerate(self.botones_filtro_pronostico):
+                    if rect.collidepoint(mouse_pos):
+                        self.pronostico_filtro = self.filtros_pronostico[i]
+                        self.ordenar_pronostico()
+                        return
+
         elif event.type == pygame.MOUSEMOTION:
             mouse_pos = event.pos
-            self.pdf_hover = self.boton_pdf_rect and self.boton_pdf_rect.collidepoint(mouse_pos)
\ No newline at end of file
+            self.pdf_hover = self.boton_pdf_rect and self.boton_pdf_rect.collidepoint(mouse_pos)
+
+        elif event.type == pygame.MOUSEWHEEL and self.opcion_seleccionada == "PEDIDOS":
+            # Desplazar la tabla de pedidos; al llegar al final se lee la página siguiente
+            if self.pedidos_scroll_area and self.pedidos_scroll_area.collidepoint(pygame.mouse.get_pos()):
+                self.pedidos_scroll_y = max(0, min(self.pedidos_scroll_max,
+                                                   self.pedidos_scroll_y - event.y * self.pedidos_scroll_speed))
+                if event.y < 0 and self.pedidos_scroll_y >= self.pedidos_scroll_max and self.pedidos_hay_mas:
+                    self.cargar_pedidos(siguiente=True)
\ No newline at end of file
@@ -0,0 +1,302 @@
+"""
+Sincronización de stock entre terminales
+----------------------------------------
+Evita vender más de lo que hay cuando dos cajas venden el mismo producto a
+la vez y mantiene al día el catálogo de cada caja.
+
+- descontar_stock: decremento condicional (WHERE Stock >= n) dentro de la
+  transacción de la venta; si otra caja ya vendió las piezas, la fila no se
+  actualiza y se reporta el conflicto con el stock que sí hay.
+- reservar_stock / liberar_stock: el cobro con tarjeta aparta el stock
+  (decremento condicional confirmado) antes de mandar el cargo a la
+  terminal y lo devuelve si el cobro se cancela, de modo que un pago
+  aprobado nunca se queda sin piezas.
+- publicar_cambios: escribe el stock resultante en la tabla cambio_stock
+  (en la misma transacción), que funciona como registro de cambios.
+- FeedStock: hilo que lee cambio_stock por rango de ID cada segundo, sin
+  recorrer CatProducto, y deja los cambios listos para que el punto de venta
+  los aplique a su catálogo en memoria. Cada consulta vuelve a leer los
+  últimos VENTANA_FEED IDs: un AUTO_INCREMENT menor puede confirmarse
+  después de uno mayor, y sin esa ventana ese cambio se perdería.
+
+La tabla cambio_stock la crea la migración 0004 (migraciones.py).
+"""
+
+import threading
+from datetime import datetime, timedelta
+from conexion import Conexion, ERRORES_BD
+from bus_cambios import marcadores
+
+INTERVALO_FEED = 1.0  # Segundos entre consultas al registro de cambios
+RETENCION_DIAS = 1  # Antigüedad máxima de los cambios que se conservan
+VENTANA_FEED = 200  # IDs ya leídos que se vuelven a consultar por si llegó uno atrasado
+
+
+def descontar_stock(cursor, lineas):
+    """
+    Descuenta stock de forma condicional dentro de una transacción abierta
+
+    Las líneas se procesan en orden de ID para que dos cajas bloqueen las
+    filas siempre en el mismo orden y no se produzcan interbloqueos.
+
+    Args:
+        cursor: Cursor de la transacción de la venta
+        lineas (iterable): Tuplas (id_producto, unidades)
+
+    Returns:
+        dict: Conflictos {id_producto: stock disponible}; vacío si todo se descontó
+    """
+    conflictos = {}
+    for id_producto, unidades in sorted(lineas):
+        cursor.execute(
+            "UPDATE CatProducto SET Stock = Stock - %s WHERE ID_CatProducto = %s AND Stock >= %s",
+            (unidades, id_producto, unidades)
+        )
+        if cursor.rowcount == 0:
+            cursor.execute("SELECT Stock FROM CatProducto WHERE ID_CatProducto = %s", (id_producto,))
+            fila = cursor.fetchone()
+            conflictos[id_producto] = fila["Stock"] if fila else 0
+    return conflictos
+
+
+def reservar_stock(lineas):
+    """
+    Aparta el stock de un ticket antes de cobrar con tarjeta
+
+    Descuenta y confirma en su propia transacción (con su aviso en
+    cambio_stock), así ninguna otra caja puede vender esas piezas mientras
+    el cliente presenta la tarjeta. Al registrar la venta ya no se vuelve a
+    descontar; si el cobro se cancela hay que llamar a liberar_stock.
+
+    Args:
+        lineas (iterable): Tuplas (id_producto, unidades)
+
+    Returns:
+        dict: Conflictos {id_producto: stock disponible} (vacío si se apartó
+            todo), o None si no se pudo hablar con la base de datos
+    """
+    lineas = list(lineas)
+    conexion = Conexion()
+    conexion.conectar()
+    if not conexion.conn:
+        return None
+    try:
+        conflictos = descontar_stock(conexion.cursor, lineas)
+        if conflictos:
+            conexion.conn.rollback()
+            return conflictos
+        publicar_cambios(conexion.cursor, [id_prod for id_prod, _ in lineas])
+        conexion.conn.commit()
+        return {}
+    except ERRORES_BD as e:
+        print(f"Error al reservar stock: {e}")
+        conexion.conn.rollback()
+        return None
+    finally:
+        conexion.cerrar()
+
+
+def liberar_stock(lineas):
+    """
+    Devuelve al catálogo el stock apartado con reservar_stock
+
+    Args:
+        lineas (iterable): Tuplas (id_producto, unidades)
+
+    Returns:
+        bool: True si el stock se devolvió
+    """
+    lineas = sorted(lineas)
+    conexion = Conexion()
+    conexion.conectar()
+    if not conexion.conn:
+        return False
+    try:
+        conexion.cursor.executemany(
+            "UPDATE CatProducto SET Stock = Stock + %s WHERE ID_CatProducto = %s",
+            [(unidades, id_prod) for id_prod, unidades in lineas]
+        )
+        publicar_cambios(conexion.cursor, [id_prod for id_prod, _ in lineas])
+        conexion.conn.commit()
+        return True
+    except ERRORES_BD as e:
+        print(f"Error al liberar stock: {e}")
+        conexion.conn.rollback()
+        return False
+    finally:
+        conexion.cerrar()
+
+
+def publicar_cambios(cursor, ids_productos):
+    """
+    Registra el stock actual de los productos en cambio_stock
+
+    Debe llamarse en la misma transacción que modificó el stock para que el
+    cambio y su aviso se confirmen (o se reviertan) juntos.
+
+    Args:
+        cursor: Cursor de la transacción
+        ids_productos (iterable): IDs de los productos modificados
+    """
+    ids = sorted(set(ids_productos))
+    if not ids:
+        return
+    cursor.execute(
+        f"""INSERT INTO cambio_stock (FK_ID_CatProducto, Stock)
+            SELECT ID_CatProducto, Stock FROM CatProducto WHERE ID_CatProducto IN ({marcadores(ids)})""",
+        tuple(ids)
+    )
+
+
+class FeedStock:
+    """
+    Lector en segundo plano del registro de cambios de stock
+
+    Una sola instancia por proceso (ver obtener_feed). Cada consumidor guarda
+    la última versión que aplicó y pide solo lo nuevo con cambios_desde().
+
+    Attributes:
+        version (int): Contador local que aumenta con cada cambio recibido
+        stock (dict): id_producto -> (versión, stock) del último cambio
+        vistos (set): IDs de cambio ya aplicados dentro de la ventana
+        id_producto (dict): id_producto -> ID del último cambio aplicado
+    """
+
+    def __init__(self, intervalo=INTERVALO_FEED):
+        self.intervalo = intervalo
+        self.version = 0
+        self.stock = {}
+        self.ultimo_id = None
+        self.vistos = set()
+        self.id_producto = {}
+        self.lock = threading.Lock()
+        self.detenido = threading.Event()
+        self.hilo = None
+        self.conexion = None
+
+    def iniciar(self):
+        """Arranca el hilo lector si no está corriendo"""
+        if self.hilo and self.hilo.is_alive():
+            return
+        self.detenido.clear()
+        self.hilo = threading.Thread(target=self._ciclo, daemon=True)
+        self.hilo.start()
+
+    def detener(self):
+        """Detiene el hilo lector y cierra su conexión"""
+        self.detenido.set()
+
+    def _ciclo(self):
+        while not self.detenido.is_set():
+            try:
+                self.consultar()
+            except ERRORES_BD as e:
+                print(f"Error al leer cambios de stock: {e}")
+                self._cerrar_conexion()
+            self.detenido.wait(self.intervalo)
+        self._cerrar_conexion()
+
+    def _cursor(self):
+        """
+        Conexión propia del hilo, abierta una sola vez
+
+        El hilo consulta cada segundo; abrir una conexión por consulta
+        costaría más que la consulta misma.
+        """
+        if self.conexion is None or not self.conexion.conn:
+            self.conexion = Conexion()
+            self.conexion.conectar()
+            if not self.conexion.conn:
+                self.conexion = None
+                return None
+        return self.conexion.cursor
+
+    def _cerrar_conexion(self):
+        if self.conexion is not None:
+            self.conexion.cerrar()
+            self.conexion = None
+
+    def consultar(self):
+        """
+        Lee los cambios nuevos del registro
+
+        La primera vez solo toma el último ID (el catálogo recién cargado ya
+        está al día) y depura los cambios antiguos. Después lee desde
+        ultimo_id - VENTANA_FEED y descarta los IDs ya vistos, de modo que
+        un cambio confirmado tarde con un ID menor también se aplica; de
+        un mismo producto solo cuenta el cambio de ID más alto.
+        """
+        cursor = self._cursor()
+        if cursor is None:
+            return
+        if self.ultimo_id is None:
+            limite = datetime.now() - timedelta(days=RETENCION_DIAS)
+            cursor.execute("DELETE FROM cambio_stock WHERE Fecha < %s", (limite.strftime("%Y-%m-%d %H:%M:%S"),))
+            cursor.execute("SELECT COALESCE(MAX(ID_Cambio), 0) AS ultimo FROM cambio_stock")
+            ultimo = cursor.fetchone()["ultimo"]
+            # Los cambios de la ventana ya están en el catálogo recién cargado
+            cursor.execute(
+                "SELECT ID_Cambio, FK_ID_CatProducto FROM cambio_stock WHERE ID_Cambio > %s",
+                (max(0, ultimo - VENTANA_FEED),)
+            )
+            for fila in cursor.fetchall():
+                self.vistos.add(fila["ID_Cambio"])
+                self.id_producto[fila["FK_ID_CatProducto"]] = max(
+                    fila["ID_Cambio"], self.id_producto.get(fila["FK_ID_CatProducto"], 0))
+            self.ultimo_id = ultimo
+            self.conexion.conn.commit()
+            return
+
+        cursor.execute(
+            "SELECT ID_Cambio, FK_ID_CatProducto, Stock FROM cambio_stock "
+            "WHERE ID_Cambio > %s ORDER BY ID_Cambio LIMIT 1000",
+            (max(0, self.ultimo_id - VENTANA_FEED),)
+        )
+        filas = cursor.fetchall()
+        # Terminar la transacción de lectura para ver los cambios de otras cajas
+        self.conexion.conn.commit()
+        nuevas = [fila for fila in filas if fila["ID_Cambio"] not in self.vistos]
+        if not nuevas:
+            return
+        with self.lock:
+            for fila in nuevas:
+                id_cambio, id_prod = fila["ID_Cambio"], fila["FK_ID_CatProducto"]
+                self.vistos.add(id_cambio)
+                if id_cambio < self.id_producto.get(id_prod, 0):
+                    continue  # Ya se aplicó un cambio posterior del producto
+                self.id_producto[id_prod] = id_cambio
+                self.version += 1
+                self.stock[id_prod] = (self.version, fila["Stock"])
+            self.ultimo_id = max(self.ultimo_id, filas[-1]["ID_Cambio"])
+            piso = self.ultimo_id - VENTANA_FEED
+            self.vistos = {id_cambio for id_cambio in self.vistos if id_cambio > piso}
+
+    def cambios_desde(self, version):
+        """
+        Devuelve los cambios posteriores a una versión
+
+        Args:
+            version (int): Última versión aplicada por el consumidor
+
+        Returns:
+            tuple: (versión actual, {id_producto: stock})
+        """
+        with self.lock:
+            if version >= self.version:
+                return self.version, {}
+            cambios = {id_prod: stock for id_prod, (v, stock) in self.stock.items() if v > version}
+            return self.version, cambios
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def obtener_feed():
+    """Devuelve el lector de cambios compartido del proceso, ya iniciado"""
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = FeedStock()
+        _feed.iniciar()
+        return _feed
@@ -0,0 +1,230 @@
+"""
+Terminal de pago simulada para pruebas locales
+
+Servidor HTTP mínimo que imita los endpoints de MercadoPago usados por
+PagoTarjeta (envío del cobro con llave de idempotencia, consulta del
+estado, búsqueda por referencia, cancelación y reembolso). Permite probar
+la máquina de estados del pago con tarjeta sin una terminal física.
+
+Uso:
+    python terminal_simulada.py --resultado approved --consultas 3
+
+    En el código:
+        terminal = TerminalSimulada(resultado="rejected")
+        url = terminal.iniciar()
+        pago = PagoTarjeta(x, y, ancho, alto, total, url_base=url)
+        ...
+        terminal.detener()
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class TerminalSimulada:
+    """
+    Servidor que simula una terminal de cobro
+
+    Attributes:
+        resultado (str): Estado final de los pagos ('approved', 'rejected' o
+            'pending' para simular una terminal que nunca responde)
+        consultas_pendientes (int): Consultas que responden 'pending' antes
+            del resultado final
+        demora (float): Segundos de retraso por respuesta (para probar timeouts)
+    """
+
+    def __init__(self, resultado="approved", consultas_pendientes=2, demora=0.0, host="127.0.0.1", puerto=0):
+        self.resultado = resultado
+        self.consultas_pendientes = consultas_pendientes
+        self.demora = demora
+        self.host = host
+        self.puerto = puerto
+        self.pagos = {}
+        self.llaves = {}  # X-Idempotency-Key -> id del pago
+        self.lock = threading.Lock()
+        self.contador = itertools.count(1)
+        self.servidor = None
+        self.hilo = None
+
+    def iniciar(self):
+        """
+        Inicia el servidor en un hilo de fondo
+
+        Returns:
+            str: URL base para pasar a PagoTarjeta
+        """
+        terminal = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip("/").endswith("/refunds"):
+                    terminal.atender_reembolso(self)
+                else:
+                    terminal.atender_cobro(self)
+
+            def do_GET(self):
+                if self.path.startswith("/v1/payments/search"):
+                    terminal.atender_busqueda(self)
+                else:
+                    terminal.atender_consulta(self)
+
+            def do_PUT(self):
+                terminal.atender_cancelacion(self)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer((self.host, self.puerto), Manejador)
+        self.hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.hilo.start()
+        return f"http://{self.host}:{self.servidor.server_address[1]}"
+
+    def detener(self):
+        """Detiene el servidor"""
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+
+    def atender_cobro(self, peticion):
+        """POST /v1/pos/<terminal>/payment: registra un cobro pendiente"""
+        partes = peticion.path.strip("/").split("/")
+        if len(partes) != 4 or partes[:2] != ["v1", "pos"] or partes[3] != "payment":
+            self.responder(peticion, 404, {"message": "not_found"})
+            return
+
+        datos = self.leer_cuerpo(peticion)
+        llave = peticion.headers.get("X-Idempotency-Key")
+        with self.lock:
+            # Un reenvío con la misma llave devuelve el cobro ya creado
+            id_pago = self.llaves.get(llave) if llave else None
+            if id_pago is None:
+                id_pago = next(self.contador)
+                self.pagos[id_pago] = {"datos": datos, "consultas": 0, "estado": None}
+                if llave:
+                    self.llaves[llave] = id_pago
+        self.responder(peticion, 201, {"id": id_pago, "status": "pending"})
+
+    def leer_cuerpo(self, peticion):
+        """Lee el cuerpo JSON de la petición"""
+        longitud = int(peticion.headers.get("Content-Length", 0))
+        return json.loads(peticion.rfile.read(longitud) or b"{}")
+
+    def estado_pago(self, pago):
+        """Estado actual de un cobro según las consultas recibidas"""
+        if pago["estado"]:
+            return pago["estado"]
+        if self.resultado == "pending" or pago["consultas"] <= self.consultas_pendientes:
+            return "pending"
+        return self.resultado
+
+    def buscar(self, peticion, partes_esperadas):
+        """Devuelve (id, pago) de la ruta /v1/payments/<id>[/...] o responde 404"""
+        partes = peticion.path.strip("/").split("/")
+        if len(partes) != partes_esperadas or partes[:2] != ["v1", "payments"] or not partes[2].isdigit():
+            self.responder(peticion, 404, {"message": "not_found"})
+            return None, None
+        pago = self.pagos.get(int(partes[2]))
+        if pago is None:
+            self.responder(peticion, 404, {"message": "payment_not_found"})
+            return None, None
+        return int(partes[2]), pago
+
+    def atender_busqueda(self, peticion):
+        """GET /v1/payments/search?external_reference=<ref>: cobros con esa referencia"""
+        consulta = parse_qs(urlparse(peticion.path).query)
+        referencia = (consulta.get("external_reference") or [None])[0]
+        with self.lock:
+            resultados = [{"id": id_pago, "status": self.estado_pago(pago)}
+                          for id_pago, pago in self.pagos.items()
+                          if referencia and pago["datos"].get("external_reference") == referencia]
+        self.responder(peticion, 200, {"results": resultados})
+
+    def atender_cancelacion(self, peticion):
+        """PUT /v1/payments/<id> {"status": "cancelled"}: cancela un cobro pendiente"""
+        datos = self.leer_cuerpo(peticion)
+        with self.lock:
+            id_pago, pago = self.buscar(peticion, 3)
+            if pago is None:
+                return
+            if datos.get("status") != "cancelled" or self.estado_pago(pago) != "pending":
+                self.responder(peticion, 400, {"message": "invalid_status"})
+                return
+            pago["estado"] = "cancelled"
+        self.responder(peticion, 200, {"id": id_pago, "status": "cancelled"})
+
+    def atender_reembolso(self, peticion):
+        """POST /v1/payments/<id>/refunds: reembolsa un cobro aprobado"""
+        self.leer_cuerpo(peticion)
+        with self.lock:
+            id_pago, pago = self.buscar(peticion, 4)
+            if pago is None:
+                return
+            if self.estado_pago(pago) not in ("approved", "refunded"):
+                self.responder(peticion, 400, {"message": "invalid_status"})
+                return
+            pago["estado"] = "refunded"
+        self.responder(peticion, 201, {"payment_id": id_pago, "status": "approved"})
+
+    def atender_consulta(self, peticion):
+        """GET /v1/payments/<id>: devuelve el estado del cobro"""
+        partes = peticion.path.strip("/").split("/")
+        if len(partes) != 3 or partes[:2] != ["v1", "payments"] or not partes[2].isdigit():
+            self.responder(peticion, 404, {"message": "not_found"})
+            return
+
+        id_pago = int(partes[2])
+        with self.lock:
+            pago = self.pagos.get(id_pago)
+            if pago is None:
+                self.responder(peticion, 404, {"message": "payment_not_found"})
+                return
+            pago["consultas"] += 1
+            status = self.estado_pago(pago)
+
+        if status == "pending":
+            self.responder(peticion, 200, {"id": id_pago, "status": "pending"})
+            return
+
+        self.responder(peticion, 200, {
+            "id": id_pago,
+            "status": status,
+            "transaction_amount": pago["datos"].get("transaction_amount"),
+            "payment_method_id": "visa",
+            "payment_type_id": "debit_card",
+            "card": {"last_four_digits": "4242"}
+        })
+
+    def responder(self, peticion, codigo, cuerpo):
+        """Envía una respuesta JSON aplicando la demora configurada"""
+        if self.demora:
+            time.sleep(self.demora)
+        datos = json.dumps(cuerpo).encode("utf-8")
+        peticion.send_response(codigo)
+        peticion.send_header("Content-Type", "application/json")
+        peticion.send_header("Content-Length", str(len(datos)))
+        peticion.end_headers()
+        peticion.wfile.write(datos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Terminal de pago simulada")
+    parser.add_argument("--resultado", default="approved", choices=["approved", "rejected", "pending"])
+    parser.add_argument("--consultas", type=int, default=2, help="Consultas pendientes antes del resultado")
+    parser.add_argument("--demora", type=float, default=0.0, help="Retraso por respuesta en segundos")
+    parser.add_argument("--puerto", type=int, default=8765)
+    args = parser.parse_args()
+
+    terminal = TerminalSimulada(args.resultado, args.consultas, args.demora, puerto=args.puerto)
+    url = terminal.iniciar()
+    print(f"Terminal simulada escuchando en {url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        terminal.detener()
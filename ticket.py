@@ -3,6 +3,7 @@ import os
 from datetime import datetime
 from fpdf import FPDF
 from decimal import Decimal
+from dinero import CERO, calcular_linea, tasa_iva, IVA_GENERAL
 
 class Ticket:
     def __init__(self, nombre_panaderia="Panadería Bambi"):
@@ -13,7 +14,15 @@ class Ticket:
         """
         self.nombre_panaderia = nombre_panaderia
         self.fecha = datetime.now()
-        self.productos = []  # Lista de productos, cada uno es un diccionario: {"nombre":..., "unidades":..., "precio":..., "id":...}
+        # Líneas indexadas por id de producto (dict conserva el orden de inserción).
+        # Cada línea es un diccionario: {"nombre":..., "unidades":..., "precio":..., "id":..., "iva":...}
+        self.lineas = {}
+        self._ids_por_nombre = {}  # nombre en minúsculas -> id de producto
+        self._lista_productos = None  # Vista en lista, se reconstruye solo al cambiar las líneas
+        self.conflictos = {}  # id de producto -> stock disponible cuando no alcanza para la línea
+        # Totales exactos (Decimal) acumulados de forma incremental
+        self.subtotal = CERO
+        self.iva = CERO
         self.pie_pagina = "¡Gracias por su compra!"
         self.tipo_pago = "Efectivo"  # Por defecto es efectivo
         self.efectivo_recibido = 0.0  # Monto de efectivo recibido
@@ -50,7 +59,30 @@ class Ticket:
         nombre_archivo = self.crear_nombre_archivo()
         return os.path.join(carpeta, nombre_archivo)
 
-    def agregar_producto(self, nombre, unidades, precio, id_producto):
+    @property
+    def productos(self):
+        """
+        Lista de líneas del ticket en orden de captura.
+
+        La lista se cachea y solo se reconstruye cuando se agregan o eliminan líneas,
+        por lo que leerla en cada cuadro no tiene costo.
+        """
+        if self._lista_productos is None:
+            self._lista_productos = list(self.lineas.values())
+        return self._lista_productos
+
+    def _acumular(self, linea, signo):
+        """
+        Suma o resta del acumulado los importes de una línea.
+
+        :param linea: Línea del ticket.
+        :param signo: 1 para sumar, -1 para restar.
+        """
+        subtotal, iva, _ = calcular_linea(linea["precio"], linea["unidades"], linea["iva"])
+        self.subtotal += signo * subtotal
+        self.iva += signo * iva
+
+    def agregar_producto(self, nombre, unidades, precio, id_producto, iva=None):
         """
         Agrega un producto al ticket. Si el producto ya existe, suma las unidades.
 
@@ -58,17 +90,53 @@ class Ticket:
         :param unidades: Número de unidades del producto.
         :param precio: Precio unitario del producto.
         :param id_producto: Identificador único del producto.
+        :param iva: Tasa de IVA del producto (CatProducto.IVA). Por defecto la general.
         """
-        # Convertir valores a tipos nativos para evitar problemas con Decimal
         unidades = int(unidades)
-        precio = float(precio) if not isinstance(precio, Decimal) else float(precio)
 
         # Si el producto ya está, suma unidades
-        for prod in self.productos:
-            if prod["nombre"] == nombre and prod["precio"] == precio and prod["id"] == id_producto:
-                prod["unidades"] += unidades
-                return
-        self.productos.append({"nombre": nombre, "unidades": unidades, "precio": precio, "id": id_producto})
+        linea = self.lineas.get(id_producto)
+        if linea is not None:
+            self.cambiar_unidades(id_producto, linea["unidades"] + unidades)
+            return
+        linea = {"nombre": nombre, "unidades": unidades, "precio": Decimal(str(precio)),
+                 "id": id_producto, "iva": tasa_iva(iva)}
+        self.lineas[id_producto] = linea
+        self._ids_por_nombre[nombre.lower()] = id_producto
+        self._lista_productos = None
+        self._acumular(linea, 1)
+
+    def cambiar_unidades(self, id_producto, unidades):
+        """
+        Fija las unidades de una línea y ajusta el subtotal acumulado.
+        Si las unidades llegan a 0 la línea se elimina.
+
+        :param id_producto: Identificador del producto.
+        :param unidades: Nuevo número de unidades.
+        :return: True si la línea existía, False en caso contrario.
+        """
+        linea = self.lineas.get(id_producto)
+        if linea is None:
+            return False
+        unidades = int(unidades)
+        if unidades <= 0:
+            return self.eliminar_linea(id_producto)
+        self._acumular(linea, -1)
+        linea["unidades"] = unidades
+        self._acumular(linea, 1)
+        if unidades <= self.conflictos.get(id_producto, unidades):
+            self.conflictos.pop(id_producto, None)
+        return True
+
+    def obtener_cantidad(self, id_producto):
+        """
+        Obtiene la cantidad de un producto en el ticket por su id.
+
+        :param id_producto: Identificador del producto.
+        :return: Unidades en el ticket; 0 si no está.
+        """
+        linea = self.lineas.get(id_producto)
+        return linea["unidades"] if linea else 0
 
     def obtener_cantidad_producto(self, nombre):
         """
@@ -80,12 +148,8 @@ class Ticket:
         Returns:
             int: Cantidad del producto en el ticket; 0 si no se encuentra o si hay un error
         """
-        for producto in self.productos:
-            if not isinstance(producto, dict):
-                continue  # Saltar si no es un diccionario
-            if producto.get("nombre", "").lower() == nombre.lower():
-                return producto.get("unidades", 0) 
-        return 0
+        id_producto = self._ids_por_nombre.get(str(nombre).lower())
+        return self.obtener_cantidad(id_producto) if id_producto is not None else 0
 
     def buscar_producto_por_nombre(self, nombre):
         """
@@ -97,32 +161,89 @@ class Ticket:
         Returns:
             bool: True si el producto está en la lista, False si no lo está
         """
-        for producto in self.productos:
-            if producto["nombre"].lower() == nombre.lower():
-                return True
-        return False
+        return str(nombre).lower() in self._ids_por_nombre
 
     def calcular_total(self):
         """
-        Calcula el total del ticket sumando el subtotal de cada producto.
+        Devuelve el subtotal del ticket (sin IVA), mantenido de forma incremental.
 
-        :return: Total del ticket.
+        :return: Subtotal del ticket como Decimal.
         """
-        total = 0
-        for prod in self.productos:
-            # Asegurar que las operaciones sean entre tipos compatibles
-            precio = float(prod["precio"])
-            unidades = int(prod["unidades"])
-            total += unidades * precio
-        return total
+        return self.subtotal
 
-    def eliminar_producto(self, nombre):
+    def calcular_iva(self):
         """
-        Elimina un producto del ticket por su nombre.
+        Devuelve el IVA del ticket, suma del IVA redondeado de cada línea.
 
-        :param nombre: Nombre del producto a eliminar.
+        :return: IVA del ticket como Decimal.
         """
-        self.productos = [prod for prod in self.productos if prod["nombre"] != nombre]
+        return self.iva
+
+    def calcular_total_con_iva(self):
+        """
+        Calcula el total del ticket incluyendo IVA.
+
+        :return: Total con IVA como Decimal.
+        """
+        return self.subtotal + self.iva
+
+    def etiqueta_iva(self):
+        """
+        Etiqueta de la línea de IVA: muestra la tasa solo si todas las líneas la comparten.
+
+        :return: Texto de la etiqueta.
+        """
+        tasas = {linea["iva"] for linea in self.lineas.values()} or {IVA_GENERAL}
+        if len(tasas) == 1:
+            return f"IVA ({next(iter(tasas)) * 100:.0f}%):"
+        return "IVA:"
+
+    def eliminar_linea(self, id_producto):
+        """
+        Elimina la línea de un producto por su id.
+
+        :param id_producto: Identificador del producto a eliminar.
+        :return: True si el producto fue eliminado, False si no existe.
+        """
+        linea = self.lineas.pop(id_producto, None)
+        if linea is None:
+            return False
+        if self._ids_por_nombre.get(linea["nombre"].lower()) == id_producto:
+            del self._ids_por_nombre[linea["nombre"].lower()]
+        self._lista_productos = None
+        self._acumular(linea, -1)
+        self.conflictos.pop(id_producto, None)
+        return True
+
+    def marcar_conflictos(self, conflictos):
+        """
+        Marca las líneas cuyo stock ya no alcanza (otra caja vendió las piezas).
+
+        :param conflictos: Diccionario {id de producto: stock disponible}.
+        :return: Lista de (nombre, unidades, disponible) de las líneas marcadas.
+        """
+        marcadas = []
+        for id_producto, disponible in conflictos.items():
+            linea = self.lineas.get(id_producto)
+            if linea is None:
+                continue
+            if linea["unidades"] > disponible:
+                self.conflictos[id_producto] = disponible
+                marcadas.append((linea["nombre"], linea["unidades"], disponible))
+            else:
+                self.conflictos.pop(id_producto, None)
+        return marcadas
+
+    def _vaciar_lineas(self):
+        """
+        Elimina todas las líneas y reinicia el subtotal acumulado.
+        """
+        self.lineas.clear()
+        self._ids_por_nombre.clear()
+        self.conflictos.clear()
+        self._lista_productos = None
+        self.subtotal = CERO
+        self.iva = CERO
 
     def guardar_pdf(self, ruta=None):
         """
@@ -179,23 +300,23 @@ class Ticket:
         pdf.cell(0, 4, "PRODUCTOS", ln=True, align="C")
         pdf.ln(1)
         
-        subtotal_general = 0
         pdf.set_font("Arial", "", 8)
         
         for prod in self.productos:
             nombre = prod["nombre"]
             cantidad = int(prod["unidades"])
-            precio_unitario = float(prod["precio"])
-            subtotal_prod = cantidad * precio_unitario
-            subtotal_general += subtotal_prod
+            precio_unitario = prod["precio"]
+            subtotal_prod = calcular_linea(precio_unitario, cantidad, prod["iva"])[0]
             
             # Nombre del producto
             if len(nombre) > 25:
                 nombre = nombre[:22] + "..."
             pdf.cell(0, 4, nombre, ln=True, align="L")
             
-            # Cantidad x Precio = Subtotal
+            # Cantidad x Precio = Subtotal (la tasa se indica solo si no es la general)
             linea_detalle = f"{cantidad} x ${precio_unitario:.2f} = ${subtotal_prod:.2f}"
+            if prod["iva"] != IVA_GENERAL:
+                linea_detalle += f" T{prod['iva'] * 100:.0f}%"
             pdf.cell(0, 4, linea_detalle, ln=True, align="R")
             pdf.ln(1)
         
@@ -204,14 +325,15 @@ class Ticket:
         pdf.cell(0, 1, "-"*40, ln=True, align="C")
         pdf.ln(1)
         
-        iva = subtotal_general * 0.16  # IVA del 16%
-        total_con_iva = subtotal_general + iva
+        subtotal_general = self.calcular_total()
+        iva = self.calcular_iva()  # IVA por producto
+        total_con_iva = self.calcular_total_con_iva()
         
         pdf.set_font("Arial", "", 9)
         pdf.cell(35, 4, "SUBTOTAL:", 0, 0, 'L')
         pdf.cell(0, 4, f"${subtotal_general:.2f}", ln=True, align="R")
         
-        pdf.cell(35, 4, "IVA (16%):", 0, 0, 'L')
+        pdf.cell(35, 4, self.etiqueta_iva(), 0, 0, 'L')
         pdf.cell(0, 4, f"${iva:.2f}", ln=True, align="R")
         
         pdf.set_font("Arial", "B", 11)
@@ -254,7 +376,7 @@ class Ticket:
             pdf.output(ruta_final)
             print(f"Ticket guardado en: {ruta_final}")
             # NO limpiar aquí para permitir múltiples operaciones con el mismo ticket
-            self.productos.clear()
+            self._vaciar_lineas()
             self.tipo_pago = "Efectivo"
             self.efectivo_recibido = 0.0
             self.cambio = 0.0
@@ -267,7 +389,7 @@ class Ticket:
         """
         Limpia la lista de productos del ticket y reinicia valores de pago.
         """
-        self.productos.clear()
+        self._vaciar_lineas()
         self.tipo_pago = "Efectivo"
         self.efectivo_recibido = 0.0
         self.cambio = 0.0
@@ -349,15 +471,13 @@ class Ticket:
         current_y += productos_header.get_height() + 8
         
         # Lista de productos
-        subtotal_general = 0
         fuente_pequeña = pygame.font.Font(None, 20)
         
         for prod in self.productos:
             nombre = prod["nombre"]
             cantidad = int(prod["unidades"])
-            precio_unitario = float(prod["precio"])
-            subtotal_prod = cantidad * precio_unitario
-            subtotal_general += subtotal_prod
+            precio_unitario = prod["precio"]
+            subtotal_prod = calcular_linea(precio_unitario, cantidad, prod["iva"])[0]
             
             # Truncar el nombre si es muy largo
             if len(nombre) > 20:
@@ -383,8 +503,9 @@ class Ticket:
         current_y += 10
         
         # Cálculos de totales
-        iva = subtotal_general * 0.16
-        total_con_iva = subtotal_general + iva
+        subtotal_general = self.calcular_total()
+        iva = self.calcular_iva()
+        total_con_iva = self.calcular_total_con_iva()
         
         # Subtotal
         subtotal_text = fuente_ticket.render("Subtotal:", True, colores["texto"])
@@ -394,7 +515,7 @@ class Ticket:
         current_y += subtotal_text.get_height() + 3
         
         # IVA
-        iva_text = fuente_ticket.render("IVA (16%):", True, colores["texto"])
+        iva_text = fuente_ticket.render(self.etiqueta_iva(), True, colores["texto"])
         iva_valor = fuente_ticket.render(f"${iva:.2f}", True, colores["texto"])
         surface.blit(iva_text, (ticket_x + 15, current_y))
         surface.blit(iva_valor, (ticket_x + ticket_w - iva_valor.get_width() - 15, current_y))
@@ -456,6 +577,5 @@ class Ticket:
             bool: True si el producto fue eliminado, False si no existe
         """
         if 0 <= indice < len(self.productos):
-            self.productos.pop(indice)
-            return True
+            return self.eliminar_linea(self.productos[indice]["id"])
         return False
\ No newline at end of file